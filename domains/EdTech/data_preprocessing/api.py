@@ -12,6 +12,7 @@ from data_preprocessing.data_processing import (
     process_docx,
     process_images_in_batch
 )
+from shared.platform_client.telemetry import setup_telemetry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +23,7 @@ app = FastAPI(
     description="API for text and document preprocessing operations",
     version="1.0.0"
 )
+setup_telemetry(app, "data_preprocessing")
 
 
 @app.post("/api/extract_text_from_file_and_analyze_images")
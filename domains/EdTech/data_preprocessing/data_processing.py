@@ -13,6 +13,7 @@ from fastapi import UploadFile
 from typing import List, Dict, Tuple
 
 from shared.platform_client.service_client import analyze_image
+from shared.platform_client.telemetry import stage, traced
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -156,6 +157,7 @@ def clean_text(text: str) -> str:
     return re.sub(r'\s+', ' ', text).strip()
 
 
+@traced("extract.image_analysis")
 async def process_images_in_batch(
     images_data: List[Tuple[int, bytes]],
     batch_size: int = 5
@@ -219,6 +221,7 @@ async def process_images_in_batch(
 
 
 
+@traced("extract.pdf")
 async def process_pdf(pdf_file: UploadFile) -> Dict[str, str]:
     """
     Process PDF file extracting text and images while preserving their original sequence.
@@ -239,24 +242,25 @@ async def process_pdf(pdf_file: UploadFile) -> Dict[str, str]:
     # Start image analysis from page 7
     image_analysis_start_page = 6  # Pages are zero-indexed, so page 7 is index 6
 
-    for page_num in range(doc.page_count):
-        page = doc[page_num]
-        
-        # Extract text using custom method for better block extraction
-        page_text = extract_and_clean_text_from_page(page)
-        if page_text:
-            final_elements.append((page_num + 1, 'text', page_text))
-        
-        # Extract images from page, only analyze images starting from page 7
-        if page_num >= image_analysis_start_page:
-            for img_index, img in enumerate(page.get_images(full=True)):
-                try:
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    images_data.append((page_num + 1, image_bytes))
-                except Exception as e:
-                    logger.error(f"Failed to extract image on page {page_num + 1}: {e}")
+    with stage("extract.pdf_parse", pages=doc.page_count):
+        for page_num in range(doc.page_count):
+            page = doc[page_num]
+
+            # Extract text using custom method for better block extraction
+            page_text = extract_and_clean_text_from_page(page)
+            if page_text:
+                final_elements.append((page_num + 1, 'text', page_text))
+
+            # Extract images from page, only analyze images starting from page 7
+            if page_num >= image_analysis_start_page:
+                for img_index, img in enumerate(page.get_images(full=True)):
+                    try:
+                        xref = img[0]
+                        base_image = doc.extract_image(xref)
+                        image_bytes = base_image["image"]
+                        images_data.append((page_num + 1, image_bytes))
+                    except Exception as e:
+                        logger.error(f"Failed to extract image on page {page_num + 1}: {e}")
 
     # Process images in batches
     image_analyses = await process_images_in_batch(images_data) if images_data else {}
@@ -285,6 +289,7 @@ async def process_pdf(pdf_file: UploadFile) -> Dict[str, str]:
 
     return {"text_and_image_analysis": "\n".join(combined_text).strip()}
 
+@traced("extract.docx")
 async def process_docx(docx_file: UploadFile):
     """
     Process a DOCX file with batch image processing, handling both embedded and external images.
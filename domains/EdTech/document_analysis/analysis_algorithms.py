@@ -37,6 +37,7 @@ import logging
 from document_analysis.spanda_types import CancellationToken, QueryRequestThesisAndRubric
 
 from shared.platform_client.service_client import stream_llm, invoke_llm
+from shared.platform_client.telemetry import traced
 from shared.config.model_configs import ModelType
 
 from fastapi import WebSocket
@@ -73,6 +74,7 @@ class DocumentAnalyzer:
             self.mark_connection_closed()
             return False
 
+    @traced("analysis.criterion")
     async def process_criterion(self, 
                               websocket: WebSocket, 
                               criterion: str, 
@@ -154,6 +156,7 @@ class DocumentAnalyzer:
                 })
             return 0, ""
 
+    @traced("analysis.document")
     async def process_Document(self, websocket: WebSocket, request: QueryRequestThesisAndRubric, streaming: bool = True):
         """Process the entire Document analysis"""
         context = {
@@ -237,6 +240,7 @@ DO NOT SCORE THE DOCUMENT, YOU ARE TO PROVIDE ONLY DETAILED ANALYSIS, AND NO SCO
         
         return prompt
 
+    @traced("analysis.scoring")
     async def _calculate_score(self, 
                              analysis: str, 
                              criterion: str, 
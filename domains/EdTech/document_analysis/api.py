@@ -2,11 +2,13 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 
 from document_analysis import analysis_algorithms
 from document_analysis.spanda_types import QueryRequestThesisAndRubric
+from shared.platform_client.telemetry import setup_telemetry
 
 import uvicorn
 import asyncio
 
 app = FastAPI()
+setup_telemetry(app, "document_analysis")
 
 @app.websocket("/api/ws/document_analysis")
 async def websocket_document(websocket: WebSocket):
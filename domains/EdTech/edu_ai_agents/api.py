@@ -5,6 +5,7 @@ import uvicorn
 
 from edu_ai_agents.spanda_types import *
 from edu_ai_agents.business_logic import summarize_and_analyze_agent, process_initial_agents, process_chunks_in_batch, scoring_agent, extract_degree_agent, extract_name_agent, extract_topic_agent
+from shared.platform_client.telemetry import setup_telemetry
 
 from dotenv import load_dotenv
 
@@ -18,6 +19,7 @@ logger = logging.getLogger(__name__)
 app = FastAPI(title="Dissertation Analysis API",
              description="API for analyzing and processing dissertations",
              version="1.0.0")
+setup_telemetry(app, "edu_ai_agents")
 
 
 
@@ -3,6 +3,7 @@ import logging
 from dotenv import load_dotenv
 from shared.config.model_configs import ModelType
 from shared.platform_client.service_client import invoke_llm
+from shared.platform_client.telemetry import traced
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 import os
 from typing import List, Dict
@@ -28,6 +29,7 @@ ollama_model_for_image = os.getenv("OLLAMA_MODEL_FOR_IMAGE")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@traced("agents.chunk_summarization")
 async def process_chunks_in_batch(chunks: List[str], system_prompt: str, batch_size: int = 5) -> List[str]:
     """
     Process text chunks in batches for summarization.
@@ -106,6 +108,7 @@ async def process_chunks_in_batch(chunks: List[str], system_prompt: str, batch_s
     
     return summarized_chunks
 
+@traced("agents.summary")
 async def summarize_and_analyze_agent(thesis: str) -> str:
     """
     Summarize and analyze a thesis document.
@@ -148,6 +151,7 @@ async def summarize_and_analyze_agent(thesis: str) -> str:
     
     return final_summary
 
+@traced("agents.extract_name")
 async def extract_name_agent(dissertation):
     
     dissertation_first_pages = get_first_n_words(dissertation, 300)
@@ -191,6 +195,7 @@ Name should be returned exactly as written in the text. If there is no name avai
     return name 
 
 
+@traced("agents.extract_topic")
 async def extract_topic_agent(dissertation):
     
     dissertation_first_pages = get_first_n_words(dissertation, 300)
@@ -236,6 +241,7 @@ Topic should be returned exactly as written in the text. If there is no topic av
     return topic 
 
 
+@traced("agents.extract_degree")
 async def extract_degree_agent(dissertation):
     
     dissertation_first_pages = get_first_n_words(dissertation, 300)
@@ -277,6 +283,7 @@ Degree should be returned exactly as written in the text. If there is no degree
     
     return degree 
 
+@traced("agents.scoring")
 async def scoring_agent(analysis, criteria, score_guidelines, criteria_guidelines, feedback):
     scoring_agent_system_prompt = """You are a precise scoring agent that evaluates one dissertation criterion at a time. 
     Review the provided criterion analysis, match it to the scoring guidelines, and assign a score from 0 to 5, without justification, solely use the analysis for your justification. 
@@ -311,6 +318,7 @@ spanda_score: <score (out of 5)>"""
 
 
 
+@traced("agents.initial")
 async def process_initial_agents(thesis_text: str) -> Dict[str, str]:
     """
     Process the initial set of agents concurrently in a batch.
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+from typing import Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
+import uvicorn
+
+from job_queue.store import CANCELLED, COMPLETED, TERMINAL_EVENTS, TERMINAL_STATUSES, JobStore
+from shared.platform_client.telemetry import setup_telemetry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+
+def _parse_json(name: str, value: Optional[str]):
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"{name} is not valid JSON: {e}")
+
+
+def create_app(store: JobStore) -> FastAPI:
+    app = FastAPI(title="Dissertation Jobs API",
+                  description="Queue dissertation analyses and follow their progress",
+                  version="1.0.0")
+    setup_telemetry(app, "job_queue")
+
+    async def get_job_or_404(job_id: str) -> dict:
+        job = await store.get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        return job
+
+    @app.post("/api/jobs")
+    async def create_job(
+        rubric: str = Form(...),
+        feedback: Optional[str] = Form(None),
+        document: Optional[str] = Form(None),
+        pre_analysis: Optional[str] = Form(None),
+        file: Optional[UploadFile] = File(None),
+    ):
+        """Queue a dissertation for analysis, from a PDF/DOCX file, its text or its pre-analysis."""
+        inputs = {"rubric": _parse_json("rubric", rubric), "feedback": feedback}
+        content = None
+        if pre_analysis is not None:
+            inputs["pre_analysis"] = _parse_json("pre_analysis", pre_analysis)
+        elif document is not None:
+            inputs["document"] = document
+        elif file is not None:
+            if not file.filename.endswith((".pdf", ".docx")):
+                raise HTTPException(status_code=400, detail="Unsupported file type.")
+            inputs["filename"] = file.filename
+            content = await file.read()
+        else:
+            raise HTTPException(status_code=400, detail="One of file, document or pre_analysis is required")
+
+        job_id = await store.create_job(inputs, content)
+        logger.info(f"Queued job {job_id}")
+        return {"job_id": job_id, "status": "queued"}
+
+    @app.get("/api/jobs/{job_id}")
+    async def get_job(job_id: str):
+        job = await get_job_or_404(job_id)
+        job.pop("inputs")
+        return job
+
+    @app.get("/api/jobs/{job_id}/result")
+    async def get_result(job_id: str):
+        job = await get_job_or_404(job_id)
+        if job["status"] != COMPLETED:
+            raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']}")
+        return job["result"]
+
+    @app.delete("/api/jobs/{job_id}")
+    async def cancel_job(job_id: str):
+        job = await get_job_or_404(job_id)
+        if job["status"] in TERMINAL_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Job {job_id} is already {job['status']}")
+        # The worker stops at the next stage or criterion.
+        await store.update(job_id, status=CANCELLED)
+        await store.add_event(job_id, "job_cancelled", {})
+        return {"job_id": job_id, "status": CANCELLED}
+
+    @app.websocket("/api/ws/jobs/{job_id}")
+    async def job_events(websocket: WebSocket, job_id: str, last_event_id: str = "0"):
+        """Stream the progress events of a job.
+
+        Each event carries its id; a client reconnecting with the id of the
+        last event it got as `last_event_id` receives the events it missed.
+        The connection is closed after the job completes, fails or is cancelled.
+        """
+        await websocket.accept()
+        connected = True
+        try:
+            if await store.get_job(job_id) is None:
+                await websocket.send_json({"type": "error", "data": {"message": f"Job {job_id} not found"}})
+                return
+            while True:
+                events = await store.read_events(job_id, last_event_id, block_ms=15000)
+                for event_id, event in events:
+                    await websocket.send_json({"id": event_id, **event})
+                    last_event_id = event_id
+                    if event["type"] in TERMINAL_EVENTS:
+                        return
+                if not events and await store.status(job_id) in TERMINAL_STATUSES:
+                    # The terminal event was trimmed away or expired.
+                    return
+        except WebSocketDisconnect:
+            # The job goes on, the client can reconnect.
+            logger.info(f"Client of job {job_id} disconnected")
+            connected = False
+        finally:
+            if connected:
+                await websocket.close()
+
+    @app.get("/api/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    return app
+
+
+def main():
+    import redis.asyncio as redis
+
+    app = create_app(JobStore(redis.Redis.from_url(REDIS_URL, decode_responses=True)))
+    uvicorn.run(app, host="0.0.0.0", port=9006)
+
+
+if __name__ == "__main__":
+    main()
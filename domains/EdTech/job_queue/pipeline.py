@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Dict
+
+import aiohttp
+
+from job_queue.store import CANCELLED, COMPLETED, RUNNING, TERMINAL_STATUSES, JobStore
+from shared.platform_client.telemetry import stage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATA_PREPROCESSING_URL = os.getenv("DATA_PREPROCESSING_URL", "http://data_preprocessing:9001")
+EDU_AI_AGENTS_URL = os.getenv("EDU_AI_AGENTS_URL", "http://edu_ai_agents:9002")
+DOCUMENT_ANALYSIS_URL = os.getenv("DOCUMENT_ANALYSIS_URL", "http://document_analysis:9000")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class StageError(Exception):
+    pass
+
+
+class PipelineClient:
+    """Calls the services that do the work of each stage."""
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+
+    async def _json(self, response) -> Any:
+        if response.status != 200:
+            raise StageError(f"HTTP {response.status}: {(await response.text())[:500]}")
+        return await response.json()
+
+    async def extract(self, filename: str, content: bytes) -> str:
+        form = aiohttp.FormData()
+        form.add_field("file", content, filename=filename)
+        url = f"{DATA_PREPROCESSING_URL}/api/extract_text_from_file_and_analyze_images"
+        async with self.session.post(url, data=form) as response:
+            return (await self._json(response))["text_and_image_analysis"]
+
+    async def pre_analyze(self, document: str) -> Dict[str, str]:
+        url = f"{EDU_AI_AGENTS_URL}/api/pre_analyze"
+        async with self.session.post(url, json={"document": document}) as response:
+            return await self._json(response)
+
+    async def analyze(self, pre_analysis: dict, rubric: dict, feedback: str) -> AsyncIterator[dict]:
+        url = f"{DOCUMENT_ANALYSIS_URL.replace('http', 'ws', 1)}/api/ws/document_analysis"
+        async with self.session.ws_connect(url, max_msg_size=0) as ws:
+            await ws.send_json({"pre_analysis": pre_analysis, "rubric": rubric, "feedback": feedback})
+            async for message in ws:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    yield json.loads(message.data)
+                elif message.type == aiohttp.WSMsgType.ERROR:
+                    raise StageError(f"WebSocket error: {ws.exception()}")
+
+
+async def _check_cancelled(store: JobStore, job_id: str):
+    if await store.status(job_id) == CANCELLED:
+        raise JobCancelled(job_id)
+
+
+async def _run_stage(store: JobStore, job_id: str, name: str, func, *args) -> Any:
+    """Run a stage unless it has a checkpoint from an earlier attempt."""
+    result = await store.get_checkpoint(job_id, name)
+    if result is not None:
+        return result
+    await _check_cancelled(store, job_id)
+    await store.update(job_id, stage=name)
+    await store.add_event(job_id, "stage_start", {"stage": name})
+    with stage(f"jobs.{name}"):
+        result = await func(*args)
+    await store.set_checkpoint(job_id, name, result)
+    await store.add_event(job_id, "stage_complete", {"stage": name})
+    return result
+
+
+async def _analyze(store: JobStore, client: PipelineClient, job_id: str, pre_analysis: dict,
+                   rubric: dict, feedback: str) -> Dict[str, dict]:
+    """Analyze the criteria not analyzed yet, checkpointing each one as it completes."""
+    evaluations = await store.get_checkpoint(job_id, "analyze") or {}
+    remaining = {criterion: explanation for criterion, explanation in rubric.items()
+                 if criterion not in evaluations}
+    if not remaining:
+        return evaluations
+
+    await store.update(job_id, stage="analyze")
+    await store.add_event(job_id, "stage_start", {"stage": "analyze", "remaining": list(remaining)})
+    messages = client.analyze(pre_analysis, remaining, feedback)
+    with stage("jobs.analyze", criteria=len(remaining)):
+        try:
+            async for message in messages:
+                kind = message.get("type")
+                data = message.get("data") or {}
+                if kind in ("criterion_start", "analysis_chunk", "criterion_complete"):
+                    await store.add_event(job_id, kind, data)
+                if kind == "criterion_start":
+                    await _check_cancelled(store, job_id)
+                elif kind == "criterion_complete":
+                    evaluations[data["criterion"]] = {"feedback": data.get("full_analysis", ""),
+                                                      "score": data.get("score", 0)}
+                    await store.set_checkpoint(job_id, "analyze", evaluations)
+                elif kind == "error":
+                    raise StageError(data.get("message", "Analysis failed"))
+                elif kind == "complete":
+                    break
+        finally:
+            await messages.aclose()
+    missing = set(rubric) - set(evaluations)
+    if missing:
+        raise StageError(f"Analysis ended without the criteria {sorted(missing)}")
+    await store.add_event(job_id, "stage_complete", {"stage": "analyze"})
+    return evaluations
+
+
+async def run_job(store: JobStore, client: PipelineClient, job_id: str):
+    """Run the stages of a job: extract -> pre_analyze -> analyze.
+
+    Every stage, and every criterion of the analysis, is checkpointed, so a
+    job taken over after a failure or a dead worker resumes where it stopped.
+    Inputs can skip stages: a `document` skips the extraction, a
+    `pre_analysis` the pre-analysis.
+    """
+    job = await store.get_job(job_id)
+    if job is None or job["status"] in TERMINAL_STATUSES:
+        return
+    inputs = job["inputs"]
+    await store.update(job_id, status=RUNNING)
+
+    async def extract():
+        return await client.extract(inputs.get("filename", "document.pdf"), await store.get_file(job_id))
+
+    document = inputs.get("document")
+    if document is None and inputs.get("pre_analysis") is None:
+        document = await _run_stage(store, job_id, "extract", extract)
+    pre_analysis = inputs.get("pre_analysis")
+    if pre_analysis is None:
+        pre_analysis = await _run_stage(store, job_id, "pre_analyze", client.pre_analyze, document)
+
+    rubric = inputs["rubric"]
+    evaluations = await _analyze(store, client, job_id, pre_analysis, rubric, inputs.get("feedback"))
+
+    result = {
+        "criteria_evaluations": {criterion: evaluations[criterion] for criterion in rubric},
+        "total_score": sum(evaluations[criterion]["score"] for criterion in rubric),
+        **{k: v for k, v in pre_analysis.items() if k != "pre_analyzed_summary"},
+    }
+    await _check_cancelled(store, job_id)
+    await store.update(job_id, status=COMPLETED, stage="", result=result)
+    await store.add_event(job_id, "job_complete", result)
+    logger.info(f"Job {job_id} completed")
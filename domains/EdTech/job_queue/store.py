@@ -0,0 +1,155 @@
+import base64
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+JOB_QUEUE_PREFIX = os.getenv("JOB_QUEUE_PREFIX", "spanda:jobs")
+# Jobs, their checkpoints, events and results expire this long after their last update.
+JOB_TTL_S = int(os.getenv("JOB_TTL_S", str(7 * 24 * 3600)))
+# Progress events kept per job; analysis chunks are many, the oldest go first.
+JOB_EVENTS_MAXLEN = int(os.getenv("JOB_EVENTS_MAXLEN", "20000"))
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATUSES = (COMPLETED, FAILED, CANCELLED)
+TERMINAL_EVENTS = ("job_complete", "job_failed", "job_cancelled")
+
+WORKER_GROUP = "workers"
+
+
+class JobStore:
+    """Jobs of the dissertation pipeline, kept in Redis.
+
+    The queue is a Redis stream read by the workers through one consumer
+    group, so that each job goes to one worker, and a job whose worker died
+    is claimed by another one once it has been idle for a while. Each job has
+    a hash with its status and inputs, a hash of stage checkpoints, and a
+    stream of progress events that clients replay from the last event they
+    saw when they reconnect.
+    """
+
+    def __init__(self, redis, prefix: str = JOB_QUEUE_PREFIX, ttl_s: int = JOB_TTL_S,
+                 events_maxlen: int = JOB_EVENTS_MAXLEN):
+        # A redis.asyncio client created with decode_responses=True.
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl_s = ttl_s
+        self.events_maxlen = events_maxlen
+        self.queue = f"{prefix}:queue"
+
+    def _key(self, job_id: str, part: str = "") -> str:
+        return f"{self.prefix}:{job_id}{':' + part if part else ''}"
+
+    async def _touch(self, job_id: str):
+        for part in ("", "checkpoints", "events", "file"):
+            await self.redis.expire(self._key(job_id, part), self.ttl_s)
+
+    async def ensure_group(self):
+        try:
+            await self.redis.xgroup_create(self.queue, WORKER_GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def create_job(self, inputs: Dict[str, Any], file: Optional[bytes] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        await self.redis.hset(self._key(job_id), mapping={
+            "id": job_id,
+            "status": QUEUED,
+            "stage": "",
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+            "inputs": json.dumps(inputs),
+        })
+        if file is not None:
+            await self.redis.set(self._key(job_id, "file"), base64.b64encode(file).decode())
+        await self.add_event(job_id, "job_queued", {"job_id": job_id})
+        await self._touch(job_id)
+        await self.enqueue(job_id)
+        return job_id
+
+    async def enqueue(self, job_id: str):
+        await self.redis.xadd(self.queue, {"job_id": job_id})
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await self.redis.hgetall(self._key(job_id))
+        if not job:
+            return None
+        job["inputs"] = json.loads(job["inputs"])
+        job["result"] = json.loads(job["result"]) if "result" in job else None
+        job["attempts"] = int(job["attempts"])
+        for field in ("created_at", "updated_at"):
+            job[field] = float(job[field])
+        return job
+
+    async def get_file(self, job_id: str) -> Optional[bytes]:
+        data = await self.redis.get(self._key(job_id, "file"))
+        return base64.b64decode(data) if data is not None else None
+
+    async def update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        await self.redis.hset(self._key(job_id), mapping=fields)
+        await self._touch(job_id)
+
+    async def status(self, job_id: str) -> Optional[str]:
+        return await self.redis.hget(self._key(job_id), "status")
+
+    async def add_attempt(self, job_id: str) -> int:
+        return await self.redis.hincrby(self._key(job_id), "attempts", 1)
+
+    async def get_checkpoint(self, job_id: str, stage: str) -> Any:
+        value = await self.redis.hget(self._key(job_id, "checkpoints"), stage)
+        return json.loads(value) if value is not None else None
+
+    async def set_checkpoint(self, job_id: str, stage: str, value: Any):
+        await self.redis.hset(self._key(job_id, "checkpoints"), stage, json.dumps(value))
+
+    async def add_event(self, job_id: str, event_type: str, data: Optional[dict] = None) -> str:
+        event = {"type": event_type, "data": data or {}, "time": time.time()}
+        return await self.redis.xadd(self._key(job_id, "events"), {"event": json.dumps(event)},
+                                     maxlen=self.events_maxlen, approximate=True)
+
+    async def read_events(self, job_id: str, last_id: str = "0", block_ms: Optional[int] = None,
+                          count: int = 500) -> List[Tuple[str, dict]]:
+        """Events after `last_id`, waiting up to `block_ms` for one if there are none."""
+        response = await self.redis.xread({self._key(job_id, "events"): last_id},
+                                          count=count, block=block_ms)
+        if not response:
+            return []
+        _, entries = response[0]
+        return [(event_id, json.loads(fields["event"])) for event_id, fields in entries]
+
+    async def claim(self, consumer: str, count: int, block_ms: int,
+                    idle_ms: int) -> List[Tuple[str, str]]:
+        """Take up to `count` (message id, job id) off the queue.
+
+        Messages left unacknowledged for `idle_ms` by a worker that died are
+        taken over first, then new ones are read.
+        """
+        _, entries, *_ = await self.redis.xautoclaim(self.queue, WORKER_GROUP, consumer,
+                                                     min_idle_time=idle_ms, count=count)
+        claimed = [(message_id, fields["job_id"]) for message_id, fields in entries if fields]
+        if len(claimed) < count:
+            response = await self.redis.xreadgroup(WORKER_GROUP, consumer, {self.queue: ">"},
+                                                   count=count - len(claimed), block=block_ms)
+            for _, stream_entries in response or []:
+                claimed.extend((message_id, fields["job_id"]) for message_id, fields in stream_entries)
+        return claimed
+
+    async def keep_claimed(self, consumer: str, message_id: str):
+        """Reset the idle time of a message still being worked on."""
+        await self.redis.xclaim(self.queue, WORKER_GROUP, consumer, min_idle_time=0,
+                                message_ids=[message_id], justid=True)
+
+    async def ack(self, message_id: str):
+        await self.redis.xack(self.queue, WORKER_GROUP, message_id)
+        await self.redis.xdel(self.queue, message_id)
@@ -0,0 +1,179 @@
+import asyncio
+
+import fakeredis
+
+from job_queue.pipeline import StageError, run_job
+from job_queue.store import CANCELLED, COMPLETED, FAILED, JobStore
+from job_queue.worker import Worker
+
+RUBRIC = {"Clarity": {"criteria_explanation": "..."}, "Depth": {"criteria_explanation": "..."}}
+PRE_ANALYSIS = {"degree": "M.Tech", "name": "A", "topic": "B", "pre_analyzed_summary": "C"}
+
+
+class FakePipelineClient:
+    """Answers like the services, and can fail after some criteria."""
+
+    def __init__(self, fail_after_criteria=None):
+        self.fail_after_criteria = fail_after_criteria
+        self.calls = []
+
+    async def extract(self, filename, content):
+        self.calls.append(("extract", filename, content))
+        return "the text"
+
+    async def pre_analyze(self, document):
+        self.calls.append(("pre_analyze", document))
+        return PRE_ANALYSIS
+
+    async def analyze(self, pre_analysis, rubric, feedback):
+        self.calls.append(("analyze", list(rubric)))
+        for i, criterion in enumerate(rubric):
+            if self.fail_after_criteria is not None and i >= self.fail_after_criteria:
+                raise StageError("connection lost")
+            yield {"type": "criterion_start", "data": {"criterion": criterion}}
+            yield {"type": "analysis_chunk", "data": {"criterion": criterion, "chunk": "good"}}
+            yield {"type": "criterion_complete",
+                   "data": {"criterion": criterion, "score": 3, "full_analysis": "good"}}
+        yield {"type": "complete", "data": {}}
+
+
+class BlockingPipelineClient(FakePipelineClient):
+    """Never finishes the pre-analysis, until its task is cancelled."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = asyncio.Event()
+
+    async def pre_analyze(self, document):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+def make_store() -> JobStore:
+    return JobStore(fakeredis.FakeAsyncRedis(decode_responses=True), prefix="test:jobs")
+
+
+def test_job_runs_all_stages():
+    async def run():
+        store = make_store()
+        await store.ensure_group()
+        client = FakePipelineClient()
+        job_id = await store.create_job({"rubric": RUBRIC, "filename": "t.pdf"}, b"%PDF")
+        await run_job(store, client, job_id)
+        return store, client, job_id, await store.get_job(job_id), await store.read_events(job_id)
+
+    store, client, job_id, job, events = asyncio.run(run())
+    assert client.calls == [("extract", "t.pdf", b"%PDF"), ("pre_analyze", "the text"),
+                            ("analyze", ["Clarity", "Depth"])]
+    assert job["status"] == COMPLETED
+    assert job["result"]["total_score"] == 6
+    assert job["result"]["criteria_evaluations"]["Depth"] == {"feedback": "good", "score": 3}
+    assert job["result"]["topic"] == "B" and "pre_analyzed_summary" not in job["result"]
+
+    types = [event["type"] for _, event in events]
+    assert types[0] == "job_queued" and types[-1] == "job_complete"
+    assert types.count("criterion_complete") == 2
+    assert ["stage_start", "stage_complete"] == types[1:3]
+
+
+def test_job_resumes_from_checkpoints():
+    async def run():
+        store = make_store()
+        job_id = await store.create_job({"rubric": RUBRIC, "document": "given text"})
+        failing = FakePipelineClient(fail_after_criteria=1)
+        try:
+            await run_job(store, failing, job_id)
+        except StageError:
+            pass
+        resumed = FakePipelineClient()
+        await run_job(store, resumed, job_id)
+        return failing, resumed, await store.get_job(job_id)
+
+    failing, resumed, job = asyncio.run(run())
+    assert failing.calls == [("pre_analyze", "given text"), ("analyze", ["Clarity", "Depth"])]
+    # Neither the pre-analysis nor the first criterion run again.
+    assert resumed.calls == [("analyze", ["Depth"])]
+    assert job["status"] == COMPLETED
+    assert job["result"]["total_score"] == 6
+
+
+def test_replay_events_after_reconnect():
+    async def run():
+        store = make_store()
+        job_id = await store.create_job({"rubric": RUBRIC, "pre_analysis": PRE_ANALYSIS})
+        first = await store.read_events(job_id)
+        await run_job(store, FakePipelineClient(), job_id)
+        return first, await store.read_events(job_id, last_id=first[-1][0])
+
+    first, missed = asyncio.run(run())
+    assert [event["type"] for _, event in first] == ["job_queued"]
+    assert missed[0][1]["type"] == "stage_start"
+    assert missed[-1][1]["type"] == "job_complete"
+
+
+def test_worker_retries_then_fails():
+    async def run():
+        store = make_store()
+        await store.ensure_group()
+        job_id = await store.create_job({"rubric": RUBRIC, "pre_analysis": PRE_ANALYSIS})
+        worker = Worker(store, FakePipelineClient(fail_after_criteria=0), "w1",
+                        max_attempts=2, block_ms=10)
+        for _ in range(2):
+            assert await worker.run_once() == 1
+            await asyncio.gather(*worker.tasks)
+        return store, job_id, await store.get_job(job_id)
+
+    store, job_id, job = asyncio.run(run())
+    assert job["status"] == FAILED
+    assert job["attempts"] == 2
+    assert "connection lost" in job["error"]
+
+
+def test_dead_worker_job_is_claimed_by_another():
+    async def run():
+        store = make_store()
+        await store.ensure_group()
+        job_id = await store.create_job({"rubric": RUBRIC, "pre_analysis": PRE_ANALYSIS})
+        # The first worker takes the job and dies without acknowledging it.
+        assert await store.claim("dead", 1, block_ms=10, idle_ms=60000) != []
+        assert await store.claim("alive", 1, block_ms=10, idle_ms=60000) == []
+        worker = Worker(store, FakePipelineClient(), "alive", claim_idle_ms=0, block_ms=10)
+        assert await worker.run_once() == 1
+        await asyncio.gather(*worker.tasks)
+        return await store.get_job(job_id), await store.claim("alive", 1, block_ms=10, idle_ms=0)
+
+    job, left = asyncio.run(run())
+    assert job["status"] == COMPLETED
+    assert left == []
+
+
+def test_cancelled_worker_leaves_job_pending():
+    async def run():
+        store = make_store()
+        await store.ensure_group()
+        job_id = await store.create_job({"rubric": RUBRIC, "document": "the text"})
+        client = BlockingPipelineClient()
+        worker = Worker(store, client, "stopping", block_ms=10)
+        assert await worker.run_once() == 1
+        await client.started.wait()
+        (task, ) = worker.tasks
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return job_id, await store.claim("other", 1, block_ms=10, idle_ms=0)
+
+    job_id, claimed = asyncio.run(run())
+    assert [claimed_job_id for _, claimed_job_id in claimed] == [job_id]
+
+
+def test_cancelled_job_is_skipped():
+    async def run():
+        store = make_store()
+        job_id = await store.create_job({"rubric": RUBRIC, "pre_analysis": PRE_ANALYSIS})
+        await store.update(job_id, status=CANCELLED)
+        client = FakePipelineClient()
+        await run_job(store, client, job_id)
+        return client, await store.get_job(job_id)
+
+    client, job = asyncio.run(run())
+    assert client.calls == []
+    assert job["status"] == CANCELLED
@@ -0,0 +1,111 @@
+"""
+Worker of the dissertation job queue, run as many times as the GPUs can keep up with:
+
+    python -m job_queue.worker
+"""
+import asyncio
+import logging
+import os
+import socket
+
+import aiohttp
+
+from job_queue.pipeline import JobCancelled, PipelineClient, run_job
+from job_queue.store import CANCELLED, FAILED, JobStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+# Jobs run at the same time by one worker.
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+# A job whose worker hasn't shown signs of life for this long is taken over by another worker.
+JOB_CLAIM_IDLE_MS = int(os.getenv("JOB_CLAIM_IDLE_MS", "60000"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+class Worker:
+    """Takes jobs off the queue and runs them, a bounded number at a time.
+
+    A job is acknowledged once it has completed, failed for good or been
+    cancelled. While it runs, the worker keeps its claim alive; if the
+    worker dies, another one claims the job after JOB_CLAIM_IDLE_MS and
+    resumes it from its checkpoints.
+    """
+
+    def __init__(self, store: JobStore, client: PipelineClient, consumer: str,
+                 concurrency: int = JOB_WORKER_CONCURRENCY, claim_idle_ms: int = JOB_CLAIM_IDLE_MS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, block_ms: int = 5000):
+        self.store = store
+        self.client = client
+        self.consumer = consumer
+        self.concurrency = concurrency
+        self.claim_idle_ms = claim_idle_ms
+        self.max_attempts = max_attempts
+        self.block_ms = block_ms
+        self.tasks = set()
+        self.stopped = False
+
+    async def _keep_claimed(self, message_id: str):
+        while True:
+            await asyncio.sleep(self.claim_idle_ms / 3000)
+            await self.store.keep_claimed(self.consumer, message_id)
+
+    async def process(self, message_id: str, job_id: str):
+        heartbeat = asyncio.create_task(self._keep_claimed(message_id))
+        try:
+            await run_job(self.store, self.client, job_id)
+        except JobCancelled:
+            # The API already recorded the cancellation.
+            logger.info(f"Job {job_id} cancelled")
+        except Exception as e:
+            attempts = await self.store.add_attempt(job_id)
+            if attempts < self.max_attempts and await self.store.status(job_id) != CANCELLED:
+                # Runs again from its last checkpoint.
+                logger.warning(f"Job {job_id} failed (attempt {attempts}), retrying: {e}")
+                await self.store.add_event(job_id, "job_retry", {"attempt": attempts, "message": str(e)})
+                await self.store.enqueue(job_id)
+            else:
+                logger.error(f"Job {job_id} failed: {e}")
+                await self.store.update(job_id, status=FAILED, error=str(e))
+                await self.store.add_event(job_id, "job_failed", {"message": str(e)})
+        finally:
+            heartbeat.cancel()
+        # Not reached when the worker is cancelled mid-job, so that the job
+        # stays pending and another worker claims it.
+        await self.store.ack(message_id)
+
+    async def run_once(self) -> int:
+        """Start the jobs there is room for, and return how many were started."""
+        free = self.concurrency - len(self.tasks)
+        if free <= 0:
+            await asyncio.wait(self.tasks, return_when=asyncio.FIRST_COMPLETED)
+            return 0
+        claimed = await self.store.claim(self.consumer, free, self.block_ms, self.claim_idle_ms)
+        for message_id, job_id in claimed:
+            task = asyncio.create_task(self.process(message_id, job_id))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        return len(claimed)
+
+    async def run(self):
+        await self.store.ensure_group()
+        logger.info(f"Worker {self.consumer} running {self.concurrency} jobs at a time")
+        while not self.stopped:
+            await self.run_once()
+        if self.tasks:
+            await asyncio.wait(self.tasks)
+
+
+async def main():
+    import redis.asyncio as redis
+
+    store = JobStore(redis.Redis.from_url(REDIS_URL, decode_responses=True))
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=900)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        worker = Worker(store, PipelineClient(session), f"{socket.gethostname()}-{os.getpid()}")
+        await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+import json
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+from mock_llm.simulator import MockLLM, MockLLMConfig, count_tokens
+
+
+def _chat_prompt(messages: List[dict]) -> Tuple[str, int]:
+    """The text of the messages, and the number of images in them."""
+    parts = []
+    num_images = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    parts.append(part.get("text", ""))
+                elif part.get("type") in ("image_url", "input_image", "image"):
+                    num_images += 1
+        else:
+            parts.append(content)
+        num_images += len(message.get("images") or [])
+    return "\n".join(parts), num_images
+
+
+def _error(llm: MockLLM) -> JSONResponse:
+    return JSONResponse(
+        status_code=llm.config.error_status,
+        content={"error": {"message": "Injected error", "type": "mock_error",
+                           "code": llm.config.error_status}},
+    )
+
+
+def create_app(config: Optional[MockLLMConfig] = None) -> FastAPI:
+    app = FastAPI()
+    llm = MockLLM(config or MockLLMConfig.from_env())
+    app.state.llm = llm
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/metrics")
+    def metrics():
+        return {
+            "active_requests": llm.active,
+            "requests_total": llm.requests_total,
+            "errors_total": llm.errors_total,
+            "tokens_total": llm.tokens_total,
+        }
+
+    @app.get("/v1/models")
+    def models():
+        return {"object": "list",
+                "data": [{"id": "mock", "object": "model", "owned_by": "mock_llm"}]}
+
+    @app.get("/api/tags")
+    def tags():
+        return {"models": [{"name": "mock", "model": "mock"}]}
+
+    async def openai_completion(body: dict, prompt: str, num_images: int, chat: bool):
+        if llm.should_fail():
+            return _error(llm)
+        model = body.get("model", "mock")
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        tokens = llm.render(prompt, max_tokens)
+        completion_id = f"{'chatcmpl' if chat else 'cmpl'}-{uuid.uuid4().hex}"
+        created = int(time.time())
+        obj = "chat.completion" if chat else "text_completion"
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": len(tokens),
+                 "total_tokens": count_tokens(prompt) + len(tokens)}
+
+        def choice(text: Optional[str], finish_reason: Optional[str], delta: bool) -> dict:
+            if not chat:
+                return {"index": 0, "text": text or "", "finish_reason": finish_reason}
+            message = {} if text is None else {"content": text}
+            if not delta:
+                message["role"] = "assistant"
+            return {"index": 0, "finish_reason": finish_reason,
+                    ("delta" if delta else "message"): message}
+
+        finish_reason = "length" if max_tokens is not None and len(tokens) >= max_tokens else "stop"
+        if not body.get("stream"):
+            text = "".join([token async for token in llm.generate(prompt, tokens, num_images)])
+            return {"id": completion_id, "object": obj, "created": created, "model": model,
+                    "choices": [choice(text, finish_reason, delta=False)], "usage": usage}
+
+        cut = llm.should_cut_stream()
+
+        async def stream():
+            def chunk(data: dict) -> str:
+                return f"data: {json.dumps({'id': completion_id, 'object': obj + '.chunk', 'created': created, 'model': model, **data})}\n\n"
+
+            if chat:
+                yield chunk({"choices": [{"index": 0, "delta": {"role": "assistant"},
+                                          "finish_reason": None}]})
+            async for token in llm.generate(prompt, tokens, num_images, cut=cut):
+                yield chunk({"choices": [choice(token, None, delta=True)]})
+            yield chunk({"choices": [choice(None, finish_reason, delta=True)]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk({"choices": [], "usage": usage})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt, num_images = _chat_prompt(body.get("messages", []))
+        return await openai_completion(body, prompt, num_images, chat=True)
+
+    @app.post("/v1/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        if isinstance(prompt, list):
+            prompt = "\n".join(map(str, prompt))
+        return await openai_completion(body, prompt, 0, chat=False)
+
+    async def ollama_response(body: dict, prompt: str, num_images: int, chat: bool):
+        if llm.should_fail():
+            return JSONResponse(status_code=llm.config.error_status,
+                                content={"error": "Injected error"})
+        model = body.get("model", "mock")
+        options = body.get("options") or {}
+        tokens = llm.render(prompt, options.get("num_predict"))
+
+        def message(text: str, done: bool) -> dict:
+            data = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "done": done}
+            if chat:
+                data["message"] = {"role": "assistant", "content": text}
+            else:
+                data["response"] = text
+            if done:
+                data.update({"done_reason": "stop", "prompt_eval_count": count_tokens(prompt),
+                             "eval_count": len(tokens)})
+            return data
+
+        # Ollama streams unless "stream" is false.
+        if body.get("stream") is False:
+            text = "".join([token async for token in llm.generate(prompt, tokens, num_images)])
+            return message(text, done=True)
+
+        cut = llm.should_cut_stream()
+
+        async def stream():
+            async for token in llm.generate(prompt, tokens, num_images, cut=cut):
+                yield json.dumps(message(token, done=False)) + "\n"
+            yield json.dumps(message("", done=True)) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/api/generate")
+    async def ollama_generate(request: Request):
+        body = await request.json()
+        prompt = f"{body.get('system', '')}\n{body.get('prompt', '')}"
+        return await ollama_response(body, prompt, len(body.get("images") or []), chat=False)
+
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request):
+        body = await request.json()
+        prompt, num_images = _chat_prompt(body.get("messages", []))
+        return await ollama_response(body, prompt, num_images, chat=True)
+
+    return app
+
+
+app = create_app()
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=9010)
@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+from dataclasses import dataclass, field, fields
+from typing import AsyncGenerator, List, Optional
+
+
+@dataclass
+class MockLLMConfig:
+    """Behaviour of the mock inference server, read from MOCK_LLM_* environment variables."""
+    # Time to first token, plus the prefill time of the prompt and images.
+    ttft_ms: float = 200.0
+    prefill_ms_per_token: float = 0.0
+    prefill_ms_per_image: float = 100.0
+    # Decode speed of one stream when it runs alone.
+    tokens_per_s: float = 50.0
+    # Each other request in flight slows the decode down by this fraction,
+    # like a batched GPU server: 0.02 halves the speed at 51 concurrent requests.
+    concurrency_slowdown: float = 0.02
+    # Requests beyond this many in flight wait for a slot, like vLLM's max_num_seqs.
+    max_concurrency: int = 256
+    # Fraction of the requests failing with error_status, and of the streams
+    # cut after half of their tokens.
+    error_rate: float = 0.0
+    error_status: int = 500
+    stream_error_rate: float = 0.0
+    # Default length of the canned outputs, in tokens.
+    output_tokens: int = 128
+    # JSON file of [{"match": regex, "response": text}], the first rule whose
+    # regex matches the prompt gives the output.
+    responses_file: str = ""
+    seed: int = 0
+    responses: List[dict] = field(default_factory=list)
+
+    @classmethod
+    def from_env(cls) -> "MockLLMConfig":
+        kwargs = {}
+        for f in fields(cls):
+            value = os.getenv(f"MOCK_LLM_{f.name.upper()}")
+            if value is None or f.name == "responses":
+                continue
+            kwargs[f.name] = type(f.default)(value)
+        config = cls(**kwargs)
+        if config.responses_file:
+            with open(config.responses_file, "r") as responses_file:
+                config.responses = json.load(responses_file)
+        return config
+
+
+FILLER = ("The submission presents a clear argument supported by relevant evidence and "
+          "a coherent structure , although some sections would benefit from deeper "
+          "analysis and more precise references to the literature .").split()
+
+
+def _digest(seed: int, text: str) -> int:
+    return int.from_bytes(hashlib.sha256(f"{seed}:{text}".encode()).digest()[:8], "big")
+
+
+def count_tokens(text: str) -> int:
+    # About four characters per token, no tokenizer needed.
+    return max(1, len(text) // 4)
+
+
+class MockLLM:
+    """Generates deterministic canned outputs with the timing of a real server.
+
+    The output only depends on the prompt and the seed, so that two runs of a
+    benchmark see the same responses. Prompts asking for a `spanda_score:`
+    get an analysis followed by a valid score line.
+    """
+
+    def __init__(self, config: MockLLMConfig):
+        self.config = config
+        self.active = 0
+        self.slots = asyncio.Semaphore(config.max_concurrency)
+        self.errors = random.Random(config.seed)
+        self.requests_total = 0
+        self.errors_total = 0
+        self.tokens_total = 0
+
+    def render(self, prompt: str, max_tokens: Optional[int] = None) -> List[str]:
+        """The output of the prompt, split into tokens."""
+        for rule in self.config.responses:
+            if re.search(rule["match"], prompt):
+                text = rule["response"]
+                break
+        else:
+            digest = _digest(self.config.seed, prompt)
+            num_words = self.config.output_tokens
+            start = digest % len(FILLER)
+            words = [FILLER[(start + i) % len(FILLER)] for i in range(num_words)]
+            text = " ".join(words)
+            if "spanda_score" in prompt:
+                text += f"\nspanda_score: {digest % 5 + 1}"
+        tokens = re.findall(r"\s*\S+", text)
+        if max_tokens is not None:
+            tokens = tokens[:max_tokens]
+        return tokens
+
+    def should_fail(self) -> bool:
+        self.requests_total += 1
+        if self.errors.random() < self.config.error_rate:
+            self.errors_total += 1
+            return True
+        return False
+
+    def should_cut_stream(self) -> bool:
+        return self.errors.random() < self.config.stream_error_rate
+
+    def ttft_s(self, prompt: str, num_images: int) -> float:
+        return (self.config.ttft_ms
+                + self.config.prefill_ms_per_token * count_tokens(prompt)
+                + self.config.prefill_ms_per_image * num_images) / 1000
+
+    def token_interval_s(self) -> float:
+        slowdown = 1 + self.config.concurrency_slowdown * max(0, self.active - 1)
+        return slowdown / self.config.tokens_per_s
+
+    async def generate(self, prompt: str, tokens: List[str], num_images: int = 0,
+                       cut: bool = False) -> AsyncGenerator[str, None]:
+        """Yield the tokens at the configured speed."""
+        async with self.slots:
+            self.active += 1
+            try:
+                await asyncio.sleep(self.ttft_s(prompt, num_images))
+                for i, token in enumerate(tokens):
+                    if cut and i >= len(tokens) // 2:
+                        raise ConnectionError("Injected stream error")
+                    if i > 0:
+                        await asyncio.sleep(self.token_interval_s())
+                    self.tokens_total += 1
+                    yield token
+            finally:
+                self.active -= 1
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import re
+import time
+
+from fastapi.testclient import TestClient
+
+from mock_llm.api import create_app
+from mock_llm.simulator import MockLLM, MockLLMConfig
+
+SCORE_PROMPT = "Required output format.\nspanda_score: <score (out of 5)>"
+
+
+def fast_config(**kwargs) -> MockLLMConfig:
+    return MockLLMConfig(ttft_ms=0, tokens_per_s=10000, **kwargs)
+
+
+def test_outputs_are_deterministic():
+    llm = MockLLM(MockLLMConfig(output_tokens=20))
+    assert llm.render("prompt a") == MockLLM(MockLLMConfig(output_tokens=20)).render("prompt a")
+    assert len(llm.render("prompt a")) == 20
+    assert len(llm.render("prompt a", max_tokens=5)) == 5
+
+    text = "".join(llm.render(SCORE_PROMPT))
+    score = re.search(r"spanda_score\s*:\s*(\d+)", text)
+    assert score is not None and 1 <= int(score.group(1)) <= 5
+
+
+def test_canned_responses():
+    llm = MockLLM(MockLLMConfig(responses=[{"match": "true/false", "response": "True. False."}]))
+    assert "".join(llm.render("Generate true/false questions")) == "True. False."
+
+
+def test_timing_and_concurrency_slowdown():
+    config = MockLLMConfig(ttft_ms=50, tokens_per_s=100, concurrency_slowdown=1.0)
+    llm = MockLLM(config)
+
+    async def run(num_requests):
+        async def one():
+            return [token async for token in llm.generate("p", ["a"] * 5)]
+        start = time.monotonic()
+        await asyncio.gather(*(one() for _ in range(num_requests)))
+        return time.monotonic() - start
+
+    # 50 ms to the first token, then 4 tokens at 10 ms.
+    alone = asyncio.run(run(1))
+    assert 0.08 <= alone < 0.2
+    # Two concurrent requests decode at half the speed.
+    assert asyncio.run(run(2)) > alone + 0.03
+
+
+def test_chat_completions():
+    client = TestClient(create_app(fast_config(output_tokens=10)))
+    body = {"model": "m", "messages": [
+        {"role": "system", "content": "You grade theses."},
+        {"role": "user", "content": [
+            {"type": "text", "text": SCORE_PROMPT},
+            {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}},
+        ]},
+    ]}
+
+    response = client.post("/v1/chat/completions", json=body)
+    assert response.status_code == 200
+    content = response.json()["choices"][0]["message"]["content"]
+    assert "spanda_score:" in content
+
+    with client.stream("POST", "/v1/chat/completions", json={**body, "stream": True}) as response:
+        lines = [line for line in response.iter_lines() if line]
+    assert lines[-1] == "data: [DONE]"
+    chunks = [json.loads(line[len("data: "):]) for line in lines[:-1]]
+    assert "".join(c["choices"][0]["delta"].get("content", "") for c in chunks) == content
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+
+def test_ollama_generate():
+    client = TestClient(create_app(fast_config(output_tokens=10)))
+    body = {"model": "llama3.2", "prompt": SCORE_PROMPT, "images": ["AAAA"], "stream": False}
+
+    response = client.post("/api/generate", json=body)
+    assert response.status_code == 200
+    assert response.json()["done"] is True
+    text = response.json()["response"]
+
+    with client.stream("POST", "/api/generate", json={**body, "stream": True}) as response:
+        messages = [json.loads(line) for line in response.iter_lines() if line]
+    assert "".join(m["response"] for m in messages) == text
+    assert messages[-1]["done"] is True
+
+
+def test_error_injection():
+    client = TestClient(create_app(fast_config(error_rate=1.0, error_status=503)))
+    response = client.post("/v1/chat/completions", json={"messages": []})
+    assert response.status_code == 503
+    assert client.get("/metrics").json()["errors_total"] == 1
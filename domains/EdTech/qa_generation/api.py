@@ -1,20 +1,26 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
 import uvicorn
+import asyncio
+import json
 import random
 import os
 from typing import List
 
 from qa_generation.spanda_types import QueryRequest, QuestionRequest
 from qa_generation.rag_configs import RagConfigForGeneration, RagConfigForIngestion, credentials_default, credentials_ingest
+from qa_generation.ingestion import create_ingested_files, ingest_files
+from qa_generation.relevance import context_cache
 from qa_generation.utils import process_context, generate_essay_questions, generate_fill_blank_questions, generate_multiple_choice_questions, generate_short_answer_questions, generate_true_false_questions, distractor_generation_agent, correct_statement_agent, tag_spanda_question
-from shared.platform_client.rag_client import send_file_to_verba
 from shared.config.rag_types import QueryPayload
+from shared.platform_client.telemetry import setup_telemetry
 
 app = FastAPI()
+setup_telemetry(app, "qa_generation")
 MAX_FILE_SIZE = 10000 * 1024 * 1024
+ingested_files = create_ingested_files()
 
 VERBA_URL = os.getenv("VERBA_URL", "http://localhost:8000")  # Default if not set
 VERBA_API_ENDPOINT = f"{VERBA_URL}/api/import_file"
@@ -171,39 +177,54 @@ async def spanda_answers_generation(question_request: QuestionRequest):
         }
 
 @app.post("/api/ingest_files/")
-async def ingest_files(
+async def spanda_ingest_files(
     courseid: str = Form(...),
     files: List[UploadFile] = File(...),
 ):
     """
     Endpoint to ingest multiple files and send them to Verba API.
     """
-    credentials = credentials_ingest["credentials"]
+    results = await ingest_files(
+        files, courseid, credentials_ingest["credentials"], RagConfigForIngestion["rag_config"],
+        ingested_files, MAX_FILE_SIZE,
+    )
+    # The new files can change what is retrieved for the course.
+    context_cache.invalidate([courseid])
+    return {"results": results}
 
-    rag_config = RagConfigForIngestion["rag_config"]
 
-    results = []
-    for file in files:
+@app.post("/api/ingest_files/stream")
+async def spanda_ingest_files_stream(
+    courseid: str = Form(...),
+    files: List[UploadFile] = File(...),
+):
+    """
+    Same as /api/ingest_files/, streaming newline-delimited JSON: the
+    progress of each file ({"status": "uploading", "sent", "total"} chunks),
+    its result when it is done, and finally {"results": [...]}.
+    """
+    events = asyncio.Queue()
+
+    async def ingest():
         try:
-            file_bytes = await file.read()
-
-            if len(file_bytes) > MAX_FILE_SIZE:
-                results.append({
-                    "filename": file.filename,
-                    "status": "failed",
-                    "error": "File size exceeds the allowed limit (100 MB).",
-                })
-                continue
-
-            # Send file to Verba API
-            result = await send_file_to_verba(
-                file_bytes, file.filename, credentials, rag_config, labels=[courseid]
+            return await ingest_files(
+                files, courseid, credentials_ingest["credentials"], RagConfigForIngestion["rag_config"],
+                ingested_files, MAX_FILE_SIZE, on_event=events.put,
             )
-            results.append(result)
+        finally:
+            context_cache.invalidate([courseid])
+            await events.put(None)
+
+    async def stream():
+        task = asyncio.create_task(ingest())
+        while (event := await events.get()) is not None:
+            yield json.dumps(event) + "\n"
+        try:
+            yield json.dumps({"results": await task}) + "\n"
         except Exception as e:
-            results.append({"filename": file.filename, "status": "error", "error": str(e)})
+            yield json.dumps({"error": str(e)}) + "\n"
 
-    return {"results": results}
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 # Main function to start the FastAPI server
 def main():
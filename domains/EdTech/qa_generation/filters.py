@@ -3,12 +3,14 @@ from dotenv import load_dotenv
 
 from shared.config.model_configs import ModelType
 from shared.platform_client.service_client import invoke_llm
+from shared.platform_client.telemetry import traced
 
 # Load environment variables from .env file
 load_dotenv()
 
 verba_url = os.getenv("VERBA_URL")
 
+@traced("qa.response_relevance_filter")
 async def response_relevance_filter(query: str, response: str) -> str:
     evaluate_system_prompt = """You are given a query and a response. Determine if the response is relevant, irrelevant, or highly irrelevant to the query. Only respond with "Relevant", "Irrelevant", or "Highly Irrelevant"."""
 
@@ -31,6 +33,7 @@ async def response_relevance_filter(query: str, response: str) -> str:
     return response
 
 
+@traced("qa.context_relevance_filter")
 async def context_relevance_filter(query: str, context: str) -> str:
     evaluate_system_prompt = (
         """You are an AI responsible for assessing whether the provided content is relevant to a specific query. Carefully analyze the content and determine if it directly addresses or provides pertinent information related to the query. Only respond with "YES" if the content is relevant, or "NO" if it is not. Do not provide any explanations, scores, or additional text—just a single word: "YES" or "NO"."""
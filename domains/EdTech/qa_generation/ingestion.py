@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional
+
+import aiohttp
+from dotenv import load_dotenv
+
+from shared.platform_client.rag_client import file_sha256, send_file_to_verba
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Files sent to Verba at the same time by one request.
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+# Where the hashes of the ingested files are kept; in memory if unset.
+REDIS_URL = os.getenv("REDIS_URL")
+INGESTED_FILES_PREFIX = os.getenv("INGESTED_FILES_PREFIX", "spanda:ingested")
+
+UPLOADING = "uploading"
+
+
+class IngestedFiles:
+    """
+    Content hashes of the files ingested for each course label.
+
+    They are kept in Redis when a client is given, so that they are shared
+    by the replicas and survive restarts, else in memory.
+    """
+
+    def __init__(self, redis=None, prefix: str = INGESTED_FILES_PREFIX):
+        self.redis = redis
+        self.prefix = prefix
+        self._hashes = {}
+
+    async def contains(self, label: str, digest: str) -> bool:
+        if self.redis is not None:
+            return bool(await self.redis.sismember(f"{self.prefix}:{label}", digest))
+        return digest in self._hashes.get(label, set())
+
+    async def add(self, label: str, digest: str):
+        if self.redis is not None:
+            await self.redis.sadd(f"{self.prefix}:{label}", digest)
+        else:
+            self._hashes.setdefault(label, set()).add(digest)
+
+
+def create_ingested_files() -> IngestedFiles:
+    if REDIS_URL:
+        import redis.asyncio as redis
+        return IngestedFiles(redis.Redis.from_url(REDIS_URL, decode_responses=True))
+    return IngestedFiles()
+
+
+async def ingest_files(
+    files: list,
+    courseid: str,
+    credentials: dict,
+    rag_config: dict,
+    ingested: IngestedFiles,
+    max_file_size: int,
+    on_event: Optional[Callable[[dict], Awaitable[None]]] = None,
+    concurrency: int = INGEST_CONCURRENCY,
+) -> List[dict]:
+    """
+    Send files to Verba, `concurrency` at a time, and return their results in order.
+
+    Files whose content was already ingested for the course are skipped.
+    `on_event` is awaited with the progress of each file, then its result.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    seen = set()
+
+    async def emit(event: dict):
+        if on_event is not None:
+            await on_event(event)
+
+    async def ingest(file) -> dict:
+        async with semaphore:
+            if file.size is not None and file.size > max_file_size:
+                return {
+                    "filename": file.filename,
+                    "status": "failed",
+                    "error": "File size exceeds the allowed limit (100 MB).",
+                }
+            digest = await file_sha256(file)
+            if digest in seen:
+                return {"filename": file.filename, "status": "skipped", "reason": "Duplicate of another file"}
+            seen.add(digest)
+            if await ingested.contains(courseid, digest):
+                return {"filename": file.filename, "status": "skipped", "reason": "Already ingested for this course"}
+
+            async def progress(sent: int, total: int):
+                await emit({"filename": file.filename, "status": UPLOADING, "sent": sent, "total": total})
+
+            result = await send_file_to_verba(
+                file, file.filename, credentials, rag_config, labels=[courseid],
+                session=session, on_progress=progress,
+            )
+            if result["status"] == "success":
+                await ingested.add(courseid, digest)
+            else:
+                seen.discard(digest)
+            return result
+
+    async def ingest_and_report(file) -> dict:
+        try:
+            result = await ingest(file)
+        except Exception as e:
+            logger.error(f"Ingestion of {file.filename} failed: {e}")
+            result = {"filename": file.filename, "status": "error", "error": str(e)}
+        await emit(result)
+        return result
+
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(*(ingest_and_report(file) for file in files))
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+from qa_generation.filters import context_relevance_filter
+from shared.platform_client.telemetry import stage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+ollama_url = os.getenv("OLLAMA_URL")
+embedder = os.getenv("EMBEDDER", "SentenceTransformers")
+embedding_model = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# Contexts whose best passage is at least this similar to the query are kept, and those
+# below QA_RELEVANCE_LOW are dropped, without asking the LLM. Only the band in between
+# goes to the LLM filter. The defaults suit all-MiniLM-L6-v2; tune them for other models.
+QA_RELEVANCE_LOW = float(os.getenv("QA_RELEVANCE_LOW", "0.2"))
+QA_RELEVANCE_HIGH = float(os.getenv("QA_RELEVANCE_HIGH", "0.5"))
+# "0" always asks the LLM, as before.
+QA_RELEVANCE_GATE = os.getenv("QA_RELEVANCE_GATE", "1") != "0"
+# Words per passage the context is split into before it is compared to the query.
+QA_RELEVANCE_PASSAGE_WORDS = int(os.getenv("QA_RELEVANCE_PASSAGE_WORDS", "200"))
+QA_CONTEXT_CACHE_TTL_S = float(os.getenv("QA_CONTEXT_CACHE_TTL_S", "900"))
+QA_CONTEXT_CACHE_SIZE = int(os.getenv("QA_CONTEXT_CACHE_SIZE", "512"))
+
+_sentence_transformer = None
+
+
+def _load_sentence_transformer():
+    global _sentence_transformer
+    if _sentence_transformer is None:
+        from sentence_transformers import SentenceTransformer
+        _sentence_transformer = SentenceTransformer(embedding_model)
+    return _sentence_transformer
+
+
+async def embed(texts: List[str]) -> Optional[np.ndarray]:
+    """
+    Embed texts with the embedder Verba indexes with, or return None if it isn't available here.
+    """
+    try:
+        if embedder == "Ollama":
+            async with httpx.AsyncClient(timeout=60) as client:
+                response = await client.post(f"{ollama_url}/api/embed",
+                                             json={"model": embedding_model, "input": texts})
+                response.raise_for_status()
+                return np.asarray(response.json()["embeddings"], dtype=np.float32)
+        model = await asyncio.to_thread(_load_sentence_transformer)
+        return await asyncio.to_thread(model.encode, texts, convert_to_numpy=True)
+    except Exception as e:
+        logger.warning(f"Embedding with {embedder} failed, relevance goes to the LLM: {e}")
+        return None
+
+
+def split_passages(text: str, words_per_passage: int = QA_RELEVANCE_PASSAGE_WORDS) -> List[str]:
+    words = text.split()
+    return [" ".join(words[i:i + words_per_passage]) for i in range(0, len(words), words_per_passage)]
+
+
+async def relevance_score(query: str, context: str) -> Optional[float]:
+    """
+    Cosine similarity between the query and the passage of the context closest to it.
+    """
+    passages = split_passages(context)
+    if not passages:
+        return 0.0
+    vectors = await embed([query] + passages)
+    if vectors is None:
+        return None
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return float(np.max(vectors[1:] @ vectors[0]))
+
+
+async def filter_context(query: str, context: str) -> str:
+    """
+    Keep the context if it is relevant to the query, else return " " like context_relevance_filter.
+
+    An embedding similarity decides the clear cases; the LLM is only asked
+    about the contexts in the uncertain band.
+    """
+    if not context.strip():
+        return " "
+    if not QA_RELEVANCE_GATE:
+        return await context_relevance_filter(query, context)
+
+    with stage("qa.relevance_gate") as span:
+        score = await relevance_score(query, context)
+        if score is None:
+            decision = "llm"
+        elif score >= QA_RELEVANCE_HIGH:
+            decision = "relevant"
+        elif score < QA_RELEVANCE_LOW:
+            decision = "irrelevant"
+        else:
+            decision = "llm"
+        span.set_attribute("decision", decision)
+        if score is not None:
+            span.set_attribute("score", score)
+
+    if decision == "relevant":
+        return context
+    if decision == "irrelevant":
+        return " "
+    return await context_relevance_filter(query, context)
+
+
+def normalize_topic(topic: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", topic.lower())).strip()
+
+
+def context_cache_key(context_payload: Dict[str, Any]) -> str:
+    """
+    Key of the retrieved context of a query: its course labels, its normalized topic and the RAG config.
+    """
+    rag_config_hash = hashlib.sha256(
+        json.dumps([context_payload.get("RAG"), context_payload.get("credentials")], sort_keys=True).encode()
+    ).hexdigest()
+    key = json.dumps([
+        sorted(context_payload.get("labels") or []),
+        sorted(context_payload.get("documentFilter") or [], key=lambda d: json.dumps(d, sort_keys=True)),
+        normalize_topic(context_payload["query"]),
+        rag_config_hash,
+    ])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ContextCache:
+    """
+    Retrieved and filtered contexts, kept QA_CONTEXT_CACHE_TTL_S, least recently used evicted first.
+    """
+
+    def __init__(self, ttl_s: float = QA_CONTEXT_CACHE_TTL_S, max_size: int = QA_CONTEXT_CACHE_SIZE):
+        self.ttl_s = ttl_s
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any], labels: Optional[List[str]] = None):
+        if self.ttl_s <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_s, set(labels or []), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, labels: List[str]):
+        """
+        Drop the contexts that files ingested with these labels could change:
+        those of queries on these labels, and of queries on all labels.
+        """
+        labels = set(labels)
+        for key, (_, entry_labels, _) in list(self._entries.items()):
+            if not entry_labels or entry_labels & labels:
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+context_cache = ContextCache()
@@ -0,0 +1,62 @@
+import asyncio
+import base64
+import json
+
+from qa_generation import ingestion
+from qa_generation.ingestion import IngestedFiles, ingest_files
+from shared.platform_client.rag_client import BytesFile, _file_config_chunks
+
+
+class FakeUpload(BytesFile):
+    def __init__(self, filename: str, data: bytes):
+        super().__init__(data)
+        self.filename = filename
+        self.size = len(data)
+
+
+def test_file_config_is_sent_in_fixed_size_chunks():
+    data = bytes(range(256)) * 41
+    file_data = {"fileID": "notes.pdf", "labels": ["BIO101"]}
+
+    async def collect():
+        return [chunk async for chunk in _file_config_chunks(BytesFile(data), file_data, len(data), 1000)]
+
+    chunks = asyncio.run(collect())
+    assert [order for order, _, _ in chunks] == list(range(len(chunks)))
+    assert {total for _, total, _ in chunks} == {len(chunks)}
+    assert all(len(chunk) == 1000 for _, _, chunk in chunks[:-1])
+    file_config = json.loads("".join(chunk for _, _, chunk in chunks))
+    assert base64.b64decode(file_config["content"]) == data
+    assert file_config["labels"] == ["BIO101"]
+
+
+def test_ingest_skips_files_already_ingested_for_the_course(monkeypatch):
+    sent = []
+
+    async def fake_send(file, filename, credentials, rag_config, labels=[], session=None, on_progress=None):
+        sent.append((filename, labels))
+        await on_progress(1, 1)
+        return {"filename": filename, "status": "success", "response": ""}
+
+    monkeypatch.setattr(ingestion, "send_file_to_verba", fake_send)
+    ingested = IngestedFiles()
+
+    async def run(filenames_and_data, courseid):
+        events = []
+
+        async def on_event(event):
+            events.append(event)
+
+        files = [FakeUpload(name, data) for name, data in filenames_and_data]
+        return await ingest_files(files, courseid, {}, {}, ingested, 1 << 20, on_event=on_event), events
+
+    results, events = asyncio.run(run([("a.pdf", b"aaa"), ("copy.pdf", b"aaa"), ("b.pdf", b"bbb")], "BIO101"))
+    assert [r["status"] for r in results] == ["success", "skipped", "success"]
+    assert {"filename": "a.pdf", "status": "uploading", "sent": 1, "total": 1} in events
+    assert len([e for e in events if e["status"] != "uploading"]) == 3
+
+    results, _ = asyncio.run(run([("a-renamed.pdf", b"aaa")], "BIO101"))
+    assert results[0]["status"] == "skipped"
+    results, _ = asyncio.run(run([("a.pdf", b"aaa")], "CHEM101"))
+    assert results[0]["status"] == "success"
+    assert sent == [("a.pdf", ["BIO101"]), ("b.pdf", ["BIO101"]), ("a.pdf", ["CHEM101"])]
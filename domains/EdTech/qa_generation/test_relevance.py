@@ -0,0 +1,67 @@
+import asyncio
+
+import numpy as np
+
+from qa_generation import relevance
+from qa_generation.relevance import ContextCache, context_cache_key, filter_context
+
+PAYLOAD = {"query": "Photosynthesis in plants", "RAG": {"Embedder": {"selected": "Ollama"}},
+           "labels": ["BIO101"], "documentFilter": [], "credentials": {"url": ""}}
+
+
+def test_gate_decides_clear_cases_and_escalates_the_rest(monkeypatch):
+    llm_calls = []
+
+    async def fake_llm_filter(query, context):
+        llm_calls.append(context)
+        return context
+
+    async def fake_embed(texts):
+        # The query, then one passage whose similarity to it is given by its text.
+        similarity = float(texts[1])
+        return np.array([[1.0, 0.0], [similarity, np.sqrt(1 - similarity ** 2)]])
+
+    monkeypatch.setattr(relevance, "context_relevance_filter", fake_llm_filter)
+    monkeypatch.setattr(relevance, "embed", fake_embed)
+
+    assert asyncio.run(filter_context("q", "0.9")) == "0.9"
+    assert asyncio.run(filter_context("q", "0.05")) == " "
+    assert llm_calls == []
+    assert asyncio.run(filter_context("q", "0.3")) == "0.3"
+    assert llm_calls == ["0.3"]
+    assert asyncio.run(filter_context("q", "   ")) == " "
+    assert llm_calls == ["0.3"]
+
+
+def test_gate_falls_back_to_llm_without_embedder(monkeypatch):
+    async def fake_llm_filter(query, context):
+        return " "
+
+    async def no_embed(texts):
+        return None
+
+    monkeypatch.setattr(relevance, "context_relevance_filter", fake_llm_filter)
+    monkeypatch.setattr(relevance, "embed", no_embed)
+    assert asyncio.run(filter_context("q", "some context")) == " "
+
+
+def test_cache_key_normalizes_topic_and_depends_on_labels_and_config():
+    key = context_cache_key(PAYLOAD)
+    assert context_cache_key({**PAYLOAD, "query": "  photosynthesis IN plants? "}) == key
+    assert context_cache_key({**PAYLOAD, "labels": ["CHEM101"]}) != key
+    assert context_cache_key({**PAYLOAD, "RAG": {"Embedder": {"selected": "OpenAI"}}}) != key
+
+
+def test_cache_expires_and_invalidates_by_label(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(relevance.time, "monotonic", lambda: now[0])
+    cache = ContextCache(ttl_s=10, max_size=2)
+    cache.set("bio", {"v": 1}, ["BIO101"])
+    cache.set("all", {"v": 2}, [])
+    cache.set("chem", {"v": 3}, ["CHEM101"])
+    assert cache.get("bio") is None  # evicted, least recently used
+    cache.invalidate(["BIO101"])
+    assert cache.get("all") is None  # queries on all labels see the new files too
+    assert cache.get("chem") == {"v": 3}
+    now[0] = 11
+    assert cache.get("chem") is None
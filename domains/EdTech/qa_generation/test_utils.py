@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from qa_generation import utils
+from qa_generation.relevance import ContextCache
+
+PAYLOAD = {"query": "photosynthesis", "labels": ["BIO101"]}
+
+
+@pytest.fixture
+def retrievals(monkeypatch):
+    """Serves the queued retrieve responses and counts the calls."""
+    responses = []
+
+    async def fake_retrieve(payload):
+        return responses.pop(0)
+
+    async def keep_context(query, context):
+        return context
+
+    monkeypatch.setattr(utils, "context_cache", ContextCache(ttl_s=60, max_size=10))
+    monkeypatch.setattr(utils, "call_spanda_retrieve", fake_retrieve)
+    monkeypatch.setattr(utils, "filter_context", keep_context)
+    return responses
+
+
+@pytest.mark.parametrize("failed", [
+    {"error": "Verba is down", "context": "stale", "documents": []},
+    {"context": "   ", "documents": []},
+])
+def test_failed_or_empty_retrieval_is_not_cached(retrievals, failed):
+    retrievals.extend([failed, {"context": "Plants use light.", "documents": [{"title": "Biology"}]}])
+
+    asyncio.run(utils.process_context(PAYLOAD, None))
+    context = asyncio.run(utils.process_context(PAYLOAD, None))
+
+    assert context == {"filtered_context": "Plants use light.", "titles_string": "Biology"}
+    assert retrievals == []
+
+
+def test_retrieved_context_is_cached(retrievals):
+    retrievals.append({"context": "Plants use light.", "documents": []})
+
+    first = asyncio.run(utils.process_context(PAYLOAD, None))
+    second = asyncio.run(utils.process_context(PAYLOAD, "Chapter 2"))
+
+    assert first["filtered_context"] == "Plants use light."
+    assert second["filtered_context"] == "Plants use light. Chapter 2"
+    assert retrievals == []
@@ -1,28 +1,38 @@
 from typing import Dict, List, Optional
 import random
 
-from qa_generation.filters import context_relevance_filter
+from qa_generation.relevance import context_cache, context_cache_key, filter_context
 from shared.config.model_configs import ModelType
 from shared.platform_client.service_client import invoke_llm
 from qa_generation.spanda_types import QueryRequest
 from shared.platform_client.rag_client import call_spanda_retrieve
+from shared.platform_client.telemetry import traced
 
 
+@traced("qa.retrieval")
 async def process_context(context_payload: Dict, query_context: Optional[str]) -> Dict:
-    retrieve_response = await call_spanda_retrieve(context_payload)
-    retrieved_context = retrieve_response.get('context', '')
-    documents = retrieve_response.get('documents', [])
-
-    document_titles = [doc['title'] for doc in documents]
-    titles_string = ', '.join(document_titles) if documents else "No source documents"
-
-    filtered_context = await context_relevance_filter(context_payload["query"], retrieved_context)
-
+    cache_key = context_cache_key(context_payload)
+    cached = context_cache.get(cache_key)
+    if cached is None:
+        retrieve_response = await call_spanda_retrieve(context_payload)
+        retrieved_context = retrieve_response.get('context', '')
+        documents = retrieve_response.get('documents', [])
+
+        document_titles = [doc['title'] for doc in documents]
+        titles_string = ', '.join(document_titles) if documents else "No source documents"
+
+        filtered_context = await filter_context(context_payload["query"], retrieved_context)
+        cached = {"filtered_context": filtered_context, "titles_string": titles_string}
+        # A failed or empty retrieval is retried by the next request instead of being served from the cache.
+        if not retrieve_response.get("error") and retrieved_context.strip():
+            context_cache.set(cache_key, cached, context_payload.get("labels"))
+
+    filtered_context = cached["filtered_context"]
     final_combined_context = f"{filtered_context.strip()} {query_context.strip()}" if query_context else filtered_context.strip()
 
     return {
         "filtered_context": final_combined_context,
-        "titles_string": titles_string
+        "titles_string": cached["titles_string"]
     }
 
 
@@ -119,6 +129,7 @@ Reply with only 'Yes' or 'No'."""
     return 'Yes' if cleaned_result == 'yes' else 'No'
 
 
+@traced("qa.question_generation")
 async def question_generation_agent(query_request: QueryRequest, context: str, previous_questions: Optional[list] = None) -> Dict:
 
 
@@ -477,6 +488,7 @@ You provide minimal context - just enough to understand but leaving room for dis
     return result
 
 
+@traced("qa.correct_statement")
 async def  correct_statement_agent(type_of_question: str, question: str, context: str) -> Dict:
     """
     Enhanced Generic Answer Agent
@@ -687,6 +699,7 @@ Keep responses focused solely on content, eliminating any meta-text or markers t
     return result
 
 
+@traced("qa.distractor_generation")
 async def distractor_generation_agent(
     question: str,
     correct_answer: str,
@@ -7,6 +7,7 @@ import logging
 import uvicorn
 from pydantic import BaseModel
 import os
+from services.telemetry import setup_telemetry
 
 app = FastAPI(
     title="Graduate-Level Question Generator API",
@@ -15,6 +16,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url=None
 )
+setup_telemetry(app, "question_generation_from_images")
 
 # Add CORS middleware
 app.add_middleware(
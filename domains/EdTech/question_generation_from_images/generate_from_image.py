@@ -2,12 +2,14 @@ from typing import Dict, List, Optional, AsyncGenerator
 import logging
 from services.service_client import invoke_llm, analyze_image
 from services.model_configs import ModelType
+from services.telemetry import traced
 import json
 
 logger = logging.getLogger(__name__)
 
 # In your generate_from_image.py file, modify the stream_educational_questions function:
 
+@traced("image_questions.stream")
 async def stream_educational_questions(
     image_data: bytes,
     num_questions: int = 5,
@@ -139,6 +141,7 @@ async def stream_educational_questions(
         yield f"data: {json.dumps({'event': 'error', 'data': str(e)})}\n\n"
 
 
+@traced("image_questions.generate")
 async def generate_educational_questions(
     image_data: bytes,
     num_questions: int = 5,
@@ -5,6 +5,7 @@ from typing import AsyncGenerator, Optional, Dict, Any
 import base64
 from services.inference_client import invoke_llm_ollama, invoke_llm_vllm, stream_llm_ollama, stream_llm_vllm, analyze_image_ollama, analyze_image_vllm, generate_from_image, generate_from_image_ollama
 from services.model_configs import ModelType, EnvConfig, CancellationToken
+from services.telemetry import stage, traced
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,12 +38,18 @@ async def invoke_llm(
     if not model or not url:
         return {"error": f"No LLM service available for model type {model_type.value}"}
     
-    if config.is_vllm_available(model_type):
-        return await invoke_llm_vllm(system_prompt, user_prompt, model, url,)
-    else:
-        return await invoke_llm_ollama(system_prompt, user_prompt, model)
+    backend = "vllm" if config.is_vllm_available(model_type) else "ollama"
+    with stage("llm.invoke", model=model, backend=backend) as span:
+        if backend == "vllm":
+            result = await invoke_llm_vllm(system_prompt, user_prompt, model, url,)
+        else:
+            result = await invoke_llm_ollama(system_prompt, user_prompt, model)
+        if "error" in result:
+            span.fail(str(result["error"]))
+    return result
     
     
+@traced("llm.stream")
 async def stream_llm(
     system_prompt: str,
     user_prompt: str,
@@ -116,26 +123,28 @@ Provide detailed Analysis of the image without missing facts. Do not miss any te
 Your goal is to provide a description such that someone else can re-create the image.
         """
     
-    try:
-        # Prefer VLLM if available
-        if has_vllm:
-            logger.info("Using VLLM for image analysis")
-            return await analyze_image_vllm(
-                image_data=image_data,
-                prompt=prompt,
-                model=vllm_model_for_image,
-                base_url=vllm_url_for_image
-            )
-        else:
-            logger.info("Using Ollama for image analysis")
-            return await analyze_image_ollama(
-                image_data=image_data,
-                prompt=prompt
-            )
-            
-    except Exception as e:
-        logger.error(f"Error in analyze_image: {str(e)}")
-        return {"response": f"Failed to analyze image: {str(e)}"}
+    with stage("llm.image", backend="vllm" if has_vllm else "ollama") as span:
+        try:
+            # Prefer VLLM if available
+            if has_vllm:
+                logger.info("Using VLLM for image analysis")
+                return await analyze_image_vllm(
+                    image_data=image_data,
+                    prompt=prompt,
+                    model=vllm_model_for_image,
+                    base_url=vllm_url_for_image
+                )
+            else:
+                logger.info("Using Ollama for image analysis")
+                return await analyze_image_ollama(
+                    image_data=image_data,
+                    prompt=prompt
+                )
+
+        except Exception as e:
+            logger.error(f"Error in analyze_image: {str(e)}")
+            span.fail(str(e))
+            return {"response": f"Failed to analyze image: {str(e)}"}
 
 
 async def analyze_image_vllm(
@@ -0,0 +1,227 @@
+"""
+Tracing and metrics of the stages of a request across the EdTech services.
+
+Every stage (PDF parse, image analysis, chunk summarization, retrieval,
+relevance filter, criterion stream, scoring, LLM calls) is timed into the
+`spanda_stage_latency_seconds` Prometheus histogram and, when OpenTelemetry
+is installed, recorded as a span. The trace context is propagated to vLLM in
+the `traceparent` header, so that its spans join the trace of the request.
+
+Both libraries are optional: without them the helpers do nothing.
+
+Environment:
+    SPANDA_TRACING              0 disables the spans, the metrics stay on.
+    SPANDA_TRACE_SAMPLE_RATIO   Fraction of the traces recorded (default 1.0).
+                                0.01 is a low-overhead mode for production:
+                                the other requests get non-recording spans,
+                                and a sampled upstream trace is always kept.
+    OTEL_EXPORTER_OTLP_TRACES_ENDPOINT, OTEL_SERVICE_NAME and the other
+    standard OTEL_* variables configure the exporter.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:
+    trace = None
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+except ImportError:
+    Counter = Histogram = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("SPANDA_TRACING", "1") != "0"
+TRACE_SAMPLE_RATIO = float(os.getenv("SPANDA_TRACE_SAMPLE_RATIO", "1.0"))
+
+_service_name = os.getenv("OTEL_SERVICE_NAME", "edtech")
+_tracer = trace.get_tracer("spanda") if trace is not None and TRACING_ENABLED else None
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, value=1):
+        pass
+
+
+if Histogram is not None:
+    STAGE_LATENCY = Histogram(
+        "spanda_stage_latency_seconds",
+        "Latency of the stages of the requests",
+        ["service", "stage", "status"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+    )
+    LLM_TIME_TO_FIRST_TOKEN = Histogram(
+        "spanda_llm_time_to_first_token_seconds",
+        "Time to the first streamed chunk of the LLM calls",
+        ["service", "model"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+    )
+    LLM_TOKENS = Counter(
+        "spanda_llm_tokens",
+        "Prompt and completion tokens of the LLM calls",
+        ["service", "model", "kind"],
+    )
+else:
+    STAGE_LATENCY = LLM_TIME_TO_FIRST_TOKEN = LLM_TOKENS = _NoopMetric()
+
+
+class stage:
+    """Time a stage into the stage histogram and a span of the trace.
+
+        with stage("pdf.parse", pages=doc.page_count) as span:
+            ...
+            response = await client.post(url, json=payload, headers=span.headers())
+
+    In an async generator pass current=False: the span is then not made the
+    current one, which would leak into the consumer between two yields, and
+    the trace context is only propagated through `headers()`.
+    """
+
+    def __init__(self, name: str, current: bool = True, **attributes):
+        self.name = name
+        self.current = current
+        self.attributes = attributes
+        self.span = None
+        self.error: Optional[str] = None
+        self._token = None
+
+    def __enter__(self) -> "stage":
+        self.start = time.perf_counter()
+        if _tracer is not None:
+            self.span = _tracer.start_span(self.name, attributes=self.attributes)
+            if self.current:
+                self._token = otel_context.attach(trace.set_span_in_context(self.span))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and not isinstance(exc, (GeneratorExit, asyncio.CancelledError)):
+            self.error = self.error or str(exc) or exc_type.__name__
+        status = "error" if self.error else "ok"
+        STAGE_LATENCY.labels(_service_name, self.name, status).observe(time.perf_counter() - self.start)
+        if self.span is not None:
+            if exc is not None:
+                self.span.record_exception(exc)
+            if self.error:
+                self.span.set_status(Status(StatusCode.ERROR, self.error))
+            self.span.end()
+            if self._token is not None:
+                otel_context.detach(self._token)
+        return False
+
+    def set_attribute(self, key: str, value):
+        if self.span is not None and self.span.is_recording():
+            self.span.set_attribute(key, value)
+
+    def fail(self, message: str):
+        """Mark the stage as failed, for errors returned rather than raised."""
+        self.error = message
+
+    def headers(self, headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """The headers with the trace context of this stage added."""
+        headers = dict(headers or {})
+        if self.span is not None:
+            propagate.inject(headers, context=trace.set_span_in_context(self.span))
+        return headers
+
+
+def traced(name: str):
+    """Run every call of the decorated function in a `stage`."""
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def generator_wrapper(*args, **kwargs):
+                with stage(name, current=False):
+                    async for item in func(*args, **kwargs):
+                        yield item
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def coroutine_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return coroutine_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_first_token(model: str, elapsed: float):
+    LLM_TIME_TO_FIRST_TOKEN.labels(_service_name, model or "unknown").observe(elapsed)
+
+
+def record_tokens(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    if prompt_tokens:
+        LLM_TOKENS.labels(_service_name, model or "unknown", "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(_service_name, model or "unknown", "completion").inc(completion_tokens)
+
+
+def setup_telemetry(app, service_name: str):
+    """Configure the tracer and expose /metrics for one service.
+
+    Incoming requests continue the trace of their caller, from the
+    `traceparent` header, so that one trace covers the whole pipeline.
+    """
+    global _service_name
+    _service_name = os.getenv("OTEL_SERVICE_NAME", service_name)
+
+    if Histogram is not None:
+        from fastapi import Response
+
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    if _tracer is None:
+        return
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("opentelemetry-sdk is not installed, spans are not exported")
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": _service_name}),
+        sampler=ParentBased(TraceIdRatioBased(TRACE_SAMPLE_RATIO)),
+    )
+    if os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT") or os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health")
+    except ImportError:
+        @app.middleware("http")
+        async def continue_trace(request, call_next):
+            token = otel_context.attach(propagate.extract(dict(request.headers)))
+            try:
+                return await call_next(request)
+            finally:
+                otel_context.detach(token)
+    logger.info(f"Tracing {_service_name} with sample ratio {TRACE_SAMPLE_RATIO}")
@@ -20,7 +20,12 @@ setup(
         'Pillow==10.4.0',
         'requests==2.32.3',
         'python-dotenv',
-        'python-multipart'
+        'python-multipart',
+        'prometheus-client',
+        'opentelemetry-api',
+        'opentelemetry-sdk',
+        'opentelemetry-exporter-otlp',
+        'opentelemetry-instrumentation-fastapi',
     ],
     entry_points={
         'console_scripts': [
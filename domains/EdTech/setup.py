@@ -37,6 +37,13 @@ setup(
         'torch',
         'pandas',
         'tqdm',
+        'aiohttp',
+        'redis>=4.2',
+        'prometheus-client',
+        'opentelemetry-api',
+        'opentelemetry-sdk',
+        'opentelemetry-exporter-otlp',
+        'opentelemetry-instrumentation-fastapi',
     ],
     entry_points={
         'console_scripts': [
@@ -1,5 +1,6 @@
 import json
 import os
+import time
 import httpx
 from typing import AsyncGenerator, List, Dict, Any
 import aiohttp
@@ -7,6 +8,7 @@ import base64
 import logging
 from dotenv import load_dotenv
 from shared.config.model_configs import CancellationToken
+from shared.platform_client.telemetry import record_first_token, record_tokens, stage
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -63,26 +65,32 @@ async def invoke_llm_vllm(
         "stream": False  # Set stream to False for non-streaming
     }
     
-    try:
-        async with httpx.AsyncClient() as client:
-            # Use the provided VLLM URL
-            response = await client.post(vllm_url, json=payload, timeout=None)
-            
-            if response.status_code == 200:
-                response_data = json.loads(response.content)
-                ai_msg = response_data.get('choices', [{}])[0].get('message', {}).get('content', '')
-                return {"answer": ai_msg}
-            else:
-                print(f"Error: {response.status_code} - {response.text}")
-                return {"error": response.text}
-    
-    except httpx.TimeoutException:
-        print("Request timed out.")
-        return {"error": "Request timed out"}
-    
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
-        return {"error": str(e)}
+    with stage("llm.invoke", model=ollama_model, backend="vllm") as span:
+        try:
+            async with httpx.AsyncClient() as client:
+                # Use the provided VLLM URL
+                response = await client.post(vllm_url, json=payload, headers=span.headers(), timeout=None)
+
+                if response.status_code == 200:
+                    response_data = json.loads(response.content)
+                    usage = response_data.get('usage') or {}
+                    record_tokens(ollama_model, usage.get('prompt_tokens'), usage.get('completion_tokens'))
+                    ai_msg = response_data.get('choices', [{}])[0].get('message', {}).get('content', '')
+                    return {"answer": ai_msg}
+                else:
+                    print(f"Error: {response.status_code} - {response.text}")
+                    span.fail(f"HTTP {response.status_code}")
+                    return {"error": response.text}
+
+        except httpx.TimeoutException:
+            print("Request timed out.")
+            span.fail("Request timed out")
+            return {"error": "Request timed out"}
+
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+            span.fail(str(e))
+            return {"error": str(e)}
     
 
 async def stream_llm_vllm(
@@ -108,37 +116,48 @@ async def stream_llm_vllm(
         "top_p": top_p,
         "top_k": top_k,
         "seed": seed,
-        "stream": True
+        "stream": True,
+        # The last chunk then carries the token counts.
+        "stream_options": {"include_usage": True}
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            async with client.stream('POST', vllm_url, json=payload, timeout=None) as response:
-                if response.status_code == 200:
-                    async for line in response.aiter_lines():
-                        if cancellation_token.is_cancelled:
-                            # Close the connection explicitly
-                            await response.aclose()
-                            break
-                            
-                        if line:
-                            raw_line = line.lstrip("data: ").strip()
-                            
-                            if raw_line == "[DONE]":
+    with stage("llm.stream", current=False, model=ollama_model, backend="vllm") as span:
+        async with httpx.AsyncClient() as client:
+            try:
+                async with client.stream('POST', vllm_url, json=payload, headers=span.headers(), timeout=None) as response:
+                    if response.status_code == 200:
+                        first_chunk = True
+                        async for line in response.aiter_lines():
+                            if cancellation_token.is_cancelled:
+                                # Close the connection explicitly
+                                await response.aclose()
                                 break
-                            
-                            try:
-                                data = json.loads(raw_line)
-                                content = data.get('choices', [{}])[0].get('delta', {}).get('content', '')
-                                if content:
-                                    yield content
-                            except json.JSONDecodeError:
-                                continue
-                else:
-                    print(f"Request failed with status code {response.status_code}")
-        except Exception as e:
-            print(f"Error during streaming: {str(e)}")
-            raise
+
+                            if line:
+                                raw_line = line.lstrip("data: ").strip()
+
+                                if raw_line == "[DONE]":
+                                    break
+
+                                try:
+                                    data = json.loads(raw_line)
+                                    if data.get('usage'):
+                                        record_tokens(ollama_model, data['usage'].get('prompt_tokens'),
+                                                      data['usage'].get('completion_tokens'))
+                                    content = (data.get('choices') or [{}])[0].get('delta', {}).get('content', '')
+                                    if content:
+                                        if first_chunk:
+                                            record_first_token(ollama_model, time.perf_counter() - span.start)
+                                            first_chunk = False
+                                        yield content
+                                except json.JSONDecodeError:
+                                    continue
+                    else:
+                        print(f"Request failed with status code {response.status_code}")
+                        span.fail(f"HTTP {response.status_code}")
+            except Exception as e:
+                print(f"Error during streaming: {str(e)}")
+                raise
 
 ##############################################################################################################################
 ##############################################################################################################################
@@ -176,24 +195,29 @@ async def invoke_llm_ollama(system_prompt, user_prompt, ollama_model):
         "stream": False
     }
 
-    try:
-        async with httpx.AsyncClient() as client:
-            # Use the global ollama_url here
-            response = await client.post(f"{ollama_url}/api/generate", json=payload, timeout=None)
-            response_data = json.loads(response.content)
-
-        if response.status_code == 200:
-            ai_msg = response_data['response']
-            return {"answer": ai_msg}
-        else:
-            print(f"Error: {response.status_code} - {response.text}")
-            return {"error": response.text}
-    except httpx.TimeoutException:
-        print("Request timed out. This should not happen with unlimited timeout.")
-        return {"error": "Request timed out"}
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
-        return {"error": str(e)}
+    with stage("llm.invoke", model=ollama_model, backend="ollama") as span:
+        try:
+            async with httpx.AsyncClient() as client:
+                # Use the global ollama_url here
+                response = await client.post(f"{ollama_url}/api/generate", json=payload, headers=span.headers(), timeout=None)
+                response_data = json.loads(response.content)
+
+            if response.status_code == 200:
+                record_tokens(ollama_model, response_data.get('prompt_eval_count'), response_data.get('eval_count'))
+                ai_msg = response_data['response']
+                return {"answer": ai_msg}
+            else:
+                print(f"Error: {response.status_code} - {response.text}")
+                span.fail(f"HTTP {response.status_code}")
+                return {"error": response.text}
+        except httpx.TimeoutException:
+            print("Request timed out. This should not happen with unlimited timeout.")
+            span.fail("Request timed out")
+            return {"error": "Request timed out"}
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+            span.fail(str(e))
+            return {"error": str(e)}
 
 
 async def stream_llm_ollama(
@@ -220,25 +244,32 @@ async def stream_llm_ollama(
         "stream": True
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
-            async with client.stream('POST', f"{ollama_url}/api/generate", json=payload, timeout=None) as response:
-                async for line in response.aiter_lines():
-                    if cancellation_token.is_cancelled:
-                        # Close the connection explicitly
-                        await response.aclose()
-                        break
-                        
-                    if line:
-                        try:
-                            data = json.loads(line)
-                            if 'response' in data:
-                                yield data['response']
-                        except json.JSONDecodeError:
-                            continue
-        except Exception as e:
-            print(f"Error during streaming: {str(e)}")
-            raise
+    with stage("llm.stream", current=False, model=ollama_model, backend="ollama") as span:
+        async with httpx.AsyncClient() as client:
+            try:
+                async with client.stream('POST', f"{ollama_url}/api/generate", json=payload, headers=span.headers(), timeout=None) as response:
+                    first_chunk = True
+                    async for line in response.aiter_lines():
+                        if cancellation_token.is_cancelled:
+                            # Close the connection explicitly
+                            await response.aclose()
+                            break
+
+                        if line:
+                            try:
+                                data = json.loads(line)
+                                if data.get('done'):
+                                    record_tokens(ollama_model, data.get('prompt_eval_count'), data.get('eval_count'))
+                                if 'response' in data:
+                                    if first_chunk:
+                                        record_first_token(ollama_model, time.perf_counter() - span.start)
+                                        first_chunk = False
+                                    yield data['response']
+                            except json.JSONDecodeError:
+                                continue
+            except Exception as e:
+                print(f"Error during streaming: {str(e)}")
+                raise
 
 
 
@@ -267,17 +298,20 @@ async def generate_from_image_ollama(image_data: bytes, prompt: str):
             "stream": False
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{ollama_url}/api/generate", json=data) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    print("########################################")
-                    print(result)
-                    return result
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Image analysis failed with status {response.status}: {error_text}")
-                    return {"response": "Failed to analyze image"}
+        with stage("llm.image", model=ollama_model_for_image, backend="ollama") as span:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(f"{ollama_url}/api/generate", json=data, headers=span.headers()) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        record_tokens(ollama_model_for_image, result.get('prompt_eval_count'), result.get('eval_count'))
+                        print("########################################")
+                        print(result)
+                        return result
+                    else:
+                        error_text = await response.text()
+                        logger.error(f"Image analysis failed with status {response.status}: {error_text}")
+                        span.fail(f"HTTP {response.status}")
+                        return {"response": "Failed to analyze image"}
     except Exception as e:
         logger.error(f"Error in generate_from_image: {str(e)}")
         return {"response": "Failed to analyze image"}
@@ -380,16 +414,19 @@ async def send_multimodal_chat_message(
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(endpoint, headers=headers, json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result["choices"][0]["message"]["content"]
-                else:
-                    error_text = await response.text()
-                    logger.error(f"API request failed with status {response.status}: {error_text}")
-                    raise aiohttp.ClientError(f"API request failed: {error_text}")
-                    
+        with stage("llm.image", model=model, backend="vllm") as span:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(endpoint, headers=span.headers(headers), json=payload) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        usage = result.get("usage") or {}
+                        record_tokens(model, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+                        return result["choices"][0]["message"]["content"]
+                    else:
+                        error_text = await response.text()
+                        logger.error(f"API request failed with status {response.status}: {error_text}")
+                        raise aiohttp.ClientError(f"API request failed: {error_text}")
+
     except Exception as e:
         logger.error(f"Error making API request: {str(e)}")
         raise
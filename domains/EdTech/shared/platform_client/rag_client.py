@@ -2,9 +2,14 @@ import os
 import httpx
 from dotenv import load_dotenv
 import base64
+import hashlib
+import io
 import json
+import math
 import aiohttp
 
+from shared.platform_client.telemetry import stage
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -12,9 +17,86 @@ VERBA_URL = os.getenv("VERBA_URL", "http://localhost:8000")  # Default if not se
 VERBA_API_ENDPOINT = f"{VERBA_URL}/api/import_file"
 
 
-async def send_file_to_verba(file_bytes, filename, credentials, rag_config, labels=[]):
+# Characters of the serialized file sent per request; large files are sent in several chunks.
+VERBA_UPLOAD_CHUNK_SIZE = int(os.getenv("VERBA_UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+
+class BytesFile:
+    """
+    In-memory file with the async read/seek of an UploadFile.
+    """
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+    async def seek(self, offset: int):
+        self._buffer.seek(offset)
+
+
+async def file_sha256(file, block_size: int = 1024 * 1024) -> str:
     """
-    Prepare and send the file payload to the Verba API.
+    Hash a file read in blocks, leaving it at its start.
+    """
+    digest = hashlib.sha256()
+    await file.seek(0)
+    while True:
+        block = await file.read(block_size)
+        if not block:
+            break
+        digest.update(block)
+    await file.seek(0)
+    return digest.hexdigest()
+
+
+async def _file_config_chunks(file, file_data: dict, file_size: int, chunk_size: int):
+    """
+    Yield (order, total, chunk) of the file config JSON, base64 encoding the file as it is read.
+
+    The content goes last in the JSON so that the rest of it can be written
+    up front and the number of chunks is known before the file is read.
+    """
+    head = json.dumps(file_data)[:-1] + ', "content": "'
+    tail = '"}'
+    length = len(head) + 4 * math.ceil(file_size / 3) + len(tail)
+    total = max(1, math.ceil(length / chunk_size))
+
+    async def pieces():
+        yield head
+        # Blocks of a multiple of 3 bytes encode to base64 that concatenates.
+        read_size = max(3, chunk_size // 4 * 3)
+        carry = b""
+        while True:
+            block = await file.read(read_size)
+            if not block:
+                break
+            block = carry + block
+            cut = len(block) // 3 * 3
+            carry = block[cut:]
+            yield base64.b64encode(block[:cut]).decode("ascii")
+        yield base64.b64encode(carry).decode("ascii") + tail
+
+    order = 0
+    buffer = ""
+    async for piece in pieces():
+        buffer += piece
+        while len(buffer) >= chunk_size and order < total - 1:
+            yield order, total, buffer[:chunk_size]
+            buffer = buffer[chunk_size:]
+            order += 1
+    yield order, total, buffer
+
+
+async def send_file_to_verba(file, filename, credentials, rag_config, labels=[], session=None,
+                             on_progress=None, file_size=None, chunk_size=VERBA_UPLOAD_CHUNK_SIZE):
+    """
+    Send a file to the Verba API in chunks of `chunk_size` characters.
+
+    `file` is bytes, or a file with async read/seek such as an UploadFile,
+    which is streamed without being held in memory. `on_progress(sent, total)`
+    is awaited after each chunk is accepted.
     """
     UNSUPPORTED_EXTENSIONS = ("exe", "bin", "dll")
     base_filename = os.path.splitext(filename)[0]
@@ -23,71 +105,84 @@ async def send_file_to_verba(file_bytes, filename, credentials, rag_config, labe
     if file_extension.lower() in UNSUPPORTED_EXTENSIONS:
         return {"filename": filename, "status": "unsupported"}
 
+    if isinstance(file, (bytes, bytearray)):
+        file_size = len(file)
+        file = BytesFile(bytes(file))
+    elif file_size is None:
+        file_size = getattr(file, "size", None)
+        if file_size is None:
+            raise ValueError("file_size is required for files without a size")
+
     # Validate file content
-    if not file_bytes or len(file_bytes) == 0:
+    if not file_size:
         return {"filename": filename, "status": "error", "error": "File is empty or invalid"}
 
-    try:
-        encoded_file = base64.b64encode(file_bytes).decode("utf-8")
-    except Exception as e:
-        return {"filename": filename, "status": "error", "error": f"Base64 encoding failed: {str(e)}"}
-
     # Prepare metadata
     metadata = {"keywords": []}
 
-    # File data
+    # File data, its content is added as it is read
+    file_id = f"{base_filename}.{file_extension}"
     file_data = {
-        "fileID": f"{base_filename}.{file_extension}",
-        "filename": f"{base_filename}.{file_extension}",
+        "fileID": file_id,
+        "filename": file_id,
         "extension": file_extension,
         "status_report": {},
         "source": "",
         "isURL": False,
         "overwrite": False,
-        "content": encoded_file,
         "metadata": json.dumps(metadata),
-        "file_size": len(file_bytes),
+        "file_size": file_size,
         "status": "READY",
         "rag_config": rag_config,
         "labels": labels,
     }
 
-    # Payload
-    payload = {
-        "fileID": f"{base_filename}.{file_extension}",
-        "file_data": file_data,
-        "credentials": credentials,
-        "rag_config": rag_config,
-        "total": 1,
-        "order": 1,
-        "chunk": json.dumps(file_data),
-        "isLastChunk": True,
-    }
-
     # Send to Verba API
-    async with aiohttp.ClientSession() as session:
+    with stage("rag.ingest", extension=file_extension, file_size=file_size) as span:
+        own_session = session is None
+        if own_session:
+            session = aiohttp.ClientSession()
         try:
-            async with session.post(VERBA_API_ENDPOINT, json=payload, headers={"Content-Type": "application/json"}) as response:
-                response_text = await response.text()
-                if response.status == 200:
-                    return {"filename": filename, "status": "success", "response": response_text}
-                else:
-                    return {"filename": filename, "status": "failed", "response": response_text}
+            await file.seek(0)
+            response_text = ""
+            async for order, total, chunk in _file_config_chunks(file, file_data, file_size, chunk_size):
+                payload = {
+                    "fileID": file_id,
+                    "credentials": credentials,
+                    "total": total,
+                    "order": order,
+                    "chunk": chunk,
+                    "isLastChunk": order == total - 1,
+                }
+                async with session.post(VERBA_API_ENDPOINT, json=payload, headers=span.headers({"Content-Type": "application/json"})) as response:
+                    response_text = await response.text()
+                    if response.status != 200:
+                        span.fail(f"HTTP {response.status}")
+                        return {"filename": filename, "status": "failed", "response": response_text}
+                if on_progress is not None:
+                    await on_progress(order + 1, total)
+            span.set_attribute("chunks", total)
+            return {"filename": filename, "status": "success", "response": response_text}
         except Exception as e:
+            span.fail(str(e))
             return {"filename": filename, "status": "error", "error": str(e)}
+        finally:
+            if own_session:
+                await session.close()
 
 
 async def  call_spanda_retrieve(payload):
     url = f"{VERBA_URL}/api/query"
     request_data = payload
    
-    async with httpx.AsyncClient(timeout=None) as client:
-        response = await client.post(url, json=request_data)
-        # Check if the response was successful
-        if response.status_code == 200:
-            is_response_relevant = response.json()
-            print(is_response_relevant) 
-            return is_response_relevant
-        else:
-            raise Exception(f"Error: {response.status_code} - {response.text}")
+    with stage("rag.retrieve") as span:
+        async with httpx.AsyncClient(timeout=None) as client:
+            response = await client.post(url, json=request_data, headers=span.headers())
+            # Check if the response was successful
+            if response.status_code == 200:
+                is_response_relevant = response.json()
+                print(is_response_relevant)
+                return is_response_relevant
+            else:
+                raise Exception(f"Error: {response.status_code} - {response.text}")
         
\ No newline at end of file
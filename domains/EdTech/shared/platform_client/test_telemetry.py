@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from shared.platform_client import telemetry
+from shared.platform_client.telemetry import stage, traced
+
+
+def stage_count(name: str, status: str) -> float:
+    prometheus_client = pytest.importorskip("prometheus_client")
+    value = prometheus_client.REGISTRY.get_sample_value(
+        "spanda_stage_latency_seconds_count",
+        {"service": telemetry._service_name, "stage": name, "status": status},
+    )
+    return value or 0
+
+
+def test_traced_keeps_results_and_errors():
+    @traced("test.coroutine")
+    async def double(x):
+        return 2 * x
+
+    @traced("test.generator")
+    async def count(n):
+        for i in range(n):
+            yield i
+
+    @traced("test.sync")
+    def fail():
+        raise ValueError("boom")
+
+    async def collect():
+        return [i async for i in count(3)]
+
+    assert asyncio.run(double(2)) == 4
+    assert asyncio.run(collect()) == [0, 1, 2]
+    with pytest.raises(ValueError):
+        fail()
+
+
+def test_stage_headers_without_tracer():
+    with stage("test.headers") as span:
+        headers = span.headers({"Content-Type": "application/json"})
+    assert headers["Content-Type"] == "application/json"
+    if telemetry._tracer is None:
+        assert "traceparent" not in headers
+
+
+def test_stage_metrics():
+    before_ok = stage_count("test.metrics", "ok")
+    before_error = stage_count("test.metrics", "error")
+    with stage("test.metrics"):
+        pass
+    with stage("test.metrics") as span:
+        span.fail("HTTP 500")
+    with pytest.raises(RuntimeError):
+        with stage("test.metrics"):
+            raise RuntimeError("boom")
+    assert stage_count("test.metrics", "ok") == before_ok + 1
+    assert stage_count("test.metrics", "error") == before_error + 2
@@ -12,9 +12,12 @@ To see a full list of configurable options, use:
 Happy pretraining!
 """
 import argparse
+import json
 import os
+import sys
 import pandas as pd
-from datasets import Dataset
+from datasets import Dataset, load_from_disk
+from transformers import default_data_collator
 from transformers.utils import strtobool
 from unsloth import FastLanguageModel, is_bfloat16_supported
 from unsloth import UnslothTrainer, UnslothTrainingArguments  # Import Unsloth-specific components
@@ -22,6 +25,36 @@ import logging
 
 logging.getLogger('hf-to-gguf').setLevel(logging.WARNING)
 
+# The dedup manifests are written and checked by minhash_dedup.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Datasets", "dataset_pipelines", "near_duplicate_filter"))
+from minhash_dedup import select_deduplicated_rows  # noqa: E402
+
+
+def load_packed_dataset(path, model_name, max_seq_length):
+    """Loads a dataset tokenized and packed by pack_dataset.py, memory-mapped from its Arrow files."""
+    with open(os.path.join(path, "packing_report.json"), "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if report["max_seq_length"] > max_seq_length:
+        raise ValueError(f"The packed sequences have {report['max_seq_length']} tokens, more than --max_seq_length {max_seq_length}")
+    if report["model_name"] != model_name:
+        print(f"Warning: the packed dataset was tokenized for {report['model_name']}, not {model_name}")
+    print(f"Packed dataset: {report['samples']} samples in {report['sequences']} sequences of {report['max_seq_length']} tokens")
+    print(f"Real tokens per batch: {report['efficiency_padded_to_longest_in_batch']:.1%} unpacked, {report['efficiency_packed']:.1%} packed")
+    return load_from_disk(path)
+
+
+def check_packed_attention(model):
+    """
+    Packed rows hold several samples, kept apart only by flash-attention, which
+    starts a new sequence wherever the position ids restart at 0. With any other
+    attention implementation the samples of a row would attend to each other.
+    """
+    attention = getattr(model.config, "_attn_implementation", None)
+    if attention != "flash_attention_2":
+        raise ValueError(f"--packed_dataset needs flash_attention_2 to keep the packed samples apart, but the model uses {attention}. "
+                         "Install flash-attn, or train on --dataset without packing.")
+
+
 def run(args):
     import torch
 
@@ -35,6 +68,8 @@ def run(args):
         )
     except Exception as e:
         raise RuntimeError(f"Failed to load model: {str(e)}")
+    if args.packed_dataset:
+        check_packed_attention(model)
 
     # Configure PEFT model
     target_modules = args.target_modules.split(",") if args.target_modules else [
@@ -96,7 +131,12 @@ def run(args):
         return Dataset.from_dict({"text": formatted_texts})
 
     # Load dataset
-    dataset = load_and_preprocess_dataset(args.dataset, args.data_format)
+    if args.packed_dataset:
+        dataset = load_packed_dataset(args.packed_dataset, args.model_name, args.max_seq_length)
+    else:
+        dataset = load_and_preprocess_dataset(args.dataset, args.data_format)
+        if args.dedup_manifest:
+            dataset = select_deduplicated_rows(dataset, args.dedup_manifest, args.dataset)
 
     # Configure UnslothTrainingArguments with separate learning rates for embeddings
     training_args = UnslothTrainingArguments(
@@ -117,12 +157,16 @@ def run(args):
         report_to=args.report_to,
     )
 
+    # Already tokenized and packed, the sequences are stacked into batches as they are
+    dataset_options = dict(data_collator=default_data_collator, dataset_kwargs={"skip_prepare_dataset": True}) if args.packed_dataset else {}
+
     # Initialize UnslothTrainer
     trainer = UnslothTrainer(
         model=model,
         tokenizer=tokenizer,
         train_dataset=dataset,
         args=training_args,
+        **dataset_options,
     )
 
     # Train model
@@ -177,8 +221,10 @@ if __name__ == "__main__":
     model_group.add_argument('--max_seq_length', type=int, default=512, help="Maximum sequence length, default is 2048.")
     model_group.add_argument('--dtype', type=str, default=None, help="Data type for model (None for auto detection)")
     model_group.add_argument('--load_in_4bit', action='store_true', help="Use 4bit quantization to reduce memory usage")
-    model_group.add_argument('--dataset', type=str, default="test.json",required=True, help="Path to dataset file (.txt, .json, .csv)")
-    model_group.add_argument('--data_format', type=str, choices=["txt", "json", "csv"], required=True, help="Dataset format: 'txt', 'json', or 'csv'")
+    model_group.add_argument('--dataset', type=str, default=None, help="Path to dataset file (.txt, .json, .csv)")
+    model_group.add_argument('--data_format', type=str, choices=["txt", "json", "csv"], help="Dataset format: 'txt', 'json', or 'csv'")
+    model_group.add_argument('--dedup_manifest', type=str, default=None, help="Manifest written by minhash_dedup.py for the dataset; only its kept rows are trained on.")
+    model_group.add_argument('--packed_dataset', type=str, default=None, help="Directory written by pack_dataset.py; its tokenized, packed sequences are trained on instead of --dataset.")
 
     # LoRA Options
     lora_group = parser.add_argument_group("🧠 LoRA Options", "These options are used to configure the LoRA model.")
@@ -230,4 +276,6 @@ if __name__ == "__main__":
 
     # Parse arguments and run
     args = parser.parse_args()
+    if not args.packed_dataset and not (args.dataset and args.data_format):
+        parser.error("--dataset and --data_format, or --packed_dataset, are required")
     run(args)
\ No newline at end of file
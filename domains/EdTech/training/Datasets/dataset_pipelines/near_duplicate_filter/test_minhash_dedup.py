@@ -0,0 +1,142 @@
+import json
+
+import numpy as np
+import pytest
+
+from minhash_dedup import deduplicate, file_sha256, select_deduplicated_rows, shingle_hashes, union
+
+BASE = ("Explain the difference between a process and a thread in an operating system "
+        "and give one example where threads are preferred over processes")
+REWORDED = ("Explain the difference between a process and a thread in an operating system "
+            "and give one example where threads are preferred over separate processes")
+UNRELATED = [
+    "Derive the time complexity of merge sort using the recurrence relation and the master theorem",
+    "What is normalization in relational databases and why is the third normal form useful",
+    "Describe the working of a transistor as an amplifier with a neat circuit diagram",
+    "Write a program in C to reverse a singly linked list without using recursion",
+]
+
+
+def cluster_of(result, row):
+    for cluster in result["clusters"]:
+        if row == cluster["kept"] or row in [d["row"] for d in cluster["duplicates"]]:
+            return cluster["kept"]
+    return row
+
+
+def test_near_duplicates_are_clustered():
+    texts = [BASE, UNRELATED[0], REWORDED, BASE.upper(), UNRELATED[1]]
+
+    result = deduplicate(texts, threshold=0.8)
+
+    assert result["kept"] == [0, 1, 4]
+    [cluster] = result["clusters"]
+    assert cluster["kept"] == 0
+    assert [d["row"] for d in cluster["duplicates"]] == [2, 3]
+    reworded, uppercased = cluster["duplicates"]
+    assert 0.8 <= reworded["similarity"] < 1
+    assert uppercased["similarity"] == 1.0
+
+
+def test_distinct_texts_are_not_merged():
+    # Sharing a few words is not enough to be a near-duplicate
+    texts = UNRELATED + [f"Explain the difference between {a} and {b}" for a, b in
+                         (("TCP", "UDP"), ("RAM", "ROM"), ("mitosis", "meiosis"))]
+
+    result = deduplicate(texts, threshold=0.8)
+
+    assert result["kept"] == list(range(len(texts)))
+    assert result["clusters"] == []
+
+
+def test_clusters_span_batches():
+    texts = [BASE, UNRELATED[0], UNRELATED[1], REWORDED]
+
+    result = deduplicate(texts, threshold=0.8, batch_size=2)
+
+    assert result["kept"] == [0, 1, 2]
+    assert cluster_of(result, 3) == 0
+
+
+def test_empty_and_short_texts():
+    texts = ["", "  ", "Define entropy", "define ENTROPY!", "Define enthalpy", "", "?"]
+
+    result = deduplicate(texts, threshold=0.8)
+
+    # Texts without words are never duplicates, not even of each other
+    assert cluster_of(result, 3) == 2
+    assert result["kept"] == [0, 1, 2, 4, 5, 6]
+
+
+def test_shingle_hashes():
+    # Texts of 4, 0, 2 and 3 tokens
+    token_hashes = np.array([1, 2, 3, 4, 5, 6, 1, 2, 3], dtype=np.uint64)
+    lengths = np.array([4, 0, 2, 3])
+
+    shingles, counts = shingle_hashes(token_hashes, lengths, ngram=3)
+
+    # One shingle per 3-gram, one for a text shorter than 3 tokens, none for an empty text
+    assert counts.tolist() == [2, 0, 1, 1]
+    assert len(shingles) == 4
+    assert (shingles <= np.uint64((1 << 32) - 1)).all()
+    # The same 3 tokens give the same shingle, in any text
+    assert shingles[0] == shingles[3]
+    assert len(set(shingles.tolist())) == 3
+
+
+def test_shingle_hashes_of_no_tokens():
+    shingles, counts = shingle_hashes(np.array([], dtype=np.uint64), np.array([0, 0]), ngram=3)
+
+    assert counts.tolist() == [0, 0]
+    assert len(shingles) == 0
+
+
+def test_union():
+    parent = np.arange(7)
+
+    parent = union(parent, np.array([5, 1, 3, 6]), np.array([3, 2, 1, 4]))
+
+    # The root of each set is its lowest row
+    assert parent.tolist() == [0, 1, 1, 1, 4, 1, 4]
+
+
+def test_union_without_pairs():
+    parent = union(np.arange(3), np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+
+    assert parent.tolist() == [0, 1, 2]
+
+
+class FakeDataset(list):
+    def select(self, indices):
+        return FakeDataset(self[i] for i in indices)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    dataset_path = tmp_path / "dataset.csv"
+    dataset_path.write_text("question\na\nb\nc\n", encoding="utf-8")
+    manifest_path = tmp_path / "dataset.dedup.manifest.json"
+    manifest_path.write_text(json.dumps({
+        "dataset": str(dataset_path),
+        "dataset_sha256": file_sha256(str(dataset_path)),
+        "total_rows": 3,
+        "kept": [0, 2],
+    }), encoding="utf-8")
+    return str(manifest_path), dataset_path
+
+
+def test_select_deduplicated_rows(manifest):
+    manifest_path, dataset_path = manifest
+
+    assert select_deduplicated_rows(FakeDataset("abc"), manifest_path, str(dataset_path)) == ["a", "c"]
+
+
+def test_select_deduplicated_rows_refuses_another_dataset(manifest):
+    manifest_path, dataset_path = manifest
+    # Same number of rows, in another order
+    dataset_path.write_text("question\nc\nb\na\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="contents differ"):
+        select_deduplicated_rows(FakeDataset("cba"), manifest_path, str(dataset_path))
+    with pytest.raises(ValueError, match="needs the dataset file"):
+        select_deduplicated_rows(FakeDataset("abc"), manifest_path, "org/hub-dataset")
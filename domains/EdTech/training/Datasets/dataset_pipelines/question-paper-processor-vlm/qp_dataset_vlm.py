@@ -9,10 +9,13 @@ import httpx
 import tempfile
 import shutil
 import subprocess
+import time
 from pathlib import Path
 from tqdm import tqdm
 from enum import Enum
-from typing import Optional, AsyncGenerator, Dict, List, Any
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Optional, AsyncGenerator, Dict, Iterator, List, Any, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -84,11 +87,13 @@ async def invoke_llm(
     system_prompt: str,
     user_prompt: str,
     model_type: ModelType,
-    config: Optional[EnvConfig] = None
+    config: Optional[EnvConfig] = None,
+    json_output: bool = False
 ) -> dict:
     """
     Unified interface for invoking LLM models. Automatically chooses between VLLM and Ollama
-    based on availability, with priority given to VLLM.
+    based on availability, with priority given to VLLM. `json_output` constrains the answer
+    to a JSON object. The result has the token counts of the request under "usage".
     """
     if config is None:
         config = EnvConfig()
@@ -99,9 +104,9 @@ async def invoke_llm(
         return {"error": f"No LLM service available for model type {model_type.value}"}
     
     if config.is_vllm_available(model_type):
-        return await invoke_llm_vllm(system_prompt, user_prompt, model, url)
+        return await invoke_llm_vllm(system_prompt, user_prompt, model, url, json_output=json_output)
     else:
-        return await invoke_llm_ollama(system_prompt, user_prompt, model, url)
+        return await invoke_llm_ollama(system_prompt, user_prompt, model, url, json_output=json_output)
 
 async def invoke_llm_vllm(
     system_prompt: str, 
@@ -111,6 +116,7 @@ async def invoke_llm_vllm(
     temperature: float = 0.2,  # Lower temperature for more deterministic outputs
     top_p: float = 0.9,
     top_k: int = 10,
+    json_output: bool = False,
 ) -> dict:
     """Invoke VLLM with specified parameters"""
     payload = {
@@ -124,6 +130,8 @@ async def invoke_llm_vllm(
         "top_k": top_k,
         "stream": False
     }
+    if json_output:
+        payload["response_format"] = {"type": "json_object"}
     
     try:
         async with httpx.AsyncClient() as client:
@@ -132,7 +140,11 @@ async def invoke_llm_vllm(
             if response.status_code == 200:
                 response_data = json.loads(response.content)
                 ai_msg = response_data.get('choices', [{}])[0].get('message', {}).get('content', '')
-                return {"answer": ai_msg}
+                usage = response_data.get('usage') or {}
+                return {"answer": ai_msg, "usage": {
+                    "prompt_tokens": usage.get('prompt_tokens', 0),
+                    "completion_tokens": usage.get('completion_tokens', 0),
+                }}
             else:
                 logging.error(f"VLLM Error: {response.status_code} - {response.text}")
                 return {"error": response.text}
@@ -146,6 +158,7 @@ async def invoke_llm_ollama(
     user_prompt: str, 
     model: str,
     url: str,
+    json_output: bool = False,
 ) -> dict:
     """Invoke Ollama with specified parameters"""
     prompt = f"""
@@ -164,6 +177,8 @@ async def invoke_llm_ollama(
         },
         "stream": False
     }
+    if json_output:
+        payload["format"] = "json"
 
     try:
         async with httpx.AsyncClient() as client:
@@ -172,7 +187,10 @@ async def invoke_llm_ollama(
             if response.status_code == 200:
                 response_data = json.loads(response.content)
                 ai_msg = response_data.get('response', '')
-                return {"answer": ai_msg}
+                return {"answer": ai_msg, "usage": {
+                    "prompt_tokens": response_data.get('prompt_eval_count', 0),
+                    "completion_tokens": response_data.get('eval_count', 0),
+                }}
             else:
                 logging.error(f"Ollama Error: {response.status_code} - {response.text}")
                 return {"error": response.text}
@@ -180,11 +198,128 @@ async def invoke_llm_ollama(
         logging.error(f"Ollama error occurred: {str(e)}")
         return {"error": str(e)}
 
+def add_failure(failures: Optional[List[str]], message: str):
+    """Logs an LLM call that fell back to a default and records it in `failures`."""
+    logging.error(message)
+    if failures is not None:
+        failures.append(message)
+
+class IncompleteDocumentError(Exception):
+    """Some LLM calls of a document failed, so it is left for the next run."""
+
+# Documents processed at the same time, and LLM requests in flight across all of them.
+FILE_CONCURRENCY = int(os.getenv("QP_FILE_CONCURRENCY", "4"))
+LLM_CONCURRENCY = int(os.getenv("QP_LLM_CONCURRENCY", "8"))
+# Processes converting documents to PDF and text.
+CONVERSION_WORKERS = int(os.getenv("QP_CONVERSION_WORKERS", str(os.cpu_count() or 1)))
+# Questions whose topics are inferred in one request; 1 infers the topic of each question on its own.
+TOPIC_BATCH_SIZE = int(os.getenv("QP_TOPIC_BATCH_SIZE", "20"))
+
+class StageStats:
+    """Counts the items of each stage and the time spent on them, to report throughput."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.tokens: Dict[str, Dict[str, int]] = {}
+
+    def add_tokens(self, stage: str, usage: Dict[str, int]):
+        tokens = self.tokens.setdefault(stage, {"prompt_tokens": 0, "completion_tokens": 0})
+        for kind in tokens:
+            tokens[kind] += usage.get(kind, 0)
+
+    def add(self, stage: str, seconds: float, items: int = 1):
+        count_and_time = self.stages.setdefault(stage, [0, 0.0])
+        count_and_time[0] += items
+        count_and_time[1] += seconds
+
+    @contextmanager
+    def time(self, stage: str, items: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, items)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        logging.info(f"Throughput over {elapsed:.1f}s:")
+        for stage, (count, seconds) in self.stages.items():
+            logging.info(
+                f"  {stage}: {count:.0f} done, {count / elapsed:.2f}/s, "
+                f"{seconds / max(count, 1):.2f}s each"
+            )
+        for stage, tokens in self.tokens.items():
+            logging.info(
+                f"  {stage}: {tokens['prompt_tokens']} prompt tokens, "
+                f"{tokens['completion_tokens']} completion tokens"
+            )
+
+class DatasetCheckpoint:
+    """
+    Append-only JSONL dataset, with a manifest of the documents whose rows are all in it.
+
+    The rows of a document are written before its manifest entry, so after a
+    crash the rows of documents missing from the manifest are dropped and
+    those documents are processed again.
+    """
+    def __init__(self, dataset_path: str, manifest_path: str):
+        self.dataset_path = dataset_path
+        self.manifest_path = manifest_path
+        self.completed: Dict[str, dict] = {}
+        for entry in self._read_jsonl(manifest_path):
+            self.completed[entry["document_id"]] = entry
+        self._drop_incomplete_rows()
+
+    @staticmethod
+    def _read_jsonl(path: str) -> Iterator[dict]:
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash
+                    continue
+
+    @staticmethod
+    def _append(f, lines: List[str]):
+        f.write("".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _drop_incomplete_rows(self):
+        rows = list(self._read_jsonl(self.dataset_path))
+        kept = [row for row in rows if row.get("metadata_tag") in self.completed]
+        if len(kept) == len(rows) and os.path.exists(self.dataset_path):
+            return
+        temp_path = self.dataset_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            self._append(f, [json.dumps(row, ensure_ascii=False) + "\n" for row in kept])
+        os.replace(temp_path, self.dataset_path)
+        if len(kept) < len(rows):
+            logging.info(f"Dropped {len(rows) - len(kept)} rows of unfinished documents from {self.dataset_path}")
+
+    def is_completed(self, document_id: str) -> bool:
+        return document_id in self.completed
+
+    def add(self, document_id: str, rows: List[dict], **entry):
+        with open(self.dataset_path, "a", encoding="utf-8") as f:
+            self._append(f, [json.dumps(row, ensure_ascii=False) + "\n" for row in rows])
+        entry = {"document_id": document_id, "rows": len(rows), "completed_at": time.time(), **entry}
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            self._append(f, [json.dumps(entry, ensure_ascii=False) + "\n"])
+        self.completed[document_id] = entry
+
+    def rows(self) -> Iterator[dict]:
+        return self._read_jsonl(self.dataset_path)
+
 def generate_document_id(file_path: str) -> str:
     """Generates a unique identifier for a document based on its file path."""
     return hashlib.sha256(file_path.encode()).hexdigest()[:8]
 
-async def extract_text_with_latex(pdf_content: str, config: EnvConfig) -> str:
+async def extract_text_with_latex(pdf_content: str, config: EnvConfig,
+                                  failures: Optional[List[str]] = None) -> str:
     """
     Use LLM to extract text from PDF content and convert mathematical equations to LaTeX
     """
@@ -228,12 +363,13 @@ async def extract_text_with_latex(pdf_content: str, config: EnvConfig) -> str:
     
     result = await invoke_llm(system_prompt, user_prompt, ModelType.OCR, config)
     if "error" in result:
-        logging.error(f"Error in OCR processing: {result['error']}")
+        add_failure(failures, f"Error in OCR processing: {result['error']}")
         return pdf_content  # Return original content if error occurs
     
     return result["answer"]
 
-async def extract_course_info(text_content: str, config: EnvConfig) -> dict:
+async def extract_course_info(text_content: str, config: EnvConfig,
+                              failures: Optional[List[str]] = None) -> dict:
     """
     Uses LLM to extract course information from the text content
     """
@@ -260,7 +396,7 @@ async def extract_course_info(text_content: str, config: EnvConfig) -> dict:
     
     result = await invoke_llm(system_prompt, user_prompt, ModelType.EXTRACTION, config)
     if "error" in result:
-        logging.error(f"Error extracting course info: {result['error']}")
+        add_failure(failures, f"Error extracting course info: {result['error']}")
         return {"course_no": "Unknown_Course_No", "course_title": "Unknown_Course_Title"}
     
     try:
@@ -278,10 +414,11 @@ async def extract_course_info(text_content: str, config: EnvConfig) -> dict:
             "course_title": course_info.get("course_title", "Unknown_Course_Title")
         }
     except json.JSONDecodeError as e:
-        logging.error(f"JSON parse error in course info: {e}, Response: {result['answer']}")
+        add_failure(failures, f"JSON parse error in course info: {e}, Response: {result['answer']}")
         return {"course_no": "Unknown_Course_No", "course_title": "Unknown_Course_Title"}
 
-async def extract_questions(text_content: str, config: EnvConfig) -> list:
+async def extract_questions(text_content: str, config: EnvConfig,
+                            failures: Optional[List[str]] = None) -> list:
     """
     Uses LLM to extract questions from the text content with improved JSON handling
     """
@@ -342,7 +479,7 @@ async def extract_questions(text_content: str, config: EnvConfig) -> list:
    
     result = await invoke_llm(system_prompt, user_prompt, ModelType.EXTRACTION, config)
     if "error" in result:
-        logging.error(f"Error extracting questions: {result['error']}")
+        add_failure(failures, f"Error extracting questions: {result['error']}")
         return []
     
     # Multiple parsing attempts with progressively more aggressive fixes
@@ -375,7 +512,7 @@ async def extract_questions(text_content: str, config: EnvConfig) -> list:
             if attempt_num < len(parsing_attempts):
                 logging.warning(f"Parsing attempt {attempt_num} failed: {e}")
             else:
-                logging.error(f"All parsing attempts failed: {e}")
+                add_failure(failures, f"All parsing attempts failed: {e}")
     
     # If all attempts fail, return empty list
     return []
@@ -502,11 +639,7 @@ def manual_json_fix(json_str: str) -> str:
     
     return processed_str
 
-async def infer_topic_name(question_text: str, course_title: str, config: EnvConfig) -> str:
-    """
-    Infers the topic name for a question based on the course title and question text.
-    """
-    system_prompt = """
+TOPIC_SYSTEM_PROMPT = """
     You are an expert in academic curriculum classification for university courses. Your task is to infer the precise topic or subject area of a given exam question based on its content and the course context.
 
     GUIDELINES FOR TOPIC IDENTIFICATION:
@@ -523,6 +656,20 @@ async def infer_topic_name(question_text: str, course_title: str, config: EnvCon
 
     Based on your analysis, provide ONLY the specific topic name as a standard discipline term - no explanations or additional text.
     """
+
+def add_usage(usage: Optional[Dict[str, int]], result: dict):
+    """Adds the token counts of an invoke_llm result to `usage`."""
+    if usage is not None:
+        for kind, count in result.get("usage", {}).items():
+            usage[kind] = usage.get(kind, 0) + (count or 0)
+
+async def infer_topic_name(question_text: str, course_title: str, config: EnvConfig,
+                           usage: Optional[Dict[str, int]] = None,
+                           failures: Optional[List[str]] = None) -> str:
+    """
+    Infers the topic name for a question based on the course title and question text.
+    """
+    system_prompt = TOPIC_SYSTEM_PROMPT
     
     user_prompt = f"""
     Based on the following question from the course titled '{course_title}', 
@@ -534,14 +681,104 @@ async def infer_topic_name(question_text: str, course_title: str, config: EnvCon
     """
     
     result = await invoke_llm(system_prompt, user_prompt, ModelType.TOPIC, config)
+    add_usage(usage, result)
     if "error" in result:
-        logging.error(f"Error inferring topic: {result['error']}")
+        add_failure(failures, f"Error inferring topic: {result['error']}")
         return "Unknown_Topic"
     
     # Clean up the response - take first line only as topic
     topic = result["answer"].strip().split('\n')[0]
     return topic
 
+def parse_topic_names(answer: str, count: int) -> Dict[int, str]:
+    """
+    Reads the topics of questions 1..count from a JSON object like {"1": "Topic", ...}.
+    Questions with no topic in the answer are left out.
+    """
+    start, end = answer.find('{'), answer.rfind('}') + 1
+    if start < 0 or end <= start:
+        return {}
+    try:
+        topics = json.loads(answer[start:end])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(topics, dict):
+        return {}
+    # Some models wrap the object, e.g. {"topics": {...}}
+    if len(topics) == 1 and isinstance(next(iter(topics.values())), dict):
+        topics = next(iter(topics.values()))
+    parsed = {}
+    for number in range(1, count + 1):
+        topic = topics.get(str(number))
+        if isinstance(topic, str) and topic.strip():
+            parsed[number - 1] = topic.strip().split('\n')[0]
+    return parsed
+
+async def infer_topic_names(question_texts: List[str], course_title: str, config: EnvConfig,
+                            usage: Optional[Dict[str, int]] = None) -> Dict[int, str]:
+    """
+    Infers the topic names of several questions of a course in one request.
+
+    Returns the topics by question index; questions whose topic could not be
+    read from the answer are missing, for the caller to infer one by one.
+    """
+    numbered_questions = "\n\n".join(f"{i}. {text}" for i, text in enumerate(question_texts, 1))
+    user_prompt = f"""
+    Based on the following questions from the course titled '{course_title}',
+    what specific topic does each question cover?
+    
+    {numbered_questions}
+    
+    Return ONLY a JSON object mapping each question number to its topic name, as a single word or short phrase:
+    {{"1": "topic name", "2": "topic name"}}
+    """
+    
+    system_prompt = TOPIC_SYSTEM_PROMPT + """
+    When given several numbered questions, answer with a JSON object mapping each question number to its topic name.
+    """
+    
+    result = await invoke_llm(system_prompt, user_prompt, ModelType.TOPIC, config, json_output=True)
+    add_usage(usage, result)
+    if "error" in result:
+        logging.error(f"Error inferring topics: {result['error']}")
+        return {}
+    return parse_topic_names(result["answer"], len(question_texts))
+
+async def infer_question_topics(question_texts: List[str], course_title: str, config: EnvConfig,
+                                llm_slots: asyncio.Semaphore, stats: StageStats,
+                                batch_size: int = TOPIC_BATCH_SIZE,
+                                failures: Optional[List[str]] = None) -> List[str]:
+    """
+    Infers the topics of questions in windows of `batch_size`, then one by one
+    for the questions the batched answers missed. Questions whose topic could
+    not be inferred at all are recorded in `failures`.
+    """
+    topics: Dict[int, str] = {}
+
+    async def infer_window(start: int):
+        window = question_texts[start:start + batch_size]
+        usage = {}
+        async with llm_slots:
+            with stats.time("topic_batch"):
+                window_topics = await infer_topic_names(window, course_title, config, usage)
+        stats.add_tokens("topic", usage)
+        topics.update({start + i: topic for i, topic in window_topics.items()})
+
+    async def infer_one(index: int):
+        usage = {}
+        async with llm_slots:
+            with stats.time("topic"):
+                topics[index] = await infer_topic_name(question_texts[index], course_title, config, usage, failures)
+        stats.add_tokens("topic", usage)
+
+    if batch_size > 1:
+        await asyncio.gather(*(infer_window(start) for start in range(0, len(question_texts), batch_size)))
+    missing = [index for index in range(len(question_texts)) if index not in topics]
+    if batch_size > 1 and missing:
+        logging.warning(f"No topic in the batched answer for {len(missing)} questions, inferring them one by one")
+    await asyncio.gather(*(infer_one(index) for index in missing))
+    return [topics[index] for index in range(len(question_texts))]
+
 class PDFToTextConverter:
     """Converts PDF to text using PyMuPDF"""
     def convert_pdf_to_text(self, pdf_path: str) -> str:
@@ -579,8 +816,11 @@ class DocumentToPDFConverter:
             # Create temporary directory for conversion
             with tempfile.TemporaryDirectory() as temp_dir:
                 # Use LibreOffice to convert the document
+                # A profile per process, concurrent LibreOffice instances can't share one
+                profile_dir = os.path.join(tempfile.gettempdir(), f"qp_libreoffice_{os.getpid()}")
                 subprocess.run([
                     'libreoffice',
+                    f'-env:UserInstallation=file://{profile_dir}',
                     '--headless',
                     '--convert-to', 'pdf',
                     '--outdir', temp_dir,
@@ -633,9 +873,109 @@ def sanitize_json_data(data):
     else:
         return data
 
-async def process_text_files(input_dir: str, output_file: str, config: EnvConfig):
+def read_text_file(file_path: str) -> str:
+    """Reads a text file, falling back to latin-1 if it isn't UTF-8."""
+    try:
+        with open(file_path, "r", encoding="utf-8", errors='replace') as f:
+            return f.read()
+    except UnicodeError:
+        with open(file_path, "r", encoding="latin-1", errors='replace') as f:
+            return f.read()
+
+async def process_document(file_path: str, config: EnvConfig, llm_slots: asyncio.Semaphore,
+                           stats: StageStats) -> Tuple[List[dict], Dict[str, Any]]:
+    """
+    Extracts the questions of a text file and returns its dataset rows and file result.
+
+    Raises IncompleteDocumentError if an LLM call failed, rather than
+    returning rows made of the fallback values.
+    """
+    text_content = read_text_file(file_path)
+    document_id = generate_document_id(file_path)
+    failures = []
+
+    async def timed_llm_call(stage: str, call):
+        async with llm_slots:
+            with stats.time(stage):
+                return await call
+
+    # Process with LLM for OCR and LaTeX conversion
+    processed_text = await timed_llm_call("ocr", extract_text_with_latex(text_content, config, failures))
+
+    # Extract course information and questions
+    course_info, questions = await asyncio.gather(
+        timed_llm_call("course_info", extract_course_info(processed_text, config, failures)),
+        timed_llm_call("questions", extract_questions(processed_text, config, failures)),
+    )
+
+    logging.info(f"Extracted {len(questions)} questions from {os.path.basename(file_path)}")
+
+    file_result = {
+        "document_id": document_id,
+        "filename": os.path.basename(file_path),
+        "course_info": course_info,
+        "questions": []
+    }
+
+    topic_names = await infer_question_topics(
+        [question["question_text"] for question in questions], course_info["course_title"],
+        config, llm_slots, stats, failures=failures
+    )
+    if failures:
+        raise IncompleteDocumentError(f"{len(failures)} LLM calls failed, first: {failures[0]}")
+
+    rows = []
+    # Process each question
+    for question, topic_name in zip(questions, topic_names):
+        question_item = {
+            "question_number": question["question_number"],
+            "question_text": question["question_text"],
+            "marks": question["marks"],
+            "topic": topic_name,
+            "course_no": course_info["course_no"],
+            "course_title": course_info["course_title"]
+        }
+
+        # Add to file result
+        file_result["questions"].append(question_item)
+
+        # Add to dataset for fine-tuning
+        instruction = (
+            f"Act as an expert in question generation. "
+            f"When you find the course titled '{course_info['course_title']}' "
+            f"with course number '{course_info['course_no']}', "
+            f"generate a new question related to the topic '{topic_name}'. "
+            f"The new question should be similar in style and complexity to the following example, "
+            f"but it must not repeat the same question: "
+            f"Ensure the generated question aligns with the course content and topic."
+        )
+
+        input_text = (
+            f"Generate a question for the course id '{course_info['course_no']}', "
+            f"course name '{course_info['course_title']}' under the topic '{topic_name}' "
+            f"appropriate for marks {question['marks']}"
+        )
+
+        rows.append({
+            "instruction": instruction,
+            "input": input_text,
+            "question": question["question_text"],
+            "course_no": course_info["course_no"],
+            "course_title": course_info["course_title"],
+            "marks": question["marks"],
+            "topic": topic_name,
+            "metadata_tag": document_id
+        })
+    return rows, file_result
+
+async def process_text_files(input_dir: str, output_file: str, config: EnvConfig,
+                             file_concurrency: int = FILE_CONCURRENCY, llm_concurrency: int = LLM_CONCURRENCY):
     """
     Processes all text files in the input directory and saves the extracted data as a JSON file.
+
+    The rows of each document are appended to a JSONL file next to the JSON as
+    soon as the document is done, and documents done by an earlier run are
+    skipped, so an interrupted run picks up where it stopped.
     """
     supported_extensions = [".txt"]
     files = [
@@ -648,94 +988,45 @@ async def process_text_files(input_dir: str, output_file: str, config: EnvConfig
         logging.warning("No supported files found in the 'text_converted' directory.")
         return
 
-    dataset = []
-    file_results = {}
+    output_base = os.path.splitext(output_file)[0]
+    checkpoint = DatasetCheckpoint(f"{output_base}.jsonl", f"{output_base}.manifest.jsonl")
+    pending = [f for f in files if not checkpoint.is_completed(generate_document_id(f))]
+    logging.info(f"Processing {len(pending)} files, {len(files) - len(pending)} already done...")
 
-    logging.info(f"Processing {len(files)} files...")
-    for file_path in tqdm(files, desc="Processing Files", unit="file"):
-        try:
-            # Read file with error handling
+    file_slots = asyncio.Semaphore(file_concurrency)
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    stats = StageStats()
+    progress = tqdm(total=len(pending), desc="Processing Files", unit="file")
+
+    async def process(file_path: str):
+        async with file_slots:
             try:
-                with open(file_path, "r", encoding="utf-8", errors='replace') as f:
-                    text_content = f.read()
-            except UnicodeError:
-                # Fallback to latin-1 if UTF-8 fails
-                with open(file_path, "r", encoding="latin-1", errors='replace') as f:
-                    text_content = f.read()
-
-            document_id = generate_document_id(file_path)
-            
-            # Process with LLM for OCR and LaTeX conversion
-            processed_text = await extract_text_with_latex(text_content, config)
-            
-            # Extract course information
-            course_info = await extract_course_info(processed_text, config)
-            
-            # Extract questions
-            questions = await extract_questions(processed_text, config)
-            
-            logging.info(f"Extracted {len(questions)} questions from {os.path.basename(file_path)}")
-            
-            file_result = {
-                "document_id": document_id,
-                "filename": os.path.basename(file_path),
-                "course_info": course_info,
-                "questions": []
-            }
-            
-            # Process each question
-            for question in questions:
-                topic_name = await infer_topic_name(
-                    question["question_text"], course_info["course_title"], config
-                )
-                
-                question_item = {
-                    "question_number": question["question_number"],
-                    "question_text": question["question_text"],
-                    "marks": question["marks"],
-                    "topic": topic_name,
-                    "course_no": course_info["course_no"],
-                    "course_title": course_info["course_title"]
-                }
-                
-                # Add to file result
-                file_result["questions"].append(question_item)
-                
-                # Add to dataset for fine-tuning
-                instruction = (
-                    f"Act as an expert in question generation. "
-                    f"When you find the course titled '{course_info['course_title']}' "
-                    f"with course number '{course_info['course_no']}', "
-                    f"generate a new question related to the topic '{topic_name}'. "
-                    f"The new question should be similar in style and complexity to the following example, "
-                    f"but it must not repeat the same question: "
-                    f"Ensure the generated question aligns with the course content and topic."
-                )
-
-                input_text = (
-                    f"Generate a question for the course id '{course_info['course_no']}', "
-                    f"course name '{course_info['course_title']}' under the topic '{topic_name}' "
-                    f"appropriate for marks {question['marks']}"
-                )
-                
-                dataset.append({
-                    "instruction": instruction,
-                    "input": input_text,
-                    "question": question["question_text"],
-                    "course_no": course_info["course_no"],
-                    "course_title": course_info["course_title"],
-                    "marks": question["marks"],
-                    "topic": topic_name,
-                    "metadata_tag": document_id
-                })
-            
-            # Save individual file results
-            file_output = os.path.join(os.path.dirname(output_file), f"file_{document_id}.json")
-            write_json_safely(file_result, file_output)
-            file_results[document_id] = file_result
+                with stats.time("document"):
+                    rows, file_result = await process_document(file_path, config, llm_slots, stats)
+                document_id = file_result["document_id"]
+                # Save individual file results
+                file_output = os.path.join(os.path.dirname(output_file), f"file_{document_id}.json")
+                write_json_safely(file_result, file_output)
+                checkpoint.add(document_id, rows, filename=file_result["filename"], file_result=file_result)
+                stats.add("question", 0.0, len(rows))
+            except IncompleteDocumentError as e:
+                # Not checkpointed, so the next run processes it again.
+                logging.warning(f"Leaving {file_path} for the next run: {str(e)}")
+            except Exception as e:
+                logging.error(f"Error processing {file_path}: {str(e)}", exc_info=True)
+            finally:
+                progress.update(1)
 
-        except Exception as e:
-            logging.error(f"Error processing {file_path}: {str(e)}", exc_info=True)
+    await asyncio.gather(*(process(file_path) for file_path in pending))
+    progress.close()
+    stats.report()
+
+    dataset = list(checkpoint.rows())
+    file_results = {
+        document_id: entry["file_result"]
+        for document_id, entry in checkpoint.completed.items()
+        if "file_result" in entry
+    }
 
     if dataset:
         # Save combined dataset as JSON
@@ -757,53 +1048,90 @@ async def process_text_files(input_dir: str, output_file: str, config: EnvConfig
     else:
         logging.warning("❌ No valid data extracted from input files. No files generated.")
 
-def process_directory(input_dir: str, output_dir: str):
-    """Process all documents by converting to PDF first, then to text"""
+_converters = None
+
+def _get_converters() -> Tuple["DocumentToPDFConverter", "PDFToTextConverter"]:
+    """Converters of the current worker process, created on first use."""
+    global _converters
+    if _converters is None:
+        _converters = (DocumentToPDFConverter(), PDFToTextConverter())
+    return _converters
+
+def convert_document(input_path: str, pdf_dir: str, text_dir: str) -> Tuple[str, str, Dict[str, float]]:
+    """
+    Converts a document to PDF, then to text. Runs in a worker process.
+
+    Returns the status of the conversion and the seconds spent per stage.
+    """
+    file = os.path.basename(input_path)
+    file_extension = Path(file).suffix.lower()
+    file_name = Path(file).stem
+
+    # Define output paths
+    pdf_path = os.path.join(pdf_dir, f"{file_name}.pdf")
+    text_path = os.path.join(text_dir, f"{file_name}.txt")
+    timings = {}
+
+    # Converted by an earlier run
+    if os.path.exists(text_path) and os.path.getmtime(text_path) >= os.path.getmtime(input_path):
+        return "skipped", f"Already converted: {file}", timings
+
+    pdf_converter, text_converter = _get_converters()
+    start = time.perf_counter()
+    # If file is already PDF, just copy it
+    if file_extension == '.pdf':
+        shutil.copy2(input_path, pdf_path)
+    # For other document types (DOCX, PPTX), use LibreOffice
+    elif file_extension in ['.docx', '.pptx', '.doc', '.html', '.htm', '.md']:
+        pdf_result = pdf_converter.convert_to_pdf_libreoffice(input_path, pdf_dir)
+        if not pdf_result:
+            return "failed", f"Could not convert {file} to PDF", timings
+    else:
+        return "unsupported", f"Unsupported file format: {file}", timings
+    timings["pdf_conversion"] = time.perf_counter() - start
+
+    # Convert PDF to text
+    start = time.perf_counter()
+    text_content = text_converter.convert_pdf_to_text(pdf_path)
+
+    # Save text content, through a temporary file so that a crash leaves no partial text
+    with open(text_path + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(text_content)
+    os.replace(text_path + ".tmp", text_path)
+    timings["text_extraction"] = time.perf_counter() - start
+    return "converted", f"✅ Processed: {file}", timings
+
+def process_directory(input_dir: str, output_dir: str, workers: int = CONVERSION_WORKERS):
+    """Process all documents by converting to PDF first, then to text, in `workers` processes"""
     # Create output directories
     pdf_dir = os.path.join(output_dir, "pdf_converted")
     text_dir = os.path.join(output_dir, "text_converted")
     os.makedirs(pdf_dir, exist_ok=True)
     os.makedirs(text_dir, exist_ok=True)
     
-    # Initialize converters
-    pdf_converter = DocumentToPDFConverter()
-    text_converter = PDFToTextConverter()
+    # Fail early if a converter is missing
+    DocumentToPDFConverter()
     
     # Process all files
     files = os.listdir(input_dir)
     print(f"Found {len(files)} files to process...")
-    for file in tqdm(files, desc="Converting Documents"):
-        input_path = os.path.join(input_dir, file)
-        file_extension = Path(file).suffix.lower()
-        file_name = Path(file).stem
-        
-        # Define output paths
-        pdf_path = os.path.join(pdf_dir, f"{file_name}.pdf")
-        text_path = os.path.join(text_dir, f"{file_name}.txt")
-        
-        try:
-            # If file is already PDF, just copy it
-            if file_extension == '.pdf':
-                shutil.copy2(input_path, pdf_path)
-            # For other document types (DOCX, PPTX), use LibreOffice
-            elif file_extension in ['.docx', '.pptx', '.doc', '.html', '.htm', '.md']:
-                pdf_result = pdf_converter.convert_to_pdf_libreoffice(input_path, pdf_dir)
-                if not pdf_result:
-                    continue
-            else:
-                print(f"Unsupported file format: {file}")
-                continue
-                
-            # Convert PDF to text
-            text_content = text_converter.convert_pdf_to_text(pdf_path)
-            
-            # Save text content
-            with open(text_path, 'w', encoding='utf-8') as f:
-                f.write(text_content)
-                
-            print(f"✅ Processed: {file}")
-        except Exception as e:
-            print(f"Error processing {file}: {str(e)}")
+    stats = StageStats()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(convert_document, os.path.join(input_dir, file), pdf_dir, text_dir): file
+            for file in files
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Converting Documents"):
+            file = futures[future]
+            try:
+                status, message, timings = future.result()
+                for stage, seconds in timings.items():
+                    stats.add(stage, seconds)
+                stats.add(status, 0.0)
+                print(message)
+            except Exception as e:
+                print(f"Error processing {file}: {str(e)}")
+    stats.report()
 
 async def test_llm_connection(config: EnvConfig) -> bool:
     """Test LLM connection before processing"""
@@ -0,0 +1,77 @@
+import numpy as np
+
+from pack_dataset import pack_lengths, pack_tokens
+
+PAD = 0
+# Samples of 3, 5, 2, 7 and 1 tokens, numbered 1 to 18
+LENGTHS = np.array([3, 5, 2, 7, 1])
+TOKENS = np.arange(1, 19)
+
+
+def test_pack_lengths():
+    rows, offsets, row_count = pack_lengths(LENGTHS, 8)
+
+    # Longest first, each into the fullest row it fits in
+    assert row_count == 3
+    assert rows.tolist() == [1, 1, 2, 0, 0]
+    assert offsets.tolist() == [5, 0, 0, 0, 7]
+
+
+def test_pack_lengths_fills_every_row_within_capacity():
+    lengths = np.random.default_rng(0).integers(1, 65, size=500)
+
+    rows, offsets, row_count = pack_lengths(lengths, 64)
+
+    used = np.bincount(rows, weights=lengths, minlength=row_count)
+    assert (used <= 64).all()
+    assert used.min() > 0
+    # Samples of a row do not overlap
+    for row in range(row_count):
+        in_row = np.flatnonzero(rows == row)
+        order = np.argsort(offsets[in_row])
+        starts, ends = offsets[in_row][order], (offsets + lengths)[in_row][order]
+        assert starts[0] == 0
+        assert (starts[1:] == ends[:-1]).all()
+
+
+def test_pack_tokens_layout():
+    input_ids, labels, position_ids = pack_tokens(TOKENS, LENGTHS, 8, PAD)
+
+    assert input_ids.tolist() == [
+        [11, 12, 13, 14, 15, 16, 17, 18],
+        [4, 5, 6, 7, 8, 1, 2, 3],
+        [9, 10, PAD, PAD, PAD, PAD, PAD, PAD],
+    ]
+
+
+def test_pack_tokens_masks_sample_starts_and_padding():
+    input_ids, labels, position_ids = pack_tokens(TOKENS, LENGTHS, 8, PAD)
+
+    # No sample is trained to predict the first token of the next
+    assert labels.tolist() == [
+        [-100, 12, 13, 14, 15, 16, 17, -100],
+        [-100, 5, 6, 7, 8, -100, 2, 3],
+        [-100, 10, -100, -100, -100, -100, -100, -100],
+    ]
+
+
+def test_pack_tokens_restarts_positions():
+    input_ids, labels, position_ids = pack_tokens(TOKENS, LENGTHS, 8, PAD)
+
+    # Positions restart at every sample and at the padding
+    assert position_ids.tolist() == [
+        [0, 1, 2, 3, 4, 5, 6, 0],
+        [0, 1, 2, 3, 4, 0, 1, 2],
+        [0, 1, 0, 1, 2, 3, 4, 5],
+    ]
+
+
+def test_pack_tokens_keeps_every_token():
+    lengths = np.random.default_rng(1).integers(1, 33, size=200)
+    tokens = np.arange(1, lengths.sum() + 1)
+
+    input_ids, labels, position_ids = pack_tokens(tokens, lengths, 32, PAD)
+
+    assert sorted(input_ids[input_ids != PAD].tolist()) == tokens.tolist()
+    assert (labels != -100).sum() == lengths.sum() - len(lengths)
+    assert (position_ids == 0).sum() == len(lengths) + ((input_ids == PAD).sum(axis=1) > 0).sum()
@@ -17,6 +17,7 @@ Happy fine-tuning!
 
 import argparse
 import os
+import sys
 from transformers.utils import strtobool
 from trl import ORPOConfig, ORPOTrainer
 from transformers import TrainingArguments
@@ -27,6 +28,11 @@ import logging
 # Suppress unnecessary logging
 logging.getLogger('hf-to-gguf').setLevel(logging.WARNING)
 
+# The dedup manifests are written and checked by minhash_dedup.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Datasets", "dataset_pipelines", "near_duplicate_filter"))
+from minhash_dedup import select_deduplicated_rows  # noqa: E402
+
+
 def run(args):
     import torch
 
@@ -99,6 +105,8 @@ def run(args):
             dataset = MsDataset.load(args.dataset, split="train")
         else:
             dataset = load_dataset(args.dataset, split="train")
+    if args.dedup_manifest:
+        dataset = select_deduplicated_rows(dataset, args.dedup_manifest, args.csv_path or args.dataset)
 
     # Preprocess dataset
     dataset = dataset.map(format_prompt, batched=True)
@@ -198,6 +206,7 @@ if __name__ == "__main__":
     model_group.add_argument('--load_in_4bit', action='store_true', help="Use 4-bit quantization to reduce memory usage.")
     model_group.add_argument('--dataset', type=str, default="reciperesearch/dolphin-sft-v0.1-preference", help="Huggingface dataset to use for training.")
     model_group.add_argument('--csv_path', type=str, default=None, help="Path to a CSV file for training.")
+    model_group.add_argument('--dedup_manifest', type=str, default=None, help="Manifest written by minhash_dedup.py for the dataset; only its kept rows are trained on.")
 
     # LoRA Options
     lora_group = parser.add_argument_group("🧠 LoRA Options", "These options are used to configure the LoRA model.")
@@ -48,13 +48,17 @@ flowchart
 
 """
 
+import asyncio
 import json
+import math
 import os
 import re
 import sqlite3
 import traceback
+import uuid
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Union
+from collections import OrderedDict
+from typing import Iterator, List, Tuple, Union
 from urllib.parse import urlparse
 
 import pandas as pd
@@ -67,6 +71,26 @@ import sqlparse
 from ..exceptions import DependencyError, ImproperlyConfigured, ValidationError
 from ..types import TrainingPlan, TrainingPlanItem
 from ..utils import validate_config_path
+from .prompt_packer import PromptPacker, load_reranker
+
+
+def _iter_cursor_chunks(cursor, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield the result set of an executed DB-API cursor as DataFrames of at most `chunk_size` rows.
+
+    Rows are pulled with `cursor.fetchmany` so only one chunk is held in memory at a time. At least one
+    (possibly empty) DataFrame is always yielded so that callers can see the column names.
+    """
+    rows = cursor.fetchmany(chunk_size)
+    # Server-side cursors only populate the description after the first fetch
+    columns = [desc[0] for desc in cursor.description]
+    yield pd.DataFrame(rows, columns=columns)
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield pd.DataFrame(rows, columns=columns)
 
 
 class VannaBase(ABC):
@@ -80,6 +104,13 @@ class VannaBase(ABC):
         self.dialect = self.config.get("dialect", "SQL")
         self.language = self.config.get("language", None)
         self.max_tokens = self.config.get("max_tokens", 14000)
+        self.run_sql_chunk_size = self.config.get("run_sql_chunk_size", 10000)
+        self.max_result_rows = self.config.get("max_result_rows", None)
+        self.max_result_bytes = self.config.get("max_result_bytes", None)
+        self.tokenizer = self.config.get("tokenizer", None)
+        self.reranker = self.config.get("reranker", None)
+        self.prompt_packing = self.config.get("prompt_packing", False)
+        self._token_count_cache = OrderedDict()
 
     def log(self, message: str, title: str = "Info"):
         print(f"{title}: {message}")
@@ -321,7 +352,14 @@ class VannaBase(ABC):
             list: A list of followup questions that you can ask Vanna.AI.
         """
 
-        message_log = [
+        message_log = self._followup_questions_prompt(question, sql, df, n_questions)
+
+        llm_response = self.submit_prompt(message_log, **kwargs)
+
+        return self._parse_followup_questions(llm_response)
+
+    def _followup_questions_prompt(self, question: str, sql: str, df: pd.DataFrame, n_questions: int) -> list:
+        return [
             self.system_message(
                 f"You are a helpful data assistant. The user asked the question: '{question}'\n\nThe SQL query for this question was: {sql}\n\nThe following is a pandas DataFrame with the results of the query: \n{df.head(25).to_markdown()}\n\n"
             ),
@@ -331,8 +369,7 @@ class VannaBase(ABC):
             ),
         ]
 
-        llm_response = self.submit_prompt(message_log, **kwargs)
-
+    def _parse_followup_questions(self, llm_response: str) -> list:
         numbers_removed = re.sub(r"^\d+\.\s*", "", llm_response, flags=re.MULTILINE)
         return numbers_removed.split("\n")
 
@@ -366,7 +403,14 @@ class VannaBase(ABC):
             str: The summary of the results of the SQL query.
         """
 
-        message_log = [
+        message_log = self._summary_prompt(question, df)
+
+        summary = self.submit_prompt(message_log, **kwargs)
+
+        return summary
+
+    def _summary_prompt(self, question: str, df: pd.DataFrame) -> list:
+        return [
             self.system_message(
                 f"You are a helpful data assistant. The user asked the question: '{question}'\n\nThe following is a pandas DataFrame with the results of the query: \n{df.to_markdown()}\n\n"
             ),
@@ -376,10 +420,6 @@ class VannaBase(ABC):
             ),
         ]
 
-        summary = self.submit_prompt(message_log, **kwargs)
-
-        return summary
-
     # ----------------- Use Any Embeddings API ----------------- #
     @abstractmethod
     def generate_embedding(self, data: str, **kwargs) -> List[float]:
@@ -515,19 +555,66 @@ class VannaBase(ABC):
     def str_to_approx_token_count(self, string: str) -> int:
         return len(string) / 4
 
+    def _get_tokenizer(self):
+        if isinstance(self.tokenizer, str):
+            try:
+                from transformers import AutoTokenizer
+            except ImportError:
+                raise DependencyError(
+                    "You need to install required dependencies to execute this method, run command:"
+                    " \npip install transformers"
+                )
+
+            self.tokenizer = AutoTokenizer.from_pretrained(self.tokenizer)
+
+        return self.tokenizer
+
+    def count_tokens(self, string: str, cache: bool = True) -> int:
+        """
+        Example:
+        ```python
+        vn.count_tokens("SELECT * FROM customers")
+        ```
+
+        Count the tokens of a string with the tokenizer set in the `tokenizer` config (a Hugging Face model name or any object with an `encode` method). Without a tokenizer this falls back to [`vn.str_to_approx_token_count`][vanna.base.base.VannaBase.str_to_approx_token_count].
+
+        Args:
+            string (str): The string to count the tokens of.
+            cache (bool): Whether to remember the count. Retrieved DDL, documentation and SQL come back for many questions, so their counts are cached.
+
+        Returns:
+            int: The number of tokens.
+        """
+        if cache and string in self._token_count_cache:
+            self._token_count_cache.move_to_end(string)
+            return self._token_count_cache[string]
+
+        if self.tokenizer is None:
+            count = math.ceil(self.str_to_approx_token_count(string))
+        else:
+            count = len(self._get_tokenizer().encode(string))
+
+        if cache:
+            self._token_count_cache[string] = count
+
+            if len(self._token_count_cache) > 10000:
+                self._token_count_cache.popitem(last=False)
+
+        return count
+
     def add_ddl_to_prompt(
         self, initial_prompt: str, ddl_list: list[str], max_tokens: int = 14000
     ) -> str:
         if len(ddl_list) > 0:
             initial_prompt += "\n===Tables \n"
+            prompt_tokens = self.count_tokens(initial_prompt, cache=False)
 
             for ddl in ddl_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(ddl)
-                    < max_tokens
-                ):
+                ddl_tokens = self.count_tokens(ddl)
+
+                if prompt_tokens + ddl_tokens < max_tokens:
                     initial_prompt += f"{ddl}\n\n"
+                    prompt_tokens += ddl_tokens
 
         return initial_prompt
 
@@ -539,14 +626,14 @@ class VannaBase(ABC):
     ) -> str:
         if len(documentation_list) > 0:
             initial_prompt += "\n===Additional Context \n\n"
+            prompt_tokens = self.count_tokens(initial_prompt, cache=False)
 
             for documentation in documentation_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(documentation)
-                    < max_tokens
-                ):
+                documentation_tokens = self.count_tokens(documentation)
+
+                if prompt_tokens + documentation_tokens < max_tokens:
                     initial_prompt += f"{documentation}\n\n"
+                    prompt_tokens += documentation_tokens
 
         return initial_prompt
 
@@ -555,17 +642,75 @@ class VannaBase(ABC):
     ) -> str:
         if len(sql_list) > 0:
             initial_prompt += "\n===Question-SQL Pairs\n\n"
+            prompt_tokens = self.count_tokens(initial_prompt, cache=False)
 
             for question in sql_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(question["sql"])
-                    < max_tokens
-                ):
+                sql_tokens = self.count_tokens(question["sql"])
+
+                if prompt_tokens + sql_tokens < max_tokens:
                     initial_prompt += f"{question['question']}\n{question['sql']}\n\n"
+                    prompt_tokens += sql_tokens
 
         return initial_prompt
 
+    def pack_prompt_context(
+        self,
+        question: str,
+        ddl_list: list,
+        doc_list: list,
+        question_sql_list: list,
+        max_tokens: int,
+    ) -> Tuple[list, list, list]:
+        """
+        Example:
+        ```python
+        ddl_list, doc_list, question_sql_list = vn.pack_prompt_context(question, ddl_list, doc_list, question_sql_list, max_tokens=4000)
+        ```
+
+        Choose the DDL, documentation and question-SQL examples that maximize total relevance within `max_tokens`, using a [`PromptPacker`][vanna.base.prompt_packer.PromptPacker]. Relevance comes from the `reranker` config (a callable or a sentence-transformers CrossEncoder model name) or, without one, from the retrieval order. This is used by [`vn.get_sql_prompt`][vanna.base.base.VannaBase.get_sql_prompt] when the `prompt_packing` config is enabled.
+
+        Args:
+            question (str): The question the prompt is for.
+            ddl_list (list): The retrieved DDL statements.
+            doc_list (list): The retrieved documentation.
+            question_sql_list (list): The retrieved question-SQL pairs.
+            max_tokens (int): The number of tokens available for all three lists.
+
+        Returns:
+            Tuple[list, list, list]: The selected DDL, documentation and question-SQL pairs, each in retrieval order.
+        """
+        self.reranker = load_reranker(self.reranker)
+        packer = PromptPacker(count_tokens=self.count_tokens, reranker=self.reranker)
+
+        question_sql_list = [
+            example for example in question_sql_list
+            if example is not None and "question" in example and "sql" in example
+        ]
+
+        candidates = (
+            packer.candidates("ddl", ddl_list, ddl_list)
+            + packer.candidates("doc", doc_list, doc_list)
+            + packer.candidates(
+                "sql",
+                question_sql_list,
+                [f"{example['question']}\n{example['sql']}" for example in question_sql_list],
+            )
+        )
+
+        selected = packer.pack(question, candidates, max_tokens)
+
+        self.log(
+            title="Prompt Packing",
+            message=f"Selected {len(selected)} of {len(candidates)} context items "
+            f"({sum(candidate.tokens for candidate in selected)} tokens of {max_tokens} available)",
+        )
+
+        return (
+            [candidate.value for candidate in selected if candidate.kind == "ddl"],
+            [candidate.value for candidate in selected if candidate.kind == "doc"],
+            [candidate.value for candidate in selected if candidate.kind == "sql"],
+        )
+
     def get_sql_prompt(
         self,
         initial_prompt : str,
@@ -603,6 +748,28 @@ class VannaBase(ABC):
             initial_prompt = f"You are a {self.dialect} expert. " + \
             "Please help to generate a SQL query to answer the question. Your response should ONLY be based on the given context and follow the response guidelines and format instructions. "
 
+        response_guidelines = (
+            "===Response Guidelines \n"
+            "1. If the provided context is sufficient, please generate a valid SQL query without any explanations for the question. \n"
+            "2. If the provided context is almost sufficient but requires knowledge of a specific string in a particular column, please generate an intermediate SQL query to find the distinct strings in that column. Prepend the query with a comment saying intermediate_sql \n"
+            "3. If the provided context is insufficient, please explain why it can't be generated. \n"
+            "4. Please use the most relevant table(s). \n"
+            "5. If the question has been asked and answered before, please repeat the answer exactly as it was given before. \n"
+            f"6. Ensure that the output SQL is {self.dialect}-compliant and executable, and free of syntax errors. \n"
+        )
+
+        if self.prompt_packing:
+            # Everything except the retrieved context counts against the budget up front
+            reserved_tokens = (
+                self.count_tokens(initial_prompt, cache=False)
+                + self.count_tokens(response_guidelines)
+                + self.count_tokens(question, cache=False)
+                + self.count_tokens(self.static_documentation)
+            )
+            ddl_list, doc_list, question_sql_list = self.pack_prompt_context(
+                question, ddl_list, doc_list, question_sql_list, max_tokens=self.max_tokens - reserved_tokens
+            )
+
         initial_prompt = self.add_ddl_to_prompt(
             initial_prompt, ddl_list, max_tokens=self.max_tokens
         )
@@ -614,15 +781,7 @@ class VannaBase(ABC):
             initial_prompt, doc_list, max_tokens=self.max_tokens
         )
 
-        initial_prompt += (
-            "===Response Guidelines \n"
-            "1. If the provided context is sufficient, please generate a valid SQL query without any explanations for the question. \n"
-            "2. If the provided context is almost sufficient but requires knowledge of a specific string in a particular column, please generate an intermediate SQL query to find the distinct strings in that column. Prepend the query with a comment saying intermediate_sql \n"
-            "3. If the provided context is insufficient, please explain why it can't be generated. \n"
-            "4. Please use the most relevant table(s). \n"
-            "5. If the question has been asked and answered before, please repeat the answer exactly as it was given before. \n"
-            f"6. Ensure that the output SQL is {self.dialect}-compliant and executable, and free of syntax errors. \n"
-        )
+        initial_prompt += response_guidelines
 
         message_log = [self.system_message(initial_prompt)]
 
@@ -648,6 +807,15 @@ class VannaBase(ABC):
     ) -> list:
         initial_prompt = f"The user initially asked the question: '{question}': \n\n"
 
+        if self.prompt_packing:
+            ddl_list, doc_list, question_sql_list = self.pack_prompt_context(
+                question,
+                ddl_list,
+                doc_list,
+                question_sql_list,
+                max_tokens=self.max_tokens - self.count_tokens(initial_prompt, cache=False),
+            )
+
         initial_prompt = self.add_ddl_to_prompt(
             initial_prompt, ddl_list, max_tokens=self.max_tokens
         )
@@ -735,6 +903,13 @@ class VannaBase(ABC):
     def generate_plotly_code(
         self, question: str = None, sql: str = None, df_metadata: str = None, **kwargs
     ) -> str:
+        message_log = self._plotly_code_prompt(question, sql, df_metadata)
+
+        plotly_code = self.submit_prompt(message_log, kwargs=kwargs)
+
+        return self._sanitize_plotly_code(self._extract_python_code(plotly_code))
+
+    def _plotly_code_prompt(self, question: str = None, sql: str = None, df_metadata: str = None) -> list:
         if question is not None:
             system_msg = f"The following is a pandas DataFrame that contains the results of the query that answers the question the user asked: '{question}'"
         else:
@@ -745,17 +920,186 @@ class VannaBase(ABC):
 
         system_msg += f"The following is information about the resulting pandas DataFrame 'df': \n{df_metadata}"
 
-        message_log = [
+        return [
             self.system_message(system_msg),
             self.user_message(
                 "Can you generate the Python plotly code to chart the results of the dataframe? Assume the data is in a pandas dataframe called 'df'. If there is only one value in the dataframe, use an Indicator. Respond with only Python code. Do not answer with any explanations -- just the code."
             ),
         ]
 
-        plotly_code = self.submit_prompt(message_log, kwargs=kwargs)
+    # ----------------- Async API ----------------- #
+    # The `a`-prefixed methods mirror their synchronous counterparts for use from asyncio code (e.g. an ASGI app).
+    # LLM and vector store integrations with a native async client override `asubmit_prompt` and the `aget_`
+    # methods; the defaults run the synchronous implementation in a worker thread.
+
+    async def asubmit_prompt(self, prompt, **kwargs) -> str:
+        """
+        Example:
+        ```python
+        await vn.asubmit_prompt([vn.user_message("What is the capital of France?")])
+        ```
+
+        Async version of [`vn.submit_prompt`][vanna.base.base.VannaBase.submit_prompt].
+
+        Args:
+            prompt (any): The prompt to submit to the LLM.
+
+        Returns:
+            str: The response from the LLM.
+        """
+        return await asyncio.to_thread(self.submit_prompt, prompt, **kwargs)
+
+    async def aget_similar_question_sql(self, question: str, **kwargs) -> list:
+        return await asyncio.to_thread(self.get_similar_question_sql, question, **kwargs)
+
+    async def aget_related_ddl(self, question: str, **kwargs) -> list:
+        return await asyncio.to_thread(self.get_related_ddl, question, **kwargs)
+
+    async def aget_related_documentation(self, question: str, **kwargs) -> list:
+        return await asyncio.to_thread(self.get_related_documentation, question, **kwargs)
+
+    async def arun_sql(self, sql: str) -> pd.DataFrame:
+        return await asyncio.to_thread(self.run_sql, sql)
+
+    async def agenerate_sql(self, question: str, allow_llm_to_see_data=False, **kwargs) -> str:
+        """
+        Example:
+        ```python
+        sql = await vn.agenerate_sql("What are the top 10 customers by sales?")
+        ```
+
+        Async version of [`vn.generate_sql`][vanna.base.base.VannaBase.generate_sql]. The similar question-SQL pairs, related DDL and related documentation are retrieved concurrently.
+
+        Args:
+            question (str): The question to generate a SQL query for.
+            allow_llm_to_see_data (bool): Whether to allow the LLM to see the data (for the purposes of introspecting the data to generate the final SQL).
+
+        Returns:
+            str: The SQL query that answers the question.
+        """
+        if self.config is not None:
+            initial_prompt = self.config.get("initial_prompt", None)
+        else:
+            initial_prompt = None
+        question_sql_list, ddl_list, doc_list = await asyncio.gather(
+            self.aget_similar_question_sql(question, **kwargs),
+            self.aget_related_ddl(question, **kwargs),
+            self.aget_related_documentation(question, **kwargs),
+        )
+        prompt = self.get_sql_prompt(
+            initial_prompt=initial_prompt,
+            question=question,
+            question_sql_list=question_sql_list,
+            ddl_list=ddl_list,
+            doc_list=doc_list,
+            **kwargs,
+        )
+        self.log(title="SQL Prompt", message=prompt)
+        llm_response = await self.asubmit_prompt(prompt, **kwargs)
+        self.log(title="LLM Response", message=llm_response)
+
+        if 'intermediate_sql' in llm_response:
+            if not allow_llm_to_see_data:
+                return "The LLM is not allowed to see the data in your database. Your question requires database introspection to generate the necessary SQL. Please set allow_llm_to_see_data=True to enable this."
+
+            intermediate_sql = self.extract_sql(llm_response)
+
+            try:
+                self.log(title="Running Intermediate SQL", message=intermediate_sql)
+                df = await self.arun_sql(intermediate_sql)
+
+                prompt = self.get_sql_prompt(
+                    initial_prompt=initial_prompt,
+                    question=question,
+                    question_sql_list=question_sql_list,
+                    ddl_list=ddl_list,
+                    doc_list=doc_list+[f"The following is a pandas DataFrame with the results of the intermediate SQL query {intermediate_sql}: \n" + df.to_markdown()],
+                    **kwargs,
+                )
+                self.log(title="Final SQL Prompt", message=prompt)
+                llm_response = await self.asubmit_prompt(prompt, **kwargs)
+                self.log(title="LLM Response", message=llm_response)
+            except Exception as e:
+                return f"Error running intermediate SQL: {e}"
+
+        return self.extract_sql(llm_response)
+
+    async def agenerate_followup_questions(
+        self, question: str, sql: str, df: pd.DataFrame, n_questions: int = 5, **kwargs
+    ) -> list:
+        """
+        Async version of [`vn.generate_followup_questions`][vanna.base.base.VannaBase.generate_followup_questions].
+        """
+        message_log = self._followup_questions_prompt(question, sql, df, n_questions)
+
+        llm_response = await self.asubmit_prompt(message_log, **kwargs)
+
+        return self._parse_followup_questions(llm_response)
+
+    async def agenerate_summary(self, question: str, df: pd.DataFrame, **kwargs) -> str:
+        """
+        Async version of [`vn.generate_summary`][vanna.base.base.VannaBase.generate_summary].
+        """
+        return await self.asubmit_prompt(self._summary_prompt(question, df), **kwargs)
+
+    async def agenerate_plotly_code(
+        self, question: str = None, sql: str = None, df_metadata: str = None, **kwargs
+    ) -> str:
+        """
+        Async version of [`vn.generate_plotly_code`][vanna.base.base.VannaBase.generate_plotly_code].
+        """
+        message_log = self._plotly_code_prompt(question, sql, df_metadata)
+
+        plotly_code = await self.asubmit_prompt(message_log, kwargs=kwargs)
 
         return self._sanitize_plotly_code(self._extract_python_code(plotly_code))
 
+    async def agenerate_insights(
+        self,
+        question: str,
+        sql: str,
+        df: pd.DataFrame,
+        summary: bool = True,
+        followup_questions: bool = True,
+        plotly_code: bool = True,
+        **kwargs,
+    ) -> dict:
+        """
+        Example:
+        ```python
+        insights = await vn.agenerate_insights(question, sql, df)
+        ```
+
+        Generate the summary, followup questions and plotly code for a result concurrently. They only depend on the DataFrame, so there is no reason to wait for one before starting the next.
+
+        Args:
+            question (str): The question that was asked.
+            sql (str): The SQL query that was run.
+            df (pd.DataFrame): The results of the SQL query.
+            summary (bool): Whether to generate the summary.
+            followup_questions (bool): Whether to generate followup questions.
+            plotly_code (bool): Whether to generate plotly code.
+
+        Returns:
+            dict: `summary`, `followup_questions` and `plotly_code`, with None for anything that was not requested.
+        """
+
+        async def skip():
+            return None
+
+        results = await asyncio.gather(
+            self.agenerate_summary(question=question, df=df, **kwargs) if summary else skip(),
+            self.agenerate_followup_questions(question=question, sql=sql, df=df, **kwargs) if followup_questions else skip(),
+            self.agenerate_plotly_code(
+                question=question,
+                sql=sql,
+                df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+                **kwargs,
+            ) if plotly_code else skip(),
+        )
+
+        return dict(zip(["summary", "followup_questions", "plotly_code"], results))
+
     # ----------------- Connect to Any Database to run the Generated SQL ----------------- #
 
     def connect_to_snowflake(
@@ -836,8 +1180,29 @@ class VannaBase(ABC):
 
             return df
 
+        def run_sql_chunked_snowflake(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+            if chunk_size is None:
+                chunk_size = self.run_sql_chunk_size
+
+            cs = conn.cursor()
+
+            try:
+                if role is not None:
+                    cs.execute(f"USE ROLE {role}")
+
+                if warehouse is not None:
+                    cs.execute(f"USE WAREHOUSE {warehouse}")
+                cs.execute(f"USE DATABASE {database}")
+
+                cs.execute(sql)
+
+                yield from _iter_cursor_chunks(cs, chunk_size)
+            finally:
+                cs.close()
+
         self.dialect = "Snowflake SQL"
         self.run_sql = run_sql_snowflake
+        self.run_sql_chunked = run_sql_chunked_snowflake
         self.run_sql_is_set = True
 
     def connect_to_sqlite(self, url: str, check_same_thread: bool = False,  **kwargs):
@@ -874,8 +1239,22 @@ class VannaBase(ABC):
         def run_sql_sqlite(sql: str):
             return pd.read_sql_query(sql, conn)
 
+        def run_sql_chunked_sqlite(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+            if chunk_size is None:
+                chunk_size = self.run_sql_chunk_size
+
+            # sqlite3 cursors step through the result lazily
+            cs = conn.cursor()
+
+            try:
+                cs.execute(sql)
+                yield from _iter_cursor_chunks(cs, chunk_size)
+            finally:
+                cs.close()
+
         self.dialect = "SQLite"
         self.run_sql = run_sql_sqlite
+        self.run_sql_chunked = run_sql_chunked_sqlite
         self.run_sql_is_set = True
 
     def connect_to_postgres(
@@ -1000,9 +1379,38 @@ class VannaBase(ABC):
                         conn.rollback()
                         raise e
 
+        def run_sql_chunked_postgres(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+            if chunk_size is None:
+                chunk_size = self.run_sql_chunk_size
+
+            conn = connect_to_db()
+
+            try:
+                if self.is_sql_valid(sql=sql):
+                    # A named cursor is a server-side cursor: rows are only sent
+                    # over the wire as they are fetched.
+                    cs = conn.cursor(name=f"vanna_{uuid.uuid4().hex}")
+                    cs.itersize = chunk_size
+                else:
+                    # Server-side cursors only support SELECT statements
+                    cs = conn.cursor()
+
+                cs.execute(sql)
+                yield from _iter_cursor_chunks(cs, chunk_size)
+                cs.close()
+                conn.commit()
+
+            except psycopg2.Error as e:
+                conn.rollback()
+                raise ValidationError(e)
+
+            finally:
+                conn.close()
+
         self.dialect = "PostgreSQL"
         self.run_sql_is_set = True
         self.run_sql = run_sql_postgres
+        self.run_sql_chunked = run_sql_chunked_postgres
 
 
     def connect_to_mysql(
@@ -1090,8 +1498,29 @@ class VannaBase(ABC):
                     conn.rollback()
                     raise e
 
+        def run_sql_chunked_mysql(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+            if chunk_size is None:
+                chunk_size = self.run_sql_chunk_size
+
+            if conn:
+                try:
+                    conn.ping(reconnect=True)
+                    # Unbuffered cursor: rows are read from the socket as they are fetched
+                    cs = conn.cursor(pymysql.cursors.SSDictCursor)
+
+                    try:
+                        cs.execute(sql)
+                        yield from _iter_cursor_chunks(cs, chunk_size)
+                    finally:
+                        cs.close()
+
+                except pymysql.Error as e:
+                    conn.rollback()
+                    raise ValidationError(e)
+
         self.run_sql_is_set = True
         self.run_sql = run_sql_mysql
+        self.run_sql_chunked = run_sql_chunked_mysql
 
     def connect_to_clickhouse(
         self,
@@ -1260,8 +1689,32 @@ class VannaBase(ABC):
                     conn.rollback()
                     raise e
 
+        def run_sql_chunked_oracle(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+            if chunk_size is None:
+                chunk_size = self.run_sql_chunk_size
+
+            if conn:
+                try:
+                    sql = sql.rstrip()
+                    if sql.endswith(';'): #fix for a known problem with Oracle db where an extra ; will cause an error.
+                        sql = sql[:-1]
+
+                    cs = conn.cursor()
+                    cs.arraysize = chunk_size
+
+                    try:
+                        cs.execute(sql)
+                        yield from _iter_cursor_chunks(cs, chunk_size)
+                    finally:
+                        cs.close()
+
+                except oracledb.Error as e:
+                    conn.rollback()
+                    raise ValidationError(e)
+
         self.run_sql_is_set = True
         self.run_sql = run_sql_oracle
+        self.run_sql_chunked = run_sql_chunked_oracle
 
     def connect_to_bigquery(
         self,
@@ -1347,9 +1800,18 @@ class VannaBase(ABC):
                 return df
             return None
 
+        def run_sql_chunked_bigquery(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+            if chunk_size is None:
+                chunk_size = self.run_sql_chunk_size
+
+            if conn:
+                job = conn.query(sql)
+                yield from job.result(page_size=chunk_size).to_dataframe_iterable()
+
         self.dialect = "BigQuery SQL"
         self.run_sql_is_set = True
         self.run_sql = run_sql_bigquery
+        self.run_sql_chunked = run_sql_chunked_bigquery
 
     def connect_to_duckdb(self, url: str, init_sql: str = None, **kwargs):
         """
@@ -1396,8 +1858,22 @@ class VannaBase(ABC):
         def run_sql_duckdb(sql: str):
             return conn.query(sql).to_df()
 
+        def run_sql_chunked_duckdb(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+            if chunk_size is None:
+                chunk_size = self.run_sql_chunk_size
+
+            # Each cursor is a separate handle on the same database
+            cs = conn.cursor()
+
+            try:
+                cs.execute(sql)
+                yield from _iter_cursor_chunks(cs, chunk_size)
+            finally:
+                cs.close()
+
         self.dialect = "DuckDB SQL"
         self.run_sql = run_sql_duckdb
+        self.run_sql_chunked = run_sql_chunked_duckdb
         self.run_sql_is_set = True
 
     def connect_to_mssql(self, odbc_conn_str: str, **kwargs):
@@ -1444,8 +1920,26 @@ class VannaBase(ABC):
 
             raise Exception("Couldn't run sql")
 
+        def run_sql_chunked_mssql(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+            if chunk_size is None:
+                chunk_size = self.run_sql_chunk_size
+
+            with engine.connect() as conn:
+                result = conn.execution_options(stream_results=True).execute(sa.text(sql))
+                columns = list(result.keys())
+
+                rows = result.fetchmany(chunk_size)
+                yield pd.DataFrame(rows, columns=columns)
+
+                while True:
+                    rows = result.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield pd.DataFrame(rows, columns=columns)
+
         self.dialect = "T-SQL / Microsoft SQL Server"
         self.run_sql = run_sql_mssql
+        self.run_sql_chunked = run_sql_chunked_mssql
         self.run_sql_is_set = True
     def connect_to_presto(
         self,
@@ -1561,8 +2055,30 @@ class VannaBase(ABC):
             print(e)
             raise e
 
+      def run_sql_chunked_presto(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        if chunk_size is None:
+          chunk_size = self.run_sql_chunk_size
+
+        if conn:
+          try:
+            sql = sql.rstrip()
+            # fix for a known problem with presto db where an extra ; will cause an error.
+            if sql.endswith(';'):
+                sql = sql[:-1]
+            cs = conn.cursor()
+            try:
+              cs.execute(sql)
+              yield from _iter_cursor_chunks(cs, chunk_size)
+            finally:
+              cs.close()
+
+          except presto.Error as e:
+            print(e)
+            raise ValidationError(e)
+
       self.run_sql_is_set = True
       self.run_sql = run_sql_presto
+      self.run_sql_chunked = run_sql_chunked_presto
 
     def connect_to_hive(
         self,
@@ -1658,8 +2174,26 @@ class VannaBase(ABC):
             print(e)
             raise e
 
+      def run_sql_chunked_hive(sql: str, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        if chunk_size is None:
+          chunk_size = self.run_sql_chunk_size
+
+        if conn:
+          try:
+            cs = conn.cursor()
+            try:
+              cs.execute(sql)
+              yield from _iter_cursor_chunks(cs, chunk_size)
+            finally:
+              cs.close()
+
+          except hive.Error as e:
+            print(e)
+            raise ValidationError(e)
+
       self.run_sql_is_set = True
       self.run_sql = run_sql_hive
+      self.run_sql_chunked = run_sql_chunked_hive
 
     def run_sql(self, sql: str, **kwargs) -> pd.DataFrame:
         """
@@ -1680,6 +2214,155 @@ class VannaBase(ABC):
             "You need to connect to a database first by running vn.connect_to_snowflake(), vn.connect_to_postgres(), similar function, or manually set vn.run_sql"
         )
 
+    def run_sql_chunked(self, sql: str, chunk_size: int = None, **kwargs) -> Iterator[pd.DataFrame]:
+        """
+        Example:
+        ```python
+        for df in vn.run_sql_chunked("SELECT * FROM my_table", chunk_size=5000):
+            ...
+        ```
+
+        Run a SQL query on the connected database and yield the results as DataFrames of at most `chunk_size` rows.
+
+        The `vn.connect_to_...` helpers replace this with an implementation that uses a server-side cursor or `fetchmany`, so the full result set is never held in memory. If only [`vn.run_sql`][vanna.base.base.VannaBase.run_sql] has been set, the full result is fetched first and then split up.
+
+        Args:
+            sql (str): The SQL query to run.
+            chunk_size (int): The maximum number of rows per DataFrame. Defaults to the `run_sql_chunk_size` config value (10000).
+
+        Returns:
+            Iterator[pd.DataFrame]: The results of the SQL query, one chunk at a time.
+        """
+        if chunk_size is None:
+            chunk_size = self.run_sql_chunk_size
+
+        df = self.run_sql(sql=sql)
+
+        if df is None:
+            return
+
+        yield df.iloc[:chunk_size]
+
+        for start in range(chunk_size, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+    def run_sql_capped(
+        self,
+        sql: str,
+        max_rows: int = None,
+        max_bytes: int = None,
+        chunk_size: int = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Example:
+        ```python
+        df = vn.run_sql_capped("SELECT * FROM my_table", max_rows=100000)
+        if df.attrs["truncated"]:
+            print("Only showing the first 100000 rows")
+        ```
+
+        Run a SQL query on the connected database, reading the results in chunks and stopping as soon as the row or byte cap is reached. Use this instead of [`vn.run_sql`][vanna.base.base.VannaBase.run_sql] when the SQL was generated by an LLM and could return an arbitrarily large result.
+
+        Args:
+            sql (str): The SQL query to run.
+            max_rows (int): The maximum number of rows to return. Defaults to the `max_result_rows` config value (no limit).
+            max_bytes (int): The maximum in-memory size of the returned DataFrame, as measured by `DataFrame.memory_usage(deep=True)`. Defaults to the `max_result_bytes` config value (no limit).
+            chunk_size (int): The number of rows to fetch at a time. Defaults to the `run_sql_chunk_size` config value.
+
+        Returns:
+            pd.DataFrame: The results of the SQL query. `df.attrs["truncated"]` is True if rows were dropped to respect the caps.
+        """
+        if max_rows is None:
+            max_rows = self.max_result_rows
+
+        if max_bytes is None:
+            max_bytes = self.max_result_bytes
+
+        chunks = []
+        n_rows = 0
+        n_bytes = 0
+        truncated = False
+
+        stream = self.run_sql_chunked(sql=sql, chunk_size=chunk_size)
+
+        try:
+            for chunk in stream:
+                if max_rows is not None and n_rows + len(chunk) > max_rows:
+                    chunk = chunk.iloc[: max_rows - n_rows]
+                    truncated = True
+
+                chunk_bytes = int(chunk.memory_usage(index=True, deep=True).sum())
+
+                if max_bytes is not None and n_bytes + chunk_bytes > max_bytes:
+                    # Keep as many rows of this chunk as fit in the remaining budget
+                    bytes_per_row = chunk_bytes / max(len(chunk), 1)
+                    keep = max(int((max_bytes - n_bytes) // bytes_per_row), 0)
+                    chunk = chunk.iloc[:keep]
+                    chunk_bytes = int(chunk.memory_usage(index=True, deep=True).sum())
+                    truncated = True
+
+                if len(chunks) == 0 or len(chunk) > 0:
+                    chunks.append(chunk)
+                n_rows += len(chunk)
+                n_bytes += chunk_bytes
+
+                if truncated:
+                    break
+        finally:
+            # Closing the generator releases the cursor even if we stopped early
+            stream.close()
+
+        if len(chunks) == 0:
+            df = pd.DataFrame()
+        else:
+            df = pd.concat(chunks, ignore_index=True)
+
+        df.attrs["truncated"] = truncated
+
+        if truncated:
+            self.log(
+                title="Result Truncated",
+                message=f"Returning the first {n_rows} rows ({n_bytes} bytes) of the result",
+            )
+
+        return df
+
+    def run_sql_arrow(self, sql: str, chunk_size: int = None, **kwargs) -> Iterator["pyarrow.RecordBatch"]:
+        """
+        Example:
+        ```python
+        for batch in vn.run_sql_arrow("SELECT * FROM my_table"):
+            writer.write_batch(batch)
+        ```
+
+        Run a SQL query on the connected database and yield the results as Arrow record batches, using [`vn.run_sql_chunked`][vanna.base.base.VannaBase.run_sql_chunked] under the hood. All batches share the schema of the first one.
+
+        Args:
+            sql (str): The SQL query to run.
+            chunk_size (int): The maximum number of rows per record batch. Defaults to the `run_sql_chunk_size` config value.
+
+        Returns:
+            Iterator[pyarrow.RecordBatch]: The results of the SQL query, one batch at a time.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method,"
+                " run command: \npip install vanna[arrow]"
+            )
+
+        def record_batches():
+            schema = None
+
+            for chunk in self.run_sql_chunked(sql=sql, chunk_size=chunk_size):
+                batch = pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+                schema = batch.schema
+                yield batch
+
+        return record_batches()
+
     def ask(
         self,
         question: Union[str, None] = None,
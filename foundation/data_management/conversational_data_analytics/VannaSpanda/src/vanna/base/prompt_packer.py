@@ -0,0 +1,141 @@
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, List, Union
+
+from ..exceptions import DependencyError
+
+
+@dataclass
+class PromptCandidate:
+    kind: str
+    value: Any
+    text: str
+    rank: int
+    tokens: int
+    relevance: float = 0.0
+
+
+class PromptPacker:
+    """
+    Chooses which retrieved DDL, documentation and question-SQL examples go into a prompt.
+
+    Every candidate gets a relevance score, either from a reranker (e.g. a cross-encoder) or, without one, from its
+    position in the retrieval results (1 / (rank + 1)). The packer then solves the 0/1 knapsack problem of
+    maximizing the total relevance of the selected candidates within the token budget, so a single large DDL
+    statement no longer crowds out several small, more relevant ones just because it was retrieved first.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        reranker: Callable[[str, List[str]], List[float]] = None,
+        granularity: int = 16,
+        max_buckets: int = 2048,
+    ):
+        """
+        Args:
+            count_tokens: Returns the number of tokens of a string.
+            reranker: Scores the relevance of each text to the question. Defaults to None, which ranks by retrieval order.
+            granularity: Token counts are rounded up to multiples of this for the knapsack table.
+            max_buckets: The maximum width of the knapsack table; the granularity is increased for large budgets.
+        """
+        self.count_tokens = count_tokens
+        self.reranker = reranker
+        self.granularity = granularity
+        self.max_buckets = max_buckets
+
+    def candidates(self, kind: str, values: list, texts: List[str]) -> List[PromptCandidate]:
+        return [
+            PromptCandidate(kind=kind, value=value, text=text, rank=rank, tokens=self.count_tokens(text))
+            for rank, (value, text) in enumerate(zip(values, texts))
+        ]
+
+    def _score(self, question: str, candidates: List[PromptCandidate]):
+        if self.reranker is None:
+            for candidate in candidates:
+                candidate.relevance = 1.0 / (candidate.rank + 1)
+            return
+
+        scores = list(self.reranker(question, [candidate.text for candidate in candidates]))
+
+        # Cross-encoders return unbounded logits; shift them so that every candidate has a positive value
+        low, high = min(scores), max(scores)
+        spread = high - low
+
+        for candidate, score in zip(candidates, scores):
+            candidate.relevance = 1.0 if spread == 0 else 0.05 + (score - low) / spread
+
+    def pack(self, question: str, candidates: List[PromptCandidate], budget: int) -> List[PromptCandidate]:
+        """
+        Select the subset of candidates with the highest total relevance whose token counts sum to at most `budget`.
+
+        Args:
+            question (str): The question the prompt is for, passed to the reranker.
+            candidates (List[PromptCandidate]): The candidates to choose from.
+            budget (int): The number of tokens available.
+
+        Returns:
+            List[PromptCandidate]: The selected candidates, in their original order.
+        """
+        if budget <= 0 or len(candidates) == 0:
+            return []
+
+        if sum(candidate.tokens for candidate in candidates) <= budget:
+            return list(candidates)
+
+        self._score(question, candidates)
+
+        granularity = max(self.granularity, math.ceil(budget / self.max_buckets))
+        capacity = budget // granularity
+        weights = [max(math.ceil(candidate.tokens / granularity), 1) for candidate in candidates]
+
+        # best[w] is the highest relevance achievable with total weight <= w
+        best = [0.0] * (capacity + 1)
+        keep = []
+
+        for candidate, weight in zip(candidates, weights):
+            taken = [False] * (capacity + 1)
+
+            for w in range(capacity, weight - 1, -1):
+                value = best[w - weight] + candidate.relevance
+                if value > best[w]:
+                    best[w] = value
+                    taken[w] = True
+
+            keep.append(taken)
+
+        selected = []
+        w = capacity
+
+        for i in range(len(candidates) - 1, -1, -1):
+            if keep[i][w]:
+                selected.append(candidates[i])
+                w -= weights[i]
+
+        selected.reverse()
+
+        return selected
+
+
+def load_reranker(reranker: Union[str, Callable, None]) -> Union[Callable[[str, List[str]], List[float]], None]:
+    """
+    Turn the `reranker` config value into a scoring function. A string is loaded as a sentence-transformers
+    CrossEncoder model name, e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2".
+    """
+    if reranker is None or callable(reranker):
+        return reranker
+
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError:
+        raise DependencyError(
+            "You need to install required dependencies to execute this method, run command:"
+            " \npip install sentence-transformers"
+        )
+
+    model = CrossEncoder(reranker)
+
+    def rerank(question: str, texts: List[str]) -> List[float]:
+        return model.predict([(question, text) for text in texts]).tolist()
+
+    return rerank
@@ -1,19 +1,26 @@
+import io
 import json
 import logging
 import os
 import sys
+import threading
+import time
 import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 import importlib.metadata
 
 import flask
+import pandas as pd
 import requests
 from flasgger import Swagger
 from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_sock import Sock
 
 from ..base import VannaBase
+from ..exceptions import DependencyError
 from .assets import css_content, html_content, js_content
 from .auth import AuthInterface, NoAuth
 
@@ -92,6 +99,246 @@ class MemoryCache(Cache):
             del self.cache[id]
 
 
+def _estimate_size(value) -> int:
+    """
+    Estimate the number of bytes a cached value occupies in memory.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+
+    if isinstance(value, (str, bytes)):
+        return len(value)
+
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value.values())
+
+    return sys.getsizeof(value)
+
+
+class LRUMemoryCache(Cache):
+    """
+    An in-memory cache with a memory budget. Once the estimated size of all cached values (DataFrames are measured
+    with `DataFrame.memory_usage(deep=True)`) exceeds `max_bytes`, or more than `max_entries` questions are cached,
+    the least recently used questions are evicted. Questions that haven't been touched for `ttl` seconds are dropped.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, max_entries: int = None, ttl: float = None):
+        """
+        Args:
+            max_bytes: The memory budget for all cached values. Defaults to 512 MiB.
+            max_entries: The maximum number of questions to keep. Defaults to None, which means no limit.
+            ttl: Seconds after the last access after which a question is dropped. Defaults to None, which means never.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        # id -> {field: value}, ordered from least to most recently used
+        self.cache = OrderedDict()
+        self.sizes = {}
+        self.created = {}
+        self.last_used = {}
+        self.total_bytes = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def generate_id(self, *args, **kwargs):
+        return str(uuid.uuid4())
+
+    def _touch(self, id):
+        self.cache.move_to_end(id)
+        self.last_used[id] = time.monotonic()
+
+    def _remove(self, id):
+        del self.cache[id]
+        self.total_bytes -= sum(self.sizes.pop(id).values())
+        del self.created[id]
+        del self.last_used[id]
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+
+        deadline = time.monotonic() - self.ttl
+
+        # The least recently used entries are at the front
+        while self.cache:
+            id = next(iter(self.cache))
+            if self.last_used[id] > deadline:
+                break
+            self._remove(id)
+            self.evictions += 1
+
+    def _evict(self, keep_id):
+        while len(self.cache) > 1 and (
+            self.total_bytes > self.max_bytes
+            or (self.max_entries is not None and len(self.cache) > self.max_entries)
+        ):
+            id = next(iter(self.cache))
+            if id == keep_id:
+                # Never evict the question that is currently being worked on
+                self.cache.move_to_end(id)
+                id = next(iter(self.cache))
+            self._remove(id)
+            self.evictions += 1
+
+    def set(self, id, field, value):
+        with self.lock:
+            self._expire()
+
+            if id not in self.cache:
+                self.cache[id] = {}
+                self.sizes[id] = {}
+                self.created[id] = time.monotonic()
+
+            size = _estimate_size(value)
+            self.total_bytes += size - self.sizes[id].get(field, 0)
+            self.sizes[id][field] = size
+            self.cache[id][field] = value
+            self._touch(id)
+
+            self._evict(keep_id=id)
+
+    def get(self, id, field):
+        with self.lock:
+            self._expire()
+
+            if id not in self.cache:
+                return None
+
+            self._touch(id)
+
+            return self.cache[id].get(field)
+
+    def get_all(self, field_list) -> list:
+        with self.lock:
+            self._expire()
+
+            ids = sorted(self.cache, key=lambda id: self.created[id])
+
+            return [
+                {"id": id, **{field: self.cache[id].get(field) for field in field_list}}
+                for id in ids
+            ]
+
+    def delete(self, id):
+        with self.lock:
+            if id in self.cache:
+                self._remove(id)
+
+
+class RedisCache(Cache):
+    """
+    A cache backed by Redis so that several Flask / gunicorn workers can share question state. DataFrames are stored
+    as Parquet, everything else as JSON. Questions expire `ttl` seconds after they were last written.
+    """
+
+    _JSON = b"j"
+    _PARQUET = b"p"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        client=None,
+        prefix: str = "vanna:cache:",
+        ttl: int = 24 * 60 * 60,
+    ):
+        """
+        Args:
+            url: The Redis URL to connect to. Ignored if `client` is passed.
+            client: An existing `redis.Redis` client. Defaults to None, which creates one from `url`.
+            prefix: The prefix for all keys written by this cache.
+            ttl: Seconds after the last write after which a question expires. Defaults to one day.
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise DependencyError(
+                    "You need to install required dependencies to execute this method,"
+                    " run command: \npip install vanna[redis]"
+                )
+
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.index_key = f"{prefix}ids"
+
+    def _key(self, id):
+        return f"{self.prefix}{id}"
+
+    def _dumps(self, value) -> bytes:
+        if isinstance(value, pd.DataFrame):
+            buffer = io.BytesIO()
+            value.to_parquet(buffer, index=True)
+            return self._PARQUET + buffer.getvalue()
+
+        return self._JSON + json.dumps(value).encode("utf-8")
+
+    def _loads(self, data: bytes):
+        if data is None:
+            return None
+
+        if data[:1] == self._PARQUET:
+            return pd.read_parquet(io.BytesIO(data[1:]))
+
+        return json.loads(data[1:].decode("utf-8"))
+
+    def generate_id(self, *args, **kwargs):
+        return str(uuid.uuid4())
+
+    def set(self, id, field, value):
+        key = self._key(id)
+
+        pipeline = self.client.pipeline()
+        pipeline.hset(key, field, self._dumps(value))
+        pipeline.expire(key, self.ttl)
+        pipeline.zadd(self.index_key, {id: time.time()}, nx=True)
+        pipeline.execute()
+
+    def get(self, id, field):
+        return self._loads(self.client.hget(self._key(id), field))
+
+    def get_all(self, field_list) -> list:
+        ids = [id.decode("utf-8") if isinstance(id, bytes) else id for id in self.client.zrange(self.index_key, 0, -1)]
+
+        pipeline = self.client.pipeline()
+        for id in ids:
+            pipeline.exists(self._key(id))
+            pipeline.hmget(self._key(id), field_list)
+        results = pipeline.execute()
+
+        entries = []
+        expired = []
+
+        for i, id in enumerate(ids):
+            exists, values = results[2 * i], results[2 * i + 1]
+
+            if not exists:
+                expired.append(id)
+                continue
+
+            entries.append(
+                {"id": id, **{field: self._loads(value) for field, value in zip(field_list, values)}}
+            )
+
+        if expired:
+            self.client.zrem(self.index_key, *expired)
+
+        return entries
+
+    def delete(self, id):
+        pipeline = self.client.pipeline()
+        pipeline.delete(self._key(id))
+        pipeline.zrem(self.index_key, id)
+        pipeline.execute()
+
+
 class VannaFlaskAPI:
     flask_app = None
 
@@ -153,7 +400,7 @@ class VannaFlaskAPI:
 
         Args:
             vn: The Vanna instance to interact with.
-            cache: The cache to use. Defaults to MemoryCache, which uses an in-memory cache. You can also pass in a custom cache that implements the Cache interface.
+            cache: The cache to use. Defaults to MemoryCache, which uses an unbounded in-memory cache. Use LRUMemoryCache to bound memory usage, RedisCache to share state between workers, or pass in a custom cache that implements the Cache interface.
             auth: The authentication method to use. Defaults to NoAuth, which doesn't require authentication. You can also pass in a custom authentication method that implements the AuthInterface interface.
             debug: Show the debug console. Defaults to True.
             allow_llm_to_see_data: Whether to allow the LLM to see data. Defaults to False.
@@ -176,6 +423,8 @@ class VannaFlaskAPI:
         self.debug = debug
         self.allow_llm_to_see_data = allow_llm_to_see_data
         self.chart = chart
+        # Runs the independent LLM calls of generate_insights concurrently
+        self.executor = ThreadPoolExecutor(thread_name_prefix="vanna-insights")
         self.config = {
           "debug": debug,
           "allow_llm_to_see_data": allow_llm_to_see_data,
@@ -470,8 +719,8 @@ class VannaFlaskAPI:
 
         @self.flask_app.route("/api/v0/run_sql", methods=["GET"])
         @self.requires_auth
-        @self.requires_cache(["sql"])
-        def run_sql(user: any, id: str, sql: str):
+        @self.requires_cache(["sql"], optional_fields=["question"])
+        def run_sql(user: any, id: str, sql: str, question):
             """
             Run SQL
             ---
@@ -496,6 +745,8 @@ class VannaFlaskAPI:
                       type: object
                     should_generate_chart:
                       type: boolean
+                    truncated:
+                      type: boolean
             """
             try:
                 if not vn.run_sql_is_set:
@@ -506,7 +757,19 @@ class VannaFlaskAPI:
                         }
                     )
 
-                df = vn.run_sql(sql=sql)
+                df = None
+
+                if hasattr(vn, "get_cached_result"):
+                    df = vn.get_cached_result(sql=sql)
+
+                if df is None:
+                    # Capped by the max_result_rows / max_result_bytes config of the Vanna instance
+                    df = vn.run_sql_capped(sql=sql)
+
+                    # The SQL ran successfully, so it's safe to reuse for similar questions. Cached results are
+                    # not added again, so that they keep their timestamp and expire
+                    if question is not None and hasattr(vn, "add_to_semantic_cache"):
+                        vn.add_to_semantic_cache(question=question, sql=sql, df=df)
 
                 self.cache.set(id=id, field="df", value=df)
 
@@ -516,6 +779,7 @@ class VannaFlaskAPI:
                         "id": id,
                         "df": df.head(10).to_json(orient='records', date_format='iso'),
                         "should_generate_chart": self.chart and vn.should_generate_chart(df),
+                        "truncated": df.attrs.get("truncated", False),
                     }
                 )
 
@@ -620,8 +884,8 @@ class VannaFlaskAPI:
 
         @self.flask_app.route("/api/v0/download_csv", methods=["GET"])
         @self.requires_auth
-        @self.requires_cache(["df"])
-        def download_csv(user: any, id: str, df):
+        @self.requires_cache(["sql"], optional_fields=["df"])
+        def download_csv(user: any, id: str, sql, df):
             """
             Download CSV
             ---
@@ -636,10 +900,28 @@ class VannaFlaskAPI:
               200:
                 description: download CSV
             """
-            csv = df.to_csv()
+            chunk_size = vn.run_sql_chunk_size
+
+            if df is not None and not df.attrs.get("truncated", False):
+                # The cached DataFrame is the full result
+                chunks = (df.iloc[start:start + chunk_size] for start in range(0, max(len(df), 1), chunk_size))
+            elif vn.run_sql_is_set:
+                # The cached DataFrame was capped, so stream the full result from the database
+                chunks = vn.run_sql_chunked(sql=sql, chunk_size=chunk_size)
+            else:
+                return jsonify({"type": "error", "error": "No df found"})
+
+            def generate_csv():
+                offset = 0
+
+                for i, chunk in enumerate(chunks):
+                    chunk = chunk.set_axis(range(offset, offset + len(chunk)), axis=0)
+                    offset += len(chunk)
+
+                    yield chunk.to_csv(header=(i == 0))
 
             return Response(
-                csv,
+                generate_csv(),
                 mimetype="text/csv",
                 headers={"Content-disposition": f"attachment; filename={id}.csv"},
             )
@@ -1035,6 +1317,96 @@ class VannaFlaskAPI:
                     }
                 )
 
+        @self.flask_app.route("/api/v0/generate_insights", methods=["GET"])
+        @self.requires_auth
+        @self.requires_cache(["df", "question", "sql"])
+        def generate_insights(user: any, id: str, df, question, sql):
+            """
+            Generate the summary, followup questions and chart for a result concurrently
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: id
+                in: query|body
+                type: string
+                required: true
+            responses:
+              200:
+                schema:
+                  type: object
+                  properties:
+                    type:
+                      type: string
+                      default: insights
+                    id:
+                      type: string
+                    summary:
+                      type: string
+                    questions:
+                      type: array
+                      items:
+                        type: string
+                    fig:
+                      type: object
+            """
+            futures = {}
+
+            if self.allow_llm_to_see_data:
+                futures["summary"] = self.executor.submit(
+                    vn.generate_summary, question=question, df=df
+                )
+                futures["followup_questions"] = self.executor.submit(
+                    vn.generate_followup_questions, question=question, sql=sql, df=df
+                )
+
+            if self.chart and vn.should_generate_chart(df):
+                futures["plotly_code"] = self.executor.submit(
+                    vn.generate_plotly_code,
+                    question=question,
+                    sql=sql,
+                    df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+                )
+
+            try:
+                summary = None
+                followup_questions = []
+                fig_json = None
+
+                if "summary" in futures:
+                    summary = futures["summary"].result()
+                    self.cache.set(id=id, field="summary", value=summary)
+
+                if "followup_questions" in futures:
+                    followup_questions = futures["followup_questions"].result()
+                    if followup_questions is not None and len(followup_questions) > 5:
+                        followup_questions = followup_questions[:5]
+                    self.cache.set(id=id, field="followup_questions", value=followup_questions)
+
+                if "plotly_code" in futures:
+                    code = futures["plotly_code"].result()
+                    self.cache.set(id=id, field="plotly_code", value=code)
+
+                    fig = vn.get_plotly_figure(plotly_code=code, df=df, dark_mode=False)
+                    fig_json = fig.to_json()
+                    self.cache.set(id=id, field="fig_json", value=fig_json)
+
+                return jsonify(
+                    {
+                        "type": "insights",
+                        "id": id,
+                        "summary": summary,
+                        "questions": followup_questions,
+                        "fig": fig_json,
+                    }
+                )
+            except Exception as e:
+                import traceback
+
+                traceback.print_exc()
+
+                return jsonify({"type": "error", "error": str(e)})
+
         @self.flask_app.route("/api/v0/load_question", methods=["GET"])
         @self.requires_auth
         @self.requires_cache(
@@ -1118,6 +1490,36 @@ class VannaFlaskAPI:
                 }
             )
 
+        @self.flask_app.route("/api/v0/get_semantic_cache_stats", methods=["GET"])
+        @self.requires_auth
+        def get_semantic_cache_stats(user: any):
+            """
+            Get semantic cache statistics
+            ---
+            parameters:
+              - name: user
+                in: query
+            responses:
+              200:
+                schema:
+                  type: object
+                  properties:
+                    type:
+                      type: string
+                      default: semantic_cache_stats
+                    stats:
+                      type: object
+            """
+            if not hasattr(vn, "semantic_cache_stats"):
+                return jsonify({"type": "error", "error": "This setup does not use a semantic cache."})
+
+            return jsonify(
+                {
+                    "type": "semantic_cache_stats",
+                    "stats": vn.semantic_cache_stats(),
+                }
+            )
+
         @self.flask_app.route("/api/v0/<path:catch_all>", methods=["GET", "POST"])
         def catch_all(catch_all):
             return jsonify(
@@ -1196,7 +1598,7 @@ class VannaFlaskApp(VannaFlaskAPI):
 
         Args:
             vn: The Vanna instance to interact with.
-            cache: The cache to use. Defaults to MemoryCache, which uses an in-memory cache. You can also pass in a custom cache that implements the Cache interface.
+            cache: The cache to use. Defaults to MemoryCache, which uses an unbounded in-memory cache. Use LRUMemoryCache to bound memory usage, RedisCache to share state between workers, or pass in a custom cache that implements the Cache interface.
             auth: The authentication method to use. Defaults to NoAuth, which doesn't require authentication. You can also pass in a custom authentication method that implements the AuthInterface interface.
             debug: Show the debug console. Defaults to True.
             allow_llm_to_see_data: Whether to allow the LLM to see data. Defaults to False.
@@ -1,5 +1,7 @@
+import asyncio
 import json
 import re
+import weakref
 
 from httpx import Timeout
 
@@ -30,6 +32,8 @@ class Ollama(VannaBase):
     self.ollama_timeout = config.get("ollama_timeout", 240.0)
 
     self.ollama_client = ollama.Client(self.host, timeout=Timeout(self.ollama_timeout))
+    # One async client per event loop, since connections can't be shared between loops
+    self._async_clients = weakref.WeakKeyDictionary()
     self.keep_alive = config.get('keep_alive', None)
     self.ollama_options = config.get('options', {})
     self.num_ctx = self.ollama_options.get('num_ctx', 2048)
@@ -101,3 +105,26 @@ class Ollama(VannaBase):
     self.log(f"Ollama Response:\n{str(response_dict)}")
 
     return response_dict['message']['content']
+
+  def _get_async_client(self):
+    loop = asyncio.get_running_loop()
+    client = self._async_clients.get(loop)
+
+    if client is None:
+      ollama = __import__("ollama")
+      client = ollama.AsyncClient(self.host, timeout=Timeout(self.ollama_timeout))
+      self._async_clients[loop] = client
+
+    return client
+
+  async def asubmit_prompt(self, prompt, **kwargs) -> str:
+    self.log(f"Prompt Content:\n{json.dumps(prompt, ensure_ascii=False)}")
+    response_dict = await self._get_async_client().chat(model=self.model,
+                                                        messages=prompt,
+                                                        stream=False,
+                                                        options=self.ollama_options,
+                                                        keep_alive=self.keep_alive)
+
+    self.log(f"Ollama Response:\n{str(response_dict)}")
+
+    return response_dict['message']['content']
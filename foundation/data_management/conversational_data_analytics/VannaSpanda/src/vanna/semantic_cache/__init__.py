@@ -0,0 +1 @@
+from .semantic_cache import SemanticCache
@@ -0,0 +1,281 @@
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from ..base import VannaBase
+
+
+class SemanticCache(VannaBase):
+    """
+    Answers repeated or paraphrased questions from a cache of previously validated SQL instead of running the full
+    retrieval + LLM round-trip of [`vn.generate_sql`][vanna.base.base.VannaBase.generate_sql].
+
+    A question is a hit if the cosine similarity between its embedding (from `vn.generate_embedding`) and the
+    embedding of a cached question is at least `semantic_cache_threshold`. Entries are only added for SQL that is
+    known to be good: SQL that ran successfully (see [`vn.add_to_semantic_cache`][vanna.semantic_cache.SemanticCache.add_to_semantic_cache])
+    or question-SQL pairs added as training data. Adding DDL or documentation and removing training data bumps the
+    schema version, which invalidates every cached entry.
+
+    List it first among the base classes so that it wraps the vector store:
+
+    ```python
+    class MyVanna(SemanticCache, ChromaDB_VectorStore, OpenAI_Chat):
+        def __init__(self, config=None):
+            ChromaDB_VectorStore.__init__(self, config=config)
+            OpenAI_Chat.__init__(self, config=config)
+            SemanticCache.__init__(self, config=config)
+    ```
+
+    Config:
+        semantic_cache_threshold (float): The minimum cosine similarity for a hit. Defaults to 0.95.
+        semantic_cache_max_entries (int): The maximum number of cached questions. Defaults to 1000.
+        semantic_cache_store_results (bool): Whether to also cache result DataFrames. Defaults to False.
+        semantic_cache_result_ttl (float): Seconds a cached result DataFrame stays valid. Defaults to 300.
+    """
+
+    def __init__(self, config=None):
+        if config is None:
+            config = {}
+
+        self.semantic_cache_threshold = config.get("semantic_cache_threshold", 0.95)
+        self.semantic_cache_max_entries = config.get("semantic_cache_max_entries", 1000)
+        self.semantic_cache_store_results = config.get("semantic_cache_store_results", False)
+        self.semantic_cache_result_ttl = config.get("semantic_cache_result_ttl", 300)
+
+        self.schema_version = 0
+        self.semantic_cache_hits = 0
+        self.semantic_cache_misses = 0
+
+        # normalized question -> {"question", "sql", "embedding", "schema_version"}
+        self._semantic_cache = OrderedDict()
+        # sql -> (DataFrame, timestamp)
+        self._semantic_cache_results = OrderedDict()
+        # Unit-normalized embeddings of all entries, rebuilt lazily after a change
+        self._semantic_cache_matrix = None
+        self._semantic_cache_keys = []
+        self._semantic_cache_lock = threading.RLock()
+
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        return re.sub(r"\s+", " ", question.strip().lower()).rstrip("?.! ")
+
+    def _embed(self, question: str) -> np.ndarray:
+        embedding = np.asarray(self.generate_embedding(question), dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+
+        if norm == 0:
+            return embedding
+
+        return embedding / norm
+
+    def _rebuild_matrix(self):
+        self._semantic_cache_keys = list(self._semantic_cache)
+
+        if self._semantic_cache_keys:
+            self._semantic_cache_matrix = np.stack(
+                [self._semantic_cache[key]["embedding"] for key in self._semantic_cache_keys]
+            )
+        else:
+            self._semantic_cache_matrix = None
+
+    def get_cached_sql(self, question: str) -> Union[dict, None]:
+        """
+        Example:
+        ```python
+        vn.get_cached_sql("Who are our 10 biggest customers by revenue?")
+        ```
+
+        Look up a previously validated SQL query for the question or a paraphrase of it.
+
+        Args:
+            question (str): The question to look up.
+
+        Returns:
+            dict: The cached `question` and `sql` plus the `similarity` of the match, or None on a miss.
+        """
+        key = self._normalize_question(question)
+
+        with self._semantic_cache_lock:
+            entry = self._semantic_cache.get(key)
+
+            if entry is not None and entry["schema_version"] == self.schema_version:
+                self._semantic_cache.move_to_end(key)
+                self.semantic_cache_hits += 1
+                return {"question": entry["question"], "sql": entry["sql"], "similarity": 1.0}
+
+            if len(self._semantic_cache) == 0:
+                self.semantic_cache_misses += 1
+                return None
+
+        embedding = self._embed(question)
+
+        with self._semantic_cache_lock:
+            if self._semantic_cache_matrix is None:
+                self._rebuild_matrix()
+
+            if self._semantic_cache_matrix is None or self._semantic_cache_matrix.shape[1] != embedding.shape[0]:
+                self.semantic_cache_misses += 1
+                return None
+
+            similarities = self._semantic_cache_matrix @ embedding
+            best = int(np.argmax(similarities))
+            entry = self._semantic_cache.get(self._semantic_cache_keys[best])
+
+            if (
+                entry is None
+                or entry["schema_version"] != self.schema_version
+                or similarities[best] < self.semantic_cache_threshold
+            ):
+                self.semantic_cache_misses += 1
+                return None
+
+            self._semantic_cache.move_to_end(self._semantic_cache_keys[best])
+            self.semantic_cache_hits += 1
+
+            return {"question": entry["question"], "sql": entry["sql"], "similarity": float(similarities[best])}
+
+    def add_to_semantic_cache(self, question: str, sql: str, df: pd.DataFrame = None) -> None:
+        """
+        Example:
+        ```python
+        df = vn.run_sql(sql)
+        vn.add_to_semantic_cache(question, sql, df)
+        ```
+
+        Record that the SQL correctly answers the question, typically after it ran successfully. The Flask API calls
+        this automatically from its `run_sql` endpoint.
+
+        Args:
+            question (str): The question that was answered.
+            sql (str): The SQL query that answered it.
+            df (pd.DataFrame): The result of the SQL query. Only kept if `semantic_cache_store_results` is enabled.
+        """
+        key = self._normalize_question(question)
+        embedding = self._embed(question)
+
+        with self._semantic_cache_lock:
+            self._semantic_cache[key] = {
+                "question": question,
+                "sql": sql,
+                "embedding": embedding,
+                "schema_version": self.schema_version,
+            }
+            self._semantic_cache.move_to_end(key)
+
+            while len(self._semantic_cache) > self.semantic_cache_max_entries:
+                self._semantic_cache.popitem(last=False)
+
+            self._semantic_cache_matrix = None
+
+            if self.semantic_cache_store_results and df is not None:
+                self._semantic_cache_results[sql] = (df, time.monotonic())
+                self._semantic_cache_results.move_to_end(sql)
+
+                while len(self._semantic_cache_results) > self.semantic_cache_max_entries:
+                    self._semantic_cache_results.popitem(last=False)
+
+    def get_cached_result(self, sql: str) -> Union[pd.DataFrame, None]:
+        """
+        Get the cached result of a SQL query, if `semantic_cache_store_results` is enabled and the result hasn't
+        expired.
+
+        Args:
+            sql (str): The SQL query.
+
+        Returns:
+            pd.DataFrame: The cached result, or None.
+        """
+        with self._semantic_cache_lock:
+            cached = self._semantic_cache_results.get(sql)
+
+            if cached is None:
+                return None
+
+            df, timestamp = cached
+
+            if time.monotonic() - timestamp > self.semantic_cache_result_ttl:
+                del self._semantic_cache_results[sql]
+                return None
+
+            return df
+
+    def invalidate_semantic_cache(self) -> None:
+        """
+        Bump the schema version and drop every cached question and result.
+        """
+        with self._semantic_cache_lock:
+            self.schema_version += 1
+            self._semantic_cache.clear()
+            self._semantic_cache_results.clear()
+            self._semantic_cache_matrix = None
+
+    def semantic_cache_stats(self) -> dict:
+        """
+        Returns:
+            dict: The hit and miss counts, the hit rate, the number of cached questions and the schema version.
+        """
+        with self._semantic_cache_lock:
+            lookups = self.semantic_cache_hits + self.semantic_cache_misses
+
+            return {
+                "hits": self.semantic_cache_hits,
+                "misses": self.semantic_cache_misses,
+                "hit_rate": self.semantic_cache_hits / lookups if lookups else 0.0,
+                "entries": len(self._semantic_cache),
+                "results": len(self._semantic_cache_results),
+                "schema_version": self.schema_version,
+            }
+
+    def generate_sql(self, question: str, allow_llm_to_see_data=False, **kwargs) -> str:
+        cached = self.get_cached_sql(question)
+
+        if cached is not None:
+            self.log(
+                title="Semantic Cache Hit",
+                message=f"Reusing the SQL for '{cached['question']}' (similarity {cached['similarity']:.3f})",
+            )
+            return cached["sql"]
+
+        return super().generate_sql(question, allow_llm_to_see_data=allow_llm_to_see_data, **kwargs)
+
+    async def agenerate_sql(self, question: str, allow_llm_to_see_data=False, **kwargs) -> str:
+        # The embedding call is synchronous
+        cached = await asyncio.to_thread(self.get_cached_sql, question)
+
+        if cached is not None:
+            self.log(
+                title="Semantic Cache Hit",
+                message=f"Reusing the SQL for '{cached['question']}' (similarity {cached['similarity']:.3f})",
+            )
+            return cached["sql"]
+
+        return await super().agenerate_sql(question, allow_llm_to_see_data=allow_llm_to_see_data, **kwargs)
+
+    def add_question_sql(self, question: str, sql: str, **kwargs) -> str:
+        id = super().add_question_sql(question=question, sql=sql, **kwargs)
+
+        # Training data is validated by definition
+        self.add_to_semantic_cache(question=question, sql=sql)
+
+        return id
+
+    def add_ddl(self, ddl: str, **kwargs) -> str:
+        id = super().add_ddl(ddl, **kwargs)
+        self.invalidate_semantic_cache()
+        return id
+
+    def add_documentation(self, documentation: str, **kwargs) -> str:
+        id = super().add_documentation(documentation, **kwargs)
+        self.invalidate_semantic_cache()
+        return id
+
+    def remove_training_data(self, id: str, **kwargs) -> bool:
+        removed = super().remove_training_data(id, **kwargs)
+        self.invalidate_semantic_cache()
+        return removed
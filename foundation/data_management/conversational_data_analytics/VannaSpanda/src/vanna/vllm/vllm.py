@@ -1,8 +1,11 @@
+import asyncio
 import re
+import weakref
 
 import requests
 
 from ..base import VannaBase
+from ..exceptions import DependencyError
 
 
 class Vllm(VannaBase):
@@ -28,6 +31,14 @@ class Vllm(VannaBase):
             # default temperature - can be overrided using config
             self.temperature = 0.7
 
+        self.timeout = config.get("timeout", None)
+        self.max_connections = config.get("max_connections", 100)
+
+        # Reuse connections to the vLLM server across requests
+        self.session = requests.Session()
+        # One httpx client per event loop, since connections can't be shared between loops
+        self._async_clients = weakref.WeakKeyDictionary()
+
     def system_message(self, message: str) -> any:
         return {"role": "system", "content": message}
 
@@ -59,10 +70,7 @@ class Vllm(VannaBase):
         else:
             return text
 
-    def generate_sql(self, question: str, **kwargs) -> str:
-        # Use the super generate_sql
-        sql = super().generate_sql(question, **kwargs)
-
+    def _clean_sql(self, sql: str) -> str:
         # Replace "\_" with "_"
         sql = sql.replace("\\_", "_")
 
@@ -70,7 +78,18 @@ class Vllm(VannaBase):
 
         return self.extract_sql_query(sql)
 
-    def submit_prompt(self, prompt, **kwargs) -> str:
+    def generate_sql(self, question: str, **kwargs) -> str:
+        # Use the super generate_sql
+        sql = super().generate_sql(question, **kwargs)
+
+        return self._clean_sql(sql)
+
+    async def agenerate_sql(self, question: str, **kwargs) -> str:
+        sql = await super().agenerate_sql(question, **kwargs)
+
+        return self._clean_sql(sql)
+
+    def _chat_completions_request(self, prompt):
         url = f"{self.host}/v1/chat/completions"
         data = {
             "model": self.model,
@@ -80,19 +99,63 @@ class Vllm(VannaBase):
         }
 
         if self.auth_key is not None:
-            headers = { 
-            'Content-Type': 'application/json', 
-            'Authorization': f'Bearer {self.auth_key}' 
+            headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.auth_key}'
             }
+        else:
+            headers = None
 
-            response = requests.post(url, headers=headers,json=data)
+        return url, headers, data
 
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        url, headers, data = self._chat_completions_request(prompt)
 
-        else:
-            response = requests.post(url, json=data)
+        response = self.session.post(url, headers=headers, json=data, timeout=self.timeout)
 
         response_dict = response.json()
 
         self.log(response.text)
 
         return response_dict['choices'][0]['message']['content']
+
+    def _get_async_client(self):
+        try:
+            import httpx
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method, run command:"
+                " \npip install httpx"
+            )
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections),
+            )
+            self._async_clients[loop] = client
+
+        return client
+
+    async def asubmit_prompt(self, prompt, **kwargs) -> str:
+        url, headers, data = self._chat_completions_request(prompt)
+
+        response = await self._get_async_client().post(url, headers=headers, json=data)
+
+        response_dict = response.json()
+
+        self.log(response.text)
+
+        return response_dict['choices'][0]['message']['content']
+
+    async def aclose(self):
+        """
+        Close the httpx client of the running event loop.
+        """
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+
+        if client is not None:
+            await client.aclose()
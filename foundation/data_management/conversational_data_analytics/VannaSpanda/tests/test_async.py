@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+
+from vanna.base import VannaBase
+from vanna.mock import MockEmbedding, MockLLM, MockVectorDB
+
+
+class VannaSlowLLM(MockEmbedding, MockVectorDB, MockLLM):
+    def __init__(self, config=None):
+        VannaBase.__init__(self, config=config)
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        time.sleep(0.2)
+        return "```sql\nSELECT * FROM customers LIMIT 10;\n```"
+
+
+class VannaOverlapLLM(MockEmbedding, MockVectorDB, MockLLM):
+    """Records how many LLM calls are in flight at once."""
+
+    def __init__(self, expected_calls, config=None):
+        VannaBase.__init__(self, config=config)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        # Only passed once `expected_calls` calls are in flight together
+        self.barrier = threading.Barrier(expected_calls, timeout=10)
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self.barrier.wait()
+        finally:
+            with self.lock:
+                self.active -= 1
+        return "```sql\nSELECT * FROM customers LIMIT 10;\n```"
+
+
+def test_agenerate_sql():
+    vn = VannaSlowLLM()
+
+    sql = asyncio.run(vn.agenerate_sql("What are the top 10 customers?"))
+
+    assert sql == vn.generate_sql("What are the top 10 customers?")
+
+
+def test_agenerate_insights_runs_concurrently():
+    vn = VannaOverlapLLM(expected_calls=3)
+    df = pd.DataFrame({"customer": ["a", "b"], "sales": [10, 20]})
+
+    insights = asyncio.run(
+        vn.agenerate_insights(question="What are the sales per customer?", sql="SELECT 1", df=df)
+    )
+
+    assert set(insights) == {"summary", "followup_questions", "plotly_code"}
+    assert all(value is not None for value in insights.values())
+    # The three LLM calls were in flight at the same time
+    assert vn.max_active == 3
+
+
+def test_agenerate_insights_skips_unrequested():
+    vn = VannaSlowLLM()
+    df = pd.DataFrame({"sales": [10, 20]})
+
+    insights = asyncio.run(
+        vn.agenerate_insights(question="q", sql="SELECT 1", df=df, summary=False, plotly_code=False)
+    )
+
+    assert insights["summary"] is None
+    assert insights["plotly_code"] is None
+    assert insights["followup_questions"] is not None
@@ -0,0 +1,76 @@
+import time
+
+import pandas as pd
+import pytest
+
+from vanna.flask import LRUMemoryCache, RedisCache
+
+
+def test_lru_memory_cache_evicts_least_recently_used():
+    df = pd.DataFrame({"n": range(1000)})
+    df_size = int(df.memory_usage(index=True, deep=True).sum())
+
+    cache = LRUMemoryCache(max_bytes=int(df_size * 2.5))
+
+    for id in ["a", "b", "c"]:
+        cache.set(id=id, field="df", value=df)
+        # Touch "a" so that "b" becomes the least recently used entry
+        cache.get(id="a", field="df")
+
+    assert cache.get(id="a", field="df") is not None
+    assert cache.get(id="b", field="df") is None
+    assert cache.get(id="c", field="df") is not None
+    assert cache.evictions == 1
+    assert cache.total_bytes <= cache.max_bytes
+
+
+def test_lru_memory_cache_keeps_current_entry_over_budget():
+    cache = LRUMemoryCache(max_bytes=10)
+
+    cache.set(id="a", field="question", value="What are the top 10 customers by sales?")
+
+    assert cache.get(id="a", field="question") is not None
+
+
+def test_lru_memory_cache_max_entries_and_history_order():
+    cache = LRUMemoryCache(max_entries=2)
+
+    cache.set(id="a", field="question", value="first")
+    cache.set(id="b", field="question", value="second")
+    cache.get(id="a", field="question")
+    cache.set(id="c", field="question", value="third")
+
+    assert cache.get_all(field_list=["question"]) == [
+        {"id": "a", "question": "first"},
+        {"id": "c", "question": "third"},
+    ]
+
+
+def test_lru_memory_cache_ttl():
+    cache = LRUMemoryCache(ttl=0.05)
+
+    cache.set(id="a", field="sql", value="SELECT 1")
+    time.sleep(0.1)
+
+    assert cache.get(id="a", field="sql") is None
+    assert cache.total_bytes == 0
+
+
+def test_redis_cache_round_trip():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("pyarrow")
+
+    cache = RedisCache(client=fakeredis.FakeRedis())
+    df = pd.DataFrame({"n": [1, 2, 3]})
+
+    cache.set(id="a", field="df", value=df)
+    cache.set(id="a", field="followup_questions", value=["Why?"])
+
+    pd.testing.assert_frame_equal(cache.get(id="a", field="df"), df)
+    assert cache.get_all(field_list=["followup_questions"]) == [
+        {"id": "a", "followup_questions": ["Why?"]}
+    ]
+
+    cache.delete(id="a")
+    assert cache.get(id="a", field="df") is None
+    assert cache.get_all(field_list=["followup_questions"]) == []
@@ -29,6 +29,7 @@ def test_regular_imports():
     from vanna.qianwen.QianwenAI_chat import QianWenAI_Chat
     from vanna.qianwen.QianwenAI_embeddings import QianWenAI_Embeddings
     from vanna.remote import VannaDefault
+    from vanna.semantic_cache.semantic_cache import SemanticCache
     from vanna.vannadb.vannadb_vector import VannaDB_VectorStore
     from vanna.weaviate.weaviate_vector import WeaviateDatabase
     from vanna.xinference.xinference import Xinference
@@ -57,6 +58,7 @@ def test_shortcut_imports():
     from vanna.qdrant import Qdrant_VectorStore
     from vanna.qianfan import Qianfan_Chat, Qianfan_Embeddings
     from vanna.qianwen import QianWenAI_Chat, QianWenAI_Embeddings
+    from vanna.semantic_cache import SemanticCache
     from vanna.vannadb import VannaDB_VectorStore
     from vanna.vllm import Vllm
     from vanna.weaviate import WeaviateDatabase
@@ -0,0 +1,76 @@
+from itertools import combinations
+
+from vanna.base import VannaBase
+from vanna.base.prompt_packer import PromptPacker
+from vanna.mock import MockEmbedding, MockLLM, MockVectorDB
+
+
+class VannaCountingTokens(MockEmbedding, MockVectorDB, MockLLM):
+    def __init__(self, config=None):
+        VannaBase.__init__(self, config=config)
+        self.measured = []
+
+    def str_to_approx_token_count(self, string: str) -> int:
+        self.measured.append(string)
+        return len(string) / 4
+
+
+def test_pack_is_optimal():
+    packer = PromptPacker(count_tokens=len, granularity=1)
+    texts = ["a" * 60, "b" * 30, "c" * 30, "d" * 25, "e" * 50]
+    candidates = packer.candidates("ddl", texts, texts)
+
+    selected = packer.pack("question", candidates, budget=90)
+
+    def relevance(subset):
+        return sum(1.0 / (candidate.rank + 1) for candidate in subset)
+
+    best = max(
+        (subset for n in range(len(candidates) + 1) for subset in combinations(candidates, n)
+         if sum(candidate.tokens for candidate in subset) <= 90),
+        key=relevance,
+    )
+
+    assert sum(candidate.tokens for candidate in selected) <= 90
+    assert relevance(selected) == relevance(best)
+    assert [candidate.rank for candidate in selected] == sorted(candidate.rank for candidate in selected)
+
+
+def test_pack_uses_reranker():
+    def reranker(question, texts):
+        return [1.0 if "orders" in text else 0.0 for text in texts]
+
+    packer = PromptPacker(count_tokens=len, reranker=reranker, granularity=1)
+    texts = ["CREATE TABLE customers", "CREATE TABLE orders"]
+
+    selected = packer.pack("How many orders?", packer.candidates("ddl", texts, texts), budget=20)
+
+    assert [candidate.text for candidate in selected] == ["CREATE TABLE orders"]
+
+
+def test_token_counts_are_cached():
+    vn = VannaCountingTokens()
+    ddl_list = ["CREATE TABLE a (id INT)", "CREATE TABLE b (id INT)"]
+
+    vn.add_ddl_to_prompt("", ddl_list)
+    vn.add_ddl_to_prompt("", ddl_list)
+
+    assert vn.measured.count(ddl_list[0]) == 1
+
+
+def test_get_sql_prompt_with_packing_respects_budget():
+    vn = VannaCountingTokens(config={"prompt_packing": True, "max_tokens": 600})
+    ddl_list = [f"CREATE TABLE t{i} ({'x INT, ' * 40})" for i in range(10)]
+    question_sql_list = [{"question": f"q{i}", "sql": f"SELECT {i}"} for i in range(5)]
+
+    prompt = vn.get_sql_prompt(
+        initial_prompt=None,
+        question="How many rows are in t0?",
+        question_sql_list=question_sql_list,
+        ddl_list=ddl_list,
+        doc_list=[],
+    )
+
+    total = sum(vn.count_tokens(message["content"], cache=False) for message in prompt)
+    assert total <= 600
+    assert "CREATE TABLE t0" in prompt[0]["content"]
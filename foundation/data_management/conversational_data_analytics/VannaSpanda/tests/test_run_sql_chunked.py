@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from vanna.base import VannaBase
+from vanna.mock import MockEmbedding, MockLLM, MockVectorDB
+
+
+class VannaSqlite(MockEmbedding, MockVectorDB, MockLLM):
+    def __init__(self, config=None):
+        VannaBase.__init__(self, config=config)
+
+
+@pytest.fixture
+def vn(tmp_path):
+    path = tmp_path / "numbers.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE numbers (n INTEGER, label TEXT)")
+    conn.executemany(
+        "INSERT INTO numbers VALUES (?, ?)", [(i, f"row {i}") for i in range(25)]
+    )
+    conn.commit()
+    conn.close()
+
+    vn = VannaSqlite(config={"run_sql_chunk_size": 10})
+    vn.connect_to_sqlite(str(path))
+    return vn
+
+
+def test_run_sql_chunked(vn):
+    chunks = list(vn.run_sql_chunked("SELECT * FROM numbers"))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert list(chunks[0].columns) == ["n", "label"]
+
+
+def test_run_sql_chunked_empty_result_keeps_columns(vn):
+    chunks = list(vn.run_sql_chunked("SELECT * FROM numbers WHERE n < 0"))
+    assert len(chunks) == 1
+    assert list(chunks[0].columns) == ["n", "label"]
+
+
+def test_run_sql_capped_rows(vn):
+    df = vn.run_sql_capped("SELECT * FROM numbers", max_rows=12)
+    assert len(df) == 12
+    assert df.attrs["truncated"]
+    assert df["n"].tolist() == list(range(12))
+
+
+def test_run_sql_capped_exact_fit_is_not_truncated(vn):
+    df = vn.run_sql_capped("SELECT * FROM numbers", max_rows=25)
+    assert len(df) == 25
+    assert not df.attrs["truncated"]
+
+
+def test_run_sql_capped_bytes(vn):
+    full = vn.run_sql("SELECT * FROM numbers")
+    budget = int(full.memory_usage(index=True, deep=True).sum()) // 2
+
+    df = vn.run_sql_capped("SELECT * FROM numbers", max_bytes=budget)
+    assert 0 < len(df) < 25
+    assert df.attrs["truncated"]
+
+
+def test_run_sql_chunked_falls_back_to_run_sql(vn):
+    df = vn.run_sql("SELECT * FROM numbers")
+    vn.run_sql = lambda sql: df
+
+    chunks = list(VannaBase.run_sql_chunked(vn, "SELECT * FROM numbers", chunk_size=20))
+    assert [len(chunk) for chunk in chunks] == [20, 5]
+
+
+def test_run_sql_arrow(vn):
+    pytest.importorskip("pyarrow")
+
+    batches = list(vn.run_sql_arrow("SELECT * FROM numbers"))
+    assert sum(batch.num_rows for batch in batches) == 25
+    assert all(batch.schema == batches[0].schema for batch in batches)
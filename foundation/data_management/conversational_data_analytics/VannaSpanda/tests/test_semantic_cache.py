@@ -0,0 +1,95 @@
+from typing import List
+
+import pandas as pd
+
+import vanna.semantic_cache.semantic_cache as semantic_cache
+from vanna.base import VannaBase
+from vanna.flask import MemoryCache, VannaFlaskAPI
+from vanna.mock import MockLLM, MockVectorDB
+from vanna.semantic_cache import SemanticCache
+
+
+class VannaSemanticCache(SemanticCache, MockVectorDB, MockLLM):
+    def __init__(self, config=None):
+        VannaBase.__init__(self, config=config)
+        SemanticCache.__init__(self, config=config)
+        self.llm_calls = 0
+
+    def generate_embedding(self, data: str, **kwargs) -> List[float]:
+        # Bag of words over a tiny vocabulary, enough to tell paraphrases apart from new questions
+        vocabulary = ["top", "customers", "sales", "revenue", "artists", "genre"]
+        words = data.lower().replace("?", "").split()
+        return [float(words.count(word)) for word in vocabulary]
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        self.llm_calls += 1
+        return "SELECT * FROM customers ORDER BY sales DESC LIMIT 10"
+
+
+def test_semantic_cache_hit_and_miss():
+    vn = VannaSemanticCache(config={"semantic_cache_threshold": 0.9})
+
+    sql = vn.generate_sql("What are the top 10 customers by sales?")
+    assert vn.llm_calls == 1
+
+    vn.add_to_semantic_cache("What are the top 10 customers by sales?", sql)
+
+    assert vn.generate_sql("what are the top 10 customers by sales") == sql
+    assert vn.generate_sql("Show me the top customers by sales") == sql
+    assert vn.llm_calls == 1
+
+    vn.generate_sql("Which genre has the most artists?")
+    assert vn.llm_calls == 2
+
+    stats = vn.semantic_cache_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+
+def test_semantic_cache_invalidated_by_ddl():
+    vn = VannaSemanticCache()
+
+    vn.add_question_sql("What are the top customers by sales?", "SELECT 1")
+    assert vn.get_cached_sql("What are the top customers by sales?") is not None
+
+    vn.add_ddl("CREATE TABLE customers (id INT, sales DECIMAL)")
+
+    assert vn.get_cached_sql("What are the top customers by sales?") is None
+    assert vn.semantic_cache_stats()["schema_version"] == 1
+
+
+def test_semantic_cache_results():
+    vn = VannaSemanticCache(config={"semantic_cache_store_results": True})
+    df = pd.DataFrame({"customer": ["a", "b"]})
+
+    vn.add_to_semantic_cache("What are the top customers by sales?", "SELECT 1", df)
+
+    assert vn.get_cached_result("SELECT 1") is df
+    assert vn.get_cached_result("SELECT 2") is None
+
+
+def test_flask_run_sql_recomputes_expired_results(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+    vn = VannaSemanticCache(config={"semantic_cache_store_results": True, "semantic_cache_result_ttl": 60})
+    runs = []
+
+    def run_sql(sql, **kwargs):
+        runs.append(sql)
+        return pd.DataFrame({"run": [len(runs)]})
+
+    vn.run_sql = run_sql
+    vn.run_sql_is_set = True
+    cache = MemoryCache()
+    client = VannaFlaskAPI(vn, cache=cache, debug=False).flask_app.test_client()
+    cache.set(id="1", field="question", value="What are the top customers by sales?")
+    cache.set(id="1", field="sql", value="SELECT 1")
+
+    assert client.get("/api/v0/run_sql?id=1").json["df"] == '[{"run":1}]'
+    now[0] += 50
+    # Served from the cache, which keeps its original timestamp
+    assert client.get("/api/v0/run_sql?id=1").json["df"] == '[{"run":1}]'
+    now[0] += 20
+    assert client.get("/api/v0/run_sql?id=1").json["df"] == '[{"run":2}]'
+    assert len(runs) == 2
@@ -1,10 +1,12 @@
 import os
 import shlex
 import logging
+from typing import List, Optional
 import yaml
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
 import docker
+from model_pool import ModelPoolManager
 
 # Load configuration from file if available, otherwise use defaults
 config_path = "config.yaml"
@@ -19,7 +21,10 @@ else:
             "app_network": "app_network",
             "platform_network": "platform_network",
             "gpu_runtime": "nvidia"
-        }
+        },
+        # Replicas per model, warm standbys and health checking, see
+        # model_pool.DEFAULT_POOL_CONFIG.
+        "pool": {}
     }
 
 # Configure logging
@@ -34,72 +39,46 @@ app = FastAPI()
 
 # Create a Docker client
 client = docker.from_env()
+pool_manager = ModelPoolManager(client, config["docker"], config.get("pool"))
 
 # Define a Pydantic model for input validation
 class StartVLLMRequest(BaseModel):
     hf_token: str = Field(..., min_length=1, description="Hugging Face Hub token")
     model_name: str = Field(..., min_length=1, description="Name of the model to run")
     command: str = Field(default="", description="Additional command arguments")
+    replicas: Optional[int] = Field(default=None, ge=1, description="Number of replicas serving requests")
+    warm_standby: Optional[int] = Field(default=None, ge=0, description="Number of ready replicas kept in reserve")
+    devices: List[str] = Field(default_factory=list, description="NVIDIA_VISIBLE_DEVICES of each replica and standby, e.g. [\"0\", \"1\"]")
 
 @app.post("/start-vllm")
 def start_vllm_container(request: StartVLLMRequest):
-    hf_token = request.hf_token
     model_name = request.model_name
-    command = request.command
-    # Use the part after the last '/' as the container name
-    container_name = model_name.split("/")[-1]
+    logger.info(f"Starting vLLM pool for model: {model_name}")
 
-    logger.info(f"Starting vLLM container for model: {model_name} (container name: {container_name})")
-
-    # Build the command list for the container
-    command_list = ["--model", model_name]
-    if command:
+    # Build the command list for the containers
+    command_list = []
+    if request.command:
         try:
-            extra_args = shlex.split(command)
-            command_list.extend(extra_args)
-            logger.info(f"Parsed additional command arguments: {extra_args}")
+            command_list = shlex.split(request.command)
+            logger.info(f"Parsed additional command arguments: {command_list}")
         except Exception as e:
             logger.error(f"Error parsing command arguments: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Invalid command format: {str(e)}")
     
     try:
-        # Run the container using the Docker SDK
-        container = client.containers.run(
-            image=config["docker"]["image_name"],
-            name=container_name,
-            detach=True,
-            runtime=config["docker"]["gpu_runtime"],
-            environment={"HUGGING_FACE_HUB_TOKEN": hf_token},
-            ports={"8000/tcp": 7000},
-            volumes={
-                os.path.expanduser("~") + "/.cache/huggingface": {
-                    "bind": "/root/.cache/huggingface",
-                    "mode": "rw"
-                }
-            },
-            ipc_mode="host",
-            network=config["docker"]["app_network"],
-            command=command_list
+        pool = pool_manager.start_pool(
+            model_name,
+            request.hf_token,
+            command_list,
+            replicas=request.replicas,
+            warm_standby=request.warm_standby,
+            devices=request.devices,
         )
-        logger.info(f"Container started with ID: {container.id}")
-
-        # Attach the container to the platform network
-        platform_network = config["docker"]["platform_network"]
-        try:
-            network_obj = client.networks.get(platform_network)
-            network_obj.connect(container)
-            logger.info(f"Container {container_name} attached to network: {platform_network}")
-        except docker.errors.NotFound:
-            logger.error(f"Platform network {platform_network} not found.")
-            raise HTTPException(status_code=500, detail=f"Platform network {platform_network} not found.")
-        except Exception as e:
-            logger.error(f"Error attaching container to platform network: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error attaching container to platform network: {str(e)}")
-        
-        return {
-            "message": "vLLM container started and attached to platform network successfully",
-            "container_id": container.id
-        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except docker.errors.NotFound as e:
+        logger.error(f"Docker resource not found: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Docker resource not found: {str(e)}")
     except docker.errors.APIError as e:
         logger.error(f"Docker API error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Docker API error: {str(e)}")
@@ -107,64 +86,61 @@ def start_vllm_container(request: StartVLLMRequest):
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+    return {
+        "message": "vLLM containers started, they receive requests once they pass the health check",
+        "container_ids": [replica.container_id for replica in pool.members]
+    }
+
 @app.post("/stop-vllm")
 def stop_vllm_container(model_name: str):
-    # Use the last part of the model name as the container name
-    container_name = model_name.split("/")[-1]
-    logger.info(f"Received request to stop container: {container_name}")
+    logger.info(f"Received request to stop the pool of: {model_name}")
     try:
-        container = client.containers.get(container_name)
-        container.stop()
-        container.remove()
-        logger.info(f"Container {container_name} stopped and removed successfully")
-        return {"message": f"vLLM container {container_name} stopped and removed successfully"}
-    except docker.errors.NotFound:
-        logger.error(f"Container {container_name} not found")
-        raise HTTPException(status_code=404, detail=f"Container {container_name} not found")
-    except docker.errors.APIError as e:
-        logger.error(f"Docker API error while stopping/removing container: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Docker API error: {str(e)}")
+        container_names = pool_manager.stop_pool(model_name)
+    except KeyError:
+        logger.error(f"No pool running for {model_name}")
+        raise HTTPException(status_code=404, detail=f"No pool running for {model_name}")
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+    logger.info(f"Containers {container_names} stopped and removed successfully")
+    return {"message": f"vLLM containers {', '.join(container_names)} stopped and removed successfully"}
 
 @app.get("/status-vllm")
 def status_vllm_container(model_name: str):
-    container_name = model_name.split("/")[-1]
-    logger.info(f"Checking status of container: {container_name}")
     try:
-        container = client.containers.get(container_name)
-        return {"container_id": container.id, "status": container.status}
-    except docker.errors.NotFound:
-        logger.error(f"Container {container_name} not found")
-        raise HTTPException(status_code=404, detail=f"Container {container_name} not found")
-    except Exception as e:
-        logger.error(f"Error retrieving container status: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+        return pool_manager.status(model_name)
+    except KeyError:
+        logger.error(f"No pool running for {model_name}")
+        raise HTTPException(status_code=404, detail=f"No pool running for {model_name}")
+
+@app.get("/registry")
+def registry():
+    """Ready replicas of every model, for the clients balancing requests themselves."""
+    return {"models": pool_manager.registry()}
+
+@app.get("/route")
+def route(model_name: str):
+    """Next ready replica of the model, round-robin."""
+    try:
+        replica = pool_manager.route(model_name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No pool running for {model_name}")
+    except LookupError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return replica
 
 @app.on_event("startup")
 def startup_event():
     logger.info("FastAPI server starting up")
-    # Cleanup orphaned containers matching our naming convention
-    for container in client.containers.list(all=True):
-        if container.name.startswith("vllm"):
-            try:
-                container.remove(force=True)
-                logger.info(f"Removed orphaned container: {container.name}")
-            except Exception as e:
-                logger.error(f"Error removing container {container.name}: {str(e)}")
+    # Cleanup the containers started by a previous run of the pool manager
+    pool_manager.remove_orphans()
+    pool_manager.run_in_background()
 
 @app.on_event("shutdown")
 def shutdown_event():
     logger.info("FastAPI server shutting down")
-    # Stop all running vLLM containers gracefully
-    for container in client.containers.list():
-        if container.name.startswith("vllm"):
-            try:
-                container.stop()
-                logger.info(f"Stopped container during shutdown: {container.name}")
-            except Exception as e:
-                logger.error(f"Error stopping container {container.name}: {str(e)}")
+    pool_manager.shutdown()
+    pool_manager.stop_all()
 
 if __name__ == "__main__":
     import uvicorn
@@ -8,6 +8,7 @@ generation. Supported dataset types include:
   - Random (synthetic)
   - Sonnet
   - BurstGPT
+  - RubricAnalysis (synthetic or NDJSON request log replay)
   - HuggingFace
   - VisionArena
 """
@@ -17,9 +18,11 @@ import io
 import json
 import logging
 import random
+import re
 from abc import ABC, abstractmethod
 from collections.abc import Mapping
 from dataclasses import dataclass
+from datetime import datetime
 from functools import cache
 from io import BytesIO
 from typing import Any, Callable, Optional, Union
@@ -54,6 +57,7 @@ class SampleRequest:
     expected_output_len: int
     multi_modal_data: Optional[Union[MultiModalDataDict, dict]] = None
     lora_request: Optional[LoRARequest] = None
+    arrival_time: Optional[float] = None
 
 
 # -----------------------------------------------------------------------------
@@ -688,6 +692,305 @@ class BurstGPTDataset(BenchmarkDataset):
         return samples
 
 
+# -----------------------------------------------------------------------------
+# Rubric Analysis Dataset Implementation
+# -----------------------------------------------------------------------------
+
+
+class RubricAnalysisDataset(BenchmarkDataset):
+    """
+    Models rubric-based document analysis traffic, e.g. dissertation
+    evaluation: every document is split into chunks that are summarized in
+    concurrent map bursts, then the whole document is sent as a long shared
+    prefix followed by one short prompt per rubric criterion.
+
+    Without a dataset path the trace is generated synthetically. With a
+    dataset path, captured request logs are replayed from an NDJSON file with
+    one request per line, e.g.
+    ```
+    {"timestamp": 1718000000.0, "prompt": "...", "output_tokens": 212}
+    {
+        "timestamp": "2024-06-10T06:13:20.4Z",
+        "system_prompt": "...",
+        "user_prompt": "...",
+    }
+    ```
+    `timestamp` is optional and is either seconds or an ISO 8601 string. Each
+    sampled request carries its `arrival_time`, in seconds after the first
+    request, so the serving benchmark can reproduce the inter-arrival timing
+    with `--replay-arrival-times`. Requests are returned in arrival order;
+    they must not be shuffled, since the order determines which prefixes are
+    already cached.
+    """
+
+    DEFAULT_DOCUMENT_LEN = 4096
+    DEFAULT_NUM_CRITERIA = 8
+    DEFAULT_CRITERION_LEN = 64
+    DEFAULT_CHUNK_LEN = 1000
+    DEFAULT_CHUNK_BATCH_SIZE = 5
+    DEFAULT_OUTPUT_LEN = 256
+    DEFAULT_CHUNK_OUTPUT_LEN = 128
+    DEFAULT_DOCUMENT_INTERVAL = 10.0
+    DEFAULT_BURST_INTERVAL = 2.0
+
+    SUMMARY_PROMPT = (
+        "# Dissertation Summarization\n"
+        "Distill the segment below into a summary paragraph "
+        "that preserves the core arguments, key evidence and "
+        "conclusions.\n\n## Dissertation Segment\n"
+    )
+    ANALYSIS_PROMPT = (
+        "# Dissertation Analysis\n"
+        "Evaluate the dissertation below against a single "
+        "rubric criterion.\n\n## Dissertation\n"
+    )
+    CRITERION_PROMPT = "\n\n## Criterion {index}\n"
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        if self.dataset_path is not None:
+            self.load_data()
+
+    @staticmethod
+    def _parse_timestamp(value: Any) -> Optional[float]:
+        if value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        # Before Python 3.11 fromisoformat() only accepts 3 or 6 fractional
+        # digits and no "Z" suffix, so normalize both first.
+        text = str(value).replace("Z", "+00:00")
+        text = re.sub(
+            r"\.(\d+)", lambda m: "." + m.group(1)[:6].ljust(6, "0"), text, count=1
+        )
+        return datetime.fromisoformat(text).timestamp()
+
+    def load_data(self) -> None:
+        if self.dataset_path is None:
+            raise ValueError("dataset_path must be provided for loading data.")
+
+        self.data = []
+        with open(self.dataset_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "prompt" in record:
+                    prompt = record["prompt"]
+                else:
+                    prompt = "\n\n".join(
+                        record[key]
+                        for key in ("system_prompt", "user_prompt")
+                        if record.get(key)
+                    )
+                if not prompt:
+                    raise ValueError(
+                        "Each request log line must contain a 'prompt' or a "
+                        "'system_prompt'/'user_prompt' pair."
+                    )
+                output_len = next(
+                    (
+                        record[key]
+                        for key in ("output_tokens", "completion_tokens", "max_tokens")
+                        if record.get(key) is not None
+                    ),
+                    None,
+                )
+                self.data.append(
+                    {
+                        "prompt": prompt,
+                        "timestamp": self._parse_timestamp(record.get("timestamp")),
+                        "output_len": output_len,
+                    }
+                )
+
+        if not self.data:
+            raise ValueError(f"No requests found in {self.dataset_path}.")
+
+        timestamps = [item["timestamp"] for item in self.data]
+        if None in timestamps:
+            if any(timestamp is not None for timestamp in timestamps):
+                logger.warning(
+                    "Some requests in %s have no timestamp; "
+                    "ignoring the arrival times of all requests.",
+                    self.dataset_path,
+                )
+            for item in self.data:
+                item["timestamp"] = None
+        else:
+            # Python's sort is stable, so requests logged at the same time
+            # keep their order.
+            self.data.sort(key=lambda item: item["timestamp"])
+
+    def sample(
+        self,
+        tokenizer: PreTrainedTokenizerBase,
+        num_requests: int,
+        output_len: Optional[int] = None,
+        document_len: int = DEFAULT_DOCUMENT_LEN,
+        num_criteria: int = DEFAULT_NUM_CRITERIA,
+        criterion_len: int = DEFAULT_CRITERION_LEN,
+        chunk_len: int = DEFAULT_CHUNK_LEN,
+        chunk_batch_size: int = DEFAULT_CHUNK_BATCH_SIZE,
+        chunk_output_len: int = DEFAULT_CHUNK_OUTPUT_LEN,
+        document_interval: float = DEFAULT_DOCUMENT_INTERVAL,
+        burst_interval: float = DEFAULT_BURST_INTERVAL,
+        **kwargs,
+    ) -> list[SampleRequest]:
+        """
+        Replay the loaded request log, or synthesize documents until
+        `num_requests` requests exist.
+
+        Args:
+            output_len: Overrides the output length of every request. For
+                synthetic traces it defaults to DEFAULT_OUTPUT_LEN for the
+                criterion prompts.
+            document_len: Length of each document, i.e. the shared prefix of
+                its criterion prompts, in tokens.
+            num_criteria: Number of criterion prompts per document.
+            criterion_len: Length of each criterion suffix in tokens.
+            chunk_len: Length of each summarized chunk in tokens. 0 disables
+                the map phase.
+            chunk_batch_size: Number of chunks summarized concurrently.
+            chunk_output_len: Output length of each chunk summary.
+            document_interval: Mean time between documents in seconds;
+                documents arrive as a Poisson process.
+            burst_interval: Time in seconds between consecutive chunk
+                batches, and between the last batch and the criterion
+                fan-out.
+        """
+        if self.data is not None:
+            return self._sample_trace(tokenizer, num_requests, output_len)
+
+        rng = np.random.default_rng(self.random_seed)
+        vocab_size = tokenizer.vocab_size
+        criterion_output_len = (
+            output_len if output_len is not None else self.DEFAULT_OUTPUT_LEN
+        )
+        if output_len is not None:
+            chunk_output_len = output_len
+
+        samples: list[SampleRequest] = []
+        start = 0.0
+        while len(samples) < num_requests:
+            document_ids = rng.integers(0, vocab_size, size=document_len).tolist()
+            document = tokenizer.decode(document_ids)
+
+            # Map phase: chunks are summarized batch by batch, each batch
+            # waiting for the previous one to finish.
+            num_batches = 0
+            if chunk_len > 0:
+                chunks = [
+                    document_ids[i : i + chunk_len]
+                    for i in range(0, document_len, chunk_len)
+                ]
+                for i, chunk_ids in enumerate(chunks):
+                    prompt = self.SUMMARY_PROMPT + tokenizer.decode(chunk_ids)
+                    samples.append(
+                        SampleRequest(
+                            prompt=prompt,
+                            prompt_len=len(tokenizer(prompt).input_ids),
+                            expected_output_len=chunk_output_len,
+                            arrival_time=start
+                            + (i // chunk_batch_size) * burst_interval,
+                        )
+                    )
+                num_batches = -(-len(chunks) // chunk_batch_size)
+
+            # Fan-out phase: every criterion shares the document as prefix.
+            fan_out_time = start + num_batches * burst_interval
+            for index in range(num_criteria):
+                criterion = tokenizer.decode(
+                    rng.integers(0, vocab_size, size=criterion_len).tolist()
+                )
+                prompt = (
+                    self.ANALYSIS_PROMPT
+                    + document
+                    + self.CRITERION_PROMPT.format(index=index + 1)
+                    + criterion
+                )
+                samples.append(
+                    SampleRequest(
+                        prompt=prompt,
+                        prompt_len=len(tokenizer(prompt).input_ids),
+                        expected_output_len=criterion_output_len,
+                        arrival_time=fan_out_time,
+                    )
+                )
+
+            start += float(rng.exponential(document_interval))
+
+        # Documents may overlap in time, so interleave them by arrival.
+        samples.sort(key=lambda sample: sample.arrival_time)
+        return samples[:num_requests]
+
+    def _sample_trace(
+        self,
+        tokenizer: PreTrainedTokenizerBase,
+        num_requests: int,
+        output_len: Optional[int],
+    ) -> list[SampleRequest]:
+        first = self.data[0]["timestamp"]
+        timed = first is not None
+        if timed:
+            duration = self.data[-1]["timestamp"] - first
+            # Loop the trace with a gap of one mean inter-arrival time.
+            gap = duration / max(len(self.data) - 1, 1)
+
+        prompt_lens: dict[int, int] = {}
+        samples: list[SampleRequest] = []
+        for i in range(num_requests):
+            index = i % len(self.data)
+            item = self.data[index]
+            if index not in prompt_lens:
+                prompt_lens[index] = len(tokenizer(item["prompt"]).input_ids)
+            arrival_time = None
+            if timed:
+                arrival_time = (
+                    (i // len(self.data)) * (duration + gap) + item["timestamp"] - first
+                )
+            samples.append(
+                SampleRequest(
+                    prompt=item["prompt"],
+                    prompt_len=prompt_lens[index],
+                    expected_output_len=(
+                        output_len or item["output_len"] or self.DEFAULT_OUTPUT_LEN
+                    ),
+                    arrival_time=arrival_time,
+                )
+            )
+        return samples
+
+    @staticmethod
+    def estimate_prefix_hit_rate(
+        requests: list[SampleRequest],
+        tokenizer: PreTrainedTokenizerBase,
+        block_size: int = 16,
+    ) -> float:
+        """
+        Return the fraction of prompt tokens that an unbounded prefix cache
+        with vLLM's block-granular hashing could serve from cache if the
+        requests were processed in the given order. This is the upper bound
+        for the hit rate that the server reports.
+        """
+        cached_blocks: set[int] = set()
+        hit_tokens = total_tokens = 0
+        for request in requests:
+            token_ids = tokenizer(request.prompt).input_ids
+            total_tokens += len(token_ids)
+            parent_hash = None
+            hit = True
+            for i in range(0, len(token_ids) - block_size + 1, block_size):
+                block_hash = hash((parent_hash, tuple(token_ids[i : i + block_size])))
+                if hit and block_hash in cached_blocks:
+                    hit_tokens += block_size
+                else:
+                    hit = False
+                    cached_blocks.add(block_hash)
+                parent_hash = block_hash
+        return hit_tokens / total_tokens if total_tokens else 0.0
+
+
 # -----------------------------------------------------------------------------
 # HuggingFace Dataset Base Implementation
 # -----------------------------------------------------------------------------
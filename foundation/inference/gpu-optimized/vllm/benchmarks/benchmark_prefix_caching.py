@@ -26,6 +26,17 @@ ShareGPT example usage:
         --num-prompts 20 \
         --repeat-count 5 \
         --input-length-range 128:256
+
+Rubric analysis example usage:
+    # This command replays 200 requests of rubric-based document analysis,
+    # i.e. chunk summarization bursts followed by many criterion prompts that
+    # share the whole document as prefix. Pass --dataset-path to replay a
+    # captured NDJSON request log instead of a synthetic trace.
+    python benchmark_prefix_caching.py \
+        --model meta-llama/Llama-2-7b-chat-hf \
+        --dataset-name rubric \
+        --enable-prefix-caching \
+        --num-prompts 200
 """
 
 import dataclasses
@@ -45,6 +56,8 @@ try:
 except ImportError:
     from backend_request_func import get_tokenizer
 
+from benchmark_dataset import RubricAnalysisDataset
+
 PROMPT = "You are a helpful assistant in recognizes the content of tables in markdown format. Here is a table as fellows. You need to answer my question about the table.\n# Table\n|Opening|Opening|Sl. No.|Film|Cast|Director|Music Director|Notes|\n|----|----|----|----|----|----|----|----|\n|J A N|9|1|Agni Pushpam|Jayabharathi, Kamalahasan|Jeassy|M. K. Arjunan||\n|J A N|16|2|Priyamvada|Mohan Sharma, Lakshmi, KPAC Lalitha|K. S. Sethumadhavan|V. Dakshinamoorthy||\n|J A N|23|3|Yakshagaanam|Madhu, Sheela|Sheela|M. S. Viswanathan||\n|J A N|30|4|Paalkkadal|Sheela, Sharada|T. K. Prasad|A. T. Ummer||\n|F E B|5|5|Amma|Madhu, Srividya|M. Krishnan Nair|M. K. Arjunan||\n|F E B|13|6|Appooppan|Thikkurissi Sukumaran Nair, Kamal Haasan|P. Bhaskaran|M. S. Baburaj||\n|F E B|20|7|Srishti|Chowalloor Krishnankutty, Ravi Alummoodu|K. T. Muhammad|M. S. Baburaj||\n|F E B|20|8|Vanadevatha|Prem Nazir, Madhubala|Yusufali Kechery|G. Devarajan||\n|F E B|27|9|Samasya|Madhu, Kamalahaasan|K. Thankappan|Shyam||\n|F E B|27|10|Yudhabhoomi|K. P. Ummer, Vidhubala|Crossbelt Mani|R. K. Shekhar||\n|M A R|5|11|Seemantha Puthran|Prem Nazir, Jayabharathi|A. B. Raj|M. K. Arjunan||\n|M A R|12|12|Swapnadanam|Rani Chandra, Dr. Mohandas|K. G. George|Bhaskar Chandavarkar||\n|M A R|19|13|Thulavarsham|Prem Nazir, sreedevi, Sudheer|N. Sankaran Nair|V. Dakshinamoorthy||\n|M A R|20|14|Aruthu|Kaviyoor Ponnamma, Kamalahasan|Ravi|G. Devarajan||\n|M A R|26|15|Swimming Pool|Kamal Haasan, M. G. Soman|J. Sasikumar|M. K. Arjunan||\n\n# Question\nWhat' s the content in the (1,1) cells\n"  # noqa: E501
 
 
@@ -149,6 +162,34 @@ def sample_requests_from_random(
     return requests
 
 
+def sample_requests_from_rubric(
+    dataset_path: Optional[str],
+    num_requests: int,
+    tokenizer: PreTrainedTokenizerBase,
+    fixed_output_len: Optional[int],
+    args,
+) -> list[Request]:
+    samples = RubricAnalysisDataset(
+        dataset_path=dataset_path, random_seed=args.seed
+    ).sample(
+        tokenizer=tokenizer,
+        num_requests=num_requests,
+        output_len=fixed_output_len,
+        document_len=args.rubric_document_len,
+        num_criteria=args.rubric_num_criteria,
+        criterion_len=args.rubric_criterion_len,
+        chunk_len=args.rubric_chunk_len,
+    )
+    print(
+        "Ideal prefix cache hit rate: "
+        f"{RubricAnalysisDataset.estimate_prefix_hit_rate(samples, tokenizer):.2%}"
+    )
+    return [
+        Request(sample.prompt, sample.prompt_len, sample.expected_output_len)
+        for sample in samples
+    ]
+
+
 def repeat_and_sort_requests(
     requests: list[Request], repeat_count: int, sort: bool = False
 ) -> list[str]:
@@ -162,9 +203,20 @@ def repeat_and_sort_requests(
 
 def main(args):
     tokenizer = get_tokenizer(args.model, trust_remote_code=True)
-    input_length_range = tuple(map(int, args.input_length_range.split(":")))
     random.seed(args.seed)
-    if args.dataset_path is not None:
+    if args.dataset_name == "rubric":
+        print(f"Start to sample {args.num_prompts} rubric analysis prompts")
+        filtered_requests = sample_requests_from_rubric(
+            dataset_path=args.dataset_path,
+            num_requests=args.num_prompts,
+            tokenizer=tokenizer,
+            fixed_output_len=args.output_len,
+            args=args,
+        )
+    elif args.input_length_range is None:
+        raise ValueError("--input-length-range is required for this dataset.")
+    elif args.dataset_path is not None:
+        input_length_range = tuple(map(int, args.input_length_range.split(":")))
         if args.prefix_len > 0:
             raise ValueError(
                 "prefix-len is not supported when dataset-path is provided."
@@ -178,6 +230,7 @@ def main(args):
             fixed_output_len=args.output_len,
         )
     else:
+        input_length_range = tuple(map(int, args.input_length_range.split(":")))
         print(f"Start to sample {args.num_prompts} prompts from random")
         filtered_requests = sample_requests_from_random(
             num_requests=args.num_prompts,
@@ -206,9 +259,15 @@ def main(args):
     )
 
     print("Testing filtered requests")
-    prompts = repeat_and_sort_requests(
-        filtered_requests, repeat_count=args.repeat_count, sort=args.sort
-    )
+    if args.dataset_name == "rubric" and not args.sort:
+        # The arrival order determines which prefixes are cached, so keep it.
+        prompts = [
+            req.prompt for req in filtered_requests for _ in range(args.repeat_count)
+        ]
+    else:
+        prompts = repeat_and_sort_requests(
+            filtered_requests, repeat_count=args.repeat_count, sort=args.sort
+        )
 
     print("------start generating------")
     test_prefix(
@@ -224,7 +283,19 @@ def create_argument_parser():
         "automatic prefix caching."
     )
     parser.add_argument(
-        "--dataset-path", type=str, default=None, help="Path to the dataset."
+        "--dataset-name",
+        type=str,
+        default=None,
+        choices=["sharegpt", "random", "rubric"],
+        help="Name of the dataset to benchmark on. Defaults to sharegpt if "
+        "dataset-path is provided and random otherwise.",
+    )
+    parser.add_argument(
+        "--dataset-path",
+        type=str,
+        default=None,
+        help="Path to the dataset, or to an NDJSON request log to replay if "
+        "using rubric dataset.",
     )
     parser.add_argument("--output-len", type=int, default=10)
     parser.add_argument(
@@ -245,9 +316,10 @@ def create_argument_parser():
     parser.add_argument(
         "--input-length-range",
         type=str,
-        required=True,
+        default=None,
         help="Range of input lengths for sampling prompts,"
-        'specified as "min:max" (e.g., "128:256").',
+        'specified as "min:max" (e.g., "128:256"). '
+        "Required unless using rubric dataset.",
     )
     parser.add_argument(
         "--prefix-len",
@@ -258,6 +330,34 @@ def create_argument_parser():
         "subtract this length when filtering prompts. Only used "
         "when dataset-path is not provided.",
     )
+    parser.add_argument(
+        "--rubric-document-len",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_DOCUMENT_LEN,
+        help="Number of tokens per document, i.e. the prefix shared by its "
+        "criterion prompts. Used only for synthetic rubric traces.",
+    )
+    parser.add_argument(
+        "--rubric-num-criteria",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_NUM_CRITERIA,
+        help="Number of criterion prompts per document. "
+        "Used only for synthetic rubric traces.",
+    )
+    parser.add_argument(
+        "--rubric-criterion-len",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_CRITERION_LEN,
+        help="Number of tokens per criterion suffix. "
+        "Used only for synthetic rubric traces.",
+    )
+    parser.add_argument(
+        "--rubric-chunk-len",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_CHUNK_LEN,
+        help="Number of tokens per summarized chunk, 0 to disable the "
+        "chunk summarization bursts. Used only for synthetic rubric traces.",
+    )
     parser.add_argument(
         "--disable-detokenize",
         action="store_true",
@@ -35,6 +35,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Optional
 
+import aiohttp
 import numpy as np
 from tqdm.asyncio import tqdm
 from transformers import PreTrainedTokenizerBase
@@ -67,6 +68,7 @@ from benchmark_dataset import (
     MTBenchDataset,
     NextEditPredictionDataset,
     RandomDataset,
+    RubricAnalysisDataset,
     SampleRequest,
     ShareGPTDataset,
     SonnetDataset,
@@ -111,6 +113,7 @@ async def get_request(
     input_requests: list[SampleRequest],
     request_rate: float,
     burstiness: float = 1.0,
+    replay_time_scale: Optional[float] = None,
 ) -> AsyncGenerator[SampleRequest, None]:
     """
     Asynchronously generates requests at a specified rate
@@ -129,7 +132,26 @@ async def get_request(
             A lower burstiness value (0 < burstiness < 1) results
             in more bursty requests, while a higher burstiness value
             (burstiness > 1) results in a more uniform arrival of requests.
+        replay_time_scale (optional):
+            If set, request_rate and burstiness are ignored and every request
+            is sent at its recorded `arrival_time` multiplied by this factor,
+            e.g. 0.5 replays a trace twice as fast. Requests without an
+            arrival time are sent immediately.
     """
+    if replay_time_scale is not None:
+        start_time = time.perf_counter()
+        for request in input_requests:
+            if request.arrival_time is not None:
+                delay = (
+                    start_time
+                    + request.arrival_time * replay_time_scale
+                    - time.perf_counter()
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield request
+        return
+
     input_requests: Iterable[SampleRequest] = iter(input_requests)
 
     # Calculate scale parameter theta to maintain the desired request_rate.
@@ -152,6 +174,40 @@ async def get_request(
         await asyncio.sleep(interval)
 
 
+async def fetch_prefix_cache_counters(base_url: str) -> Optional[tuple[float, float]]:
+    """
+    Return the (queries, hits) prefix cache token counters from the server's
+    Prometheus endpoint, or None if the server does not expose them.
+    """
+    counters = {
+        "vllm:prefix_cache_queries_total": 0.0,
+        "vllm:prefix_cache_hits_total": 0.0,
+    }
+    try:
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10)
+        ) as session:
+            response = await session.get(f"{base_url}/metrics")
+            if response.status != 200:
+                return None
+            text = await response.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+    found = False
+    for line in text.splitlines():
+        name = line.split("{", 1)[0].split(" ", 1)[0]
+        if name in counters:
+            counters[name] += float(line.rsplit(" ", 1)[1])
+            found = True
+    if not found:
+        return None
+    return (
+        counters["vllm:prefix_cache_queries_total"],
+        counters["vllm:prefix_cache_hits_total"],
+    )
+
+
 def calculate_metrics(
     input_requests: list[SampleRequest],
     outputs: list[RequestFuncOutput],
@@ -290,6 +346,7 @@ async def benchmark(
     max_concurrency: Optional[int],
     lora_modules: Optional[Iterable[str]],
     extra_body: Optional[dict],
+    replay_time_scale: Optional[float] = None,
 ):
     if backend in ASYNC_REQUEST_FUNCS:
         request_func = ASYNC_REQUEST_FUNCS[backend]
@@ -353,8 +410,14 @@ async def benchmark(
 
     distribution = "Poisson process" if burstiness == 1.0 else "Gamma distribution"
 
-    print(f"Traffic request rate: {request_rate}")
-    print(f"Burstiness factor: {burstiness} ({distribution})")
+    if replay_time_scale is not None:
+        print(
+            "Traffic: replaying recorded arrival times "
+            f"(time scale {replay_time_scale})"
+        )
+    else:
+        print(f"Traffic request rate: {request_rate}")
+        print(f"Burstiness factor: {burstiness} ({distribution})")
     print(f"Maximum request concurrency: {max_concurrency}")
 
     pbar = None if disable_tqdm else tqdm(total=len(input_requests))
@@ -371,9 +434,13 @@ async def benchmark(
         async with semaphore:
             return await request_func(request_func_input=request_func_input, pbar=pbar)
 
+    prefix_cache_start = await fetch_prefix_cache_counters(base_url)
+
     benchmark_start_time = time.perf_counter()
     tasks: list[asyncio.Task] = []
-    async for request in get_request(input_requests, request_rate, burstiness):
+    async for request in get_request(
+        input_requests, request_rate, burstiness, replay_time_scale
+    ):
         prompt, prompt_len, output_len, mm_content = (
             request.prompt,
             request.prompt_len,
@@ -423,6 +490,14 @@ async def benchmark(
 
     benchmark_duration = time.perf_counter() - benchmark_start_time
 
+    prefix_cache_hit_rate = None
+    prefix_cache_end = await fetch_prefix_cache_counters(base_url)
+    if prefix_cache_start is not None and prefix_cache_end is not None:
+        queries = prefix_cache_end[0] - prefix_cache_start[0]
+        hits = prefix_cache_end[1] - prefix_cache_start[1]
+        if queries > 0:
+            prefix_cache_hit_rate = hits / queries
+
     metrics, actual_output_lens = calculate_metrics(
         input_requests=input_requests,
         outputs=outputs,
@@ -459,6 +534,12 @@ async def benchmark(
             "Total Token throughput (tok/s):", metrics.total_token_throughput
         )
     )
+    if prefix_cache_hit_rate is not None:
+        print(
+            "{:<40} {:<10.2f}".format(
+                "Prefix cache hit rate (%):", prefix_cache_hit_rate * 100
+            )
+        )
 
     result = {
         "duration": benchmark_duration,
@@ -469,6 +550,7 @@ async def benchmark(
         "request_goodput:": metrics.request_goodput if goodput_config_dict else None,
         "output_throughput": metrics.output_throughput,
         "total_token_throughput": metrics.total_token_throughput,
+        "prefix_cache_hit_rate": prefix_cache_hit_rate,
         "input_lens": [output.prompt_len for output in outputs],
         "output_lens": actual_output_lens,
         "ttfts": [output.ttft for output in outputs],
@@ -744,12 +826,34 @@ def main(args: argparse.Namespace):
                 output_len=args.random_output_len,
                 range_ratio=args.random_range_ratio,
             ),
+            "rubric": lambda: RubricAnalysisDataset(
+                random_seed=args.seed, dataset_path=args.dataset_path
+            ).sample(
+                tokenizer=tokenizer,
+                num_requests=args.num_prompts,
+                output_len=args.rubric_output_len,
+                document_len=args.rubric_document_len,
+                num_criteria=args.rubric_num_criteria,
+                criterion_len=args.rubric_criterion_len,
+                chunk_len=args.rubric_chunk_len,
+                chunk_batch_size=args.rubric_chunk_batch_size,
+                chunk_output_len=args.rubric_chunk_output_len,
+                document_interval=args.rubric_document_interval,
+                burst_interval=args.rubric_burst_interval,
+            ),
         }
 
         try:
             input_requests = dataset_mapping[args.dataset_name]()
         except KeyError as err:
             raise ValueError(f"Unknown dataset: {args.dataset_name}") from err
+
+    if args.dataset_name == "rubric":
+        ideal_hit_rate = RubricAnalysisDataset.estimate_prefix_hit_rate(
+            input_requests, tokenizer
+        )
+        print(f"Ideal prefix cache hit rate: {ideal_hit_rate * 100:.2f}%")
+
     goodput_config_dict = check_goodput_args(args)
 
     # Collect the sampling parameters.
@@ -802,6 +906,9 @@ def main(args: argparse.Namespace):
             max_concurrency=args.max_concurrency,
             lora_modules=args.lora_modules,
             extra_body=sampling_params,
+            replay_time_scale=(
+                args.replay_time_scale if args.replay_arrival_times else None
+            ),
         )
     )
 
@@ -832,6 +939,8 @@ def main(args: argparse.Namespace):
             args.request_rate if args.request_rate < float("inf") else "inf"
         )
         result_json["burstiness"] = args.burstiness
+        if args.replay_arrival_times:
+            result_json["replay_time_scale"] = args.replay_time_scale
         result_json["max_concurrency"] = args.max_concurrency
 
         # Merge with benchmark result
@@ -904,7 +1013,7 @@ def create_argument_parser():
         "--dataset-name",
         type=str,
         default="sharegpt",
-        choices=["sharegpt", "burstgpt", "sonnet", "random", "hf", "custom"],
+        choices=["sharegpt", "burstgpt", "sonnet", "random", "hf", "custom", "rubric"],
         help="Name of the dataset to benchmark on.",
     )
     parser.add_argument(
@@ -912,7 +1021,8 @@ def create_argument_parser():
         type=str,
         default=None,
         help="Path to the sharegpt/sonnet dataset. "
-        "Or the huggingface dataset ID if using HF dataset.",
+        "Or the huggingface dataset ID if using HF dataset. "
+        "Or an NDJSON request log to replay if using rubric dataset.",
     )
     parser.add_argument(
         "--max-concurrency",
@@ -979,6 +1089,21 @@ def create_argument_parser():
         "bursty requests. A higher burstiness value (burstiness > 1) "
         "results in a more uniform arrival of requests.",
     )
+    parser.add_argument(
+        "--replay-arrival-times",
+        action="store_true",
+        help="Send each request at the arrival time recorded by the dataset "
+        "instead of synthesizing arrival times from --request-rate and "
+        "--burstiness. Currently only the rubric dataset records arrival "
+        "times.",
+    )
+    parser.add_argument(
+        "--replay-time-scale",
+        type=float,
+        default=1.0,
+        help="Factor applied to the recorded arrival times when "
+        "--replay-arrival-times is set, e.g. 0.5 replays twice as fast.",
+    )
     parser.add_argument("--seed", type=int, default=0)
     parser.add_argument(
         "--trust-remote-code",
@@ -1152,6 +1277,72 @@ def create_argument_parser():
         ),
     )
 
+    rubric_group = parser.add_argument_group("rubric dataset options")
+    rubric_group.add_argument(
+        "--rubric-document-len",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_DOCUMENT_LEN,
+        help="Number of tokens per document, i.e. the prefix shared by its "
+        "criterion prompts. Used only for synthetic rubric traces.",
+    )
+    rubric_group.add_argument(
+        "--rubric-num-criteria",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_NUM_CRITERIA,
+        help="Number of criterion prompts per document. "
+        "Used only for synthetic rubric traces.",
+    )
+    rubric_group.add_argument(
+        "--rubric-criterion-len",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_CRITERION_LEN,
+        help="Number of tokens per criterion suffix. "
+        "Used only for synthetic rubric traces.",
+    )
+    rubric_group.add_argument(
+        "--rubric-chunk-len",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_CHUNK_LEN,
+        help="Number of tokens per summarized chunk, 0 to disable the "
+        "chunk summarization bursts. Used only for synthetic rubric traces.",
+    )
+    rubric_group.add_argument(
+        "--rubric-chunk-batch-size",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_CHUNK_BATCH_SIZE,
+        help="Number of chunks summarized concurrently. "
+        "Used only for synthetic rubric traces.",
+    )
+    rubric_group.add_argument(
+        "--rubric-chunk-output-len",
+        type=int,
+        default=RubricAnalysisDataset.DEFAULT_CHUNK_OUTPUT_LEN,
+        help="Number of output tokens per chunk summary. "
+        "Used only for synthetic rubric traces.",
+    )
+    rubric_group.add_argument(
+        "--rubric-output-len",
+        type=int,
+        default=None,
+        help="Output length for each request. Overrides the output lengths "
+        "from the request log, or of the criterion prompts of synthetic "
+        "traces.",
+    )
+    rubric_group.add_argument(
+        "--rubric-document-interval",
+        type=float,
+        default=RubricAnalysisDataset.DEFAULT_DOCUMENT_INTERVAL,
+        help="Mean time between documents in seconds. "
+        "Used only for synthetic rubric traces.",
+    )
+    rubric_group.add_argument(
+        "--rubric-burst-interval",
+        type=float,
+        default=RubricAnalysisDataset.DEFAULT_BURST_INTERVAL,
+        help="Time in seconds between the chunk summarization batches of a "
+        "document. Used only for synthetic rubric traces.",
+    )
+
     hf_group = parser.add_argument_group("hf dataset options")
     hf_group.add_argument(
         "--hf-subset", type=str, default=None, help="Subset of the HF dataset."
@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+"""
+Micro-benchmark of the V1 output processor with many concurrent streams.
+
+A mock engine core emits one token per request per step, like a decode step
+of the real engine, and the output processor detokenizes them and checks the
+stop strings, either request by request or with the batched detokenization
+(VLLM_BATCHED_DETOKENIZATION=1).
+"""
+
+import os
+import random
+import time
+
+from vllm.sampling_params import RequestOutputKind, SamplingParams
+from vllm.transformers_utils.tokenizer_group import TokenizerGroup
+from vllm.utils import FlexibleArgumentParser
+from vllm.v1.engine import EngineCoreOutput, EngineCoreRequest, FinishReason
+from vllm.v1.engine.output_processor import OutputProcessor
+
+
+class MockEngineCore:
+    """Emits the premade output tokens of each request, one per step."""
+
+    def __init__(self, tokens_list: list[list[int]]):
+        self.tokens_list = tokens_list
+        self.step = 0
+
+    def get_outputs(self) -> list[EngineCoreOutput]:
+        outputs = []
+        for req_idx, token_ids in enumerate(self.tokens_list):
+            if self.step >= len(token_ids):
+                continue
+            outputs.append(
+                EngineCoreOutput(
+                    request_id=f"request-{req_idx}",
+                    new_token_ids=[token_ids[self.step]],
+                    finish_reason=FinishReason.LENGTH
+                    if self.step == len(token_ids) - 1
+                    else None,
+                )
+            )
+        self.step += 1
+        return outputs
+
+
+def make_requests(
+    tokenizer, num_streams: int, args
+) -> tuple[list[EngineCoreRequest], list[list[int]]]:
+    rng = random.Random(args.seed)
+    # Take the prompts and outputs from real text, so that the detokenizer
+    # sees realistic merges of tokens into words.
+    with open(args.text_file) as f:
+        text_ids = tokenizer.encode(" ".join(f.read().split()))
+    requests = []
+    outputs_list = []
+    for idx in range(num_streams):
+        start = rng.randrange(len(text_ids) - args.input_len - args.output_len)
+        end = start + args.input_len
+        outputs_list.append(text_ids[end : end + args.output_len])
+        requests.append(
+            EngineCoreRequest(
+                request_id=f"request-{idx}",
+                prompt_token_ids=text_ids[start:end],
+                mm_inputs=None,
+                mm_hashes=None,
+                mm_placeholders=None,
+                sampling_params=SamplingParams(
+                    max_tokens=args.output_len,
+                    output_kind=RequestOutputKind.DELTA,
+                    stop=args.stop,
+                ),
+                eos_token_id=None,
+                arrival_time=0,
+                lora_request=None,
+                cache_salt=None,
+                data_parallel_rank=None,
+            )
+        )
+    return requests, outputs_list
+
+
+def run(tokenizer_group, requests, outputs_list, batched: bool) -> float:
+    os.environ["VLLM_BATCHED_DETOKENIZATION"] = "1" if batched else "0"
+    output_processor = OutputProcessor(tokenizer_group, log_stats=False)
+    for request in requests:
+        output_processor.add_request(request, None)
+    engine_core = MockEngineCore(outputs_list)
+
+    elapsed = 0.0
+    while outputs := engine_core.get_outputs():
+        start = time.perf_counter()
+        output_processor.process_outputs(outputs)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def main(args):
+    tokenizer_group = TokenizerGroup(
+        tokenizer_id=args.tokenizer,
+        enable_lora=False,
+        max_num_seqs=max(args.num_streams),
+        max_input_length=None,
+    )
+    tokenizer = tokenizer_group.tokenizer
+
+    for num_streams in args.num_streams:
+        requests, outputs_list = make_requests(tokenizer, num_streams, args)
+        num_tokens = sum(map(len, outputs_list))
+
+        for batched in (False, True):
+            elapsed = min(
+                run(tokenizer_group, requests, outputs_list, batched)
+                for _ in range(args.num_iters)
+            )
+            name = "batched" if batched else "per-request"
+            print(
+                f"{num_streams:>5} streams, {name:>11}: "
+                f"{num_tokens / elapsed:,.0f} tokens/s, "
+                f"{elapsed / args.output_len * 1000:.2f} ms per step"
+            )
+
+
+if __name__ == "__main__":
+    parser = FlexibleArgumentParser(
+        description="Benchmark the throughput of the V1 output processor."
+    )
+    parser.add_argument(
+        "--tokenizer", type=str, default="meta-llama/Llama-3.1-8B-Instruct"
+    )
+    parser.add_argument("--num-streams", type=int, nargs="+", default=[256, 512, 1024])
+    parser.add_argument("--input-len", type=int, default=128)
+    parser.add_argument("--output-len", type=int, default=256)
+    parser.add_argument(
+        "--stop",
+        type=str,
+        nargs="*",
+        default=["\n\n"],
+        help="Stop strings checked on every output.",
+    )
+    parser.add_argument(
+        "--text-file",
+        type=str,
+        default=os.path.join(os.path.dirname(__file__), "..", "sonnet.txt"),
+        help="Text the prompts and outputs are taken from.",
+    )
+    parser.add_argument("--num-iters", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args)
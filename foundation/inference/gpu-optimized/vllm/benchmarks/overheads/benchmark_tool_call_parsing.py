@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+"""
+Micro-benchmark of streaming tool call parsing with long arguments.
+
+Compares re-parsing the whole tool call with partial_json_parser for every
+delta, as the tool parsers used to do, with the incremental parser that only
+consumes each delta.
+"""
+
+import json
+import random
+import time
+
+import partial_json_parser
+from partial_json_parser.core.options import Allow
+
+from vllm.entrypoints.openai.tool_parsers.incremental_json import (
+    IncrementalToolCallParser,
+)
+from vllm.utils import FlexibleArgumentParser
+
+WORDS = ["essay", "argument", "evidence", "rubric", "score", "é", 'a "quote"', "\n"]
+
+
+def make_tool_call(num_tokens: int, seed: int) -> str:
+    rng = random.Random(seed)
+    # One word is roughly one token; numbers are added as nested values
+    num_items = num_tokens // 20
+    arguments = {
+        "text": " ".join(rng.choice(WORDS) for _ in range(num_tokens // 2)),
+        "items": [
+            {"id": i, "score": round(rng.random(), 3), "ok": True}
+            for i in range(num_items)
+        ],
+    }
+    return json.dumps({"name": "submit_analysis", "arguments": arguments})
+
+
+def split_deltas(text: str, tokenizer_name: str) -> list[str]:
+    if tokenizer_name is None:
+        # About four characters per token
+        return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+    from vllm.transformers_utils.tokenizer import get_tokenizer
+
+    tokenizer = get_tokenizer(tokenizer_name)
+    token_ids = tokenizer.encode(text, add_special_tokens=False)
+    return [tokenizer.decode([token_id]) for token_id in token_ids]
+
+
+def parse_full(deltas: list[str]) -> str:
+    text = ""
+    arguments = ""
+    for delta in deltas:
+        text += delta
+        try:
+            tool_call = partial_json_parser.loads(text, Allow.ALL)
+        except partial_json_parser.core.exceptions.MalformedJSON:
+            continue
+        if "arguments" in tool_call:
+            arguments = json.dumps(tool_call["arguments"], ensure_ascii=False)
+    return arguments
+
+
+def parse_incremental(deltas: list[str]) -> str:
+    parser = IncrementalToolCallParser()
+    arguments = []
+    for delta in deltas:
+        for tool_call_delta in parser.feed(delta):
+            arguments.append(tool_call_delta.arguments)
+    return "".join(arguments)
+
+
+def main(args):
+    text = make_tool_call(args.num_tokens, args.seed)
+    deltas = split_deltas(text, args.tokenizer)
+    expected = json.dumps(json.loads(text)["arguments"], ensure_ascii=False)
+    print(f"{len(deltas)} deltas, {len(text)} characters")
+
+    parsers = [("incremental", parse_incremental)]
+    if not args.skip_full:
+        parsers.insert(0, ("full re-parse", parse_full))
+
+    for name, parse in parsers:
+        times = []
+        for _ in range(args.num_iters):
+            start = time.perf_counter()
+            arguments = parse(deltas)
+            times.append(time.perf_counter() - start)
+        assert arguments == expected, f"{name} returned different arguments"
+        best = min(times)
+        print(
+            f"{name:>14}: {best * 1000:.1f} ms per request, "
+            f"{best / len(deltas) * 1e6:.2f} us per delta"
+        )
+
+
+if __name__ == "__main__":
+    parser = FlexibleArgumentParser(
+        description="Benchmark streaming tool call parsing with long arguments."
+    )
+    parser.add_argument(
+        "--num-tokens",
+        type=int,
+        default=10000,
+        help="Approximate number of tokens of the tool call arguments.",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Split the tool call into the deltas of this tokenizer instead "
+        "of four-character chunks.",
+    )
+    parser.add_argument("--num-iters", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--skip-full",
+        action="store_true",
+        help="Skip the full re-parse, which is slow for long arguments.",
+    )
+    args = parser.parse_args()
+    main(args)
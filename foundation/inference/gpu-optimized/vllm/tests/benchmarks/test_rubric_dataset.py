@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+import json
+
+import pytest
+from transformers import AutoTokenizer
+
+from vllm.benchmarks.datasets import RubricAnalysisDataset
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return AutoTokenizer.from_pretrained("gpt2")
+
+
+def test_synthetic_trace_shares_document_prefix(tokenizer):
+    requests = RubricAnalysisDataset(random_seed=0).sample(
+        tokenizer=tokenizer,
+        num_requests=12,
+        document_len=512,
+        num_criteria=8,
+        criterion_len=16,
+        chunk_len=128,
+        chunk_batch_size=2,
+        document_interval=1000.0,
+        burst_interval=1.0,
+    )
+    assert len(requests) == 12
+
+    arrival_times = [request.arrival_time for request in requests]
+    assert arrival_times == sorted(arrival_times)
+
+    # Four chunk summaries in two batches, then the criterion fan-out.
+    assert arrival_times[:4] == [0.0, 0.0, 1.0, 1.0]
+    assert arrival_times[4:] == [2.0] * 8
+
+    criteria = [request.prompt for request in requests[4:]]
+    document = criteria[0].split(
+        RubricAnalysisDataset.CRITERION_PROMPT.format(index=1))[0]
+    assert all(prompt.startswith(document) for prompt in criteria)
+
+    hit_rate = RubricAnalysisDataset.estimate_prefix_hit_rate(
+        requests, tokenizer)
+    assert 0.5 < hit_rate < 1.0
+
+
+def test_request_log_replay(tokenizer, tmp_path):
+    path = tmp_path / "requests.ndjson"
+    path.write_text("\n".join(
+        json.dumps(record) for record in [
+            {
+                "timestamp": 100.5,
+                "system_prompt": "Summarize.",
+                "user_prompt": "Chapter one."
+            },
+            {
+                "timestamp": 100.0,
+                "prompt": "First request",
+                "output_tokens": 7
+            },
+        ]))
+
+    requests = RubricAnalysisDataset(dataset_path=str(path)).sample(
+        tokenizer=tokenizer, num_requests=3)
+
+    assert [request.prompt for request in requests] == [
+        "First request", "Summarize.\n\nChapter one.", "First request"
+    ]
+    assert [request.arrival_time for request in requests] == [0.0, 0.5, 1.0]
+    assert requests[0].expected_output_len == 7
+    assert requests[1].expected_output_len == (
+        RubricAnalysisDataset.DEFAULT_OUTPUT_LEN)
+
+
+@pytest.mark.parametrize("value", [
+    "2024-06-10T06:13:20.4Z",
+    "2024-06-10T06:13:20.40Z",
+    "2024-06-10T06:13:20.400000+00:00",
+])
+def test_parse_timestamp_fractional_seconds(value):
+    assert RubricAnalysisDataset._parse_timestamp(value) == pytest.approx(
+        1718000000.4)
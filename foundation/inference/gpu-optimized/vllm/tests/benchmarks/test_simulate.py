@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+import subprocess
+
+import pytest
+
+from vllm.benchmarks.simulate import (SimulatedRequest, StepCostModel,
+                                      create_kv_cache_config, simulate)
+from vllm.config import CacheConfig, ModelConfig, SchedulerConfig, VllmConfig
+
+MODEL_NAME = "meta-llama/Llama-3.2-1B-Instruct"
+
+
+def create_config(max_num_seqs: int, num_gpu_blocks: int):
+    model_config = ModelConfig(
+        model="facebook/opt-125m",
+        task="auto",
+        tokenizer="facebook/opt-125m",
+        tokenizer_mode="auto",
+        trust_remote_code=True,
+        dtype="float16",
+        seed=42,
+    )
+    vllm_config = VllmConfig(
+        model_config=model_config,
+        scheduler_config=SchedulerConfig(
+            max_num_seqs=max_num_seqs,
+            max_num_batched_tokens=2048,
+            max_model_len=model_config.max_model_len,
+            enable_chunked_prefill=True,
+        ),
+        cache_config=CacheConfig(
+            block_size=16,
+            gpu_memory_utilization=0.9,
+            swap_space=0,
+            cache_dtype="auto",
+            enable_prefix_caching=True,
+        ),
+    )
+    return vllm_config, create_kv_cache_config(vllm_config,
+                                               num_gpu_blocks=num_gpu_blocks)
+
+
+def test_simulate_shared_prefix():
+    vllm_config, kv_cache_config = create_config(max_num_seqs=8,
+                                                 num_gpu_blocks=100)
+    cost_model = StepCostModel()
+    prefix = list(range(64))
+    # Each request arrives after the previous one finished.
+    trace = [
+        SimulatedRequest(request_id=str(i),
+                         prompt_token_ids=prefix + [1000 + i] * 16,
+                         output_len=8,
+                         arrival_time=float(i)) for i in range(8)
+    ]
+
+    result = simulate(vllm_config, kv_cache_config, trace, cost_model)
+
+    assert result.num_preemptions == 0
+    assert result.prefix_cache_hits == 7 * 64
+    first, second = result.requests[:2]
+    assert first.first_token_time == pytest.approx(
+        cost_model.step_time(num_prefill_tokens=80,
+                             num_decode_seqs=0,
+                             num_context_tokens=80))
+    # Only the 16 tokens after the cached prefix are computed.
+    assert second.first_token_time - second.arrival_time == pytest.approx(
+        cost_model.step_time(num_prefill_tokens=16,
+                             num_decode_seqs=0,
+                             num_context_tokens=80))
+    tpot = ((first.finish_time - first.first_token_time) /
+            (first.output_len - 1))
+    assert tpot > cost_model.fixed_s
+    # The input trace is not modified.
+    assert trace[0].finish_time is None
+
+
+@pytest.mark.parametrize("num_gpu_blocks,preempted", [(11, True),
+                                                      (100, False)])
+def test_simulate_kv_cache_capacity(num_gpu_blocks, preempted):
+    vllm_config, kv_cache_config = create_config(max_num_seqs=4,
+                                                 num_gpu_blocks=num_gpu_blocks)
+    trace = [
+        SimulatedRequest(request_id=str(i),
+                         prompt_token_ids=[i] * 32,
+                         output_len=64,
+                         arrival_time=0.0) for i in range(4)
+    ]
+
+    result = simulate(vllm_config, kv_cache_config, trace, StepCostModel())
+
+    assert (result.num_preemptions > 0) == preempted
+    assert all(req.finish_time is not None for req in result.requests)
+    assert result.max_kv_cache_usage <= 1.0
+    metrics = result.get_metrics([50, 99])
+    assert metrics["total_output_tokens"] == 4 * 64
+    assert metrics["p99_ttft_ms"] >= metrics["p50_ttft_ms"]
+
+
+def test_simulate_request_larger_than_cache():
+    vllm_config, kv_cache_config = create_config(max_num_seqs=4,
+                                                 num_gpu_blocks=4)
+    trace = [
+        SimulatedRequest(request_id="0",
+                         prompt_token_ids=[0] * 64,
+                         output_len=16,
+                         arrival_time=0.0)
+    ]
+    with pytest.raises(ValueError, match="KV cache blocks"):
+        simulate(vllm_config, kv_cache_config, trace, StepCostModel())
+
+
+@pytest.mark.benchmark
+def test_bench_simulate():
+    command = [
+        "vllm", "bench", "simulate", "--model", MODEL_NAME, "--dataset-name",
+        "random", "--num-prompts", "50", "--random-input-len", "128",
+        "--random-output-len", "32", "--request-rate", "10", "--max-num-seqs",
+        "8", "32", "--num-gpu-blocks", "200", "2000"
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    print(result.stdout)
+    print(result.stderr)
+
+    assert result.returncode == 0, f"Benchmark failed: {result.stderr}"
@@ -144,3 +144,40 @@ def test_score(input_batch):
             line_dict = json.loads(line)
             assert isinstance(line_dict, dict)
             assert line_dict["error"] is None
+
+
+def test_resume():
+    with tempfile.NamedTemporaryFile(
+            "w") as input_file, tempfile.NamedTemporaryFile(
+                "r+") as output_file:
+        input_file.write(INPUT_EMBEDDING_BATCH)
+        input_file.flush()
+
+        # Simulate a previous run that completed request-1 and crashed while
+        # writing the next output.
+        done = BatchRequestOutput(id="vllm-done",
+                                  custom_id="request-1",
+                                  response=None,
+                                  error=None)
+        output_file.write(done.model_dump_json() + "\n")
+        output_file.write('{"id": "vllm-partial", "custom_id": "requ')
+        output_file.flush()
+
+        proc = subprocess.Popen([
+            "vllm", "run-batch", "-i", input_file.name, "-o", output_file.name,
+            "--model", "intfloat/multilingual-e5-small", "--resume",
+            "--max-concurrent-requests", "2"
+        ], )
+        proc.communicate()
+        proc.wait()
+        assert proc.returncode == 0, f"{proc=}"
+
+        output_file.seek(0)
+        outputs = [
+            BatchRequestOutput.model_validate_json(line)
+            for line in output_file.read().strip().split("\n")
+        ]
+        assert outputs[0].id == "vllm-done"
+        assert sorted(output.custom_id for output in outputs) == [
+            "request-1", "request-2", "request-3", "request-4"
+        ]
@@ -0,0 +1,119 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+
+import json
+
+import pytest
+
+from vllm.entrypoints.openai.tool_parsers.incremental_json import (
+    IncrementalToolCallParser)
+
+ARGUMENTS = {
+    "city": "Paris",
+    "note": "tab\t, quote \" and é 😀",
+    "values": [1, 2.5, -0.25, 1e3, True, False, None],
+    "nested": {
+        "empty_object": {},
+        "empty_array": []
+    },
+}
+
+
+def stream(text: str, chunk_size: int):
+    parser = IncrementalToolCallParser()
+    names: dict[int, str] = {}
+    arguments: dict[int, str] = {}
+    deltas = []
+    for i in range(0, len(text), chunk_size):
+        deltas += parser.feed(text[i:i + chunk_size])
+    deltas += parser.close()
+
+    for delta in deltas:
+        if delta.name is not None:
+            assert delta.index not in names, "name must be sent once"
+            names[delta.index] = delta.name
+        assert delta.index in names, "name must be sent before arguments"
+        arguments[delta.index] = (arguments.get(delta.index, "") +
+                                  delta.arguments)
+    return parser, names, arguments
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_single_tool_call(chunk_size):
+    # Escapes and whitespace differ from the canonical form on purpose
+    text = ('\n{"name": "get_weather",\n  "arguments":{"city":"Paris",'
+            '"note":"tab\\t, quote \\" and \\u00e9 \\ud83d\\ude00",'
+            '"values":[1, 2.50, -0.25, 1E3, true, false, null],'
+            '"nested":{"empty_object":{}, "empty_array":[ ]}}}\n')
+    parser, names, arguments = stream(text, chunk_size)
+
+    assert names == {0: "get_weather"}
+    assert arguments[0] == json.dumps(ARGUMENTS, ensure_ascii=False)
+    assert parser.get_tool_call(0) == {
+        "name": "get_weather",
+        "arguments": ARGUMENTS
+    }
+    assert parser.is_complete(0)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1000])
+def test_tool_call_array(chunk_size):
+    tool_calls = [
+        {
+            "name": "first",
+            "arguments": {
+                "x": 1
+            }
+        },
+        {
+            "name": "second",
+            "parameters": {
+                "y": "z"
+            }
+        },
+    ]
+    _, names, arguments = stream(json.dumps(tool_calls), chunk_size)
+
+    assert names == {0: "first", 1: "second"}
+    assert arguments == {0: '{"x": 1}', 1: '{"y": "z"}'}
+
+
+def test_arguments_before_name_are_held_back():
+    parser = IncrementalToolCallParser()
+    assert parser.feed('{"arguments": {"query": "late name"}, ') == []
+
+    deltas = parser.feed('"name": "search"}')
+    assert len(deltas) == 1
+    assert deltas[0].name == "search"
+    assert deltas[0].arguments == '{"query": "late name"}'
+
+
+def test_numbers_are_sent_when_complete():
+    parser = IncrementalToolCallParser()
+    parser.feed('{"name": "f", "arguments": {"n": 12')
+    assert parser.get_arguments(0) == '{"n": '
+
+    parser.feed("34}}")
+    assert parser.get_arguments(0) == '{"n": 1234}'
+
+
+def test_text_around_tool_call():
+    parser = IncrementalToolCallParser()
+    parser.feed('{"name": "f", "arguments": {}} and some text')
+
+    assert parser.finished
+    assert parser.remainder == " and some text"
+
+
+@pytest.mark.parametrize("truncated", [
+    '{"name": "f", "arguments": {"a": "unfinished str',
+    '{"name": "f", "arguments": {"a": [1, {"b": tr',
+    '{"name": "f", "arguments": {"a": 1, "b',
+    '{"name": "f", "arguments": {"a":',
+    '{"name": "f", "arguments": {"a": 1.',
+])
+def test_close_completes_truncated_arguments(truncated):
+    _, _, arguments = stream(truncated, 3)
+
+    # The streamed arguments must be valid JSON even without the end
+    json.loads(arguments[0])
@@ -413,6 +413,40 @@ def test_metrics():
     assert not metrics.query_queue
 
 
+def test_metrics_tiers():
+    """
+    Test the prefix caching metrics of the lower cache tiers.
+    """
+
+    def stats(requests, host_queries, host_hits, disk_hits):
+        return PrefixCacheStats(requests=requests,
+                                tier_queries={
+                                    "host": host_queries,
+                                    "disk": host_queries - host_hits
+                                },
+                                tier_hits={
+                                    "host": host_hits,
+                                    "disk": disk_hits
+                                })
+
+    metrics = PrefixCachingMetrics(max_recent_requests=2)
+    assert metrics.tier_hit_rates == {}
+
+    metrics.observe(stats(1, 100, 50, 25))
+    assert metrics.tier_hit_rates == {"host": 0.5, "disk": 0.5}
+
+    metrics.observe(stats(1, 100, 0, 0))
+    assert metrics.tier_hit_rates == {"host": 0.25, "disk": 25 / 150}
+
+    # The oldest update leaves the window.
+    metrics.observe(stats(1, 100, 0, 10))
+    assert metrics.tier_hit_rates == {"host": 0.0, "disk": 0.05}
+
+    metrics.reset()
+    assert metrics.tier_hit_rates == {}
+    assert not metrics.tier_queue
+
+
 def test_unify_kv_cache_configs():
     same_kv_cache_config = [
         KVCacheConfig(
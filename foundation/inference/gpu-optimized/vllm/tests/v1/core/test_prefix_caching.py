@@ -1146,6 +1146,34 @@ def test_kv_cache_events(blocks_to_cache: int):
     assert len(manager.block_pool.cached_block_hash_to_block) == 0
 
 
+def test_record_evicted_blocks():
+    block_size = 16
+    manager = KVCacheManager(
+        make_kv_cache_config(block_size, 4),
+        max_model_len=8192,
+        enable_caching=True,
+    )
+    manager.record_evicted_blocks()
+
+    # Two full blocks are cached, the partial block is not.
+    req0 = make_request("0", list(range(block_size * 2 + 1)))
+    blocks = manager.allocate_slots(req0, block_size * 2 + 1)
+    block_ids = blocks.get_block_ids()[0]
+    block_hashes = manager.req_to_block_hashes[req0.request_id]
+    manager.free(req0)
+    assert manager.take_evicted_blocks() == []
+
+    # A different prompt reuses all blocks and evicts the cached ones.
+    req1 = make_request("1", list(range(100, 100 + block_size * 3)))
+    manager.allocate_slots(req1, block_size * 3)
+    evicted_blocks = manager.take_evicted_blocks()
+    assert sorted(evicted_blocks, key=lambda x: x[1]) == [
+        (BlockHashWithGroupId(block_hashes[0], 0), block_ids[0]),
+        (BlockHashWithGroupId(block_hashes[1], 0), block_ids[1]),
+    ]
+    assert manager.take_evicted_blocks() == []
+
+
 def test_eagle_enabled_removes_last_block():
     """Verify Eagle does NOT remove blocks when request 
     length is divisible by block size."""
@@ -0,0 +1,126 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+from typing import Optional
+
+import pytest
+
+from vllm.sampling_params import SamplingParams
+from vllm.v1.core.sched.request_queue import (FairShareRequestQueue,
+                                              FCFSRequestQueue,
+                                              TenantTokenRates)
+from vllm.v1.request import Request
+
+
+def create_request(request_id: str,
+                   num_tokens: int,
+                   tenant: Optional[str] = None) -> Request:
+    return Request(
+        request_id=request_id,
+        prompt_token_ids=[0] * num_tokens,
+        sampling_params=SamplingParams(
+            max_tokens=1,
+            extra_args=None if tenant is None else {"tenant": tenant}),
+        multi_modal_inputs=None,
+        multi_modal_placeholders=None,
+        multi_modal_hashes=None,
+        eos_token_id=None,
+    )
+
+
+def test_fcfs_queue():
+    queue = FCFSRequestQueue()
+    requests = [create_request(str(i), 10) for i in range(3)]
+    for request in requests:
+        queue.add_request(request)
+
+    assert queue.peek_request() is requests[0]
+    assert queue.pop_request() is requests[0]
+    assert queue.pop_request() is requests[1]
+    # Put back in the order they were popped, like deque.extendleft.
+    queue.prepend_requests([requests[1], requests[0]])
+    assert list(queue) == requests
+    queue.remove_request(requests[1])
+    assert len(queue) == 2 and requests[1] not in queue
+
+
+@pytest.mark.parametrize("weight_b", [1.0, 3.0])
+def test_fair_share_queue_shares_tokens_by_weight(weight_b):
+    queue = FairShareRequestQueue({"b": weight_b}, quantum=100)
+    for i in range(100):
+        queue.add_request(create_request(f"a-{i}", 10, "a"))
+        queue.add_request(create_request(f"b-{i}", 10, "b"))
+
+    popped = [queue.pop_request().tenant for _ in range(80)]
+    assert popped.count("b") == pytest.approx(popped.count("a") * weight_b,
+                                              rel=0.2)
+
+
+def test_fair_share_queue_refunds_put_back_requests():
+    queue = FairShareRequestQueue({}, quantum=100)
+    a = [create_request(f"a-{i}", 50, "a") for i in range(4)]
+    b = create_request("b", 50, "b")
+    for request in a:
+        queue.add_request(request)
+    queue.add_request(b)
+
+    # A request that is put back is not charged, so tenant a keeps its turn.
+    skipped = queue.pop_request()
+    queue.prepend_request(skipped)
+    assert [queue.pop_request() for _ in range(3)] == [a[0], a[1], b]
+    assert len(queue) == 2 and list(queue) == a[2:]
+
+
+def test_fair_share_queue_refunds_the_popped_charge():
+    queue = FairShareRequestQueue({}, quantum=100)
+    a = [create_request(f"a-{i}", 40, "a") for i in range(3)]
+    b = create_request("b", 40, "b")
+    for request in a:
+        queue.add_request(request)
+    queue.add_request(b)
+
+    # The request is refunded the 40 tokens it was charged, not the 20 it
+    # still has to compute, so tenant a can pay for a[2] in the same turn.
+    assert queue.pop_request() is a[0]
+    a[0].num_computed_tokens = 20
+    queue.prepend_request(a[0])
+    assert [queue.pop_request() for _ in range(4)] == [a[0], a[1], a[2], b]
+
+
+def test_fair_share_queue_does_not_refund_preempted_requests():
+    queue = FairShareRequestQueue({}, quantum=100)
+    a = [create_request(f"a-{i}", 50, "a") for i in range(3)]
+    b = create_request("b", 50, "b")
+    for request in a:
+        queue.add_request(request)
+    queue.add_request(b)
+
+    # a[0] ran before it was preempted, so its charge stands and tenant a
+    # cannot pay for both a[0] and a[1] in this turn.
+    assert queue.pop_request() is a[0]
+    queue.commit_request(a[0])
+    queue.prepend_request(a[0])
+    assert [queue.pop_request() for _ in range(2)] == [a[0], b]
+
+
+def test_fair_share_queue_without_tenant():
+    queue = FairShareRequestQueue({}, quantum=100)
+    request = create_request("0", 1000)
+    queue.add_request(request)
+
+    # A request larger than the quantum is scheduled after a few turns.
+    assert queue.peek_request() is request
+    assert queue.pop_request() is request
+    assert not queue
+    with pytest.raises(IndexError):
+        queue.pop_request()
+
+
+def test_tenant_token_rates():
+    rates = TenantTokenRates({"b": 2.0}, half_life_s=10.0)
+    rates.record("a", 100, now=0.0)
+    rates.record("b", 100, now=0.0)
+
+    assert rates.get("a", now=0.0) == 100
+    assert rates.get("b", now=0.0) == 50
+    assert rates.get("a", now=10.0) == pytest.approx(50)
+    assert rates.get("c", now=10.0) == 0
@@ -7,7 +7,8 @@ import pytest
 import torch
 
 from vllm.config import (CacheConfig, KVTransferConfig, ModelConfig,
-                         SchedulerConfig, SpeculativeConfig, VllmConfig)
+                         SchedulerConfig, SchedulerPolicy, SpeculativeConfig,
+                         VllmConfig)
 from vllm.multimodal.inputs import MultiModalKwargs, PlaceholderRange
 from vllm.sampling_params import SamplingParams
 from vllm.v1.core.sched.output import SchedulerOutput
@@ -33,6 +34,8 @@ def create_scheduler(
     block_size: int = 16,
     max_model_len: Optional[int] = None,
     num_speculative_tokens: Optional[int] = None,
+    policy: SchedulerPolicy = "fcfs",
+    tenant_weights: Optional[dict[str, float]] = None,
 ) -> Scheduler:
     '''Create scheduler under test.
 
@@ -56,6 +59,8 @@ def create_scheduler(
         long_prefill_token_threshold=long_prefill_token_threshold,
         disable_chunked_mm_input=disable_chunked_mm_input,
         enable_chunked_prefill=True,
+        policy=policy,
+        tenant_weights=tenant_weights or {},
     )
     model_config = ModelConfig(
         model=model,
@@ -1247,3 +1252,75 @@ def test_memory_leak():
 
     # Confirm no memory leak.
     assert_scheduler_empty(scheduler)
+
+
+def create_tenant_requests(tenant: str, num_requests: int, num_tokens: int,
+                           max_tokens: int) -> list[Request]:
+    sampling_params = SamplingParams(ignore_eos=False,
+                                     max_tokens=max_tokens,
+                                     extra_args={"tenant": tenant})
+    return [
+        Request(
+            request_id=f"{tenant}-{i}",
+            prompt_token_ids=[i] * num_tokens,
+            sampling_params=sampling_params,
+            multi_modal_inputs=None,
+            multi_modal_placeholders=None,
+            multi_modal_hashes=None,
+            eos_token_id=EOS_TOKEN_ID,
+        ) for i in range(num_requests)
+    ]
+
+
+def simulate_tenants(policy: SchedulerPolicy) -> int:
+    """Run a bulk tenant that fills the scheduler, then an interactive
+    request. Returns the number of steps to finish the interactive request.
+    """
+    scheduler = create_scheduler(max_num_seqs=4,
+                                 max_num_batched_tokens=1024,
+                                 policy=policy)
+    for request in create_tenant_requests("bulk",
+                                          num_requests=16,
+                                          num_tokens=100,
+                                          max_tokens=50):
+        scheduler.add_request(request)
+    (interactive, ) = create_tenant_requests("interactive",
+                                             num_requests=1,
+                                             num_tokens=10,
+                                             max_tokens=5)
+
+    num_steps = 0
+    while not interactive.is_finished():
+        if num_steps == 3:
+            scheduler.add_request(interactive)
+        scheduler_output = scheduler.schedule()
+        assert len(scheduler.running) <= 4
+        scheduler.update_from_output(scheduler_output, make_output(scheduler))
+        num_steps += 1
+    return num_steps - 3
+
+
+def test_fair_share_isolates_tenant_latency():
+    # With FCFS, the interactive request waits for 12 bulk requests.
+    assert simulate_tenants("fcfs") > 150
+    # With fair sharing, a running slot is freed for it right away.
+    assert simulate_tenants("fair") <= 6
+
+
+def test_fair_share_slots_by_weight():
+    scheduler = create_scheduler(max_num_seqs=4,
+                                 max_num_batched_tokens=1024,
+                                 policy="fair",
+                                 tenant_weights={"a": 3.0})
+    for tenant in ("a", "b"):
+        for request in create_tenant_requests(tenant,
+                                              num_requests=8,
+                                              num_tokens=10,
+                                              max_tokens=100):
+            scheduler.add_request(request)
+
+    for _ in range(5):
+        scheduler_output = scheduler.schedule()
+        scheduler.update_from_output(scheduler_output, make_output(scheduler))
+        tenants = [request.tenant for request in scheduler.running]
+        assert sorted(tenants) == ["a", "a", "a", "b"]
@@ -16,7 +16,8 @@ from vllm.outputs import CompletionOutput, RequestOutput
 from vllm.sampling_params import RequestOutputKind, SamplingParams
 from vllm.sequence import PromptLogprobs, SampleLogprobs
 from vllm.transformers_utils.tokenizer import AnyTokenizer
-from vllm.v1.engine import EngineCoreRequest
+from vllm.v1.engine import EngineCoreOutput, EngineCoreRequest, FinishReason
+from vllm.v1.engine.detokenizer import BatchedIncrementalDetokenizer
 from vllm.v1.engine.output_processor import (OutputProcessor,
                                              RequestOutputCollector)
 from vllm.v1.metrics.stats import IterationStats
@@ -766,6 +767,96 @@ def test_stop_string(include_stop_str_in_output: bool,
     assert not output_processor.has_unfinished_requests()
 
 
+def _generate_strings(dummy_test_vectors, stop: list[str],
+                      include_stop_str_in_output: bool,
+                      tokens_per_step: int) -> dict[str, str]:
+    output_processor = OutputProcessor(dummy_test_vectors.tokenizer_group,
+                                       log_stats=False)
+    for idx, prompt_tokens in enumerate(dummy_test_vectors.prompt_tokens):
+        output_processor.add_request(
+            EngineCoreRequest(
+                request_id=f"request-{idx}",
+                prompt_token_ids=prompt_tokens,
+                arrival_time=0,
+                mm_inputs=None,
+                mm_hashes=None,
+                mm_placeholders=None,
+                eos_token_id=None,
+                lora_request=None,
+                cache_salt=None,
+                data_parallel_rank=None,
+                sampling_params=SamplingParams(
+                    output_kind=RequestOutputKind.DELTA,
+                    stop=stop,
+                    include_stop_str_in_output=(include_stop_str_in_output),
+                )), None)
+
+    gen_strings: dict[str, str] = {}
+    generation_tokens = dummy_test_vectors.generation_tokens
+    for start in range(0, max(map(len, generation_tokens)), tokens_per_step):
+        outputs = []
+        for idx, token_ids in enumerate(generation_tokens):
+            new_token_ids = token_ids[start:start + tokens_per_step]
+            if not new_token_ids:
+                continue
+            finished = start + tokens_per_step >= len(token_ids)
+            outputs.append(
+                EngineCoreOutput(
+                    request_id=f"request-{idx}",
+                    new_token_ids=new_token_ids,
+                    finish_reason=FinishReason.LENGTH if finished else None))
+        for request_output in output_processor.process_outputs(
+                outputs).request_outputs:
+            gen_strings[request_output.request_id] = gen_strings.get(
+                request_output.request_id, "") + request_output.outputs[0].text
+    assert not output_processor.has_unfinished_requests()
+    return gen_strings
+
+
+@pytest.mark.parametrize("include_stop_str_in_output", [True, False])
+@pytest.mark.parametrize("tokens_per_step", [1, 3])
+def test_batched_detokenization(include_stop_str_in_output: bool,
+                                tokens_per_step: int, dummy_test_vectors,
+                                monkeypatch: pytest.MonkeyPatch):
+    for stop in ([], STOP_STRINGS):
+        monkeypatch.setenv("VLLM_BATCHED_DETOKENIZATION", "0")
+        expected = _generate_strings(dummy_test_vectors, stop,
+                                     include_stop_str_in_output,
+                                     tokens_per_step)
+        monkeypatch.setenv("VLLM_BATCHED_DETOKENIZATION", "1")
+        batched = _generate_strings(dummy_test_vectors, stop,
+                                    include_stop_str_in_output,
+                                    tokens_per_step)
+        assert batched == expected
+        if not stop:
+            assert list(expected.values()) == \
+                dummy_test_vectors.generation_strings
+
+
+def test_batched_detokenizer_decode_next(dummy_test_vectors):
+    """A batched detokenizer can also decode one token at a time."""
+    for prompt_tokens, token_ids, expected in zip(
+            dummy_test_vectors.prompt_tokens,
+            dummy_test_vectors.generation_tokens,
+            dummy_test_vectors.generation_strings):
+        detokenizer = BatchedIncrementalDetokenizer(
+            dummy_test_vectors.tokenizer,
+            EngineCoreRequest(request_id="request",
+                              prompt_token_ids=prompt_tokens,
+                              arrival_time=0,
+                              mm_inputs=None,
+                              mm_hashes=None,
+                              mm_placeholders=None,
+                              eos_token_id=None,
+                              lora_request=None,
+                              cache_salt=None,
+                              data_parallel_rank=None,
+                              sampling_params=SamplingParams()))
+        text = "".join(
+            detokenizer.decode_next(token_id) for token_id in token_ids)
+        assert text == expected
+
+
 def test_iteration_stats(dummy_test_vectors):
     output_processor = OutputProcessor(dummy_test_vectors.tokenizer_group,
                                        log_stats=True)
@@ -0,0 +1,159 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+import copy
+from types import SimpleNamespace
+
+import pytest
+
+from vllm.config import KVTransferConfig
+from vllm.distributed.kv_transfer.kv_connector.v1.tiered_prefix_cache_connector import (  # noqa: E501
+    TieredPrefixCacheConnectorMetadata, TieredPrefixCacheScheduler, TierIndex)
+from vllm.v1.core.kv_cache_utils import BlockHashWithGroupId
+from vllm.v1.outputs import EMPTY_MODEL_RUNNER_OUTPUT
+from vllm.v1.request import RequestStatus
+
+from .utils import (create_model_runner_output, create_request,
+                    create_scheduler, create_vllm_config)
+
+
+def test_tier_index_lru():
+    index = TierIndex(num_slots=2)
+    keys = [BlockHashWithGroupId(i, 0) for i in range(4)]
+
+    assert index.allocate(keys[0], pinned=set()) == 0
+    assert index.allocate(keys[1], pinned=set()) == 1
+    # keys[0] becomes the most recently used, so keys[1] is evicted.
+    assert index.get(keys[0]) == 0
+    assert index.allocate(keys[2], pinned=set()) == 1
+    assert keys[1] not in index
+
+    # Pinned slots are not evicted.
+    assert index.allocate(keys[3], pinned={0}) == 1
+    assert keys[2] not in index
+    assert index.allocate(keys[1], pinned={0, 1}) is None
+    assert len(index) == 2
+
+
+def test_multiple_kv_cache_groups_are_rejected():
+    scheduler = TieredPrefixCacheScheduler(create_vllm_config(),
+                                           num_host_blocks=8,
+                                           num_disk_blocks=0)
+    kv_cache_manager = SimpleNamespace(num_kv_cache_groups=2,
+                                       log_stats=False)
+
+    with pytest.raises(ValueError, match="single KV cache group"):
+        scheduler.bind_kv_cache_manager(kv_cache_manager)
+
+
+def run_to_completion(scheduler, request):
+    """Schedule a request until it finishes after one token."""
+    scheduler.add_request(request)
+    scheduler_output = scheduler.schedule()
+    assert request.status == RequestStatus.RUNNING
+    model_runner_output = create_model_runner_output([request], use_eos=True)
+    scheduler.update_from_output(scheduler_output, model_runner_output)
+    assert request.is_finished()
+    return scheduler_output
+
+
+def test_evicted_blocks_are_loaded_from_host():
+    vllm_config = create_vllm_config()
+    vllm_config.kv_transfer_config = KVTransferConfig(
+        kv_connector="TieredPrefixCacheConnector",
+        kv_role="kv_both",
+        kv_connector_extra_config={"host_cache_num_blocks": 8})
+    # 4 usable GPU blocks: each request evicts the blocks of the previous.
+    scheduler = create_scheduler(vllm_config, num_blocks=5)
+
+    BLOCK_SIZE = vllm_config.cache_config.block_size
+    NUM_FULL_BLOCKS = 3
+    NUM_TOKENS = BLOCK_SIZE * NUM_FULL_BLOCKS + 4
+
+    request_a = create_request(request_id=1,
+                               num_tokens=NUM_TOKENS,
+                               use_all_1s_for_prompt_tokens=True)
+    scheduler.add_request(request_a)
+    scheduler_output = scheduler.schedule()
+    (block_ids_a, ) = scheduler.kv_cache_manager.get_block_ids(
+        request_a.request_id)
+    scheduler.update_from_output(
+        scheduler_output, create_model_runner_output([request_a],
+                                                     use_eos=True))
+    assert request_a.is_finished()
+
+    # Request B evicts the full blocks of request A into the host tier.
+    request_b = create_request(request_id=2, num_tokens=NUM_TOKENS)
+    scheduler_output = run_to_completion(scheduler, request_b)
+    meta = scheduler_output.kv_connector_metadata
+    assert isinstance(meta, TieredPrefixCacheConnectorMetadata)
+    assert sorted(block_id for block_id, _ in meta.saves) == sorted(
+        block_ids_a[:NUM_FULL_BLOCKS])
+    host_slots = dict(meta.saves)
+
+    # Request C has the prompt of request A: it misses the GPU prefix cache
+    # and waits for the blocks to be loaded from the host tier.
+    request_c = create_request(request_id=3,
+                               num_tokens=NUM_TOKENS,
+                               use_all_1s_for_prompt_tokens=True)
+    scheduler.add_request(request_c)
+    scheduler_output = scheduler.schedule()
+    assert request_c.status == RequestStatus.WAITING_FOR_REMOTE_KVS
+    assert scheduler_output.total_num_scheduled_tokens == 0
+    (block_ids_c, ) = scheduler.kv_cache_manager.get_block_ids(
+        request_c.request_id)
+    meta = scheduler_output.kv_connector_metadata
+    assert meta.loads == {
+        request_c.request_id: [(host_slots[block_ids_a[i]], block_ids_c[i])
+                               for i in range(NUM_FULL_BLOCKS)]
+    }
+    stats = scheduler.make_stats().prefix_cache_stats
+    assert stats.tier_hits["host"] == NUM_FULL_BLOCKS * BLOCK_SIZE
+    assert stats.tier_queries["host"] >= NUM_TOKENS
+
+    # Once loaded, only the last partial block is computed.
+    model_runner_output = copy.deepcopy(EMPTY_MODEL_RUNNER_OUTPUT)
+    model_runner_output.finished_recving = [request_c.request_id]
+    scheduler.update_from_output(scheduler_output, model_runner_output)
+    scheduler_output = scheduler.schedule()
+    assert request_c.status == RequestStatus.RUNNING
+    assert scheduler_output.num_scheduled_tokens[request_c.request_id] == 4
+
+
+def test_finished_while_loading_frees_blocks_after_load():
+    vllm_config = create_vllm_config()
+    vllm_config.kv_transfer_config = KVTransferConfig(
+        kv_connector="TieredPrefixCacheConnector",
+        kv_role="kv_both",
+        kv_connector_extra_config={"host_cache_num_blocks": 8})
+    scheduler = create_scheduler(vllm_config, num_blocks=5)
+    NUM_TOKENS = vllm_config.cache_config.block_size * 3 + 4
+
+    run_to_completion(
+        scheduler,
+        create_request(request_id=1,
+                       num_tokens=NUM_TOKENS,
+                       use_all_1s_for_prompt_tokens=True))
+    run_to_completion(scheduler,
+                      create_request(request_id=2, num_tokens=NUM_TOKENS))
+
+    request = create_request(request_id=3,
+                             num_tokens=NUM_TOKENS,
+                             use_all_1s_for_prompt_tokens=True)
+    scheduler.add_request(request)
+    scheduler_output = scheduler.schedule()
+    assert request.status == RequestStatus.WAITING_FOR_REMOTE_KVS
+
+    # The request is aborted while loading: its blocks are only freed once
+    # the worker reports the load as done.
+    scheduler.finish_requests(request.request_id,
+                              RequestStatus.FINISHED_ABORTED)
+    assert request.request_id in scheduler.requests
+    scheduler.update_from_output(scheduler_output, EMPTY_MODEL_RUNNER_OUTPUT)
+
+    scheduler_output = scheduler.schedule()
+    meta = scheduler_output.kv_connector_metadata
+    assert meta.free_after_load == [request.request_id]
+    model_runner_output = copy.deepcopy(EMPTY_MODEL_RUNNER_OUTPUT)
+    model_runner_output.finished_sending = [request.request_id]
+    scheduler.update_from_output(scheduler_output, model_runner_output)
+    assert request.request_id not in scheduler.requests
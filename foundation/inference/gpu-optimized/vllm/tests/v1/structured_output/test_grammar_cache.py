@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+import json
+import os
+
+import pytest
+import xgrammar as xgr
+
+from vllm.v1.structured_output import load_json_schemas
+from vllm.v1.structured_output.grammar_cache import (
+    DEFAULT_GRAMMAR_SIZE_BYTES, CompiledGrammarCache, get_tokenizer_fingerprint)
+
+SCHEMA = json.dumps({
+    "type": "object",
+    "properties": {
+        "name": {
+            "type": "string"
+        }
+    },
+})
+
+requires_serialization = pytest.mark.skipif(
+    not hasattr(xgr.CompiledGrammar, "serialize_json"),
+    reason="xgrammar cannot serialize compiled grammars")
+
+
+def create_tokenizer_info(vocab: list[str]) -> xgr.TokenizerInfo:
+    return xgr.TokenizerInfo(encoded_vocab=vocab, stop_token_ids=[0])
+
+
+def compile_schema(tokenizer_info: xgr.TokenizerInfo) -> xgr.CompiledGrammar:
+    return xgr.GrammarCompiler(tokenizer_info).compile_json_schema(SCHEMA)
+
+
+def test_cache_key():
+    key = CompiledGrammarCache.get_key("JSON", SCHEMA, any_whitespace=True)
+    assert key == CompiledGrammarCache.get_key("JSON", SCHEMA, True)
+    assert key != CompiledGrammarCache.get_key("JSON", SCHEMA, False)
+    assert key != CompiledGrammarCache.get_key("REGEX", SCHEMA, True)
+
+
+def test_tokenizer_fingerprint():
+    vocab = ["</s>", "{", "}", '"', "name", ":", " "]
+    assert (get_tokenizer_fingerprint(
+        create_tokenizer_info(vocab)) == get_tokenizer_fingerprint(
+            create_tokenizer_info(vocab)))
+    assert (get_tokenizer_fingerprint(create_tokenizer_info(vocab))
+            != get_tokenizer_fingerprint(create_tokenizer_info(vocab[::-1])))
+
+
+@requires_serialization
+def test_cache_round_trip(tmp_path):
+    vocab = ["</s>", "{", "}", '"', "name", ":", " "]
+    key = CompiledGrammarCache.get_key("JSON", SCHEMA, any_whitespace=True)
+    cache = CompiledGrammarCache(create_tokenizer_info(vocab),
+                                 cache_dir=str(tmp_path),
+                                 max_memory_bytes=1 << 20)
+    assert cache.get(key) is None
+    cache.put(key, compile_schema(cache.tokenizer_info))
+
+    # Another process with the same tokenizer reads it from disk.
+    other = CompiledGrammarCache(create_tokenizer_info(vocab),
+                                 cache_dir=str(tmp_path),
+                                 max_memory_bytes=1 << 20)
+    ctx = other.get(key)
+    assert ctx is not None
+    matcher = xgr.GrammarMatcher(ctx)
+    assert matcher.accept_string('{"name": "a"}')
+
+    # A different tokenizer does not share the entries.
+    different = CompiledGrammarCache(create_tokenizer_info(vocab[::-1]),
+                                     cache_dir=str(tmp_path),
+                                     max_memory_bytes=1 << 20)
+    assert different.get(key) is None
+
+
+@requires_serialization
+def test_cache_corrupted_file(tmp_path):
+    key = CompiledGrammarCache.get_key("JSON", SCHEMA, any_whitespace=True)
+    cache = CompiledGrammarCache(create_tokenizer_info(["</s>", "{", "}"]),
+                                 cache_dir=str(tmp_path),
+                                 max_memory_bytes=1 << 20)
+    os.makedirs(cache.cache_dir)
+    with open(os.path.join(cache.cache_dir, f"{key}.json"), "w") as f:
+        f.write("not a grammar")
+
+    assert cache.get(key) is None
+    cache.put(key, compile_schema(cache.tokenizer_info))
+    assert cache.get(key) is not None
+
+
+def test_memory_bound_without_grammar_sizes():
+    cache = CompiledGrammarCache(create_tokenizer_info(["</s>"]),
+                                 cache_dir=None,
+                                 max_memory_bytes=2 *
+                                 DEFAULT_GRAMMAR_SIZE_BYTES)
+    # Stand-ins for grammars of an xgrammar version that does not report
+    # their size.
+    grammars = [object() for _ in range(3)]
+    for i, ctx in enumerate(grammars):
+        cache.put(str(i), ctx)
+
+    assert cache.get("0") is None
+    assert cache.get("1") is grammars[1] and cache.get("2") is grammars[2]
+    assert cache.memory_bytes == 2 * DEFAULT_GRAMMAR_SIZE_BYTES
+
+
+def test_load_json_schemas(tmp_path):
+    schema_dir = tmp_path / "schemas"
+    schema_dir.mkdir()
+    (schema_dir / "b.json").write_text(SCHEMA)
+    (schema_dir / "a.json").write_text('{"type": "integer"}')
+    (schema_dir / "notes.txt").write_text("not a schema")
+    other = tmp_path / "other.json"
+    other.write_text('{\n  "type":   "string"\n}')
+
+    schemas = load_json_schemas([str(schema_dir), str(other)])
+
+    # Serialized like the guided_json of the requests.
+    assert [schema for _, schema in schemas
+            ] == ['{"type": "integer"}', SCHEMA, '{"type": "string"}']
+
+    other.write_text("{")
+    with pytest.raises(ValueError, match="other.json"):
+        load_json_schemas([str(other)])
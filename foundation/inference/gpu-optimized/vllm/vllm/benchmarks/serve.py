@@ -28,12 +28,13 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Optional
 
+import aiohttp
 import numpy as np
 from tqdm.asyncio import tqdm
 from transformers import PreTrainedTokenizerBase
 
-from vllm.benchmarks.datasets import (SampleRequest, add_dataset_parser,
-                                      get_samples)
+from vllm.benchmarks.datasets import (RubricAnalysisDataset, SampleRequest,
+                                      add_dataset_parser, get_samples)
 from vllm.benchmarks.endpoint_request_func import (ASYNC_REQUEST_FUNCS,
                                                    OPENAI_COMPATIBLE_BACKENDS,
                                                    RequestFuncInput,
@@ -79,6 +80,7 @@ async def get_request(
     input_requests: list[SampleRequest],
     request_rate: float,
     burstiness: float = 1.0,
+    replay_time_scale: Optional[float] = None,
 ) -> AsyncGenerator[SampleRequest, None]:
     """
     Asynchronously generates requests at a specified rate
@@ -97,7 +99,24 @@ async def get_request(
             A lower burstiness value (0 < burstiness < 1) results
             in more bursty requests, while a higher burstiness value
             (burstiness > 1) results in a more uniform arrival of requests.
+        replay_time_scale (optional):
+            If set, request_rate and burstiness are ignored and every request
+            is sent at its recorded `arrival_time` multiplied by this factor,
+            e.g. 0.5 replays a trace twice as fast. Requests without an
+            arrival time are sent immediately.
     """
+    if replay_time_scale is not None:
+        start_time = time.perf_counter()
+        for request in input_requests:
+            if request.arrival_time is not None:
+                delay = (start_time +
+                         request.arrival_time * replay_time_scale -
+                         time.perf_counter())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield request
+        return
+
     input_requests: Iterable[SampleRequest] = iter(input_requests)
 
     # Calculate scale parameter theta to maintain the desired request_rate.
@@ -119,6 +138,38 @@ async def get_request(
         await asyncio.sleep(interval)
 
 
+async def fetch_prefix_cache_counters(
+        base_url: str) -> Optional[tuple[float, float]]:
+    """
+    Return the (queries, hits) prefix cache token counters from the server's
+    Prometheus endpoint, or None if the server does not expose them.
+    """
+    counters = {
+        "vllm:prefix_cache_queries_total": 0.0,
+        "vllm:prefix_cache_hits_total": 0.0,
+    }
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(
+                total=10)) as session:
+            response = await session.get(f"{base_url}/metrics")
+            if response.status != 200:
+                return None
+            text = await response.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+    found = False
+    for line in text.splitlines():
+        name = line.split("{", 1)[0].split(" ", 1)[0]
+        if name in counters:
+            counters[name] += float(line.rsplit(" ", 1)[1])
+            found = True
+    if not found:
+        return None
+    return (counters["vllm:prefix_cache_queries_total"],
+            counters["vllm:prefix_cache_hits_total"])
+
+
 def calculate_metrics(
     input_requests: list[SampleRequest],
     outputs: list[RequestFuncOutput],
@@ -259,6 +310,7 @@ async def benchmark(
     max_concurrency: Optional[int],
     lora_modules: Optional[Iterable[str]],
     extra_body: Optional[dict],
+    replay_time_scale: Optional[float] = None,
 ):
     if endpoint_type in ASYNC_REQUEST_FUNCS:
         request_func = ASYNC_REQUEST_FUNCS[endpoint_type]
@@ -321,8 +373,12 @@ async def benchmark(
     else:
         distribution = "Gamma distribution"
 
-    print(f"Traffic request rate: {request_rate}")
-    print(f"Burstiness factor: {burstiness} ({distribution})")
+    if replay_time_scale is not None:
+        print("Traffic: replaying recorded arrival times "
+              f"(time scale {replay_time_scale})")
+    else:
+        print(f"Traffic request rate: {request_rate}")
+        print(f"Burstiness factor: {burstiness} ({distribution})")
     print(f"Maximum request concurrency: {max_concurrency}")
 
     pbar = None if disable_tqdm else tqdm(total=len(input_requests))
@@ -342,9 +398,12 @@ async def benchmark(
             return await request_func(request_func_input=request_func_input,
                                       pbar=pbar)
 
+    prefix_cache_start = await fetch_prefix_cache_counters(base_url)
+
     benchmark_start_time = time.perf_counter()
     tasks: list[asyncio.Task] = []
-    async for request in get_request(input_requests, request_rate, burstiness):
+    async for request in get_request(input_requests, request_rate, burstiness,
+                                     replay_time_scale):
         prompt, prompt_len, output_len, mm_content = (
             request.prompt,
             request.prompt_len,
@@ -391,6 +450,14 @@ async def benchmark(
 
     benchmark_duration = time.perf_counter() - benchmark_start_time
 
+    prefix_cache_hit_rate = None
+    prefix_cache_end = await fetch_prefix_cache_counters(base_url)
+    if prefix_cache_start is not None and prefix_cache_end is not None:
+        queries = prefix_cache_end[0] - prefix_cache_start[0]
+        hits = prefix_cache_end[1] - prefix_cache_start[1]
+        if queries > 0:
+            prefix_cache_hit_rate = hits / queries
+
     metrics, actual_output_lens = calculate_metrics(
         input_requests=input_requests,
         outputs=outputs,
@@ -416,6 +483,9 @@ async def benchmark(
                                     metrics.output_throughput))
     print("{:<40} {:<10.2f}".format("Total Token throughput (tok/s):",
                                     metrics.total_token_throughput))
+    if prefix_cache_hit_rate is not None:
+        print("{:<40} {:<10.2f}".format("Prefix cache hit rate (%):",
+                                        prefix_cache_hit_rate * 100))
 
     result = {
         "duration": benchmark_duration,
@@ -427,6 +497,7 @@ async def benchmark(
         metrics.request_goodput if goodput_config_dict else None,
         "output_throughput": metrics.output_throughput,
         "total_token_throughput": metrics.total_token_throughput,
+        "prefix_cache_hit_rate": prefix_cache_hit_rate,
         "input_lens": [output.prompt_len for output in outputs],
         "output_lens": actual_output_lens,
         "ttfts": [output.ttft for output in outputs],
@@ -625,6 +696,21 @@ def add_cli_args(parser: argparse.ArgumentParser):
         "bursty requests. A higher burstiness value (burstiness > 1) "
         "results in a more uniform arrival of requests.",
     )
+    parser.add_argument(
+        "--replay-arrival-times",
+        action="store_true",
+        help="Send each request at the arrival time recorded by the dataset "
+        "instead of synthesizing arrival times from --request-rate and "
+        "--burstiness. Currently only the rubric dataset records arrival "
+        "times.",
+    )
+    parser.add_argument(
+        "--replay-time-scale",
+        type=float,
+        default=1.0,
+        help="Factor applied to the recorded arrival times when "
+        "--replay-arrival-times is set, e.g. 0.5 replays twice as fast.",
+    )
     parser.add_argument(
         "--trust-remote-code",
         action="store_true",
@@ -801,6 +887,11 @@ def main(args: argparse.Namespace):
 
     # Load the dataset.
     input_requests = get_samples(args, tokenizer)
+
+    if args.dataset_name == "rubric":
+        ideal_hit_rate = RubricAnalysisDataset.estimate_prefix_hit_rate(
+            input_requests, tokenizer)
+        print(f"Ideal prefix cache hit rate: {ideal_hit_rate * 100:.2f}%")
     goodput_config_dict = check_goodput_args(args)
 
     # Collect the sampling parameters.
@@ -849,6 +940,8 @@ def main(args: argparse.Namespace):
             max_concurrency=args.max_concurrency,
             lora_modules=args.lora_modules,
             extra_body=sampling_params,
+            replay_time_scale=(args.replay_time_scale
+                               if args.replay_arrival_times else None),
         ))
 
     # Save config and results to json
@@ -879,6 +972,8 @@ def main(args: argparse.Namespace):
         result_json["request_rate"] = (args.request_rate if args.request_rate
                                        < float("inf") else "inf")
         result_json["burstiness"] = args.burstiness
+        if args.replay_arrival_times:
+            result_json["replay_time_scale"] = args.replay_time_scale
         result_json["max_concurrency"] = args.max_concurrency
 
         # Merge with benchmark result
@@ -0,0 +1,544 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+r"""Simulate the V1 scheduler and KV cache offline, for capacity planning.
+
+The real V1 `Scheduler`, `KVCacheManager` and `BlockPool` are driven by a
+mock model executor. Its step time comes from a linear cost model, so a
+request trace is replayed on CPU in seconds, without loading model weights.
+Only the model config and the tokenizer are loaded.
+
+The configurations in the cartesian product of the swept arguments are
+simulated one after the other, e.g.
+    vllm bench simulate \
+        --model <your_model> \
+        --dataset-name random --num-prompts 1000 --request-rate 20 \
+        --max-num-seqs 64 128 256 \
+        --kv-cache-memory-gib 8 16
+
+The cost model coefficients should be fitted on the target hardware, e.g.
+from `vllm bench latency` runs with different input lengths and batch sizes.
+"""
+import argparse
+import dataclasses
+import itertools
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+
+from vllm.benchmarks.datasets import (SampleRequest, add_dataset_parser,
+                                      get_samples)
+from vllm.benchmarks.utils import write_to_json
+from vllm.config import (CacheConfig, ModelConfig, ParallelConfig,
+                         SchedulerConfig, VllmConfig)
+from vllm.sampling_params import SamplingParams
+from vllm.transformers_utils.tokenizer import get_tokenizer
+from vllm.utils import cdiv
+from vllm.v1.core.sched.scheduler import Scheduler
+from vllm.v1.engine import EngineCoreEventType
+from vllm.v1.kv_cache_interface import (FullAttentionSpec, KVCacheConfig,
+                                        KVCacheGroupSpec)
+from vllm.v1.outputs import ModelRunnerOutput
+from vllm.v1.request import Request
+from vllm.v1.structured_output import StructuredOutputManager
+
+# The token "sampled" by the mock model executor. Requests are created with
+# `ignore_eos=True`, so they always generate their expected output length.
+SAMPLED_TOKEN_ID = 0
+
+
+@dataclass
+class StepCostModel:
+    """Linear model of the duration of a model executor step, in seconds:
+    `fixed_s + prefill_token_s * <prefill tokens>
+    + decode_seq_s * <decode requests> + context_token_s * <attended tokens>`.
+
+    The attended tokens are the context lengths of the scheduled requests,
+    which account for the attention cost growing with the sequence length.
+    The defaults are in the range of an 8B model on one H100 GPU.
+    """
+    fixed_s: float = 0.008
+    prefill_token_s: float = 6e-5
+    decode_seq_s: float = 5e-5
+    context_token_s: float = 5e-8
+
+    def step_time(self, num_prefill_tokens: int, num_decode_seqs: int,
+                  num_context_tokens: int) -> float:
+        return (self.fixed_s + self.prefill_token_s * num_prefill_tokens +
+                self.decode_seq_s * num_decode_seqs +
+                self.context_token_s * num_context_tokens)
+
+
+@dataclass
+class SimulatedRequest:
+    """A request of the replayed trace, and its simulated timeline."""
+    request_id: str
+    prompt_token_ids: list[int]
+    output_len: int
+    arrival_time: float
+    first_token_time: Optional[float] = None
+    finish_time: Optional[float] = None
+    num_preemptions: int = 0
+
+
+@dataclass
+class SimulationResult:
+    duration: float
+    num_steps: int
+    requests: list[SimulatedRequest]
+    num_preemptions: int
+    prefix_cache_queries: int
+    prefix_cache_hits: int
+    mean_kv_cache_usage: float
+    max_kv_cache_usage: float
+    wall_time: float
+    config: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def prefix_cache_hit_rate(self) -> float:
+        if self.prefix_cache_queries == 0:
+            return 0.0
+        return self.prefix_cache_hits / self.prefix_cache_queries
+
+    def get_metrics(self, percentiles: list[float]) -> dict[str, Any]:
+        """Get the throughput and latency metrics, with latencies in ms."""
+        ttfts = [(req.first_token_time - req.arrival_time) * 1000
+                 for req in self.requests]
+        tpots = [(req.finish_time - req.first_token_time) /
+                 (req.output_len - 1) * 1000 for req in self.requests
+                 if req.output_len > 1]
+        e2els = [(req.finish_time - req.arrival_time) * 1000
+                 for req in self.requests]
+        total_input = sum(len(req.prompt_token_ids) for req in self.requests)
+        total_output = sum(req.output_len for req in self.requests)
+        metrics: dict[str, Any] = {
+            **self.config,
+            "completed": len(self.requests),
+            "duration": self.duration,
+            "num_steps": self.num_steps,
+            "total_input_tokens": total_input,
+            "total_output_tokens": total_output,
+            "request_throughput": len(self.requests) / self.duration,
+            "output_throughput": total_output / self.duration,
+            "total_token_throughput":
+            (total_input + total_output) / self.duration,
+            "num_preemptions": self.num_preemptions,
+            "prefix_cache_hit_rate": self.prefix_cache_hit_rate,
+            "mean_kv_cache_usage": self.mean_kv_cache_usage,
+            "max_kv_cache_usage": self.max_kv_cache_usage,
+            "simulation_wall_time": self.wall_time,
+        }
+        for name, values in (("ttft", ttfts), ("tpot", tpots), ("e2el",
+                                                                e2els)):
+            metrics[f"mean_{name}_ms"] = float(np.mean(values or 0))
+            for p in percentiles:
+                p_word = str(int(p)) if int(p) == p else str(p)
+                metrics[f"p{p_word}_{name}_ms"] = float(
+                    np.percentile(values or 0, p))
+        return metrics
+
+
+def create_kv_cache_config(vllm_config: VllmConfig,
+                           num_gpu_blocks: Optional[int] = None,
+                           kv_cache_memory_gib: Optional[float] = None,
+                           tensor_parallel_size: int = 1) -> KVCacheConfig:
+    """Create the KV cache config of one GPU, with either a number of blocks
+    or an amount of KV cache memory. All the layers are modeled as full
+    attention layers."""
+    model_config = vllm_config.model_config
+    cache_config = vllm_config.cache_config
+    spec = FullAttentionSpec(
+        block_size=cache_config.block_size,
+        num_kv_heads=max(
+            1,
+            model_config.get_total_num_kv_heads() // tensor_parallel_size),
+        head_size=model_config.get_head_size(),
+        dtype=model_config.dtype,
+        use_mla=model_config.use_mla,
+    )
+    num_layers = model_config.get_num_layers(ParallelConfig())
+    if num_gpu_blocks is None:
+        if kv_cache_memory_gib is None:
+            raise ValueError(
+                "Either num_gpu_blocks or kv_cache_memory_gib must be set.")
+        num_gpu_blocks = int(kv_cache_memory_gib * (1 << 30) //
+                             (spec.page_size_bytes * num_layers))
+    cache_config.num_gpu_blocks = num_gpu_blocks
+    return KVCacheConfig(
+        num_blocks=num_gpu_blocks,
+        kv_cache_tensors=[],
+        kv_cache_groups=[KVCacheGroupSpec(["model"], spec)],
+    )
+
+
+def create_trace(samples: list[SampleRequest],
+                 tokenizer: Any,
+                 request_rate: float = float("inf"),
+                 burstiness: float = 1.0,
+                 replay_time_scale: Optional[float] = None,
+                 max_model_len: Optional[int] = None,
+                 seed: int = 0) -> list[SimulatedRequest]:
+    """Tokenize the sampled requests and give them arrival times.
+
+    The arrival times follow a gamma process like `vllm bench serve`, or the
+    recorded `arrival_time` of the samples with `replay_time_scale`.
+    """
+    rng = np.random.default_rng(seed)
+    trace: list[SimulatedRequest] = []
+    arrival_time = 0.0
+    for i, sample in enumerate(samples):
+        if not isinstance(sample.prompt, str):
+            raise ValueError("Only text prompts can be simulated.")
+        prompt_token_ids = tokenizer(sample.prompt).input_ids
+        output_len = max(sample.expected_output_len, 1)
+        if max_model_len is not None:
+            if len(prompt_token_ids) >= max_model_len:
+                raise ValueError(
+                    f"Request {i} has {len(prompt_token_ids)} prompt tokens, "
+                    f"max_model_len is {max_model_len}.")
+            output_len = min(output_len, max_model_len - len(prompt_token_ids))
+
+        if replay_time_scale is not None:
+            if sample.arrival_time is not None:
+                arrival_time = sample.arrival_time * replay_time_scale
+        elif i > 0 and request_rate != float("inf"):
+            arrival_time += rng.gamma(shape=burstiness,
+                                      scale=1.0 / (request_rate * burstiness))
+        trace.append(
+            SimulatedRequest(request_id=str(i),
+                             prompt_token_ids=prompt_token_ids,
+                             output_len=output_len,
+                             arrival_time=arrival_time))
+    trace.sort(key=lambda req: req.arrival_time)
+    return trace
+
+
+def simulate(
+    vllm_config: VllmConfig,
+    kv_cache_config: KVCacheConfig,
+    trace: list[SimulatedRequest],
+    cost_model: StepCostModel,
+    structured_output_manager: Optional[StructuredOutputManager] = None,
+) -> SimulationResult:
+    """Replay a trace through the scheduler, advancing a simulated clock by
+    the modeled duration of every step."""
+    block_size = vllm_config.cache_config.block_size
+    for req in trace:
+        num_blocks = cdiv(
+            len(req.prompt_token_ids) + req.output_len, block_size)
+        # One block is reserved as the null block.
+        if num_blocks > kv_cache_config.num_blocks - 1:
+            raise ValueError(
+                f"Request {req.request_id} needs {num_blocks} KV cache "
+                f"blocks, but the cache only has "
+                f"{kv_cache_config.num_blocks - 1}.")
+
+    if structured_output_manager is None:
+        structured_output_manager = StructuredOutputManager(vllm_config)
+    scheduler = Scheduler(
+        vllm_config=vllm_config,
+        kv_cache_config=kv_cache_config,
+        structured_output_manager=structured_output_manager,
+        log_stats=True,
+    )
+
+    trace = [dataclasses.replace(req) for req in trace]
+    simulated_requests = {req.request_id: req for req in trace}
+    pending = deque(trace)
+    now = 0.0
+    num_steps = 0
+    num_preemptions = 0
+    prefix_cache_queries = prefix_cache_hits = 0
+    kv_cache_usages: list[float] = []
+    start_time = time.perf_counter()
+
+    while pending or scheduler.has_unfinished_requests():
+        while pending and pending[0].arrival_time <= now:
+            req = pending.popleft()
+            scheduler.add_request(
+                Request(
+                    request_id=req.request_id,
+                    prompt_token_ids=req.prompt_token_ids,
+                    multi_modal_inputs=None,
+                    multi_modal_hashes=None,
+                    multi_modal_placeholders=None,
+                    sampling_params=SamplingParams(max_tokens=req.output_len,
+                                                   ignore_eos=True),
+                    eos_token_id=None,
+                ))
+        if not scheduler.has_unfinished_requests():
+            now = pending[0].arrival_time
+            continue
+
+        scheduler_output = scheduler.schedule()
+        stats = scheduler.make_stats()
+        assert stats is not None
+        prefix_cache_queries += stats.prefix_cache_stats.queries
+        prefix_cache_hits += stats.prefix_cache_stats.hits
+
+        if scheduler_output.total_num_scheduled_tokens == 0:
+            # Nothing can run until the next request arrives.
+            if not pending:
+                raise RuntimeError(
+                    "The scheduler cannot make progress with "
+                    f"{scheduler.get_num_unfinished_requests()} unfinished "
+                    "requests.")
+            now = max(now, pending[0].arrival_time)
+            continue
+        kv_cache_usages.append(stats.kv_cache_usage)
+
+        # The scheduler already advanced the computed tokens.
+        num_prefill_tokens = num_decode_seqs = num_context_tokens = 0
+        req_ids: list[str] = []
+        sampled_token_ids: list[list[int]] = []
+        for req_id, num_tokens in (
+                scheduler_output.num_scheduled_tokens.items()):
+            request = scheduler.requests[req_id]
+            num_computed_tokens = request.num_computed_tokens - num_tokens
+            if (num_tokens == 1
+                    and num_computed_tokens == request.num_tokens - 1):
+                num_decode_seqs += 1
+            else:
+                num_prefill_tokens += num_tokens
+            num_context_tokens += request.num_computed_tokens
+            req_ids.append(req_id)
+            sampled_token_ids.append(
+                [SAMPLED_TOKEN_ID] if request.num_computed_tokens >=
+                request.num_tokens else [])
+        now += cost_model.step_time(num_prefill_tokens, num_decode_seqs,
+                                    num_context_tokens)
+        num_steps += 1
+
+        model_runner_output = ModelRunnerOutput(
+            req_ids=req_ids,
+            req_id_to_index={
+                req_id: i
+                for i, req_id in enumerate(req_ids)
+            },
+            sampled_token_ids=sampled_token_ids,
+            spec_token_ids=None,
+            logprobs=None,
+            prompt_logprobs_dict={},
+        )
+        engine_core_outputs = scheduler.update_from_output(
+            scheduler_output, model_runner_output)
+        for outputs in engine_core_outputs.values():
+            for output in outputs.outputs:
+                req = simulated_requests[output.request_id]
+                for event in output.events or ():
+                    if event.type == EngineCoreEventType.PREEMPTED:
+                        req.num_preemptions += 1
+                        num_preemptions += 1
+                if output.new_token_ids and req.first_token_time is None:
+                    req.first_token_time = now
+                if output.finished:
+                    req.finish_time = now
+
+    return SimulationResult(
+        duration=now - trace[0].arrival_time if trace else 0.0,
+        num_steps=num_steps,
+        requests=trace,
+        num_preemptions=num_preemptions,
+        prefix_cache_queries=prefix_cache_queries,
+        prefix_cache_hits=prefix_cache_hits,
+        mean_kv_cache_usage=float(np.mean(kv_cache_usages or 0)),
+        max_kv_cache_usage=max(kv_cache_usages, default=0.0),
+        wall_time=time.perf_counter() - start_time,
+    )
+
+
+def print_metrics(metrics: dict[str, Any]) -> None:
+    print("{s:{c}^{n}}".format(s=" Simulation Result ", n=50, c="="))
+    for name, value in metrics.items():
+        if isinstance(value, float):
+            print("{:<40} {:<10.4g}".format(name + ":", value))
+        else:
+            print("{:<40} {:<10}".format(name + ":", str(value)))
+    print("=" * 50)
+
+
+def add_cli_args(parser: argparse.ArgumentParser):
+    add_dataset_parser(parser)
+    # Only used by the sonnet and hf datasets.
+    parser.set_defaults(endpoint_type="openai")
+    parser.add_argument("--model",
+                        type=str,
+                        required=True,
+                        help="Name or path of the model. Only its config and "
+                        "tokenizer are loaded.")
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Name or path of the tokenizer, if not using the default "
+        "tokenizer.")
+    parser.add_argument("--tokenizer-mode", type=str, default="auto")
+    parser.add_argument("--trust-remote-code", action="store_true")
+    parser.add_argument("--dtype", type=str, default="auto")
+    parser.add_argument("--max-model-len", type=int, default=None)
+    parser.add_argument(
+        "--tensor-parallel-size",
+        type=int,
+        default=1,
+        help="Number of GPUs the KV heads are sharded on. The KV cache "
+        "capacity is per GPU.")
+
+    parser.add_argument(
+        "--request-rate",
+        type=float,
+        default=float("inf"),
+        help="Number of requests per second. If this is inf, all the requests "
+        "arrive at time 0.")
+    parser.add_argument(
+        "--burstiness",
+        type=float,
+        default=1.0,
+        help="Burstiness factor of the request arrivals, as in "
+        "`vllm bench serve`.")
+    parser.add_argument(
+        "--replay-time-scale",
+        type=float,
+        default=None,
+        help="Replay the recorded arrival times of the dataset (e.g. the "
+        "rubric dataset) scaled by this factor, instead of --request-rate.")
+
+    sweep_group = parser.add_argument_group(
+        "swept options",
+        "Every combination of the values of these options is simulated.")
+    sweep_group.add_argument("--max-num-seqs",
+                             type=int,
+                             nargs="+",
+                             default=[256])
+    sweep_group.add_argument("--max-num-batched-tokens",
+                             type=int,
+                             nargs="+",
+                             default=[8192])
+    sweep_group.add_argument("--block-size", type=int, nargs="+", default=[16])
+    sweep_group.add_argument("--num-gpu-blocks",
+                             type=int,
+                             nargs="+",
+                             default=None,
+                             help="KV cache capacities in blocks. Overrides "
+                             "--kv-cache-memory-gib.")
+    sweep_group.add_argument("--kv-cache-memory-gib",
+                             type=float,
+                             nargs="+",
+                             default=[16.0],
+                             help="KV cache capacities in GiB per GPU.")
+    parser.add_argument("--enable-prefix-caching",
+                        action=argparse.BooleanOptionalAction,
+                        default=True,
+                        help="Whether to enable prefix caching.")
+    parser.add_argument("--long-prefill-token-threshold", type=int, default=0)
+
+    cost_group = parser.add_argument_group(
+        "cost model options",
+        "Coefficients of the step time model, in seconds.")
+    for cost_field in dataclasses.fields(StepCostModel):
+        cost_group.add_argument(
+            "--cost-" + cost_field.name.replace("_", "-"),
+            dest="cost_" + cost_field.name,
+            type=float,
+            default=cost_field.default,
+        )
+
+    parser.add_argument(
+        "--metric-percentiles",
+        type=str,
+        default="50,90,99",
+        help="Comma-separated list of percentiles of TTFT, TPOT and E2EL to "
+        "report.")
+    parser.add_argument(
+        "--output-json",
+        type=str,
+        default=None,
+        help="Path to save the metrics of all the configurations in JSON "
+        "format.")
+
+
+def main(args: argparse.Namespace):
+    print(args)
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+
+    tokenizer = get_tokenizer(args.tokenizer or args.model,
+                              tokenizer_mode=args.tokenizer_mode,
+                              trust_remote_code=args.trust_remote_code)
+    model_config = ModelConfig(
+        model=args.model,
+        task="generate",
+        tokenizer=args.tokenizer or args.model,
+        tokenizer_mode=args.tokenizer_mode,
+        trust_remote_code=args.trust_remote_code,
+        dtype=args.dtype,
+        seed=args.seed,
+        max_model_len=args.max_model_len,
+    )
+    trace = create_trace(get_samples(args, tokenizer),
+                         tokenizer,
+                         request_rate=args.request_rate,
+                         burstiness=args.burstiness,
+                         replay_time_scale=args.replay_time_scale,
+                         max_model_len=model_config.max_model_len,
+                         seed=args.seed)
+    cost_model = StepCostModel(
+        **{
+            cost_field.name: getattr(args, "cost_" + cost_field.name)
+            for cost_field in dataclasses.fields(StepCostModel)
+        })
+    percentiles = [float(p) for p in args.metric_percentiles.split(",")]
+
+    capacities: list[tuple[str, Any]]
+    if args.num_gpu_blocks is not None:
+        capacities = [("num_gpu_blocks", n) for n in args.num_gpu_blocks]
+    else:
+        capacities = [("kv_cache_memory_gib", gib)
+                      for gib in args.kv_cache_memory_gib]
+
+    structured_output_manager = None
+    all_metrics = []
+    for (max_num_seqs, max_num_batched_tokens, block_size,
+         capacity) in itertools.product(args.max_num_seqs,
+                                        args.max_num_batched_tokens,
+                                        args.block_size, capacities):
+        vllm_config = VllmConfig(
+            model_config=model_config,
+            scheduler_config=SchedulerConfig(
+                max_num_seqs=max_num_seqs,
+                max_num_batched_tokens=max_num_batched_tokens,
+                max_model_len=model_config.max_model_len,
+                enable_chunked_prefill=True,
+                long_prefill_token_threshold=args.long_prefill_token_threshold,
+            ),
+            cache_config=CacheConfig(
+                block_size=block_size,
+                gpu_memory_utilization=0.9,
+                swap_space=0,
+                cache_dtype="auto",
+                enable_prefix_caching=args.enable_prefix_caching,
+            ),
+        )
+        kv_cache_config = create_kv_cache_config(
+            vllm_config,
+            tensor_parallel_size=args.tensor_parallel_size,
+            **{capacity[0]: capacity[1]})
+        if structured_output_manager is None:
+            structured_output_manager = StructuredOutputManager(vllm_config)
+
+        result = simulate(vllm_config, kv_cache_config, trace, cost_model,
+                          structured_output_manager)
+        result.config = {
+            "max_num_seqs": max_num_seqs,
+            "max_num_batched_tokens": max_num_batched_tokens,
+            "block_size": block_size,
+            "num_gpu_blocks": kv_cache_config.num_blocks,
+        }
+        metrics = result.get_metrics(percentiles)
+        print_metrics(metrics)
+        all_metrics.append(metrics)
+
+    if args.output_json:
+        write_to_json(args.output_json, all_metrics)
@@ -1991,7 +1991,7 @@ class ParallelConfig:
 
 
 PreemptionMode = Literal["swap", "recompute"]
-SchedulerPolicy = Literal["fcfs", "priority"]
+SchedulerPolicy = Literal["fcfs", "priority", "fair"]
 
 
 @config
@@ -2099,7 +2099,15 @@ class SchedulerConfig:
     - "fcfs" means first come first served, i.e. requests are handled in order
     of arrival.\n
     - "priority" means requests are handled based on given priority (lower
-    value means earlier handling) and time of arrival deciding any ties)."""
+    value means earlier handling) and time of arrival deciding any ties).\n
+    - "fair" means the tenants of the requests share the scheduler capacity
+    in proportion to their weights (see `tenant_weights`). Only supported in
+    V1. The tenant of a request is set with `extra_args={"tenant": ...}` in
+    its sampling parameters, or the `tenant` field of the OpenAI API."""
+
+    tenant_weights: dict[str, float] = field(default_factory=dict)
+    """The weights of the tenants for the "fair" scheduling policy. Tenants
+    that are not listed have a weight of 1."""
 
     chunked_prefill_enabled: bool = field(init=False)
     """True if chunked prefill is enabled."""
@@ -2272,6 +2280,12 @@ class SchedulerConfig:
                 "must be greater than or equal to 1 and less than or equal to "
                 f"max_num_partial_prefills ({self.max_num_partial_prefills}).")
 
+        for tenant, weight in self.tenant_weights.items():
+            if weight <= 0:
+                raise ValueError(
+                    f"The weight of tenant {tenant!r} ({weight}) must be "
+                    "greater than 0.")
+
     @property
     def is_multi_step(self) -> bool:
         return self.num_scheduler_steps > 1
@@ -3496,6 +3510,13 @@ class DecodingConfig:
     """Select the reasoning parser depending on the model that you're using.
     This is used to parse the reasoning content into OpenAI API format."""
 
+    warmup_json_schemas: list[str] = field(default_factory=list)
+    """Paths of JSON schema files, or of directories of `*.json` schema files,
+    to compile when the engine starts, so that the first requests using them
+    do not wait for the compilation. Only supported by the xgrammar backend.
+    A schema is reused by the requests whose `guided_json` is the same JSON
+    object, with the same key order."""
+
     def compute_hash(self) -> str:
         """
         WARNING: Whenever a new field is added to this config,
@@ -126,3 +126,8 @@ KVConnectorFactory.register_connector(
     "MultiConnector",
     "vllm.distributed.kv_transfer.kv_connector.v1.multi_connector",
     "MultiConnector")
+
+KVConnectorFactory.register_connector(
+    "TieredPrefixCacheConnector",
+    "vllm.distributed.kv_transfer.kv_connector.v1."
+    "tiered_prefix_cache_connector", "TieredPrefixCacheConnector")
@@ -17,6 +17,11 @@ The class provides the following primitives:
             Returns whether KV cache should be freed now or will be
             freed asynchronously and optionally returns KV transfer
             params.
+        bind_kv_cache_manager() - called once with the scheduler's
+            KVCacheManager, for connectors that extend the local prefix
+            cache.
+        update_prefix_cache_stats() - adds the connector's prefix cache
+            stats to the scheduler stats.
 
     Worker-side: runs in each worker, loads/saves KV cache to/from
     the Connector based on the metadata.
@@ -43,7 +48,8 @@ if TYPE_CHECKING:
     from vllm.attention.backends.abstract import AttentionMetadata
     from vllm.config import VllmConfig
     from vllm.forward_context import ForwardContext
-    from vllm.v1.core.kv_cache_manager import KVCacheBlocks
+    from vllm.v1.core.kv_cache_manager import KVCacheBlocks, KVCacheManager
+    from vllm.v1.metrics.stats import PrefixCacheStats
     from vllm.v1.request import Request
 
 logger = init_logger(__name__)
@@ -281,3 +287,24 @@ class KVConnectorBase_V1(ABC):
             returned by the engine.
         """
         return False, None
+
+    def bind_kv_cache_manager(self,
+                              kv_cache_manager: "KVCacheManager") -> None:
+        """
+        Called once by the scheduler after its KVCacheManager is created.
+
+        Args:
+            kv_cache_manager (KVCacheManager): the scheduler's KV cache
+                manager.
+        """
+        return
+
+    def update_prefix_cache_stats(self, stats: "PrefixCacheStats") -> None:
+        """
+        Add the connector's prefix cache stats since the last call to the
+        stats of the scheduler.
+
+        Args:
+            stats (PrefixCacheStats): the prefix cache stats of the step.
+        """
+        return
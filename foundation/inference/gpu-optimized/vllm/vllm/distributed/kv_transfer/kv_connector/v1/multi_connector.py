@@ -12,12 +12,13 @@ from vllm.distributed.kv_transfer.kv_connector.factory import (
 from vllm.distributed.kv_transfer.kv_connector.v1.base import (
     KVConnectorBase_V1, KVConnectorMetadata, KVConnectorRole)
 from vllm.logger import init_logger
-from vllm.v1.core.kv_cache_manager import KVCacheBlocks
+from vllm.v1.core.kv_cache_manager import KVCacheBlocks, KVCacheManager
 from vllm.v1.core.sched.output import SchedulerOutput
 
 if TYPE_CHECKING:
     from vllm.attention.backends.abstract import AttentionMetadata
     from vllm.forward_context import ForwardContext
+    from vllm.v1.metrics.stats import PrefixCacheStats
     from vllm.v1.request import Request
 
 logger = init_logger(__name__)
@@ -199,3 +200,11 @@ class MultiConnector(KVConnectorBase_V1):
         self._requests_to_connector.pop(request.request_id, None)
 
         return async_saves > 0, kv_txfer_params
+
+    def bind_kv_cache_manager(self, kv_cache_manager: KVCacheManager) -> None:
+        for c in self._connectors:
+            c.bind_kv_cache_manager(kv_cache_manager)
+
+    def update_prefix_cache_stats(self, stats: "PrefixCacheStats") -> None:
+        for c in self._connectors:
+            c.update_prefix_cache_stats(stats)
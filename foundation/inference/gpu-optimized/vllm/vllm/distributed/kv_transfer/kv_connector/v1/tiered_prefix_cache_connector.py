@@ -0,0 +1,632 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+"""
+A second and third tier for the prefix cache of the v1 KV block pool.
+
+Full blocks evicted from the GPU prefix cache are copied into a bounded LRU
+cache in pinned host memory, which is written through to an optional LRU
+cache in a memory-mapped file on local disk. When a new request misses the
+GPU prefix cache, the blocks that follow its GPU hit are looked up in the
+lower tiers by their block hash, and hits are loaded back into the request's
+GPU blocks asynchronously, with the request waiting like for a remote KV
+transfer.
+
+Enable with:
+    --kv-transfer-config '{"kv_connector": "TieredPrefixCacheConnector",
+        "kv_role": "kv_both", "kv_connector_extra_config": {
+            "host_cache_num_blocks": 4096, "disk_cache_num_blocks": 65536,
+            "disk_cache_path": "/mnt/nvme"}}'
+
+Sizes are in KV cache blocks (of all layers) per worker. Prefix caching must
+be enabled. Only models with a single KV cache group are supported: hybrid
+models (e.g. with sliding window and full attention layers) are rejected.
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+import numpy as np
+import torch
+
+from vllm import _custom_ops as ops
+from vllm.attention.selector import backend_name_to_enum, get_attn_backend
+from vllm.config import VllmConfig
+from vllm.distributed.kv_transfer.kv_connector.v1.base import (
+    KVConnectorBase_V1, KVConnectorMetadata, KVConnectorRole)
+from vllm.distributed.parallel_state import (
+    get_tensor_model_parallel_rank, get_tensor_model_parallel_world_size,
+    get_tp_group)
+from vllm.logger import init_logger
+from vllm.platforms import _Backend
+from vllm.utils import is_pin_memory_available
+from vllm.v1.core.kv_cache_utils import BlockHashWithGroupId
+from vllm.v1.core.sched.output import SchedulerOutput
+
+if TYPE_CHECKING:
+    from vllm.attention.backends.abstract import AttentionMetadata
+    from vllm.forward_context import ForwardContext
+    from vllm.v1.core.kv_cache_manager import KVCacheBlocks, KVCacheManager
+    from vllm.v1.metrics.stats import PrefixCacheStats
+    from vllm.v1.request import Request
+
+logger = init_logger(__name__)
+
+HOST_TIER = "host"
+DISK_TIER = "disk"
+
+
+@dataclass
+class TieredPrefixCacheConnectorMetadata(KVConnectorMetadata):
+    # (GPU block ID, host slot) of the evicted blocks to save.
+    saves: list[tuple[int, int]] = field(default_factory=list)
+    # (host slot, disk slot) of the saved blocks to write through to disk.
+    writes: list[tuple[int, int]] = field(default_factory=list)
+    # (disk slot, host slot) of the disk hits to stage in host memory.
+    promotions: list[tuple[int, int]] = field(default_factory=list)
+    # {request ID: [(host slot, GPU block ID)]} of the hits to load.
+    loads: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+    # Requests that finished while loading; their blocks are freed once the
+    # load is done.
+    free_after_load: list[str] = field(default_factory=list)
+
+
+class TierIndex:
+    """LRU index of the block hashes stored in the slots of one cache tier.
+
+    Args:
+        num_slots: The number of blocks the tier can hold.
+    """
+
+    def __init__(self, num_slots: int):
+        self.num_slots = num_slots
+        # {block hash: slot}, from least to most recently used.
+        self.slots: OrderedDict[BlockHashWithGroupId, int] = OrderedDict()
+        self.free_slots = list(range(num_slots - 1, -1, -1))
+
+    def __contains__(self, key: BlockHashWithGroupId) -> bool:
+        return key in self.slots
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def get(self, key: BlockHashWithGroupId) -> Optional[int]:
+        """Get the slot of a block hash and mark it as most recently used."""
+        slot = self.slots.get(key)
+        if slot is not None:
+            self.slots.move_to_end(key)
+        return slot
+
+    def allocate(self, key: BlockHashWithGroupId,
+                 pinned: set[int]) -> Optional[int]:
+        """Allocate a slot for a new block hash, evicting the least recently
+        used block whose slot is not pinned if the tier is full.
+
+        Returns:
+            The slot, or None if all slots are pinned.
+        """
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            for victim, slot in self.slots.items():
+                if slot not in pinned:
+                    break
+            else:
+                return None
+            del self.slots[victim]
+        self.slots[key] = slot
+        return slot
+
+
+class TieredPrefixCacheConnector(KVConnectorBase_V1):
+
+    def __init__(self, vllm_config: "VllmConfig", role: KVConnectorRole):
+        super().__init__(vllm_config=vllm_config, role=role)
+        assert vllm_config.cache_config.enable_prefix_caching, (
+            "TieredPrefixCacheConnector requires prefix caching.")
+        transfer_config = vllm_config.kv_transfer_config
+        num_host_blocks = transfer_config.get_from_extra_config(
+            "host_cache_num_blocks", vllm_config.cache_config.num_gpu_blocks)
+        num_disk_blocks = transfer_config.get_from_extra_config(
+            "disk_cache_num_blocks", 0)
+        assert num_host_blocks, "host_cache_num_blocks must be positive."
+
+        self.connector_scheduler: Optional[TieredPrefixCacheScheduler] = None
+        self.connector_worker: Optional[TieredPrefixCacheWorker] = None
+        if role == KVConnectorRole.SCHEDULER:
+            self.connector_scheduler = TieredPrefixCacheScheduler(
+                vllm_config, num_host_blocks, num_disk_blocks)
+        elif role == KVConnectorRole.WORKER:
+            self.connector_worker = TieredPrefixCacheWorker(
+                vllm_config, num_host_blocks, num_disk_blocks,
+                transfer_config.get_from_extra_config("disk_cache_path",
+                                                      tempfile.gettempdir()))
+
+    ############################################################
+    # Scheduler Side Methods
+    ############################################################
+
+    def get_num_new_matched_tokens(
+            self, request: "Request",
+            num_computed_tokens: int) -> tuple[int, bool]:
+        assert self.connector_scheduler is not None
+        return self.connector_scheduler.get_num_new_matched_tokens(
+            request, num_computed_tokens)
+
+    def update_state_after_alloc(self, request: "Request",
+                                 blocks: "KVCacheBlocks",
+                                 num_external_tokens: int):
+        assert self.connector_scheduler is not None
+        return self.connector_scheduler.update_state_after_alloc(
+            request, blocks, num_external_tokens)
+
+    def build_connector_meta(
+        self,
+        scheduler_output: SchedulerOutput,
+    ) -> KVConnectorMetadata:
+        assert self.connector_scheduler is not None
+        return self.connector_scheduler.build_connector_meta()
+
+    def request_finished(
+        self,
+        request: "Request",
+        block_ids: list[int],
+    ) -> tuple[bool, Optional[dict[str, Any]]]:
+        assert self.connector_scheduler is not None
+        return self.connector_scheduler.request_finished(request), None
+
+    def bind_kv_cache_manager(self,
+                              kv_cache_manager: "KVCacheManager") -> None:
+        assert self.connector_scheduler is not None
+        self.connector_scheduler.bind_kv_cache_manager(kv_cache_manager)
+
+    def update_prefix_cache_stats(self, stats: "PrefixCacheStats") -> None:
+        assert self.connector_scheduler is not None
+        self.connector_scheduler.update_prefix_cache_stats(stats)
+
+    ############################################################
+    # Worker Side Methods
+    ############################################################
+
+    def register_kv_caches(self, kv_caches: dict[str, torch.Tensor]):
+        assert self.connector_worker is not None
+        self.connector_worker.register_kv_caches(kv_caches)
+
+    def get_finished(
+        self, finished_req_ids: set[str]
+    ) -> tuple[Optional[set[str]], Optional[set[str]]]:
+        assert self.connector_worker is not None
+        return self.connector_worker.get_finished()
+
+    def start_load_kv(self, forward_context: "ForwardContext",
+                      **kwargs) -> None:
+        assert self.connector_worker is not None
+        assert isinstance(self._connector_metadata,
+                          TieredPrefixCacheConnectorMetadata)
+        self.connector_worker.start_load_kv(self._connector_metadata)
+
+    def wait_for_layer_load(self, layer_name: str) -> None:
+        """Loads finish before the request is scheduled."""
+        pass
+
+    def save_kv_layer(self, layer_name: str, kv_layer: torch.Tensor,
+                      attn_metadata: "AttentionMetadata", **kwargs) -> None:
+        """Blocks are saved when they are evicted, not when computed."""
+        pass
+
+    def wait_for_save(self):
+        """Saves are ordered before the forward pass on the GPU."""
+        pass
+
+
+class TieredPrefixCacheScheduler:
+    """Implementation of Scheduler side methods"""
+
+    def __init__(self, vllm_config: VllmConfig, num_host_blocks: int,
+                 num_disk_blocks: int):
+        self.block_size = vllm_config.cache_config.block_size
+        self.host = TierIndex(num_host_blocks)
+        self.disk = TierIndex(num_disk_blocks) if num_disk_blocks else None
+        self.kv_cache_manager: Optional[KVCacheManager] = None
+        self.log_stats = False
+
+        # Host slots that must not be reused in this step, because the
+        # workers read or write them after this step's saves.
+        self._pinned_host_slots: set[int] = set()
+        # {request ID: (first block index, [(block hash, tier)])} of the last
+        # lookup of each waiting request.
+        self._matches: dict[str, tuple[int, list[tuple[BlockHashWithGroupId,
+                                                       str]]]] = {}
+        # Requests whose blocks are being loaded, until they are scheduled.
+        self._loading_req_ids: set[str] = set()
+        self._meta = TieredPrefixCacheConnectorMetadata()
+        self._tier_queries: dict[str, int] = defaultdict(int)
+        self._tier_hits: dict[str, int] = defaultdict(int)
+
+    def bind_kv_cache_manager(self,
+                              kv_cache_manager: "KVCacheManager") -> None:
+        if kv_cache_manager.num_kv_cache_groups != 1:
+            # The tiers are indexed by the block hashes and block IDs of a
+            # single group.
+            raise ValueError(
+                "TieredPrefixCacheConnector supports a single KV cache group, "
+                f"got {kv_cache_manager.num_kv_cache_groups}.")
+        self.kv_cache_manager = kv_cache_manager
+        self.log_stats = kv_cache_manager.log_stats
+        kv_cache_manager.record_evicted_blocks()
+
+    def get_num_new_matched_tokens(
+            self, request: "Request",
+            num_computed_tokens: int) -> tuple[int, bool]:
+        """Match the blocks after the GPU prefix cache hit in the host and
+        disk tiers. The hits are loaded asynchronously."""
+        assert self.kv_cache_manager is not None
+        block_hashes = self.kv_cache_manager.req_to_block_hashes[
+            request.request_id]
+        start = num_computed_tokens // self.block_size
+        # The last token is always computed to get the logits.
+        end = min(len(block_hashes),
+                  (request.num_tokens - 1) // self.block_size)
+        # Every hit pins a host slot for this step; disk hits are staged in
+        # host slots.
+        max_hits = self.host.num_slots - len(self._pinned_host_slots)
+
+        matches: list[tuple[BlockHashWithGroupId, str]] = []
+        for block_hash in block_hashes[start:end]:
+            key = BlockHashWithGroupId(block_hash, 0)
+            if len(matches) >= max_hits:
+                break
+            if key in self.host:
+                matches.append((key, HOST_TIER))
+            elif self.disk is not None and key in self.disk:
+                matches.append((key, DISK_TIER))
+            else:
+                break
+        self._matches[request.request_id] = (start, matches)
+
+        num_matched_tokens = len(matches) * self.block_size
+        return num_matched_tokens, num_matched_tokens > 0
+
+    def update_state_after_alloc(self, request: "Request",
+                                 blocks: "KVCacheBlocks",
+                                 num_external_tokens: int):
+        if request.num_computed_tokens > 0:
+            # Called again once the loaded request is scheduled.
+            self._loading_req_ids.discard(request.request_id)
+            return
+        match = self._matches.pop(request.request_id, None)
+        if match is None:
+            return
+        start, matches = match
+        if self.log_stats:
+            self._record_stats(request, start, matches)
+        if num_external_tokens == 0:
+            return
+        assert num_external_tokens == len(matches) * self.block_size
+
+        # Pin the host hits first, so that staging the disk hits cannot
+        # evict them.
+        host_slots = [
+            self.host.get(key) if tier == HOST_TIER else None
+            for key, tier in matches
+        ]
+        self._pinned_host_slots.update(slot for slot in host_slots
+                                       if slot is not None)
+        (block_ids, ) = blocks.get_block_ids()
+        block_ids = block_ids[start:start + len(matches)]
+        loads: list[tuple[int, int]] = []
+        for (key, tier), host_slot, block_id in zip(matches, host_slots,
+                                                    block_ids):
+            if tier == DISK_TIER:
+                assert self.disk is not None
+                host_slot = self.host.allocate(key, self._pinned_host_slots)
+                assert host_slot is not None
+                self._pinned_host_slots.add(host_slot)
+                self._meta.promotions.append((self.disk.get(key), host_slot))
+            loads.append((host_slot, block_id))
+        self._meta.loads[request.request_id] = loads
+        self._loading_req_ids.add(request.request_id)
+
+    def _record_stats(self, request: "Request", start: int,
+                      matches: list[tuple[BlockHashWithGroupId, str]]):
+        host_hits = sum(tier == HOST_TIER for _, tier in matches)
+        queries = request.num_tokens - start * self.block_size
+        self._tier_queries[HOST_TIER] += queries
+        self._tier_hits[HOST_TIER] += host_hits * self.block_size
+        if self.disk is not None:
+            self._tier_queries[DISK_TIER] += (queries -
+                                              host_hits * self.block_size)
+            self._tier_hits[DISK_TIER] += (len(matches) -
+                                           host_hits) * self.block_size
+
+    def build_connector_meta(self) -> TieredPrefixCacheConnectorMetadata:
+        """Save the blocks evicted in this step and issue the loads."""
+        assert self.kv_cache_manager is not None
+        meta = self._meta
+        for key, block_id in self.kv_cache_manager.take_evicted_blocks():
+            if key in self.host or (self.disk is not None
+                                    and key in self.disk):
+                continue
+            host_slot = self.host.allocate(key, self._pinned_host_slots)
+            if host_slot is None:
+                continue
+            # Later evictions of this step must not reuse the slot.
+            self._pinned_host_slots.add(host_slot)
+            meta.saves.append((block_id, host_slot))
+            if self.disk is not None:
+                # Disk jobs run in order, so no disk slot needs pinning.
+                disk_slot = self.disk.allocate(key, set())
+                assert disk_slot is not None
+                meta.writes.append((host_slot, disk_slot))
+
+        self._meta = TieredPrefixCacheConnectorMetadata()
+        self._pinned_host_slots.clear()
+        return meta
+
+    def request_finished(self, request: "Request") -> bool:
+        """Delay freeing the blocks of a request that is still loading."""
+        self._matches.pop(request.request_id, None)
+        if request.request_id not in self._loading_req_ids:
+            return False
+        self._loading_req_ids.remove(request.request_id)
+        self._meta.free_after_load.append(request.request_id)
+        return True
+
+    def update_prefix_cache_stats(self, stats: "PrefixCacheStats") -> None:
+        for tier, queries in self._tier_queries.items():
+            stats.tier_queries[tier] = (stats.tier_queries.get(tier, 0) +
+                                        queries)
+            stats.tier_hits[tier] = (stats.tier_hits.get(tier, 0) +
+                                     self._tier_hits[tier])
+        self._tier_queries.clear()
+        self._tier_hits.clear()
+
+
+class TieredPrefixCacheWorker:
+    """Implementation of Worker side methods"""
+
+    def __init__(self, vllm_config: VllmConfig, num_host_blocks: int,
+                 num_disk_blocks: int, disk_cache_path: str):
+        model_config = vllm_config.model_config
+        cache_config = vllm_config.cache_config
+        backend = get_attn_backend(model_config.get_head_size(),
+                                   model_config.dtype,
+                                   cache_config.cache_dtype,
+                                   cache_config.block_size,
+                                   model_config.is_attention_free,
+                                   use_mla=model_config.use_mla)
+        # The KV caches have the block dimension first, instead of after K
+        # and V, with MLA and FlashInfer.
+        self.blocks_first = (model_config.use_mla or backend_name_to_enum(
+            backend.get_name()) == _Backend.FLASHINFER_VLLM_V1)
+        self.num_host_blocks = num_host_blocks
+        self.num_disk_blocks = num_disk_blocks
+        self.disk_cache_path = disk_cache_path
+        self.tp_rank = get_tensor_model_parallel_rank()
+        self.world_size = get_tensor_model_parallel_world_size()
+        self.tp_group = get_tp_group()
+
+        # Per layer, the GPU caches with the block dimension first: K and V
+        # separately for [2, num_blocks, ...] layouts, the layer otherwise.
+        self.gpu_caches: list[torch.Tensor] = []
+        # The same in pinned host memory, with num_host_blocks blocks.
+        self.host_caches: list[torch.Tensor] = []
+        # [num_disk_blocks, bytes per block of all layers] memory-mapped
+        # file, and the byte offset of each GPU cache in a block.
+        self.disk_cache: Optional[torch.Tensor] = None
+        self.disk_offsets: list[int] = []
+
+        # Promotions, loads and disk writes run in order on one thread, so
+        # they never see a slot in an older state than the scheduler did.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vllm-tiered-prefix-cache")
+        self._load_stream: Optional[torch.cuda.Stream] = None
+        # The last job that uses each host slot; saves into the slot wait
+        # for it.
+        self._slot_jobs: dict[int, Future] = {}
+
+        self._lock = threading.Lock()
+        self._job_error: Optional[BaseException] = None
+        self._loading_req_ids: set[str] = set()
+        self._free_after_load: set[str] = set()
+        self._done_sending: set[str] = set()
+        self._done_recving: set[str] = set()
+        self._done_sending_count: defaultdict[str, int] = defaultdict(int)
+        self._done_recving_count: defaultdict[str, int] = defaultdict(int)
+
+    def register_kv_caches(self, kv_caches: dict[str, torch.Tensor]):
+        """Allocate the host and disk tiers with the layout of the GPU KV
+        caches."""
+        pin_memory = is_pin_memory_available()
+        block_offset = 0
+        for kv_cache in kv_caches.values():
+            gpu_caches = ([kv_cache] if self.blocks_first else list(
+                kv_cache.unbind(0)))
+            for gpu_cache in gpu_caches:
+                self.gpu_caches.append(gpu_cache)
+                self.host_caches.append(
+                    torch.empty((self.num_host_blocks, *gpu_cache.shape[1:]),
+                                dtype=gpu_cache.dtype,
+                                device="cpu",
+                                pin_memory=pin_memory))
+                self.disk_offsets.append(block_offset)
+                block_offset += gpu_cache[0].numel() * gpu_cache.element_size()
+        self._load_stream = torch.cuda.Stream(self.gpu_caches[0].device)
+
+        logger.info(
+            "Tiered prefix cache: %d host blocks (%.2f GiB), %d disk blocks "
+            "(%.2f GiB) in %s", self.num_host_blocks,
+            self.num_host_blocks * block_offset / 2**30, self.num_disk_blocks,
+            self.num_disk_blocks * block_offset / 2**30, self.disk_cache_path)
+        if self.num_disk_blocks:
+            fd, path = tempfile.mkstemp(prefix=f"vllm-kv-rank{self.tp_rank}-",
+                                        suffix=".bin",
+                                        dir=self.disk_cache_path)
+            os.close(fd)
+            disk_cache = np.memmap(path,
+                                   dtype=np.uint8,
+                                   mode="w+",
+                                   shape=(self.num_disk_blocks, block_offset))
+            # The mapping stays valid; the file is gone when the worker exits.
+            os.unlink(path)
+            self.disk_cache = torch.from_numpy(disk_cache)
+
+    def start_load_kv(self, meta: TieredPrefixCacheConnectorMetadata):
+        """Save the evicted blocks before the forward pass overwrites them,
+        then hand the disk and load work of this step to the job thread."""
+        with self._lock:
+            self._loading_req_ids.update(meta.loads)
+            for req_id in meta.free_after_load:
+                if req_id in self._loading_req_ids:
+                    self._free_after_load.add(req_id)
+                else:
+                    self._done_sending.add(req_id)
+                    self._done_recving.discard(req_id)
+
+        save_event = None
+        if meta.saves:
+            for _, host_slot in meta.saves:
+                job = self._slot_jobs.pop(host_slot, None)
+                if job is not None:
+                    job.result()
+            # The saves are ordered before the forward pass on the current
+            # stream, and before the loads by the event.
+            self._swap_blocks(self.gpu_caches, self.host_caches, meta.saves)
+            save_event = torch.cuda.Event()
+            save_event.record()
+
+        if not (meta.writes or meta.promotions or meta.loads):
+            return
+        job = self._executor.submit(self._run_job, meta, save_event)
+        for host_slot, _ in meta.writes:
+            self._slot_jobs[host_slot] = job
+        for _, host_slot in meta.promotions:
+            self._slot_jobs[host_slot] = job
+        for loads in meta.loads.values():
+            for host_slot, _ in loads:
+                self._slot_jobs[host_slot] = job
+
+    def _run_job(self, meta: TieredPrefixCacheConnectorMetadata,
+                 save_event: Optional[torch.cuda.Event]):
+        try:
+            if meta.promotions:
+                self._copy_disk_blocks(meta.promotions, to_disk=False)
+            if meta.loads:
+                assert self._load_stream is not None
+                with torch.cuda.stream(self._load_stream):
+                    if save_event is not None:
+                        # A block evicted in this step may be loaded into.
+                        self._load_stream.wait_event(save_event)
+                    self._swap_blocks(self.host_caches, self.gpu_caches, [
+                        load for loads in meta.loads.values() for load in loads
+                    ])
+                self._load_stream.synchronize()
+            if meta.writes:
+                if save_event is not None:
+                    save_event.synchronize()
+                self._copy_disk_blocks(meta.writes, to_disk=True)
+        except BaseException as e:
+            # Loaded blocks may be partially written; fail in get_finished()
+            # rather than letting requests use them.
+            logger.exception("Tiered prefix cache job failed")
+            self._job_error = e
+            raise
+        with self._lock:
+            for req_id in meta.loads:
+                self._loading_req_ids.discard(req_id)
+                if req_id in self._free_after_load:
+                    self._free_after_load.remove(req_id)
+                    self._done_sending.add(req_id)
+                else:
+                    self._done_recving.add(req_id)
+
+    @staticmethod
+    def _swap_blocks(src_caches: list[torch.Tensor],
+                     dst_caches: list[torch.Tensor],
+                     block_mapping: list[tuple[int, int]]):
+        src_to_dst = torch.tensor(block_mapping,
+                                  dtype=torch.int64,
+                                  device="cpu").view(-1, 2)
+        for src_cache, dst_cache in zip(src_caches, dst_caches):
+            ops.swap_blocks(src_cache, dst_cache, src_to_dst)
+
+    def _copy_disk_blocks(self, block_mapping: list[tuple[int, int]],
+                          to_disk: bool):
+        """Copy blocks between host slots and disk slots.
+
+        Args:
+            block_mapping: (host slot, disk slot) if to_disk, else
+                (disk slot, host slot).
+        """
+        assert self.disk_cache is not None
+        src_slots, dst_slots = zip(*block_mapping)
+        host_slots = torch.tensor(src_slots if to_disk else dst_slots)
+        disk_slots = torch.tensor(dst_slots if to_disk else src_slots)
+        for host_cache, offset in zip(self.host_caches, self.disk_offsets):
+            host_blocks = host_cache.view(self.num_host_blocks,
+                                          -1).view(torch.uint8)
+            disk_blocks = self.disk_cache[:,
+                                          offset:offset + host_blocks.shape[1]]
+            if to_disk:
+                disk_blocks[disk_slots] = host_blocks[host_slots]
+            else:
+                host_blocks[host_slots] = disk_blocks[disk_slots]
+
+    def get_finished(self) -> tuple[set[str], set[str]]:
+        """
+        Get requests that are done loading. Requests that finished while
+        loading are reported as done sending, to free their blocks.
+
+        In TP>1 setup, each rank exchanges KVs with its counterpart
+        ranks independently. get_finished() runs in a worker creates
+        the done_sending and done_recving sets that are sent to the
+        scheduler via ModelRunnerOutput by Rank 0. To ensure trnxs
+        are done before adding to finished, Ranks 1 to N-1 communicate
+        to Rank 0 once their transaction is done + Rank 0 returns
+        finished sets to Scheduler only once all ranks are done.
+        """
+        if self._job_error is not None:
+            raise RuntimeError(
+                "Tiered prefix cache job failed") from self._job_error
+        with self._lock:
+            done_sending, self._done_sending = self._done_sending, set()
+            done_recving, self._done_recving = self._done_recving, set()
+
+        if self.world_size == 1:
+            return done_sending, done_recving
+
+        # Rank 0: get finished from all other ranks.
+        if self.tp_rank == 0:
+            for req_id in done_sending:
+                self._done_sending_count[req_id] += 1
+            for req_id in done_recving:
+                self._done_recving_count[req_id] += 1
+            for i in range(1, self.world_size):
+                other_sending, other_recving = self.tp_group.recv_object(src=i)
+                for req_id in other_sending:
+                    self._done_sending_count[req_id] += 1
+                for req_id in other_recving:
+                    self._done_recving_count[req_id] += 1
+
+            # Return ids that finished on all ranks to the scheduler.
+            all_done_sending = self._pop_done(self._done_sending_count)
+            all_done_recving = self._pop_done(self._done_recving_count)
+            return all_done_sending, all_done_recving
+
+        # Ranks 1 to N-1: send finished ids to Rank 0.
+        self.tp_group.send_object((list(done_sending), list(done_recving)),
+                                  dst=0)
+        # Unused as only Rank 0 results are sent to scheduler.
+        return done_sending, done_recving
+
+    def _pop_done(self, done_count: defaultdict[str, int]) -> set[str]:
+        all_done = {
+            req_id
+            for req_id, count in done_count.items() if count == self.world_size
+        }
+        for req_id in all_done:
+            del done_count[req_id]
+        return all_done
@@ -396,6 +396,8 @@ class EngineArgs:
         DecodingConfig.disable_any_whitespace
     guided_decoding_disable_additional_properties: bool = \
         DecodingConfig.disable_additional_properties
+    guided_decoding_warmup_json_schemas: list[str] = \
+        get_field(DecodingConfig, "warmup_json_schemas")
     logits_processor_pattern: Optional[
         str] = ModelConfig.logits_processor_pattern
 
@@ -410,6 +412,8 @@ class EngineArgs:
         ObservabilityConfig.collect_detailed_traces
     disable_async_output_proc: bool = not ModelConfig.use_async_output_proc
     scheduling_policy: SchedulerPolicy = SchedulerConfig.policy
+    tenant_weights: dict[str, float] = \
+        get_field(SchedulerConfig, "tenant_weights")
     scheduler_cls: Union[str, Type[object]] = SchedulerConfig.scheduler_cls
 
     override_neuron_config: dict[str, Any] = \
@@ -598,6 +602,9 @@ class EngineArgs:
         guided_decoding_group.add_argument(
             "--guided-decoding-disable-additional-properties",
             **guided_decoding_kwargs["disable_additional_properties"])
+        guided_decoding_group.add_argument(
+            "--guided-decoding-warmup-json-schemas",
+            **guided_decoding_kwargs["warmup_json_schemas"])
         guided_decoding_group.add_argument(
             "--enable-reasoning",
             action=argparse.BooleanOptionalAction,
@@ -847,6 +854,8 @@ class EngineArgs:
             **scheduler_kwargs["multi_step_stream_outputs"])
         scheduler_group.add_argument("--scheduling-policy",
                                      **scheduler_kwargs["policy"])
+        scheduler_group.add_argument("--tenant-weights",
+                                     **scheduler_kwargs["tenant_weights"])
         scheduler_group.add_argument(
             "--enable-chunked-prefill",
             **scheduler_kwargs["enable_chunked_prefill"])
@@ -1046,6 +1055,10 @@ class EngineArgs:
 
         assert self.enable_chunked_prefill is not None
 
+        if self.scheduling_policy == "fair" and not use_v1:
+            raise ValueError(
+                "The fair scheduling policy is only supported in V1.")
+
         if envs.VLLM_ATTENTION_BACKEND in [STR_DUAL_CHUNK_FLASH_ATTN_VAL]:
             assert self.enforce_eager, (
                 "Cuda graph is not supported with DualChunkFlashAttention. "
@@ -1180,6 +1193,7 @@ class EngineArgs:
             send_delta_data=(envs.VLLM_USE_RAY_SPMD_WORKER
                              and parallel_config.use_ray),
             policy=self.scheduling_policy,
+            tenant_weights=self.tenant_weights,
             scheduler_cls=self.scheduler_cls,
             max_num_partial_prefills=self.max_num_partial_prefills,
             max_long_partial_prefills=self.max_long_partial_prefills,
@@ -1216,7 +1230,8 @@ class EngineArgs:
             disable_any_whitespace=self.guided_decoding_disable_any_whitespace,
             disable_additional_properties=\
                 self.guided_decoding_disable_additional_properties,
-            reasoning_backend=self.reasoning_parser
+            reasoning_backend=self.reasoning_parser,
+            warmup_json_schemas=self.guided_decoding_warmup_json_schemas,
         )
 
         observability_config = ObservabilityConfig(
@@ -1275,7 +1290,7 @@ class EngineArgs:
                                recommend_to_remove=True)
             return False
 
-        if self.scheduling_policy != SchedulerConfig.policy:
+        if self.scheduling_policy == "priority":
             _raise_or_fallback(feature_name="--scheduling-policy",
                                recommend_to_remove=False)
             return False
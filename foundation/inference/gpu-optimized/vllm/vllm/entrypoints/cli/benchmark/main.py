@@ -4,6 +4,7 @@ import argparse
 
 import vllm.entrypoints.cli.benchmark.latency
 import vllm.entrypoints.cli.benchmark.serve
+import vllm.entrypoints.cli.benchmark.simulate
 import vllm.entrypoints.cli.benchmark.throughput
 from vllm.entrypoints.cli.types import CLISubcommand
 from vllm.utils import FlexibleArgumentParser
@@ -11,6 +12,7 @@ from vllm.utils import FlexibleArgumentParser
 BENCHMARK_CMD_MODULES = [
     vllm.entrypoints.cli.benchmark.latency,
     vllm.entrypoints.cli.benchmark.serve,
+    vllm.entrypoints.cli.benchmark.simulate,
     vllm.entrypoints.cli.benchmark.throughput,
 ]
 
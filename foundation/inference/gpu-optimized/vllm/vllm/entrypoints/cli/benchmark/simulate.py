@@ -0,0 +1,31 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+import argparse
+
+from vllm.benchmarks.simulate import add_cli_args, main
+from vllm.entrypoints.cli.benchmark.base import BenchmarkSubcommandBase
+from vllm.entrypoints.cli.types import CLISubcommand
+
+
+class BenchmarkSimulateSubcommand(BenchmarkSubcommandBase):
+    """ The `simulate` subcommand for vllm bench. """
+
+    def __init__(self):
+        self.name = "simulate"
+        super().__init__()
+
+    @property
+    def help(self) -> str:
+        return ("Simulate the scheduler and KV cache on CPU with a step "
+                "cost model, for capacity planning.")
+
+    def add_cli_args(self, parser: argparse.ArgumentParser) -> None:
+        add_cli_args(parser)
+
+    @staticmethod
+    def cmd(args: argparse.Namespace) -> None:
+        main(args)
+
+
+def cmd_init() -> list[CLISubcommand]:
+    return [BenchmarkSimulateSubcommand()]
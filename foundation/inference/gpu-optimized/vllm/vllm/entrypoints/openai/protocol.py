@@ -220,6 +220,16 @@ def get_logits_processors(processors: Optional[LogitsProcessors],
     return None
 
 
+def _get_extra_args(kv_transfer_params: Optional[dict[str, Any]],
+                    tenant: Optional[str]) -> Optional[dict[str, Any]]:
+    extra_args: dict[str, Any] = {}
+    if kv_transfer_params:
+        extra_args["kv_transfer_params"] = kv_transfer_params
+    if tenant is not None:
+        extra_args["tenant"] = tenant
+    return extra_args or None
+
+
 class ChatCompletionRequest(OpenAIBaseModel):
     # Ordered by official OpenAI API documentation
     # https://platform.openai.com/docs/api-reference/chat/create
@@ -413,6 +423,11 @@ class ChatCompletionRequest(OpenAIBaseModel):
     kv_transfer_params: Optional[dict[str, Any]] = Field(
         default=None,
         description="KVTransfer parameters used for disaggregated serving.")
+    tenant: Optional[str] = Field(
+        default=None,
+        description=(
+            "The tenant of the request, e.g. an API key, for the `fair` "
+            "scheduling policy. Requests without a tenant share one."))
 
     # --8<-- [end:chat-completion-extra-params]
 
@@ -553,8 +568,7 @@ class ChatCompletionRequest(OpenAIBaseModel):
             logit_bias=self.logit_bias,
             bad_words= self.bad_words,
             allowed_token_ids=self.allowed_token_ids,
-            extra_args=({"kv_transfer_params": self.kv_transfer_params}
-                        if self.kv_transfer_params else None))
+            extra_args=_get_extra_args(self.kv_transfer_params, self.tenant))
 
     def _get_guided_json_from_tool(
             self) -> Optional[Union[str, dict, BaseModel]]:
@@ -870,6 +884,11 @@ class CompletionRequest(OpenAIBaseModel):
     kv_transfer_params: Optional[dict[str, Any]] = Field(
         default=None,
         description="KVTransfer parameters used for disaggregated serving.")
+    tenant: Optional[str] = Field(
+        default=None,
+        description=(
+            "The tenant of the request, e.g. an API key, for the `fair` "
+            "scheduling policy. Requests without a tenant share one."))
 
     # --8<-- [end:completion-extra-params]
 
@@ -997,8 +1016,7 @@ class CompletionRequest(OpenAIBaseModel):
             guided_decoding=guided_decoding,
             logit_bias=self.logit_bias,
             allowed_token_ids=self.allowed_token_ids,
-            extra_args=({"kv_transfer_params": self.kv_transfer_params}
-                        if self.kv_transfer_params else None))
+            extra_args=_get_extra_args(self.kv_transfer_params, self.tenant))
 
     @model_validator(mode="before")
     @classmethod
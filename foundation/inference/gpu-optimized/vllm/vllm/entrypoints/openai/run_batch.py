@@ -2,10 +2,11 @@
 # SPDX-FileCopyrightText: Copyright contributors to the vLLM project
 
 import asyncio
+import os
 import tempfile
-from collections.abc import Awaitable
+import time
+from collections.abc import AsyncIterator, Awaitable
 from http import HTTPStatus
-from io import StringIO
 from typing import Callable, Optional
 
 import aiohttp
@@ -59,6 +60,27 @@ def make_arg_parser(parser: FlexibleArgumentParser):
         help="The directory to store the output file before uploading it "
         "to the output URL.",
     )
+    parser.add_argument(
+        "--max-concurrent-requests",
+        type=int,
+        default=1024,
+        help="The maximum number of requests submitted to the engine at a "
+        "time. Further lines of the input file are only read once earlier "
+        "requests have completed, which bounds the memory use for large "
+        "batches.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Append to an existing local output file and skip the requests "
+        "whose custom_id it already contains, e.g. to continue a batch after "
+        "a crash.")
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=60.0,
+        help="Interval in seconds between throughput log lines. "
+        "0 disables them.")
     parser.add_argument("--response-role",
                         type=optional_type(str),
                         default="assistant",
@@ -121,6 +143,9 @@ class BatchProgressTracker:
 
     def submitted(self):
         self._total += 1
+        if self._pbar:
+            # The total is unknown until the whole input has been read.
+            self._pbar.total = self._total
 
     def completed(self):
         if self._pbar:
@@ -138,28 +163,143 @@ class BatchProgressTracker:
         return self._pbar
 
 
-async def read_file(path_or_url: str) -> str:
+# Size of the chunks in which input files are downloaded.
+_READ_CHUNK_SIZE = 1 << 20
+
+
+async def iter_file_lines(path_or_url: str) -> AsyncIterator[str]:
+    """
+    Yield the lines of a local file or of a file served over HTTP, without
+    reading the whole file into memory.
+    """
     if path_or_url.startswith("http://") or path_or_url.startswith("https://"):
         async with aiohttp.ClientSession() as session, \
                    session.get(path_or_url) as resp:
-            return await resp.text()
+            # StreamReader's own line iteration fails on lines over 64 KiB,
+            # which long prompts easily exceed.
+            buffer = b""
+            async for chunk in resp.content.iter_chunked(_READ_CHUNK_SIZE):
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    yield line.decode("utf-8")
+            if buffer:
+                yield buffer.decode("utf-8")
     else:
         with open(path_or_url, encoding="utf-8") as f:
-            return f.read()
+            for line in f:
+                yield line
 
 
-async def write_local_file(output_path: str,
-                           batch_outputs: list[BatchRequestOutput]) -> None:
+def load_completed_custom_ids(output_path: str) -> set[str]:
+    """
+    Return the custom_ids of the outputs in an existing output file. A last
+    line that was only partially written, e.g. because the previous run
+    crashed, is truncated so that new outputs can be appended.
+    """
+    if not os.path.exists(output_path):
+        return set()
+
+    custom_ids: set[str] = set()
+    valid_size = 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                try:
+                    output = BatchRequestOutput.model_validate_json(line)
+                except ValueError:
+                    break
+                custom_ids.add(output.custom_id)
+            valid_size += len(line)
+
+    if valid_size != os.path.getsize(output_path):
+        logger.warning("Truncating the incomplete last line of %s",
+                       output_path)
+        os.truncate(output_path, valid_size)
+    return custom_ids
+
+
+class BatchOutputWriter:
     """
-    Write the responses to a local file.
-    output_path: The path to write the responses to.
-    batch_outputs: The list of batch outputs to write.
+    Writes each output as soon as it completes, so that memory use does not
+    grow with the size of the batch and a crash loses at most the requests
+    still in flight. Outputs are therefore written in completion order rather
+    than input order; use custom_id to match them to the inputs.
+
+    Output URLs are written to a temporary local file that is uploaded by
+    `close()`.
     """
-    # We should make this async, but as long as run_batch runs as a
-    # standalone program, blocking the event loop won't effect performance.
-    with open(output_path, "w", encoding="utf-8") as f:
-        for o in batch_outputs:
-            print(o.model_dump_json(), file=f)
+
+    def __init__(self, path_or_url: str, output_tmp_dir: Optional[str],
+                 resume: bool):
+        self.path_or_url = path_or_url
+        self.is_url = (path_or_url.startswith("http://")
+                       or path_or_url.startswith("https://"))
+        self.num_written = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+        if self.is_url:
+            if resume:
+                raise ValueError(
+                    "--resume is only supported for local output files.")
+            self._file = tempfile.NamedTemporaryFile(  # noqa: SIM115
+                mode="w",
+                encoding="utf-8",
+                dir=output_tmp_dir,
+                prefix="tmp_batch_output_",
+                suffix=".jsonl",
+            )
+            logger.info("Writing outputs to temporary local file %s",
+                        self._file.name)
+        else:
+            logger.info("Writing outputs to local file %s", path_or_url)
+            self._file = open(  # noqa: SIM115
+                path_or_url,
+                "a" if resume else "w",
+                encoding="utf-8")
+
+    def write(self, output: BatchRequestOutput) -> None:
+        print(output.model_dump_json(), file=self._file, flush=True)
+        self.num_written += 1
+
+        usage = getattr(output.response.body, "usage", None) \
+            if output.response is not None else None
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens or 0
+
+    async def close(self) -> None:
+        if self.is_url:
+            self._file.flush()
+            logger.info("Uploading outputs to %s", self.path_or_url)
+            await upload_data(self.path_or_url,
+                              self._file.name,
+                              from_file=True)
+        self._file.close()
+
+
+async def log_throughput(writer: BatchOutputWriter,
+                         in_flight: set[asyncio.Task],
+                         interval: float) -> None:
+    start_time = last_time = time.monotonic()
+    last_written = last_tokens = 0
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        elapsed = now - last_time
+        logger.info(
+            "Batch progress: %d outputs written, %d requests in flight, "
+            "%.2f req/s and %.1f generated tokens/s over the last %.0f s, "
+            "%.2f req/s overall.", writer.num_written, len(in_flight),
+            (writer.num_written - last_written) / elapsed,
+            (writer.completion_tokens - last_tokens) / elapsed, elapsed,
+            writer.num_written / (now - start_time))
+        last_time = now
+        last_written = writer.num_written
+        last_tokens = writer.completion_tokens
 
 
 async def upload_data(output_url: str, data_or_file: str,
@@ -210,47 +350,6 @@ async def upload_data(output_url: str, data_or_file: str,
                                 f"Error message: {str(e)}.") from e
 
 
-async def write_file(path_or_url: str, batch_outputs: list[BatchRequestOutput],
-                     output_tmp_dir: str) -> None:
-    """
-    Write batch_outputs to a file or upload to a URL.
-    path_or_url: The path or URL to write batch_outputs to.
-    batch_outputs: The list of batch outputs to write.
-    output_tmp_dir: The directory to store the output file before uploading it
-    to the output URL.
-    """
-    if path_or_url.startswith("http://") or path_or_url.startswith("https://"):
-        if output_tmp_dir is None:
-            logger.info("Writing outputs to memory buffer")
-            output_buffer = StringIO()
-            for o in batch_outputs:
-                print(o.model_dump_json(), file=output_buffer)
-            output_buffer.seek(0)
-            logger.info("Uploading outputs to %s", path_or_url)
-            await upload_data(
-                path_or_url,
-                output_buffer.read().strip().encode("utf-8"),
-                from_file=False,
-            )
-        else:
-            # Write responses to a temporary file and then upload it to the URL.
-            with tempfile.NamedTemporaryFile(
-                    mode="w",
-                    encoding="utf-8",
-                    dir=output_tmp_dir,
-                    prefix="tmp_batch_output_",
-                    suffix=".jsonl",
-            ) as f:
-                logger.info("Writing outputs to temporary local file %s",
-                            f.name)
-                await write_local_file(f.name, batch_outputs)
-                logger.info("Uploading outputs to %s", path_or_url)
-                await upload_data(path_or_url, f.name, from_file=True)
-    else:
-        logger.info("Writing outputs to local file %s", path_or_url)
-        await write_local_file(path_or_url, batch_outputs)
-
-
 def make_error_request_output(request: BatchRequestInput,
                               error_msg: str) -> BatchRequestOutput:
     batch_output = BatchRequestOutput(
@@ -358,92 +457,132 @@ async def main(args):
         request_logger=request_logger,
     ) if model_config.task == "score" else None)
 
-    tracker = BatchProgressTracker()
-    logger.info("Reading batch from %s...", args.input_file)
-
-    # Submit all requests in the file to the engine "concurrently".
-    response_futures: list[Awaitable[BatchRequestOutput]] = []
-    for request_json in (await read_file(args.input_file)).strip().split("\n"):
-        # Skip empty lines.
-        request_json = request_json.strip()
-        if not request_json:
-            continue
-
-        request = BatchRequestInput.model_validate_json(request_json)
-
+    def make_response_future(
+            request: BatchRequestInput) -> Awaitable[BatchRequestOutput]:
         # Determine the type of request and run it.
         if request.url == "/v1/chat/completions":
             chat_handler_fn = openai_serving_chat.create_chat_completion if \
                 openai_serving_chat is not None else None
             if chat_handler_fn is None:
-                response_futures.append(
-                    make_async_error_request_output(
-                        request,
-                        error_msg=
-                        "The model does not support Chat Completions API",
-                    ))
-                continue
-
-            response_futures.append(
-                run_request(chat_handler_fn, request, tracker))
+                return make_async_error_request_output(
+                    request,
+                    error_msg="The model does not support Chat Completions API",
+                )
+
             tracker.submitted()
+            return run_request(chat_handler_fn, request, tracker)
         elif request.url == "/v1/embeddings":
             embed_handler_fn = openai_serving_embedding.create_embedding if \
                 openai_serving_embedding is not None else None
             if embed_handler_fn is None:
-                response_futures.append(
-                    make_async_error_request_output(
-                        request,
-                        error_msg="The model does not support Embeddings API",
-                    ))
-                continue
-
-            response_futures.append(
-                run_request(embed_handler_fn, request, tracker))
+                return make_async_error_request_output(
+                    request,
+                    error_msg="The model does not support Embeddings API",
+                )
+
             tracker.submitted()
+            return run_request(embed_handler_fn, request, tracker)
         elif request.url.endswith("/score"):
             score_handler_fn = openai_serving_scores.create_score if \
                 openai_serving_scores is not None else None
             if score_handler_fn is None:
-                response_futures.append(
-                    make_async_error_request_output(
-                        request,
-                        error_msg="The model does not support Scores API",
-                    ))
-                continue
-
-            response_futures.append(
-                run_request(score_handler_fn, request, tracker))
+                return make_async_error_request_output(
+                    request,
+                    error_msg="The model does not support Scores API",
+                )
+
             tracker.submitted()
+            return run_request(score_handler_fn, request, tracker)
         elif request.url.endswith("/rerank"):
             rerank_handler_fn = openai_serving_scores.do_rerank if \
                 openai_serving_scores is not None else None
             if rerank_handler_fn is None:
-                response_futures.append(
-                    make_async_error_request_output(
-                        request,
-                        error_msg="The model does not support Rerank API",
-                    ))
-                continue
-
-            response_futures.append(
-                run_request(rerank_handler_fn, request, tracker))
+                return make_async_error_request_output(
+                    request,
+                    error_msg="The model does not support Rerank API",
+                )
+
             tracker.submitted()
+            return run_request(rerank_handler_fn, request, tracker)
         else:
-            response_futures.append(
-                make_async_error_request_output(
-                    request,
-                    error_msg=f"URL {request.url} was used. "
-                    "Supported endpoints: /v1/chat/completions, /v1/embeddings,"
-                    " /score, /rerank ."
-                    "See vllm/entrypoints/openai/api_server.py for supported "
-                    "score/rerank versions.",
-                ))
+            return make_async_error_request_output(
+                request,
+                error_msg=f"URL {request.url} was used. "
+                "Supported endpoints: /v1/chat/completions, /v1/embeddings,"
+                " /score, /rerank ."
+                "See vllm/entrypoints/openai/api_server.py for supported "
+                "score/rerank versions.",
+            )
 
-    with tracker.pbar():
-        responses = await asyncio.gather(*response_futures)
+    completed_custom_ids: set[str] = set()
+    if args.resume:
+        if args.output_file.startswith(("http://", "https://")):
+            raise ValueError(
+                "--resume is only supported for local output files.")
+        completed_custom_ids = load_completed_custom_ids(args.output_file)
+        logger.info("Resuming batch, %d outputs already exist in %s",
+                    len(completed_custom_ids), args.output_file)
+
+    writer = BatchOutputWriter(args.output_file, args.output_tmp_dir,
+                               args.resume)
+    in_flight: set[asyncio.Task] = set()
+
+    async def run_and_write(
+            response_future: Awaitable[BatchRequestOutput]) -> None:
+        writer.write(await response_future)
+
+    async def wait_for_any() -> None:
+        done, _ = await asyncio.wait(in_flight,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        in_flight.difference_update(done)
+        for task in done:
+            # Propagate exceptions of failed requests.
+            task.result()
+
+    stats_task = (asyncio.create_task(
+        log_throughput(writer, in_flight, args.stats_interval))
+                  if args.stats_interval > 0 else None)
+
+    tracker = BatchProgressTracker()
+    logger.info("Reading batch from %s...", args.input_file)
 
-    await write_file(args.output_file, responses, args.output_tmp_dir)
+    num_skipped = 0
+    try:
+        with tracker.pbar():
+            # Submit the requests to the engine "concurrently", but only read
+            # further lines once there is room in the in-flight window.
+            async for request_json in iter_file_lines(args.input_file):
+                # Skip empty lines.
+                request_json = request_json.strip()
+                if not request_json:
+                    continue
+
+                request = BatchRequestInput.model_validate_json(request_json)
+                if request.custom_id in completed_custom_ids:
+                    num_skipped += 1
+                    continue
+
+                while len(in_flight) >= args.max_concurrent_requests:
+                    await wait_for_any()
+                in_flight.add(
+                    asyncio.create_task(
+                        run_and_write(make_response_future(request))))
+
+            while in_flight:
+                await wait_for_any()
+    finally:
+        if stats_task is not None:
+            stats_task.cancel()
+        for task in in_flight:
+            task.cancel()
+        # Also on failure, so that the outputs written so far are flushed
+        # (and uploaded) and a resumed run can skip them.
+        logger.info("Wrote %d outputs", writer.num_written)
+        await writer.close()
+
+    if num_skipped:
+        logger.info("Skipped %d requests that were already completed",
+                    num_skipped)
 
 
 if __name__ == "__main__":
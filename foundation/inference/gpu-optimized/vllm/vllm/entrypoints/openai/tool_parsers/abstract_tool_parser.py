@@ -1,13 +1,15 @@
 # SPDX-License-Identifier: Apache-2.0
 # SPDX-FileCopyrightText: Copyright contributors to the vLLM project
 
+import json
 import os
 from collections.abc import Sequence
 from functools import cached_property
 from typing import Callable, Optional, Union
 
 from vllm.entrypoints.openai.protocol import (ChatCompletionRequest,
-                                              DeltaMessage,
+                                              DeltaFunctionCall, DeltaMessage,
+                                              DeltaToolCall,
                                               ExtractedToolCallInformation)
 from vllm.logger import init_logger
 from vllm.transformers_utils.tokenizer import AnyTokenizer
@@ -79,6 +81,47 @@ class ToolParser:
             "AbstractToolParser.extract_tool_calls_streaming has not been "
             "implemented!")
 
+    def complete_streamed_tool_call(
+            self, index: int, delta_message: DeltaMessage) -> DeltaMessage:
+        """
+        Called with the final delta of a stream if it includes tool call
+        arguments. Returns the delta to send instead, which includes any
+        arguments that were generated but not streamed yet.
+
+        By default, the arguments that were "autocompleted" by partial JSON
+        parsing of the tool call at `index` are compared to the ones streamed
+        so far, and the remainder is sent.
+        """
+        latest_delta_len = 0
+        if ((isinstance(delta_message.tool_calls[0].function,
+                        DeltaFunctionCall))
+                and isinstance(delta_message.tool_calls[0].function.arguments,
+                               str)):
+            latest_delta_len = len(
+                delta_message.tool_calls[0].function.arguments)
+
+        # get the expected call based on partial JSON
+        # parsing which "autocompletes" the JSON
+        expected_arguments = self.prev_tool_call_arr[index].get(
+            "arguments", {})
+        expected_call = json.dumps(expected_arguments, ensure_ascii=False)
+
+        # get what we've streamed so far for arguments
+        # for the current tool
+        actual_call = self.streamed_args_for_tool[index]
+        if (latest_delta_len > 0):
+            actual_call = actual_call[:-latest_delta_len]
+
+        # check to see if there's anything left to stream
+        remaining_call = expected_call.replace(actual_call, "", 1)
+        # set that as a delta message
+        return DeltaMessage(tool_calls=[
+            DeltaToolCall(index=index,
+                          function=DeltaFunctionCall(
+                              arguments=remaining_call).model_dump(
+                                  exclude_none=True))
+        ])
+
 
 class ToolParserManager:
     tool_parsers: dict[str, type] = {}
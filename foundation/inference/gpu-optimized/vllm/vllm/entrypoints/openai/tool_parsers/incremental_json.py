@@ -0,0 +1,487 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+"""
+Incremental parsing of JSON tool calls for streaming.
+
+Parsers that re-parse the whole tool call with partial_json_parser for every
+delta do work that grows with the length of the arguments, i.e. quadratic
+work per request. `IncrementalToolCallParser` instead keeps its parse state
+between deltas and only looks at each new character once.
+"""
+
+import contextlib
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+
+import regex as re
+
+from vllm.entrypoints.chat_utils import random_tool_call_id
+from vllm.entrypoints.openai.protocol import (DeltaFunctionCall, DeltaMessage,
+                                              DeltaToolCall)
+
+# Characters that end a run of plain string content
+_STRING_SPECIAL = re.compile(r'["\\\x00-\x1f]')
+
+# Characters that end a number or literal
+_SCALAR_END = frozenset(' \t\r\n{}[],:"')
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+# How json.dumps(..., ensure_ascii=False) escapes characters in strings
+_CANONICAL_ESCAPES = {
+    '"': '\\"',
+    '\\': '\\\\',
+    '\b': '\\b',
+    '\f': '\\f',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+}
+
+_LITERALS = ("true", "false", "null")
+
+# States of an open object or array
+_START = 0  # after "{" or "["
+_COLON = 1  # after an object key
+_VALUE = 2  # after ":" or after "," in an array
+_NEXT = 3  # after a value
+_KEY = 4  # after "," in an object
+
+# Roles of the string being parsed
+_SKIP = 0
+_ARGUMENTS = 1
+_KEY_NAME = 2
+_TOOL_NAME = 3
+
+
+def _escape_char(char: str) -> str:
+    escaped = _CANONICAL_ESCAPES.get(char)
+    if escaped is not None:
+        return escaped
+    if char < " ":
+        return f"\\u{ord(char):04x}"
+    return char
+
+
+def _canonical_scalar(token: str) -> str:
+    try:
+        return json.dumps(json.loads(token))
+    except ValueError:
+        # Not valid JSON, e.g. a Python literal; pass it through unchanged
+        return token
+
+
+def _complete_scalar(token: str) -> str:
+    for literal in _LITERALS:
+        if literal.startswith(token):
+            return literal
+    for suffix in ("", "0"):
+        try:
+            return json.dumps(json.loads(token + suffix))
+        except ValueError:
+            pass
+    return token
+
+
+@dataclass
+class ToolCallDelta:
+    index: int
+    """The position of the tool call in the parsed text."""
+    name: Optional[str] = None
+    """The function name, set once when it is complete."""
+    arguments: str = ""
+    """The next part of the arguments."""
+
+
+@dataclass
+class _ToolCallState:
+    name: Optional[str] = None
+    name_sent: bool = False
+    arguments: list[str] = field(default_factory=list)
+    num_sent: int = 0
+    complete: bool = False
+
+
+class IncrementalToolCallParser:
+    """
+    Parses a JSON tool call, e.g. `{"name": "f", "arguments": {"x": 1}}`, or
+    an array of them from text that arrives in pieces.
+
+    `feed` consumes only the new text and returns the name of each tool call
+    once it is complete, followed by its arguments as they are parsed. The
+    arguments are emitted in the form `json.dumps(arguments,
+    ensure_ascii=False)` produces, so that the concatenated deltas are equal
+    to the arguments returned by the non-streaming `extract_tool_calls`.
+    Numbers and literals are held back until they are complete. Arguments
+    that appear before the name are held back until the name is known.
+    """
+
+    def __init__(
+        self,
+        name_keys: tuple[str, ...] = ("name", ),
+        arguments_keys: tuple[str, ...] = ("arguments", "parameters"),
+    ) -> None:
+        self.name_keys = name_keys
+        self.arguments_keys = arguments_keys
+
+        # Whether the top-level value is complete
+        self.finished = False
+        # Text after the end of the top-level value
+        self.remainder = ""
+
+        self._tool_calls: list[_ToolCallState] = []
+        # Depth of the tool call objects: 1 for a single object, 2 for an
+        # array of them
+        self._tool_depth: Optional[int] = None
+        # The last key seen in the current tool call object
+        self._key: Optional[str] = None
+        # Depth at which the arguments value started, while it's being parsed
+        self._arguments_depth: Optional[int] = None
+        # Open objects and arrays as [bracket, state]
+        self._stack: list[list] = []
+
+        self._in_string = False
+        self._string_is_key = False
+        self._string_role = _SKIP
+        self._string_chars: list[str] = []
+        # The characters after a backslash, while an escape is incomplete
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+
+        # The characters of an incomplete number or literal
+        self._scalar = ""
+
+    @property
+    def num_tool_calls(self) -> int:
+        return len(self._tool_calls)
+
+    def get_name(self, index: int) -> Optional[str]:
+        return self._tool_calls[index].name
+
+    def get_arguments(self, index: int) -> str:
+        """Return the arguments of a tool call that were parsed so far."""
+        return "".join(self._tool_calls[index].arguments)
+
+    def is_complete(self, index: int) -> bool:
+        return self._tool_calls[index].complete
+
+    def get_tool_call(self, index: int) -> dict:
+        """
+        Return a tool call as the non-streaming parsers load it, i.e. as a
+        dict with the name and the arguments, if they are valid JSON.
+        """
+        tool_call: dict = {"name": self._tool_calls[index].name}
+        arguments = self.get_arguments(index)
+        if arguments:
+            # arguments that are not valid JSON are left out
+            with contextlib.suppress(ValueError):
+                tool_call["arguments"] = json.loads(arguments)
+        return tool_call
+
+    def feed(self, text: str) -> list[ToolCallDelta]:
+        """Parse the next part of the text."""
+        start = max(len(self._tool_calls) - 1, 0)
+        i, n = 0, len(text)
+        while i < n:
+            if self.finished:
+                self.remainder += text[i:]
+                break
+            if self._in_string:
+                i = self._consume_string(text, i)
+                continue
+            char = text[i]
+            i += 1
+            if not self._stack and char != "{" and char != "[":
+                # Skip anything before the top-level value
+                continue
+            if char not in _SCALAR_END:
+                if not self._scalar:
+                    self._begin_value("")
+                self._scalar += char
+                continue
+            if self._scalar:
+                self._end_scalar()
+            if char in " \t\r\n":
+                continue
+            if char == '"':
+                self._begin_string()
+            elif char == "{" or char == "[":
+                self._begin_value(char)
+                self._emit(char)
+                self._stack.append([char, _START])
+            elif char == "}" or char == "]":
+                self._emit(char)
+                self._stack.pop()
+                if (char == "}" and self._arguments_depth is None
+                        and len(self._stack) == self._tool_depth - 1):
+                    self._tool_calls[-1].complete = True
+                self._end_value()
+            elif char == ",":
+                frame = self._stack[-1]
+                frame[1] = _KEY if frame[0] == "{" else _VALUE
+                if self._in_arguments_container():
+                    self._emit(", ")
+                elif len(self._stack) == self._tool_depth:
+                    self._key = None
+            elif char == ":":
+                self._stack[-1][1] = _VALUE
+                if self._in_arguments_container():
+                    self._emit(": ")
+        return self._collect(start)
+
+    def close(self) -> list[ToolCallDelta]:
+        """
+        Finish parsing, e.g. when the tool call end tag or the end of the
+        output is reached. If the arguments are incomplete, they are completed
+        with the missing closing quotes and brackets.
+        """
+        start = max(len(self._tool_calls) - 1, 0)
+        if self._arguments_depth is not None:
+            self._emit(self.arguments_suffix())
+            self._arguments_depth = None
+        if self._tool_calls:
+            self._tool_calls[-1].complete = True
+        self.finished = True
+        return self._collect(start)
+
+    def arguments_suffix(self) -> str:
+        """
+        Return the text that completes the arguments parsed so far to valid
+        JSON, or an empty string if they are complete or haven't started.
+        """
+        if self._arguments_depth is None:
+            return ""
+        parts = []
+        value_pending = bool(self._scalar) or self._in_string
+        if self._scalar:
+            parts.append(_complete_scalar(self._scalar))
+        elif self._in_string and self._string_role == _ARGUMENTS:
+            parts.append('"')
+            if self._string_is_key:
+                parts.append(": null")
+        frames = self._stack[self._arguments_depth:]
+        for k, (bracket, state) in enumerate(reversed(frames)):
+            if k == 0 and not value_pending:
+                if state == _COLON:
+                    parts.append(": null")
+                elif state == _VALUE:
+                    parts.append("null")
+                elif state == _KEY:
+                    parts.append('"": null')
+            parts.append("}" if bracket == "{" else "]")
+        return "".join(parts)
+
+    def _collect(self, start: int) -> list[ToolCallDelta]:
+        deltas = []
+        for index in range(start, len(self._tool_calls)):
+            state = self._tool_calls[index]
+            if state.name is None:
+                continue
+            delta = ToolCallDelta(index=index)
+            if not state.name_sent:
+                delta.name = state.name
+                state.name_sent = True
+            if state.num_sent < len(state.arguments):
+                delta.arguments = "".join(state.arguments[state.num_sent:])
+                state.num_sent = len(state.arguments)
+            if delta.name is not None or delta.arguments:
+                deltas.append(delta)
+        return deltas
+
+    def _emit(self, text: str) -> None:
+        if self._arguments_depth is not None:
+            self._tool_calls[-1].arguments.append(text)
+
+    def _in_arguments_container(self) -> bool:
+        return (self._arguments_depth is not None
+                and len(self._stack) > self._arguments_depth)
+
+    def _begin_value(self, bracket: str) -> None:
+        if self._arguments_depth is not None:
+            return
+        depth = len(self._stack)
+        if depth == 0 and self._tool_depth is None:
+            self._tool_depth = 2 if bracket == "[" else 1
+        if depth == self._tool_depth - 1 and bracket == "{":
+            self._tool_calls.append(_ToolCallState())
+            self._key = None
+        elif (depth == self._tool_depth and self._tool_calls
+              and self._key in self.arguments_keys):
+            self._arguments_depth = depth
+
+    def _end_value(self) -> None:
+        depth = len(self._stack)
+        if self._arguments_depth == depth:
+            self._arguments_depth = None
+        if self._stack:
+            self._stack[-1][1] = _NEXT
+        else:
+            self.finished = True
+
+    def _end_scalar(self) -> None:
+        self._emit(_canonical_scalar(self._scalar))
+        self._scalar = ""
+        self._end_value()
+
+    def _begin_string(self) -> None:
+        frame = self._stack[-1]
+        self._string_is_key = frame[0] == "{" and frame[1] in (_START, _KEY)
+        if not self._string_is_key:
+            self._begin_value('"')
+
+        if self._arguments_depth is not None:
+            self._string_role = _ARGUMENTS
+            self._emit('"')
+        elif len(self._stack) != self._tool_depth or frame[0] != "{":
+            self._string_role = _SKIP
+        elif self._string_is_key:
+            self._string_role = _KEY_NAME
+        elif self._key in self.name_keys:
+            self._string_role = _TOOL_NAME
+        else:
+            self._string_role = _SKIP
+        self._in_string = True
+
+    def _end_string(self) -> None:
+        self._flush_high_surrogate()
+        self._in_string = False
+        if self._string_role == _ARGUMENTS:
+            self._emit('"')
+        elif self._string_role == _KEY_NAME:
+            self._key = "".join(self._string_chars)
+        elif self._string_role == _TOOL_NAME:
+            self._tool_calls[-1].name = "".join(self._string_chars)
+        self._string_chars.clear()
+
+        if self._string_is_key:
+            self._stack[-1][1] = _COLON
+        else:
+            self._end_value()
+
+    def _consume_string(self, text: str, i: int) -> int:
+        n = len(text)
+        while i < n:
+            if self._escape is not None:
+                i = self._consume_escape(text, i)
+                continue
+            match = _STRING_SPECIAL.search(text, i)
+            end = match.start() if match else n
+            if end > i:
+                # Plain characters are the same in the canonical form
+                self._flush_high_surrogate()
+                self._add_string_text(text[i:end], text[i:end])
+                i = end
+            if match is None:
+                break
+            char = text[i]
+            i += 1
+            if char == '"':
+                self._end_string()
+                break
+            if char == "\\":
+                self._escape = ""
+            else:
+                # Unescaped control characters are invalid, but tolerated
+                self._add_string_char(char)
+        return i
+
+    def _consume_escape(self, text: str, i: int) -> int:
+        char = text[i]
+        if not self._escape:
+            if char == "u":
+                self._escape = char
+            else:
+                self._escape = None
+                self._add_string_char(_SIMPLE_ESCAPES.get(char, char))
+            return i + 1
+
+        self._escape += char
+        if len(self._escape) < 5:
+            return i + 1
+
+        try:
+            code = int(self._escape[1:], 16)
+        except ValueError:
+            code = 0xFFFD
+        self._escape = None
+        if 0xD800 <= code < 0xDC00:
+            self._flush_high_surrogate()
+            self._high_surrogate = code
+        elif 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = (0x10000 + ((self._high_surrogate - 0xD800) << 10) +
+                    (code - 0xDC00))
+            self._high_surrogate = None
+            self._add_string_char(chr(code))
+        else:
+            self._add_string_char(chr(code))
+        return i + 1
+
+    def _flush_high_surrogate(self) -> None:
+        if self._high_surrogate is not None:
+            char = chr(self._high_surrogate)
+            self._high_surrogate = None
+            self._add_string_text(char, char)
+
+    def _add_string_char(self, char: str) -> None:
+        self._flush_high_surrogate()
+        self._add_string_text(char, _escape_char(char))
+
+    def _add_string_text(self, text: str, canonical: str) -> None:
+        if self._string_role == _ARGUMENTS:
+            self._emit(canonical)
+        elif self._string_role != _SKIP:
+            self._string_chars.append(text)
+
+
+def to_delta_tool_calls(deltas: list[ToolCallDelta],
+                        first_index: int = 0) -> list[DeltaToolCall]:
+    """
+    Convert the deltas of an `IncrementalToolCallParser` to the tool call
+    deltas of a streaming response, assigning an id when the name is sent.
+    `first_index` is the response index of the parser's first tool call.
+    """
+    tool_calls = []
+    for delta in deltas:
+        function = DeltaFunctionCall(name=delta.name,
+                                     arguments=delta.arguments or None)
+        if delta.name is not None:
+            tool_calls.append(
+                DeltaToolCall(index=first_index + delta.index,
+                              type="function",
+                              id=random_tool_call_id(),
+                              function=function.model_dump(exclude_none=True)))
+        else:
+            tool_calls.append(
+                DeltaToolCall(index=first_index + delta.index,
+                              function=function.model_dump(exclude_none=True)))
+    return tool_calls
+
+
+def append_tool_call_arguments(delta_message: DeltaMessage, index: int,
+                               arguments: str) -> DeltaMessage:
+    """
+    Append arguments, e.g. the completion of truncated arguments, to the
+    tool call with the given index in a streaming delta.
+    """
+    if not arguments:
+        return delta_message
+    for tool_call in delta_message.tool_calls:
+        if tool_call.index == index and tool_call.function is not None:
+            tool_call.function.arguments = (tool_call.function.arguments
+                                            or "") + arguments
+            return delta_message
+    delta_message.tool_calls.append(
+        DeltaToolCall(index=index,
+                      function=DeltaFunctionCall(
+                          arguments=arguments).model_dump(exclude_none=True)))
+    return delta_message
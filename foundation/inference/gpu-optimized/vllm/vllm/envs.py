@@ -100,6 +100,7 @@ if TYPE_CHECKING:
     V_SCALE_CONSTANT: int = 100
     VLLM_SERVER_DEV_MODE: bool = False
     VLLM_V1_OUTPUT_PROC_CHUNK_SIZE: int = 128
+    VLLM_BATCHED_DETOKENIZATION: bool = False
     VLLM_MLA_DISABLE: bool = False
     VLLM_ENABLE_MOE_ALIGN_BLOCK_SIZE_TRITON: bool = False
     VLLM_RAY_PER_WORKER_GPUS: float = 1.0
@@ -119,6 +120,7 @@ if TYPE_CHECKING:
     VLLM_TPU_BUCKET_PADDING_GAP: int = 0
     VLLM_USE_DEEP_GEMM: bool = False
     VLLM_XGRAMMAR_CACHE_MB: int = 0
+    VLLM_XGRAMMAR_CACHE_PATH: str = ""
     VLLM_MSGPACK_ZERO_COPY_THRESHOLD: int = 256
     VLLM_ALLOW_INSECURE_SERIALIZATION: bool = False
     VLLM_NIXL_SIDE_CHANNEL_HOST: str = "localhost"
@@ -712,6 +714,13 @@ environment_variables: dict[str, Callable[[], Any]] = {
     "VLLM_V1_OUTPUT_PROC_CHUNK_SIZE":
     lambda: int(os.getenv("VLLM_V1_OUTPUT_PROC_CHUNK_SIZE", "128")),
 
+    # If set, the V1 output processor detokenizes the new tokens of all the
+    # requests using a fast tokenizer with one batched call per step, instead
+    # of one DecodeStream per request, which lowers the CPU time of the
+    # front-end process with many concurrent streams.
+    "VLLM_BATCHED_DETOKENIZATION":
+    lambda: bool(int(os.getenv("VLLM_BATCHED_DETOKENIZATION", "0"))),
+
     # If set, vLLM will disable the MLA attention optimizations.
     "VLLM_MLA_DISABLE":
     lambda: bool(int(os.getenv("VLLM_MLA_DISABLE", "0"))),
@@ -825,6 +834,16 @@ environment_variables: dict[str, Callable[[], Any]] = {
     "VLLM_XGRAMMAR_CACHE_MB":
     lambda: int(os.getenv("VLLM_XGRAMMAR_CACHE_MB", "512")),
 
+    # Directory of the on-disk cache of compiled xgrammar grammars. It is
+    # shared by all the engine processes using the same tokenizer, and set
+    # it to an empty string to disable it.
+    "VLLM_XGRAMMAR_CACHE_PATH":
+    lambda: os.path.expanduser(
+        os.getenv(
+            "VLLM_XGRAMMAR_CACHE_PATH",
+            os.path.join(get_default_cache_root(), "vllm", "xgrammar_cache"),
+        )),
+
     # Control the threshold for msgspec to use 'zero copy' for
     # serialization/deserialization of tensors. Tensors below
     # this limit will be encoded into the msgpack buffer, and
@@ -69,6 +69,12 @@ class BlockPool:
         self.enable_kv_cache_events = enable_kv_cache_events
         self.kv_event_queue: list[KVCacheEvent] = []
 
+        # (block hash, block ID) of the blocks whose hash was evicted from the
+        # cache. Only recorded after `record_evicted_blocks()` is called, e.g.
+        # by a KV connector that keeps evicted blocks in a lower cache tier.
+        self.evicted_blocks: Optional[list[tuple[BlockHashWithGroupId,
+                                                 int]]] = None
+
     def get_cached_block(
             self, block_hash: BlockHash,
             kv_cache_group_ids: list[int]) -> Optional[list[KVCacheBlock]]:
@@ -249,6 +255,10 @@ class BlockPool:
 
             if len(self.cached_block_hash_to_block[block_hash]) == 0:
                 del self.cached_block_hash_to_block[block_hash]
+                if self.evicted_blocks is not None:
+                    # The block content stays valid until the block is
+                    # written, so it can still be copied out in this step.
+                    self.evicted_blocks.append((block_hash, block.block_id))
 
             if self.enable_kv_cache_events:
                 # FIXME (Chen): Not sure whether we should return `hash_value`
@@ -347,3 +357,21 @@ class BlockPool:
         events = self.kv_event_queue
         self.kv_event_queue = []
         return events
+
+    def record_evicted_blocks(self) -> None:
+        """Start recording the blocks evicted from the prefix cache."""
+        if self.evicted_blocks is None:
+            self.evicted_blocks = []
+
+    def take_evicted_blocks(self) -> list[tuple[BlockHashWithGroupId, int]]:
+        """Atomically takes all evicted blocks and clears the list.
+
+        Returns:
+            A list of (block hash, block ID) of the evicted blocks, in
+            eviction order.
+        """
+        if not self.evicted_blocks:
+            return []
+        evicted_blocks = self.evicted_blocks
+        self.evicted_blocks = []
+        return evicted_blocks
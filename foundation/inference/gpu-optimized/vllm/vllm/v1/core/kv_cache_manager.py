@@ -9,8 +9,8 @@ from vllm.distributed.kv_events import KVCacheEvent
 from vllm.logger import init_logger
 from vllm.utils import sha256
 from vllm.v1.core.kv_cache_coordinator import get_kv_cache_coordinator
-from vllm.v1.core.kv_cache_utils import (BlockHash, KVCacheBlock,
-                                         hash_request_tokens)
+from vllm.v1.core.kv_cache_utils import (BlockHash, BlockHashWithGroupId,
+                                         KVCacheBlock, hash_request_tokens)
 from vllm.v1.kv_cache_interface import KVCacheConfig
 from vllm.v1.metrics.stats import PrefixCacheStats
 from vllm.v1.request import Request, RequestStatus
@@ -375,6 +375,18 @@ class KVCacheManager:
         """
         return self.block_pool.take_events()
 
+    def record_evicted_blocks(self) -> None:
+        """Start recording the blocks evicted from the prefix cache."""
+        self.block_pool.record_evicted_blocks()
+
+    def take_evicted_blocks(self) -> list[tuple[BlockHashWithGroupId, int]]:
+        """Take the blocks evicted from the prefix cache since the last call.
+
+        Returns:
+            A list of (block hash, block ID) of the evicted blocks.
+        """
+        return self.block_pool.take_evicted_blocks()
+
     def get_block_ids(self, request_id: str) -> tuple[list[int], ...]:
         """Get the block ids of a request."""
         return KVCacheBlocks(
@@ -76,6 +76,10 @@ class PrefixCachingMetrics:
         self.aggregated_query_hit = 0
         # A deque of (requests, queries, hits) for the most recent requests.
         self.query_queue: deque[tuple[int, int, int]] = deque()
+        # The same for the lower cache tiers: the aggregated and the per-update
+        # {tier: (queries, hits)}, aligned with query_queue.
+        self.aggregated_tiers: dict[str, tuple[int, int]] = {}
+        self.tier_queue: deque[dict[str, tuple[int, int]]] = deque()
 
     def observe(self, stats: PrefixCacheStats):
         """Observe the prefix caching for a set of requests.
@@ -99,6 +103,12 @@ class PrefixCachingMetrics:
         self.aggregated_requests += stats.requests
         self.aggregated_query_total += stats.queries
         self.aggregated_query_hit += stats.hits
+        tiers = {
+            tier: (queries, stats.tier_hits.get(tier, 0))
+            for tier, queries in stats.tier_queries.items()
+        }
+        self.tier_queue.append(tiers)
+        self._add_tiers(tiers, 1)
 
         # Remove the oldest stats if the number of requests exceeds.
         if self.aggregated_requests > self.max_recent_requests:
@@ -106,6 +116,13 @@ class PrefixCachingMetrics:
             self.aggregated_requests -= old_requests
             self.aggregated_query_total -= old_queries
             self.aggregated_query_hit -= old_hits
+            self._add_tiers(self.tier_queue.popleft(), -1)
+
+    def _add_tiers(self, tiers: dict[str, tuple[int, int]], sign: int):
+        for tier, (queries, hits) in tiers.items():
+            total_queries, total_hits = self.aggregated_tiers.get(tier, (0, 0))
+            self.aggregated_tiers[tier] = (total_queries + sign * queries,
+                                           total_hits + sign * hits)
 
     def reset(self):
         """Reset the metrics."""
@@ -113,6 +130,8 @@ class PrefixCachingMetrics:
         self.aggregated_query_total = 0
         self.aggregated_query_hit = 0
         self.query_queue.clear()
+        self.aggregated_tiers.clear()
+        self.tier_queue.clear()
 
     @property
     def hit_rate(self) -> float:
@@ -121,6 +140,15 @@ class PrefixCachingMetrics:
             return 0.0
         return self.aggregated_query_hit / self.aggregated_query_total
 
+    @property
+    def tier_hit_rates(self) -> dict[str, float]:
+        """Calculate the hit rate of each lower cache tier for the past N
+        requests."""
+        return {
+            tier: hits / queries if queries else 0.0
+            for tier, (queries, hits) in self.aggregated_tiers.items()
+        }
+
 
 @dataclass
 class KVCacheBlock:
@@ -0,0 +1,282 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+
+from __future__ import annotations
+
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Iterator
+
+from vllm.config import SchedulerConfig
+from vllm.v1.request import Request
+
+# Tenant of the requests that do not set one.
+DEFAULT_TENANT = ""
+
+# Half-life of the per-tenant token rates used for fair sharing.
+TENANT_RATE_HALF_LIFE_S = 10.0
+
+
+class RequestQueue(ABC):
+    """The queue of waiting requests of the scheduler."""
+
+    @abstractmethod
+    def add_request(self, request: Request) -> None:
+        """Add a newly arrived request."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def peek_request(self) -> Request:
+        """Return the next request to schedule without removing it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def pop_request(self) -> Request:
+        """Remove and return the next request to schedule."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def prepend_request(self, request: Request) -> None:
+        """Put back a preempted or unscheduled request, ahead of the requests
+        of the same tenant."""
+        raise NotImplementedError
+
+    def prepend_requests(self, requests: Iterable[Request]) -> None:
+        """Put back requests, like `deque.extendleft`."""
+        for request in requests:
+            self.prepend_request(request)
+
+    @abstractmethod
+    def remove_request(self, request: Request) -> None:
+        """Remove a request, e.g. when it is aborted."""
+        raise NotImplementedError
+
+    def commit_request(self, request: Request) -> None:
+        """Mark a popped request as scheduled. It is not put back anymore,
+        only preempted."""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Request]:
+        raise NotImplementedError
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+class FCFSRequestQueue(deque, RequestQueue):
+    """First come first served."""
+
+    def add_request(self, request: Request) -> None:
+        self.append(request)
+
+    def peek_request(self) -> Request:
+        if not self:
+            raise IndexError("peek from an empty queue")
+        return self[0]
+
+    def pop_request(self) -> Request:
+        return self.popleft()
+
+    def prepend_request(self, request: Request) -> None:
+        self.appendleft(request)
+
+    def prepend_requests(self, requests: Iterable[Request]) -> None:
+        self.extendleft(requests)
+
+    def remove_request(self, request: Request) -> None:
+        self.remove(request)
+
+    def __len__(self) -> int:
+        return deque.__len__(self)
+
+    def __iter__(self) -> Iterator[Request]:
+        return deque.__iter__(self)
+
+    def __bool__(self) -> bool:
+        return deque.__len__(self) > 0
+
+
+def get_tenant(request: Request) -> str:
+    return request.tenant or DEFAULT_TENANT
+
+
+def get_num_tokens_to_compute(request: Request) -> int:
+    return max(request.num_tokens - request.num_computed_tokens, 1)
+
+
+class FairShareRequestQueue(RequestQueue):
+    """Weighted deficit round-robin over per-tenant FCFS queues.
+
+    The tenants with waiting requests take turns. At the start of its turn, a
+    tenant is credited `quantum * weight` tokens, and its requests are popped
+    while the credit covers their number of tokens to compute. Requests that
+    are put back before they are scheduled are refunded exactly what they
+    were charged when popped, so only scheduled work is charged. Once a
+    request is committed, its charge is final: preempting and prepending it
+    refunds nothing.
+
+    Args:
+        tenant_weights: The weight of each tenant. Tenants not listed have a
+            weight of 1.
+        quantum: The number of tokens credited per turn to a tenant of
+            weight 1.
+    """
+
+    def __init__(self, tenant_weights: dict[str, float], quantum: int):
+        self.tenant_weights = tenant_weights
+        self.quantum = quantum
+        # The queues of the tenants with waiting requests, in turn order. The
+        # first tenant has the turn.
+        self._queues: OrderedDict[str, deque[Request]] = OrderedDict()
+        self._deficits: dict[str, float] = {}
+        # The tokens charged for each popped request, refunded if it is put
+        # back before it is committed. Weak, so that the requests that finish
+        # are dropped.
+        self._charges: weakref.WeakKeyDictionary[
+            Request, int] = weakref.WeakKeyDictionary()
+        self._num_requests = 0
+
+    def get_weight(self, tenant: str) -> float:
+        return self.tenant_weights.get(tenant, 1.0)
+
+    def tenants(self) -> Iterator[str]:
+        """The tenants with waiting requests."""
+        return iter(self._queues)
+
+    def add_request(self, request: Request) -> None:
+        self._get_queue(get_tenant(request)).append(request)
+        self._num_requests += 1
+
+    def prepend_request(self, request: Request) -> None:
+        tenant = get_tenant(request)
+        self._get_queue(tenant).appendleft(request)
+        self._deficits[tenant] += self._charges.pop(request, 0)
+        self._num_requests += 1
+
+    def peek_request(self) -> Request:
+        if not self._queues:
+            raise IndexError("peek from an empty queue")
+        self._select_tenant()
+        return next(iter(self._queues.values()))[0]
+
+    def pop_request(self) -> Request:
+        if not self._queues:
+            raise IndexError("pop from an empty queue")
+        self._select_tenant()
+        tenant, queue = next(iter(self._queues.items()))
+        request = queue.popleft()
+        charge = get_num_tokens_to_compute(request)
+        self._deficits[tenant] -= charge
+        self._charges[request] = charge
+        self._num_requests -= 1
+        if not queue:
+            self._remove_tenant(tenant)
+        return request
+
+    def commit_request(self, request: Request) -> None:
+        self._charges.pop(request, None)
+
+    def remove_request(self, request: Request) -> None:
+        tenant = get_tenant(request)
+        queue = self._queues[tenant]
+        queue.remove(request)
+        self._deficits[tenant] += self._charges.pop(request, 0)
+        self._num_requests -= 1
+        if not queue:
+            self._remove_tenant(tenant)
+
+    def __len__(self) -> int:
+        return self._num_requests
+
+    def __iter__(self) -> Iterator[Request]:
+        for queue in self._queues.values():
+            yield from queue
+
+    def _get_queue(self, tenant: str) -> deque[Request]:
+        queue = self._queues.get(tenant)
+        if queue is None:
+            queue = self._queues[tenant] = deque()
+            self._deficits[tenant] = 0.0
+            if len(self._queues) == 1:
+                self._start_turn()
+        return queue
+
+    def _remove_tenant(self, tenant: str) -> None:
+        has_turn = next(iter(self._queues)) == tenant
+        del self._queues[tenant]
+        # An idle tenant does not accumulate credit.
+        del self._deficits[tenant]
+        if has_turn and self._queues:
+            self._start_turn()
+
+    def _start_turn(self) -> None:
+        tenant = next(iter(self._queues))
+        self._deficits[tenant] += self.quantum * self.get_weight(tenant)
+
+    def _select_tenant(self) -> None:
+        """Pass the turn until the tenant with the turn can pay for its next
+        request."""
+        while True:
+            tenant, queue = next(iter(self._queues.items()))
+            if self._deficits[tenant] >= get_num_tokens_to_compute(queue[0]):
+                return
+            self._queues.move_to_end(tenant)
+            self._start_turn()
+
+
+class TenantTokenRates:
+    """Exponentially decaying rate of scheduled tokens per tenant, divided by
+    the tenant weight.
+
+    Args:
+        tenant_weights: The weight of each tenant. Tenants not listed have a
+            weight of 1.
+        half_life_s: The half-life of the rates, in seconds.
+    """
+
+    def __init__(self,
+                 tenant_weights: dict[str, float],
+                 half_life_s: float = TENANT_RATE_HALF_LIFE_S):
+        self.tenant_weights = tenant_weights
+        self.half_life_s = half_life_s
+        # {tenant: (weighted number of tokens, time of the last update)}
+        self._tokens: dict[str, tuple[float, float]] = {}
+
+    def record(self,
+               tenant: str,
+               num_tokens: int,
+               now: float | None = None) -> None:
+        """Record tokens scheduled for a tenant."""
+        if now is None:
+            now = time.monotonic()
+        self._tokens[tenant] = (
+            self.get(tenant, now) +
+            num_tokens / self.tenant_weights.get(tenant, 1.0), now)
+
+    def get(self, tenant: str, now: float | None = None) -> float:
+        """Get the weighted number of recent tokens of a tenant."""
+        tokens, last_update = self._tokens.get(tenant, (0.0, 0.0))
+        if tokens == 0.0:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        return tokens * 0.5**((now - last_update) / self.half_life_s)
+
+
+def create_request_queue(scheduler_config: SchedulerConfig) -> RequestQueue:
+    if scheduler_config.policy == "fair":
+        return FairShareRequestQueue(
+            scheduler_config.tenant_weights,
+            quantum=scheduler_config.max_num_batched_tokens)
+    if scheduler_config.policy == "fcfs":
+        return FCFSRequestQueue()
+    raise ValueError(
+        f"Scheduling policy {scheduler_config.policy!r} is not supported by "
+        "the V1 scheduler.")
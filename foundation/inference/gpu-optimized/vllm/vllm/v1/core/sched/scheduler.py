@@ -4,7 +4,7 @@
 from __future__ import annotations
 
 import time
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
 from collections.abc import Iterable
 from typing import Any, Optional, Union
 
@@ -22,6 +22,9 @@ from vllm.v1.core.kv_cache_manager import KVCacheManager
 from vllm.v1.core.sched.interface import SchedulerInterface
 from vllm.v1.core.sched.output import (CachedRequestData, NewRequestData,
                                        SchedulerOutput)
+from vllm.v1.core.sched.request_queue import (FairShareRequestQueue,
+                                              RequestQueue, TenantTokenRates,
+                                              create_request_queue, get_tenant)
 from vllm.v1.core.sched.utils import check_stop
 from vllm.v1.engine import (EngineCoreEventType, EngineCoreOutput,
                             EngineCoreOutputs)
@@ -95,8 +98,13 @@ class Scheduler(SchedulerInterface):
         # req_id -> Request
         self.requests: dict[str, Request] = {}
         # Priority queues for requests.
-        self.waiting: deque[Request] = deque()
+        self.policy = self.scheduler_config.policy
+        self.waiting: RequestQueue = create_request_queue(
+            self.scheduler_config)
         self.running: list[Request] = []
+        # Fair-share: recent scheduled tokens of each tenant, by weight.
+        self.tenant_token_rates = TenantTokenRates(
+            self.scheduler_config.tenant_weights)
 
         # The request IDs that are finished in between the previous and the
         # current steps. This is used to notify the workers about the finished
@@ -154,6 +162,8 @@ class Scheduler(SchedulerInterface):
             log_stats=self.log_stats,
             enable_kv_cache_events=self.enable_kv_cache_events,
         )
+        if self.connector is not None:
+            self.connector.bind_kv_cache_manager(self.kv_cache_manager)
 
     def schedule(self) -> SchedulerOutput:
         # NOTE(woosuk) on the scheduling algorithm:
@@ -192,6 +202,15 @@ class Scheduler(SchedulerInterface):
         # For logging.
         scheduled_timestamp = time.monotonic()
 
+        fair_share = self.policy == "fair"
+        if fair_share:
+            # Serve the tenants with the fewest recent tokens by weight first.
+            # This also makes the preemption below, which takes the last
+            # running request, hit the most served tenant.
+            self.running.sort(key=lambda req: self.tenant_token_rates.get(
+                get_tenant(req), scheduled_timestamp))
+            self._preempt_for_fair_share(scheduled_timestamp)
+
         # First, schedule the RUNNING requests.
         req_index = 0
         while req_index < len(self.running) and token_budget > 0:
@@ -255,7 +274,7 @@ class Scheduler(SchedulerInterface):
                         preempted_req.record_event(
                             EngineCoreEventType.PREEMPTED, scheduled_timestamp)
 
-                    self.waiting.appendleft(preempted_req)
+                    self.waiting.prepend_request(preempted_req)
                     preempted_reqs.append(preempted_req)
                     if preempted_req == request:
                         # No more request to preempt.
@@ -315,13 +334,16 @@ class Scheduler(SchedulerInterface):
         # and put back at the head of the waiting queue later
         skipped_waiting_requests: deque[Request] = deque()
 
+        if fair_share:
+            num_running_per_tenant, slot_shares = self._get_slot_shares()
+
         # Next, schedule the WAITING requests.
         if not preempted_reqs:
             while self.waiting and token_budget > 0:
                 if len(self.running) == self.max_num_running_reqs:
                     break
 
-                request = self.waiting[0]
+                request = self.waiting.peek_request()
 
                 # KVTransfer: skip request if still waiting for remote kvs.
                 if request.status == RequestStatus.WAITING_FOR_REMOTE_KVS:
@@ -332,7 +354,7 @@ class Scheduler(SchedulerInterface):
                         logger.debug(
                             "%s is still in WAITING_FOR_REMOTE_KVS state.",
                             request.request_id)
-                        self.waiting.popleft()
+                        self.waiting.pop_request()
                         skipped_waiting_requests.appendleft(request)
                         continue
 
@@ -343,7 +365,7 @@ class Scheduler(SchedulerInterface):
                     if structured_output_req and structured_output_req.grammar:
                         request.status = RequestStatus.WAITING
                     else:
-                        self.waiting.popleft()
+                        self.waiting.pop_request()
                         skipped_waiting_requests.appendleft(request)
                         continue
 
@@ -354,7 +376,15 @@ class Scheduler(SchedulerInterface):
                         and request.lora_request.lora_int_id
                         not in scheduled_loras):
                     # Scheduling would exceed max_loras, skip.
-                    self.waiting.popleft()
+                    self.waiting.pop_request()
+                    skipped_waiting_requests.appendleft(request)
+                    continue
+
+                # Fair-share: leave the running slots to the tenants below
+                # their share.
+                if fair_share and self._exceeds_slot_share(
+                        request, num_running_per_tenant, slot_shares):
+                    self.waiting.pop_request()
                     skipped_waiting_requests.appendleft(request)
                     continue
 
@@ -439,7 +469,7 @@ class Scheduler(SchedulerInterface):
                         num_external_computed_tokens,
                     )
 
-                self.waiting.popleft()
+                self.waiting.pop_request()
                 if load_kv_async:
                     # If loading async, allocate memory and put request
                     # into the WAITING_FOR_REMOTE_KV state.
@@ -452,6 +482,9 @@ class Scheduler(SchedulerInterface):
                         request.request_id] = req_index
                 req_index += 1
                 self.running.append(request)
+                self.waiting.commit_request(request)
+                if fair_share:
+                    num_running_per_tenant[get_tenant(request)] += 1
                 if self.log_stats:
                     request.record_event(EngineCoreEventType.SCHEDULED,
                                          scheduled_timestamp)
@@ -485,7 +518,7 @@ class Scheduler(SchedulerInterface):
 
         # Put back any skipped requests at the head of the waiting queue
         if skipped_waiting_requests:
-            self.waiting.extendleft(skipped_waiting_requests)
+            self.waiting.prepend_requests(skipped_waiting_requests)
 
         # Check if the scheduling constraints are satisfied.
         total_num_scheduled_tokens = sum(num_scheduled_tokens.values())
@@ -498,6 +531,12 @@ class Scheduler(SchedulerInterface):
         assert (len(scheduled_new_reqs) + len(scheduled_resumed_reqs) +
                 len(scheduled_running_reqs) <= len(self.running))
 
+        if fair_share:
+            for req_id, num_tokens in num_scheduled_tokens.items():
+                self.tenant_token_rates.record(
+                    get_tenant(self.requests[req_id]), num_tokens,
+                    scheduled_timestamp)
+
         # Get the longest common prefix among all requests in the running queue.
         # This can be potentially used for cascade attention.
         num_common_prefix_blocks = [0] * len(
@@ -583,6 +622,67 @@ class Scheduler(SchedulerInterface):
         self.finished_req_ids = set()
         return scheduler_output
 
+    def _get_slot_shares(self) -> tuple[Counter[str], dict[str, float]]:
+        """Fair-share: get the number of running requests of each tenant, and
+        the number of running slots each tenant is entitled to. The slots are
+        shared by weight between the tenants with running or waiting
+        requests."""
+        assert isinstance(self.waiting, FairShareRequestQueue)
+        num_running_per_tenant = Counter(
+            get_tenant(req) for req in self.running)
+        tenants = set(num_running_per_tenant).union(self.waiting.tenants())
+        total_weight = sum(self.waiting.get_weight(t) for t in tenants)
+        slot_shares = {
+            tenant:
+            self.max_num_running_reqs * self.waiting.get_weight(tenant) /
+            total_weight
+            for tenant in tenants
+        }
+        return num_running_per_tenant, slot_shares
+
+    def _exceeds_slot_share(
+        self,
+        request: Request,
+        num_running_per_tenant: Counter[str],
+        slot_shares: dict[str, float],
+    ) -> bool:
+        """Fair-share: whether running the request would take the share of
+        running slots of another waiting tenant."""
+        assert isinstance(self.waiting, FairShareRequestQueue)
+        tenant = get_tenant(request)
+        if num_running_per_tenant[tenant] + 1 <= slot_shares[tenant]:
+            return False
+        return any(num_running_per_tenant[other] + 1 <= slot_shares[other]
+                   for other in self.waiting.tenants() if other != tenant)
+
+    def _preempt_for_fair_share(self, timestamp: float) -> None:
+        """Fair-share: when all the running slots are taken, preempt the last
+        running request of a tenant above its share of slots if a waiting
+        tenant is below its share. At most one request is preempted per step
+        to bound the recomputation."""
+        if len(self.running) < self.max_num_running_reqs or not self.waiting:
+            return
+        assert isinstance(self.waiting, FairShareRequestQueue)
+        num_running_per_tenant, slot_shares = self._get_slot_shares()
+        if not any(num_running_per_tenant[tenant] + 1 <= slot_shares[tenant]
+                   for tenant in self.waiting.tenants()):
+            return
+        for preempted_req in reversed(self.running):
+            tenant = get_tenant(preempted_req)
+            if num_running_per_tenant[tenant] > slot_shares[tenant]:
+                break
+        else:
+            return
+
+        self.running.remove(preempted_req)
+        self.kv_cache_manager.free(preempted_req)
+        preempted_req.status = RequestStatus.PREEMPTED
+        preempted_req.num_computed_tokens = 0
+        if self.log_stats:
+            preempted_req.record_event(EngineCoreEventType.PREEMPTED,
+                                       timestamp)
+        self.waiting.prepend_request(preempted_req)
+
     def _make_cached_request_data(
         self,
         request: Request,
@@ -869,7 +969,7 @@ class Scheduler(SchedulerInterface):
         return len(self.running), len(self.waiting)
 
     def add_request(self, request: Request) -> None:
-        self.waiting.append(request)
+        self.waiting.add_request(request)
         self.requests[request.request_id] = request
         if self.log_stats:
             request.record_event(EngineCoreEventType.QUEUED)
@@ -899,7 +999,7 @@ class Scheduler(SchedulerInterface):
             if request.status == RequestStatus.RUNNING:
                 self.running.remove(request)
             else:
-                self.waiting.remove(request)
+                self.waiting.remove_request(request)
             request.status = finished_status
             self._free_request(request)
 
@@ -944,6 +1044,8 @@ class Scheduler(SchedulerInterface):
             return None
         prefix_cache_stats = self.kv_cache_manager.make_prefix_cache_stats()
         assert prefix_cache_stats is not None
+        if self.connector is not None:
+            self.connector.update_prefix_cache_stats(prefix_cache_stats)
         return SchedulerStats(
             num_running_reqs=len(self.running),
             num_waiting_reqs=len(self.waiting),
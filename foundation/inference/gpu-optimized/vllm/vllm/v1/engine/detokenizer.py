@@ -1,6 +1,8 @@
 # SPDX-License-Identifier: Apache-2.0
 # SPDX-FileCopyrightText: Copyright contributors to the vLLM project
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Sequence
 from typing import Optional
 
 import tokenizers
@@ -9,6 +11,7 @@ from tokenizers import Tokenizer
 from tokenizers.decoders import DecodeStream
 from transformers import PreTrainedTokenizerFast
 
+import vllm.envs as envs
 from vllm.engine.output_processor.stop_checker import StopChecker
 from vllm.logger import init_logger
 from vllm.transformers_utils.detokenizer_utils import (
@@ -56,6 +59,11 @@ class IncrementalDetokenizer:
 
         if USE_FAST_DETOKENIZER and isinstance(tokenizer,
                                                PreTrainedTokenizerFast):
+            if (envs.VLLM_BATCHED_DETOKENIZATION
+                    and BatchedIncrementalDetokenizer.supports(
+                        tokenizer, request)):
+                # Decoded together with the other requests of the step.
+                return BatchedIncrementalDetokenizer(tokenizer, request)
             # Fast tokenizer => use tokenizers library DecodeStream.
             return FastIncrementalDetokenizer(tokenizer, request)
 
@@ -97,13 +105,8 @@ class BaseIncrementalDetokenizer(IncrementalDetokenizer, ABC):
             # Skip detokenization if no new token ids.
             return None
 
-        if stop_terminated and not self.include_stop_str_in_output:
-            # If stop-terminated, exclude last token from detokenization
-            # based on include_stop_str_in_output parameter.
-            skipped_stop_token_id = new_token_ids[-1]
-            new_token_ids = new_token_ids[:-1]
-        else:
-            skipped_stop_token_id = None
+        new_token_ids, skipped_stop_token_id = self._split_stop_token(
+            new_token_ids, stop_terminated)
 
         # 1) Detokenize the new token ids incrementally.
         # TODO(woosuk): This method becomes very inefficient when the number of
@@ -113,6 +116,22 @@ class BaseIncrementalDetokenizer(IncrementalDetokenizer, ABC):
             self.token_ids.append(new_token_id)
             self.output_text += self.decode_next(new_token_id)
 
+        # 2) Evaluate stop strings.
+        return self._check_stop(offset_before, skipped_stop_token_id,
+                                stop_terminated)
+
+    def _split_stop_token(
+            self, new_token_ids: list[int],
+            stop_terminated: bool) -> tuple[list[int], Optional[int]]:
+        if stop_terminated and not self.include_stop_str_in_output:
+            # If stop-terminated, exclude last token from detokenization
+            # based on include_stop_str_in_output parameter.
+            return new_token_ids[:-1], new_token_ids[-1]
+        return new_token_ids, None
+
+    def _check_stop(self, offset_before: int,
+                    skipped_stop_token_id: Optional[int],
+                    stop_terminated: bool) -> Optional[str]:
         if stop_terminated:
             if skipped_stop_token_id is not None:
                 # Cleanup after skipping detokenization.
@@ -120,7 +139,6 @@ class BaseIncrementalDetokenizer(IncrementalDetokenizer, ABC):
             # Stop token triggered; skip stop string check.
             return None
 
-        # 2) Evaluate stop strings.
         stop_string = None
         if self.stop:
             stop = StopChecker.check_stop_strings(
@@ -172,18 +190,9 @@ class FastIncrementalDetokenizer(BaseIncrementalDetokenizer):
 
         self.tokenizer: Tokenizer = tokenizer._tokenizer
 
-        # Find a safe place to start.
-        prompt_suffix = request.prompt_token_ids
-        prompt_len = len(prompt_suffix)
-        if prompt_len > 4:
-            for i in range(4, min(prompt_len + 1, 24)):
-                suffix = request.prompt_token_ids[-i:]
-                if '�' not in self.tokenizer.decode(suffix):
-                    prompt_suffix = suffix
-                    break
-
         # Prime the stream.
-        for tid in prompt_suffix:
+        for tid in _get_prompt_suffix(self.tokenizer,
+                                      request.prompt_token_ids):
             self._protected_step(tid)
 
         self.spaces_between_special_tokens = (
@@ -239,6 +248,131 @@ class FastIncrementalDetokenizer(BaseIncrementalDetokenizer):
         return token
 
 
+class BatchedIncrementalDetokenizer(BaseIncrementalDetokenizer):
+    """Detokenizes the new tokens of all the requests of a step with one
+    `Tokenizer.decode_batch` call, see `update_batch`.
+
+    Like `DecodeStream`, it decodes a window of tokens which starts at the
+    last tokens already turned into text (the prefix), and emits the text
+    after the prefix once it does not end with an incomplete character.
+    """
+
+    def __init__(self, tokenizer: PreTrainedTokenizerFast,
+                 request: EngineCoreRequest):
+        super().__init__(request)
+
+        self.tokenizer: Tokenizer = tokenizer._tokenizer
+        self.skip_special_tokens = request.sampling_params.skip_special_tokens
+
+        # The tokens still needed to decode the next text: the window
+        # starts with the prefix, tokens [prefix_offset, read_offset), and
+        # ends with the tokens not turned into text yet.
+        self.window = _get_prompt_suffix(self.tokenizer,
+                                         request.prompt_token_ids)
+        self.prefix_offset = 0
+        self.read_offset = len(self.window)
+
+    @staticmethod
+    def supports(tokenizer: PreTrainedTokenizerFast,
+                 request: EngineCoreRequest) -> bool:
+        params = request.sampling_params
+        # Removing the spaces between added tokens needs to look at every
+        # token, leave it to FastIncrementalDetokenizer.
+        return (params.skip_special_tokens
+                or params.spaces_between_special_tokens
+                or not tokenizer._tokenizer.get_added_tokens_decoder())
+
+    def update(self, new_token_ids: list[int],
+               stop_terminated: bool) -> Optional[str]:
+        return update_batch([self], [new_token_ids], [stop_terminated])[0]
+
+    def decode_next(self, next_token_id: int) -> str:
+        # Only used when a single request is decoded, update_batch decodes
+        # the windows of all the requests at once.
+        self.window.append(next_token_id)
+        prefix_text, text = self.tokenizer.decode_batch(
+            self._get_sequences(),
+            skip_special_tokens=self.skip_special_tokens)
+        return self._apply(prefix_text, text)
+
+    def _get_sequences(self) -> list[list[int]]:
+        """The prefix, and the prefix followed by the tokens to decode."""
+        return [
+            self.window[self.prefix_offset:self.read_offset],
+            self.window[self.prefix_offset:],
+        ]
+
+    def _apply(self, prefix_text: str, text: str) -> str:
+        if len(text) <= len(prefix_text) or text.endswith("�"):
+            # Wait for the next tokens to complete the character.
+            return ""
+        # Drop the prefix, only the tokens after it are needed from now on.
+        del self.window[:self.read_offset]
+        self.prefix_offset = 0
+        self.read_offset = len(self.window)
+        return text[len(prefix_text):]
+
+
+def update_batch(detokenizers: Sequence[IncrementalDetokenizer],
+                 new_token_ids: Sequence[list[int]],
+                 stop_terminated: Sequence[bool]) -> list[Optional[str]]:
+    """Equivalent to calling `update` on each detokenizer, but decodes the
+    tokens of all the `BatchedIncrementalDetokenizer`s with one
+    `decode_batch` call per tokenizer, which runs in Rust without the GIL.
+
+    Return the matched stop string of each detokenizer, or None.
+    """
+    stop_strings: list[Optional[str]] = [None] * len(detokenizers)
+    # (tokenizer, skip_special_tokens) -> indices of the detokenizers.
+    groups: dict[tuple[int, bool], list[int]] = defaultdict(list)
+    skipped: dict[int, Optional[int]] = {}
+    for i, detokenizer in enumerate(detokenizers):
+        if not new_token_ids[i]:
+            continue
+        if not isinstance(detokenizer, BatchedIncrementalDetokenizer):
+            stop_strings[i] = detokenizer.update(new_token_ids[i],
+                                                 stop_terminated[i])
+            continue
+        token_ids, skipped[i] = detokenizer._split_stop_token(
+            new_token_ids[i], stop_terminated[i])
+        detokenizer.token_ids.extend(token_ids)
+        detokenizer.window.extend(token_ids)
+        groups[(id(detokenizer.tokenizer),
+                detokenizer.skip_special_tokens)].append(i)
+
+    for (_, skip_special_tokens), indices in groups.items():
+        sequences: list[list[int]] = []
+        for i in indices:
+            detokenizer = detokenizers[i]
+            assert isinstance(detokenizer, BatchedIncrementalDetokenizer)
+            sequences.extend(detokenizer._get_sequences())
+        tokenizer = detokenizers[indices[0]].tokenizer  # type: ignore
+        texts = tokenizer.decode_batch(sequences,
+                                       skip_special_tokens=skip_special_tokens)
+        for j, i in enumerate(indices):
+            detokenizer = detokenizers[i]
+            assert isinstance(detokenizer, BatchedIncrementalDetokenizer)
+            offset_before = len(detokenizer.output_text)
+            detokenizer.output_text += detokenizer._apply(
+                texts[2 * j], texts[2 * j + 1])
+            stop_strings[i] = detokenizer._check_stop(offset_before,
+                                                      skipped[i],
+                                                      stop_terminated[i])
+    return stop_strings
+
+
+def _get_prompt_suffix(tokenizer: Tokenizer,
+                       prompt_token_ids: list[int]) -> list[int]:
+    """Find a safe place to start decoding the prompt from."""
+    prompt_len = len(prompt_token_ids)
+    if prompt_len > 4:
+        for i in range(4, min(prompt_len + 1, 24)):
+            suffix = prompt_token_ids[-i:]
+            if '�' not in tokenizer.decode(suffix):
+                return list(suffix)
+    return list(prompt_token_ids)
+
+
 class SlowIncrementalDetokenizer(BaseIncrementalDetokenizer):
 
     def __init__(self, tokenizer: AnyTokenizer, request: EngineCoreRequest):
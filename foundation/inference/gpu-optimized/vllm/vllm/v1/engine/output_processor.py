@@ -6,12 +6,13 @@ from collections.abc import Iterable
 from dataclasses import dataclass
 from typing import Any, Optional, Union
 
+import vllm.envs as envs
 from vllm.outputs import CompletionOutput, RequestOutput
 from vllm.sampling_params import RequestOutputKind
 from vllm.transformers_utils.tokenizer import AnyTokenizer
 from vllm.transformers_utils.tokenizer_group import TokenizerGroup
 from vllm.v1.engine import EngineCoreOutput, EngineCoreRequest, FinishReason
-from vllm.v1.engine.detokenizer import IncrementalDetokenizer
+from vllm.v1.engine.detokenizer import IncrementalDetokenizer, update_batch
 from vllm.v1.engine.logprobs import LogprobsProcessor
 from vllm.v1.engine.parallel_sampling import ParentRequest
 from vllm.v1.metrics.stats import (IterationStats, LoRARequestStates,
@@ -242,6 +243,7 @@ class OutputProcessor:
         self.request_states: dict[str, RequestState] = {}
         self.parent_requests: dict[str, ParentRequest] = {}
         self.lora_states = LoRARequestStates()
+        self.batched_detokenization = envs.VLLM_BATCHED_DETOKENIZATION
 
     def get_num_unfinished_requests(self):
         return len(self.request_states)
@@ -323,9 +325,14 @@ class OutputProcessor:
         only function that should loop over EngineCoreOutputs.
 
         If you need to touch every element of the batch, do it from
-        within the loop below.
+        within the loop below. The only exception is the batched
+        detokenization, which needs the new tokens of the whole batch.
         """
 
+        stop_strings: Optional[dict[str, Optional[str]]] = None
+        if self.batched_detokenization:
+            stop_strings = self._detokenize_batch(engine_core_outputs)
+
         request_outputs: list[RequestOutput] = []
         reqs_to_abort: list[str] = []
         for engine_core_output in engine_core_outputs:
@@ -348,8 +355,11 @@ class OutputProcessor:
             req_state.is_prefilling = False
 
             # 2) Detokenize the token ids into text and perform stop checks.
-            stop_string = req_state.detokenizer.update(
-                new_token_ids, finish_reason == FinishReason.STOP)
+            if stop_strings is not None:
+                stop_string = stop_strings.get(req_id)
+            else:
+                stop_string = req_state.detokenizer.update(
+                    new_token_ids, finish_reason == FinishReason.STOP)
             if stop_string:
                 finish_reason = FinishReason.STOP
                 stop_reason = stop_string
@@ -391,6 +401,28 @@ class OutputProcessor:
             reqs_to_abort=reqs_to_abort,
         )
 
+    def _detokenize_batch(
+        self, engine_core_outputs: list[EngineCoreOutput]
+    ) -> dict[str, Optional[str]]:
+        """Detokenize the new tokens of all the requests at once, return
+        the matched stop string of each request."""
+        req_ids: list[str] = []
+        detokenizers: list[IncrementalDetokenizer] = []
+        new_token_ids: list[list[int]] = []
+        stop_terminated: list[bool] = []
+        for engine_core_output in engine_core_outputs:
+            req_state = self.request_states.get(engine_core_output.request_id)
+            if req_state is None:
+                continue
+            req_ids.append(engine_core_output.request_id)
+            detokenizers.append(req_state.detokenizer)
+            new_token_ids.append(engine_core_output.new_token_ids)
+            stop_terminated.append(
+                engine_core_output.finish_reason == FinishReason.STOP)
+        return dict(
+            zip(req_ids,
+                update_batch(detokenizers, new_token_ids, stop_terminated)))
+
     def _update_stats_from_output(self, req_state: RequestState,
                                   engine_core_output: EngineCoreOutput,
                                   engine_core_timestamp: Optional[float],
@@ -130,6 +130,13 @@ class LoggingStatLogger(StatLoggerBase):
             scheduler_stats.kv_cache_usage * 100,
             self.prefix_caching_metrics.hit_rate * 100,
         )
+        tier_hit_rates = self.prefix_caching_metrics.tier_hit_rates
+        if tier_hit_rates:
+            log_fn(
+                "Engine %03d: Lower tier prefix cache hit rate: %s",
+                self.engine_index,
+                ", ".join(f"{tier}: {hit_rate * 100:.1f}%"
+                          for tier, hit_rate in tier_hit_rates.items()))
         self.spec_decoding_logging.log(log_fn=log_fn)
 
     def log_engine_initialized(self):
@@ -230,6 +237,22 @@ class PrometheusStatLogger(StatLoggerBase):
                 "Prefix cache hits, in terms of number of cached tokens."),
             labelnames=labelnames).labels(*labelvalues)
 
+        # Lower cache tiers of a KV connector, labelled lazily by tier.
+        self.labelvalues = labelvalues
+        self.counter_tier_prefix_cache_queries = self._counter_cls(
+            name="vllm:tier_prefix_cache_queries",
+            documentation=(
+                "Lower tier prefix cache queries, in terms of number of "
+                "tokens missed by the tiers above."),
+            labelnames=labelnames + ["tier"])
+
+        self.counter_tier_prefix_cache_hits = self._counter_cls(
+            name="vllm:tier_prefix_cache_hits",
+            documentation=(
+                "Lower tier prefix cache hits, in terms of number of cached "
+                "tokens."),
+            labelnames=labelnames + ["tier"])
+
         #
         # Counters
         #
@@ -440,6 +463,14 @@ class PrometheusStatLogger(StatLoggerBase):
             self.counter_prefix_cache_hits.inc(
                 scheduler_stats.prefix_cache_stats.hits)
 
+            prefix_cache_stats = scheduler_stats.prefix_cache_stats
+            for tier, queries in prefix_cache_stats.tier_queries.items():
+                labelvalues = self.labelvalues + [tier]
+                self.counter_tier_prefix_cache_queries.labels(
+                    *labelvalues).inc(queries)
+                self.counter_tier_prefix_cache_hits.labels(*labelvalues).inc(
+                    prefix_cache_stats.tier_hits.get(tier, 0))
+
             if scheduler_stats.spec_decoding_stats is not None:
                 self.spec_decoding_prom.observe(
                     scheduler_stats.spec_decoding_stats)
@@ -24,6 +24,11 @@ class PrefixCacheStats:
     queries: int = 0
     # The number of hits in these requests.
     hits: int = 0
+    # Queries and hits of the lower cache tiers (e.g. "host", "disk") of a KV
+    # connector, by tier. The queries of a tier are the tokens missed by the
+    # tiers above it.
+    tier_queries: dict[str, int] = field(default_factory=dict)
+    tier_hits: dict[str, int] = field(default_factory=dict)
 
 
 @dataclass
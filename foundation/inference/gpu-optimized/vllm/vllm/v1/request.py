@@ -68,6 +68,11 @@ class Request:
                      sampling_params.extra_args.get("kv_transfer_params"))
         self.kv_transfer_params: Optional[dict[str, Any]] = kv_params
 
+        # Fair-share scheduling: the tenant, e.g. the API key, of the request.
+        self.tenant: Optional[str] = (None if sampling_params.extra_args
+                                      is None else
+                                      sampling_params.extra_args.get("tenant"))
+
         # Sanity check
         assert len(self.mm_inputs) == len(self.mm_positions)
         if self.mm_hashes:
@@ -2,8 +2,11 @@
 # SPDX-FileCopyrightText: Copyright contributors to the vLLM project
 from __future__ import annotations
 
+import glob
+import json
 import multiprocessing
-from concurrent.futures import ThreadPoolExecutor
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import TYPE_CHECKING, Optional
 
 from vllm.config import VllmConfig
@@ -13,7 +16,8 @@ from vllm.transformers_utils.tokenizer_group import init_tokenizer_from_configs
 from vllm.utils import LazyLoader
 from vllm.v1.structured_output.backend_guidance import GuidanceBackend
 from vllm.v1.structured_output.backend_types import (StructuredOutputBackend,
-                                                     StructuredOutputGrammar)
+                                                     StructuredOutputGrammar,
+                                                     StructuredOutputOptions)
 from vllm.v1.structured_output.backend_xgrammar import XgrammarBackend
 
 if TYPE_CHECKING:
@@ -57,6 +61,46 @@ class StructuredOutputManager:
                 reasoning_backend)
             self.reasoner = reasoner_cls(tokenizer=self.tokenizer)
 
+        if vllm_config.decoding_config.warmup_json_schemas:
+            self._warmup_json_schemas(
+                vllm_config.decoding_config.warmup_json_schemas)
+
+    def _create_backend(self, backend: str) -> StructuredOutputBackend:
+        vocab_size = self.vllm_config.model_config.get_vocab_size()
+        if backend == "xgrammar":
+            return XgrammarBackend(
+                self.vllm_config,
+                tokenizer=self.tokenizer,
+                vocab_size=vocab_size,
+            )
+        if backend == "guidance":
+            return GuidanceBackend(
+                self.vllm_config,
+                tokenizer=self.tokenizer,
+                vocab_size=vocab_size,
+            )
+        raise ValueError(f"Unsupported structured output backend: {backend}")
+
+    def _warmup_json_schemas(self, paths: list[str]) -> None:
+        """Compile the JSON schemas in the background, so that they are
+        already in the grammar cache when the first requests arrive."""
+        backend = self.vllm_config.decoding_config.backend
+        if backend != "xgrammar":
+            logger.warning(
+                "Warming up JSON schemas is only supported with the xgrammar "
+                "structured output backend, not %r. Skipping it.", backend)
+            return
+
+        schemas = load_json_schemas(paths)
+        self.backend = self._create_backend(backend)
+        logger.info("Compiling %d JSON schemas in the background.",
+                    len(schemas))
+        for path, schema in schemas:
+            future = self.executor.submit(self.backend.compile_grammar,
+                                          StructuredOutputOptions.JSON, schema)
+            future.add_done_callback(
+                lambda f, path=path: _log_warmup_error(f, path))
+
     def grammar_init(self, request: Request) -> None:
         if request.structured_output_request is None:
             return
@@ -69,23 +113,8 @@ class StructuredOutputManager:
         # NOTE: We only support a single backend. We do NOT support different
         # backends on a per-request basis in V1 (for now, anyway...).
         if self.backend is None:
-            backend = request.sampling_params.guided_decoding.backend
-            vocab_size = self.vllm_config.model_config.get_vocab_size()
-            if backend == "xgrammar":
-                self.backend = XgrammarBackend(
-                    self.vllm_config,
-                    tokenizer=self.tokenizer,
-                    vocab_size=vocab_size,
-                )
-            elif backend == "guidance":
-                self.backend = GuidanceBackend(
-                    self.vllm_config,
-                    tokenizer=self.tokenizer,
-                    vocab_size=vocab_size,
-                )
-            else:
-                raise ValueError(
-                    f"Unsupported structured output backend: {backend}")
+            self.backend = self._create_backend(
+                request.sampling_params.guided_decoding.backend)
 
         grammar = self.executor.submit(self._async_create_grammar, request)
         request.structured_output_request.grammar = grammar  # type: ignore[assignment]
@@ -220,3 +249,32 @@ class StructuredOutputManager:
     def clear_backend(self) -> None:
         if self.backend is not None:
             self.backend.destroy()
+
+
+def load_json_schemas(paths: list[str]) -> list[tuple[str, str]]:
+    """Read the JSON schemas from files and directories of `*.json` files.
+
+    The schemas are serialized like the `guided_json` of the requests, so that
+    they have the same cache keys.
+    """
+    files: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.json"))))
+        else:
+            files.append(path)
+
+    schemas: list[tuple[str, str]] = []
+    for file in files:
+        try:
+            with open(file) as f:
+                schemas.append((file, json.dumps(json.load(f))))
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(
+                f"Failed to read the JSON schema {file}: {e}") from e
+    return schemas
+
+
+def _log_warmup_error(future: Future, path: str) -> None:
+    if (e := future.exception()) is not None:
+        logger.warning("Failed to compile the JSON schema %s: %s", path, e)
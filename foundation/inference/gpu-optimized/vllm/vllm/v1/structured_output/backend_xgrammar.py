@@ -17,6 +17,7 @@ from vllm.utils import LazyLoader
 from vllm.v1.structured_output.backend_types import (StructuredOutputBackend,
                                                      StructuredOutputGrammar,
                                                      StructuredOutputOptions)
+from vllm.v1.structured_output.grammar_cache import CompiledGrammarCache
 from vllm.v1.structured_output.utils import (choice_as_grammar,
                                              convert_lark_to_ebnf,
                                              grammar_is_likely_lark)
@@ -80,6 +81,11 @@ class XgrammarBackend(StructuredOutputBackend):
             cache_enabled=True,
             cache_limit_bytes=vllm.envs.VLLM_XGRAMMAR_CACHE_MB * 1024 * 1024,
         )
+        self.grammar_cache = CompiledGrammarCache(
+            tokenizer_info,
+            cache_dir=vllm.envs.VLLM_XGRAMMAR_CACHE_PATH,
+            max_memory_bytes=vllm.envs.VLLM_XGRAMMAR_CACHE_MB * 1024 * 1024,
+        )
 
         self.num_speculative_tokens = 0
         if self.vllm_config.speculative_config is not None:
@@ -88,6 +94,26 @@ class XgrammarBackend(StructuredOutputBackend):
 
     def compile_grammar(self, request_type: StructuredOutputOptions,
                         grammar_spec: str) -> StructuredOutputGrammar:
+        key = self.grammar_cache.get_key(
+            request_type.name,
+            grammar_spec,
+            any_whitespace=not self.disable_any_whitespace)
+        ctx = self.grammar_cache.get(key)
+        if ctx is None:
+            ctx = self._compile(request_type, grammar_spec)
+            self.grammar_cache.put(key, ctx)
+
+        return XgrammarGrammar(
+            matcher=xgr.GrammarMatcher(
+                ctx,
+                max_rollback_tokens=self.num_speculative_tokens,
+            ),
+            vocab_size=self.vocab_size,
+            ctx=ctx,
+        )
+
+    def _compile(self, request_type: StructuredOutputOptions,
+                 grammar_spec: str) -> xgr.CompiledGrammar:
         if request_type == StructuredOutputOptions.JSON:
             ctx = self.compiler.compile_json_schema(
                 grammar_spec, any_whitespace=not self.disable_any_whitespace)
@@ -115,15 +141,7 @@ class XgrammarBackend(StructuredOutputBackend):
             )
             raise ValueError(
                 f"grammar is not of valid supported types. ({request_type!s})")
-
-        return XgrammarGrammar(
-            matcher=xgr.GrammarMatcher(
-                ctx,
-                max_rollback_tokens=self.num_speculative_tokens,
-            ),
-            vocab_size=self.vocab_size,
-            ctx=ctx,
-        )
+        return ctx
 
     def allocate_token_bitmask(self, max_num_seqs: int):
         return xgr.allocate_token_bitmask(max_num_seqs, self.vocab_size)
@@ -0,0 +1,152 @@
+# SPDX-License-Identifier: Apache-2.0
+# SPDX-FileCopyrightText: Copyright contributors to the vLLM project
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from vllm.logger import init_logger
+from vllm.utils import LazyLoader
+
+if TYPE_CHECKING:
+    import xgrammar as xgr
+else:
+    xgr = LazyLoader("xgr", globals(), "xgrammar")
+
+logger = init_logger(__name__)
+
+# Memory accounted for each compiled grammar when xgrammar cannot report its
+# size, which bounds the memory tier to `max_memory_bytes / 512 KiB` grammars
+# (roughly 1000 JSON schemas for the default 512 MB).
+DEFAULT_GRAMMAR_SIZE_BYTES = 512 * 1024
+
+
+def get_tokenizer_fingerprint(tokenizer_info: xgr.TokenizerInfo) -> str:
+    """Hash everything a compiled grammar depends on besides the grammar
+    itself: the xgrammar version and the vocabulary of the tokenizer."""
+    hasher = hashlib.sha256()
+    hasher.update(xgr.__version__.encode())
+    hasher.update(str(tokenizer_info.vocab_type).encode())
+    hasher.update(str(tokenizer_info.vocab_size).encode())
+    hasher.update(str(sorted(tokenizer_info.stop_token_ids)).encode())
+    hasher.update(str(tokenizer_info.add_prefix_space).encode())
+    for token in tokenizer_info.decoded_vocab:
+        hasher.update(len(token).to_bytes(4, "little"))
+        hasher.update(token)
+    return hasher.hexdigest()
+
+
+class CompiledGrammarCache:
+    """Content-addressed cache of compiled xgrammar grammars.
+
+    Grammars are kept on disk under `cache_dir`, in a subdirectory per
+    tokenizer fingerprint, and read lazily the first time they are
+    requested. Files are written atomically, so the directory can be shared
+    by several engine processes. The most recently used grammars are also
+    kept in memory, up to `max_memory_bytes`, counting
+    `DEFAULT_GRAMMAR_SIZE_BYTES` for each grammar if xgrammar does not report
+    their size.
+
+    The key is the exact grammar string, so two JSON schemas that only
+    differ in the order of their properties are different entries, as they
+    compile to different grammars.
+    """
+
+    def __init__(self, tokenizer_info: xgr.TokenizerInfo,
+                 cache_dir: str | None, max_memory_bytes: int):
+        self.tokenizer_info = tokenizer_info
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        # Grammars are compiled by a pool of threads.
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[xgr.CompiledGrammar,
+                                              int]] = OrderedDict()
+
+        self.cache_dir: str | None = None
+        if cache_dir and not hasattr(xgr.CompiledGrammar, "serialize_json"):
+            logger.warning(
+                "xgrammar %s cannot serialize compiled grammars, disabling "
+                "the on-disk grammar cache.", xgr.__version__)
+        elif cache_dir:
+            fingerprint = get_tokenizer_fingerprint(tokenizer_info)
+            self.cache_dir = os.path.join(cache_dir, fingerprint[:16])
+
+    @staticmethod
+    def get_key(kind: str, grammar_spec: str, any_whitespace: bool) -> str:
+        hasher = hashlib.sha256()
+        for part in (kind, str(any_whitespace), grammar_spec):
+            hasher.update(part.encode())
+            hasher.update(b"\0")
+        return hasher.hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        assert self.cache_dir is not None
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> xgr.CompiledGrammar | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+        if self.cache_dir is None:
+            return None
+
+        path = self._get_path(key)
+        try:
+            with open(path) as f:
+                serialized = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Failed to read the compiled grammar %s: %s", path,
+                           e)
+            return None
+
+        try:
+            ctx = xgr.CompiledGrammar.deserialize_json(serialized,
+                                                       self.tokenizer_info)
+        except Exception as e:
+            # Written by an incompatible version, it is overwritten after
+            # the grammar is compiled again.
+            logger.warning("Failed to load the compiled grammar %s: %s", path,
+                           e)
+            return None
+        self._add_to_memory(key, ctx)
+        return ctx
+
+    def put(self, key: str, ctx: xgr.CompiledGrammar) -> None:
+        self._add_to_memory(key, ctx)
+        if self.cache_dir is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(ctx.serialize_json())
+                os.replace(tmp_path, self._get_path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("Failed to write the compiled grammar to %s: %s",
+                           self.cache_dir, e)
+
+    def _add_to_memory(self, key: str, ctx: xgr.CompiledGrammar) -> None:
+        size = getattr(ctx, "memory_size_bytes", DEFAULT_GRAMMAR_SIZE_BYTES)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (ctx, size)
+            self.memory_bytes += size
+            while self.memory_bytes > self.max_memory_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.memory_bytes -= evicted_size
@@ -0,0 +1,401 @@
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import docker
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Label put on every container started by the pool, so that only those are
+# cleaned up, and not the other containers whose name starts with "vllm".
+POOL_LABEL = "spanda.model-pool"
+MODEL_LABEL = "spanda.model-pool.model"
+
+DEFAULT_POOL_CONFIG = {
+    "replicas": 1,
+    "warm_standby": 0,
+    "container_port": 8000,
+    # Probe the replicas at http://<container name>:<container_port>, which
+    # requires this process to run in a container on the platform network
+    # (see docker-compose-vllm-gateway.yml). Set to False when it runs on the
+    # Docker host, to probe the published ports on `health_host` instead.
+    "probe_internal_url": True,
+    # Host the replicas' published ports are reached on, by the clients
+    # outside the Docker networks.
+    "health_host": "localhost",
+    "health_interval_s": 5,
+    "health_timeout_s": 900,
+    "max_health_failures": 3,
+}
+
+STARTING = "starting"
+SERVING = "serving"
+STANDBY = "standby"
+
+
+@dataclass
+class Replica:
+    replica_id: str
+    container_name: str
+    container_id: str
+    host_port: int
+    device: Optional[str]
+    started_at: float
+    ready_at: Optional[float] = None
+    health_failures: int = 0
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_at is not None
+
+
+@dataclass
+class ModelPool:
+    model_name: str
+    hf_token: str
+    command: List[str]
+    replicas: int
+    warm_standby: int
+    devices: List[str] = field(default_factory=list)
+    members: List[Replica] = field(default_factory=list)
+    next_index: int = 0
+
+    @property
+    def size(self) -> int:
+        return self.replicas + self.warm_standby
+
+    def ready_members(self) -> List[Replica]:
+        return sorted((r for r in self.members if r.is_ready),
+                      key=lambda r: r.ready_at)
+
+    def roles(self) -> Dict[str, str]:
+        # The replicas that became ready first serve, so that a standby only
+        # starts serving when a serving replica goes away.
+        roles = {r.replica_id: STARTING for r in self.members}
+        for i, replica in enumerate(self.ready_members()):
+            roles[replica.replica_id] = SERVING if i < self.replicas else STANDBY
+        return roles
+
+    def serving(self) -> List[Replica]:
+        return self.ready_members()[:self.replicas]
+
+
+def probe_replica(base_url: str, model_name: str, timeout: float = 5.0) -> bool:
+    """A replica is ready once `/health` succeeds and `/v1/models` lists the
+    model, i.e. the weights are loaded and the API server is accepting
+    requests."""
+    try:
+        health = requests.get(f"{base_url}/health", timeout=timeout)
+        if health.status_code != 200:
+            return False
+        models = requests.get(f"{base_url}/v1/models", timeout=timeout)
+        if models.status_code != 200:
+            return False
+        return any(m.get("id") == model_name
+                   for m in models.json().get("data", []))
+    except (requests.RequestException, ValueError):
+        return False
+
+
+class ModelPoolManager:
+    """Keeps `replicas` ready vLLM containers per model, plus `warm_standby`
+    ready containers that take over when a serving replica fails.
+
+    Host ports are allocated by Docker. A replica only receives traffic once
+    it passes the health check, and a replica that fails it
+    `max_health_failures` times in a row, exits, or does not become ready
+    within `health_timeout_s` is removed and replaced.
+    """
+
+    def __init__(self,
+                 client,
+                 docker_config: dict,
+                 pool_config: Optional[dict] = None,
+                 probe: Callable[[str, str], bool] = probe_replica,
+                 clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.docker_config = docker_config
+        self.pool_config = {**DEFAULT_POOL_CONFIG, **(pool_config or {})}
+        self.probe = probe
+        self.clock = clock
+        self.pools: Dict[str, ModelPool] = {}
+        self._round_robin: Dict[str, itertools.count] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Pool lifecycle
+
+    def start_pool(self,
+                   model_name: str,
+                   hf_token: str,
+                   command: List[str],
+                   replicas: Optional[int] = None,
+                   warm_standby: Optional[int] = None,
+                   devices: Optional[List[str]] = None) -> ModelPool:
+        replicas = self.pool_config["replicas"] if replicas is None else replicas
+        warm_standby = (self.pool_config["warm_standby"]
+                        if warm_standby is None else warm_standby)
+        if replicas < 1 or warm_standby < 0:
+            raise ValueError(
+                "replicas must be at least 1 and warm_standby at least 0")
+        devices = devices or []
+        if devices and len(devices) != replicas + warm_standby:
+            raise ValueError(
+                f"Got {len(devices)} devices for {replicas + warm_standby} "
+                "containers, give one device per replica and standby")
+
+        with self._lock:
+            if model_name in self.pools:
+                raise ValueError(f"A pool for {model_name} is already running")
+            pool = ModelPool(model_name=model_name,
+                             hf_token=hf_token,
+                             command=command,
+                             replicas=replicas,
+                             warm_standby=warm_standby,
+                             devices=devices)
+            self.pools[model_name] = pool
+            self._round_robin[model_name] = itertools.count()
+        try:
+            self._scale(pool)
+        except Exception:
+            self.stop_pool(model_name)
+            raise
+        return pool
+
+    def stop_pool(self, model_name: str) -> List[str]:
+        with self._lock:
+            pool = self.pools.pop(model_name, None)
+            self._round_robin.pop(model_name, None)
+        if pool is None:
+            raise KeyError(model_name)
+        for replica in pool.members:
+            self._remove_container(replica)
+        return [replica.container_name for replica in pool.members]
+
+    def remove_orphans(self) -> None:
+        """Remove the pool containers left over by a previous run."""
+        for container in self.client.containers.list(
+                all=True, filters={"label": POOL_LABEL}):
+            try:
+                container.remove(force=True)
+                logger.info(f"Removed orphaned container: {container.name}")
+            except Exception as e:
+                logger.error(
+                    f"Error removing container {container.name}: {str(e)}")
+
+    def stop_all(self) -> None:
+        for model_name in list(self.pools):
+            self.stop_pool(model_name)
+
+    # Health checking
+
+    def reconcile(self) -> None:
+        """Probe every replica, replace the failed ones and start containers
+        until each pool has its replicas and warm standbys."""
+        with self._lock:
+            pools = list(self.pools.values())
+        for pool in pools:
+            for replica in list(pool.members):
+                self._check(pool, replica)
+            try:
+                self._scale(pool)
+            except Exception as e:
+                logger.error(f"Error starting a replica of "
+                             f"{pool.model_name}: {str(e)}")
+
+    def _check(self, pool: ModelPool, replica: Replica) -> None:
+        reason = None
+        try:
+            container = self.client.containers.get(replica.container_id)
+            status = container.status
+        except docker.errors.NotFound:
+            status = "removed"
+        if status in ("exited", "dead", "removed"):
+            reason = f"container is {status}"
+        elif self.probe(self._probe_url(replica), pool.model_name):
+            if not replica.is_ready:
+                logger.info(
+                    f"Replica {replica.container_name} of {pool.model_name} "
+                    f"is ready after "
+                    f"{self.clock() - replica.started_at:.0f}s")
+                replica.ready_at = self.clock()
+            replica.health_failures = 0
+        elif replica.is_ready:
+            replica.health_failures += 1
+            if (replica.health_failures >=
+                    self.pool_config["max_health_failures"]):
+                reason = (f"failed {replica.health_failures} health checks "
+                          "in a row")
+        elif (self.clock() - replica.started_at >
+              self.pool_config["health_timeout_s"]):
+            reason = "did not become ready in time"
+
+        if reason is not None:
+            logger.warning(f"Replacing replica {replica.container_name} of "
+                           f"{pool.model_name}: {reason}")
+            with self._lock:
+                if replica in pool.members:
+                    pool.members.remove(replica)
+            self._remove_container(replica)
+
+    def _scale(self, pool: ModelPool) -> None:
+        while True:
+            with self._lock:
+                if (self.pools.get(pool.model_name) is not pool
+                        or len(pool.members) >= pool.size):
+                    return
+                used = {r.device for r in pool.members}
+                device = next((d for d in pool.devices if d not in used), None)
+                index = pool.next_index
+                pool.next_index += 1
+            replica = self._launch(pool, index, device)
+            with self._lock:
+                stopped = self.pools.get(pool.model_name) is not pool
+                if not stopped:
+                    pool.members.append(replica)
+            if stopped:
+                self._remove_container(replica)
+                return
+
+    def run_in_background(self) -> None:
+        interval = self.pool_config["health_interval_s"]
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    logger.error(f"Error checking model pools: {str(e)}")
+
+        self._thread = threading.Thread(target=loop,
+                                        name="model-pool-health",
+                                        daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    # Routing
+
+    def route(self, model_name: str) -> dict:
+        """Pick the next serving replica of the model, round-robin."""
+        with self._lock:
+            pool = self.pools.get(model_name)
+            if pool is None:
+                raise KeyError(model_name)
+            serving = pool.serving()
+            if not serving:
+                raise LookupError(f"No ready replica for {model_name}")
+            replica = serving[next(self._round_robin[model_name]) %
+                              len(serving)]
+            return self.describe(pool, replica)
+
+    def registry(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            return {
+                name: [self.describe(pool, r) for r in pool.serving()]
+                for name, pool in self.pools.items()
+            }
+
+    def status(self, model_name: str) -> dict:
+        with self._lock:
+            pool = self.pools.get(model_name)
+            if pool is None:
+                raise KeyError(model_name)
+            return {
+                "model_name": model_name,
+                "replicas": pool.replicas,
+                "warm_standby": pool.warm_standby,
+                "members": [self.describe(pool, r) for r in pool.members],
+            }
+
+    def describe(self, pool: ModelPool, replica: Replica) -> dict:
+        return {
+            "replica_id": replica.replica_id,
+            "container_name": replica.container_name,
+            "container_id": replica.container_id,
+            "role": pool.roles()[replica.replica_id],
+            "url": self._base_url(replica),
+            "internal_url": self._internal_url(replica),
+            "device": replica.device,
+        }
+
+    # Docker
+
+    def _base_url(self, replica: Replica) -> str:
+        return f"http://{self.pool_config['health_host']}:{replica.host_port}"
+
+    def _internal_url(self, replica: Replica) -> str:
+        return (f"http://{replica.container_name}:"
+                f"{self.pool_config['container_port']}")
+
+    def _probe_url(self, replica: Replica) -> str:
+        if self.pool_config["probe_internal_url"]:
+            return self._internal_url(replica)
+        return self._base_url(replica)
+
+    def _launch(self, pool: ModelPool, index: int,
+                device: Optional[str]) -> Replica:
+        base_name = pool.model_name.split("/")[-1]
+        container_name = f"{base_name}-{index}-{uuid.uuid4().hex[:6]}"
+        container_port = f"{self.pool_config['container_port']}/tcp"
+        environment = {"HUGGING_FACE_HUB_TOKEN": pool.hf_token}
+        if device is not None:
+            environment["NVIDIA_VISIBLE_DEVICES"] = device
+
+        logger.info(f"Starting replica {container_name} of {pool.model_name}")
+        container = self.client.containers.run(
+            image=self.docker_config["image_name"],
+            name=container_name,
+            detach=True,
+            runtime=self.docker_config["gpu_runtime"],
+            environment=environment,
+            # None lets Docker pick a free host port.
+            ports={container_port: None},
+            volumes={
+                os.path.expanduser("~") + "/.cache/huggingface": {
+                    "bind": "/root/.cache/huggingface",
+                    "mode": "rw"
+                }
+            },
+            ipc_mode="host",
+            network=self.docker_config["app_network"],
+            labels={
+                POOL_LABEL: "true",
+                MODEL_LABEL: pool.model_name
+            },
+            command=["--model", pool.model_name] + pool.command)
+        try:
+            platform_network = self.docker_config["platform_network"]
+            self.client.networks.get(platform_network).connect(container)
+            container.reload()
+            ports = container.attrs["NetworkSettings"]["Ports"]
+            host_port = int(ports[container_port][0]["HostPort"])
+        except Exception:
+            container.remove(force=True)
+            raise
+        return Replica(replica_id=uuid.uuid4().hex,
+                       container_name=container_name,
+                       container_id=container.id,
+                       host_port=host_port,
+                       device=device,
+                       started_at=self.clock())
+
+    def _remove_container(self, replica: Replica) -> None:
+        try:
+            self.client.containers.get(replica.container_id).remove(force=True)
+            logger.info(f"Removed container {replica.container_name}")
+        except docker.errors.NotFound:
+            pass
+        except Exception as e:
+            logger.error(f"Error removing container "
+                         f"{replica.container_name}: {str(e)}")
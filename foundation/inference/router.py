@@ -0,0 +1,278 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import math
+import os
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+
+# Comma separated base URLs of the replicas, e.g. "http://vllm-0:8000,http://vllm-1:8000",
+# used for every model, or the /registry of the model pool manager (api.py).
+ROUTER_REPLICAS = os.getenv("ROUTER_REPLICAS", "")
+ROUTER_REGISTRY_URL = os.getenv("ROUTER_REGISTRY_URL", "")
+ROUTER_REGISTRY_INTERVAL_S = float(os.getenv("ROUTER_REGISTRY_INTERVAL_S", "10"))
+# Number of leading characters of the prompt hashed to pick a replica.
+ROUTER_PREFIX_CHARS = int(os.getenv("ROUTER_PREFIX_CHARS", "2048"))
+# A replica takes at most LOAD_FACTOR times its fair share of the requests in
+# flight before the requests hashed to it go to the least loaded replica.
+ROUTER_LOAD_FACTOR = float(os.getenv("ROUTER_LOAD_FACTOR", "1.25"))
+ROUTER_VIRTUAL_NODES = int(os.getenv("ROUTER_VIRTUAL_NODES", "100"))
+# How long a replica that refused a connection is skipped.
+ROUTER_EJECT_S = float(os.getenv("ROUTER_EJECT_S", "10"))
+
+SESSION_KEY_HEADER = "x-session-key"
+ANY_MODEL = "*"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+def get_routing_key(body: dict, prefix_chars: int) -> str:
+    """The leading characters of the prompt, so that the requests sharing a
+    prefix, e.g. the criteria of one thesis, hit the same prefix cache."""
+    if "messages" in body:
+        parts = []
+        for message in body["messages"]:
+            content = message.get("content")
+            if isinstance(content, list):
+                content = "".join(part.get("text", "") for part in content
+                                  if isinstance(part, dict))
+            parts.append(f"{message.get('role', '')}:{content or ''}\n")
+        prompt = "".join(parts)
+    else:
+        prompt = body.get("prompt", "")
+        if isinstance(prompt, list):
+            prompt = prompt[0] if prompt else ""
+        prompt = str(prompt)
+    return f"{body.get('model', '')}\n{prompt[:prefix_chars]}"
+
+
+class PrefixAffinityRouter:
+    """Consistent hashing of the routing keys onto the replicas, with bounded
+    load.
+
+    A key goes to the first replica after it on the hash ring, unless that
+    replica has more than `load_factor` times the average number of
+    requests in flight, in which case it goes to the replica with the fewest
+    requests in flight.
+    """
+
+    def __init__(self, load_factor: float = ROUTER_LOAD_FACTOR,
+                 virtual_nodes: int = ROUTER_VIRTUAL_NODES,
+                 eject_s: float = ROUTER_EJECT_S):
+        self.load_factor = load_factor
+        self.virtual_nodes = virtual_nodes
+        self.eject_s = eject_s
+        self.replicas: Dict[str, List[str]] = {}
+        self.outstanding: Dict[str, int] = {}
+        self.requests_total: Dict[str, int] = {}
+        self.fallbacks_total = 0
+        self.ejected_until: Dict[str, float] = {}
+        self._rings: Dict[str, tuple] = {}
+
+    def set_replicas(self, replicas: Dict[str, List[str]]) -> None:
+        """Set the replica URLs of each model, ANY_MODEL for all of them."""
+        self.replicas = {model: sorted(set(urls)) for model, urls in replicas.items() if urls}
+        self._rings = {}
+        for model, urls in self.replicas.items():
+            points = sorted((_hash(f"{url}#{i}"), url) for url in urls for i in range(self.virtual_nodes))
+            self._rings[model] = ([p for p, _ in points], [url for _, url in points])
+            for url in urls:
+                self.outstanding.setdefault(url, 0)
+                self.requests_total.setdefault(url, 0)
+
+    def pick(self, model: str, key: str) -> str:
+        ring_model = model if model in self._rings else ANY_MODEL
+        if ring_model not in self._rings:
+            raise LookupError(f"No replica for model {model}")
+        now = time.monotonic()
+        urls = [url for url in self.replicas[ring_model] if self.ejected_until.get(url, 0) <= now]
+        if not urls:
+            raise LookupError(f"No available replica for model {model}")
+
+        points, ring_urls = self._rings[ring_model]
+        start = bisect.bisect(points, _hash(key))
+        home = None
+        for i in range(len(ring_urls)):
+            url = ring_urls[(start + i) % len(ring_urls)]
+            if url in urls:
+                home = url
+                break
+
+        in_flight = sum(self.outstanding[url] for url in urls)
+        capacity = max(1, math.ceil(self.load_factor * (in_flight + 1) / len(urls)))
+        if self.outstanding[home] < capacity:
+            return home
+        self.fallbacks_total += 1
+        return min(urls, key=lambda url: (self.outstanding[url], url))
+
+    def acquire(self, url: str) -> None:
+        self.outstanding[url] += 1
+        self.requests_total[url] += 1
+
+    def release(self, url: str) -> None:
+        self.outstanding[url] -= 1
+
+    def eject(self, url: str) -> None:
+        self.ejected_until[url] = time.monotonic() + self.eject_s
+
+    def metrics(self) -> str:
+        lines = [
+            "# HELP router_replica_outstanding_requests Requests in flight on the replica.",
+            "# TYPE router_replica_outstanding_requests gauge",
+        ]
+        lines += [f'router_replica_outstanding_requests{{replica="{url}"}} {n}'
+                  for url, n in sorted(self.outstanding.items())]
+        lines += [
+            "# HELP router_replica_requests_total Requests routed to the replica.",
+            "# TYPE router_replica_requests_total counter",
+        ]
+        lines += [f'router_replica_requests_total{{replica="{url}"}} {n}'
+                  for url, n in sorted(self.requests_total.items())]
+        lines += [
+            "# HELP router_fallbacks_total Requests routed away from an overloaded replica.",
+            "# TYPE router_fallbacks_total counter",
+            f"router_fallbacks_total {self.fallbacks_total}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def parse_replicas(value: str) -> Dict[str, List[str]]:
+    urls = [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+    return {ANY_MODEL: urls} if urls else {}
+
+
+def create_app(router: Optional[PrefixAffinityRouter] = None,
+               transport: Optional[httpx.AsyncBaseTransport] = None) -> FastAPI:
+    app = FastAPI()
+    app.state.router = router or PrefixAffinityRouter()
+    if ROUTER_REPLICAS and not app.state.router.replicas:
+        app.state.router.set_replicas(parse_replicas(ROUTER_REPLICAS))
+
+    async def refresh_registry():
+        while True:
+            try:
+                response = await app.state.client.get(ROUTER_REGISTRY_URL)
+                response.raise_for_status()
+                app.state.router.set_replicas({
+                    model: [replica["internal_url"] for replica in replicas]
+                    for model, replicas in response.json()["models"].items()
+                })
+            except Exception as e:
+                logger.error(f"Error reading the replica registry: {str(e)}")
+            await asyncio.sleep(ROUTER_REGISTRY_INTERVAL_S)
+
+    @app.on_event("startup")
+    async def startup_event():
+        app.state.client = httpx.AsyncClient(timeout=None, transport=transport)
+        app.state.registry_task = None
+        if ROUTER_REGISTRY_URL:
+            app.state.registry_task = asyncio.create_task(refresh_registry())
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        if app.state.registry_task is not None:
+            app.state.registry_task.cancel()
+        await app.state.client.aclose()
+
+    @app.get("/metrics")
+    def metrics():
+        return PlainTextResponse(app.state.router.metrics())
+
+    @app.get("/replicas")
+    def replicas():
+        router = app.state.router
+        return {
+            "models": router.replicas,
+            "outstanding": router.outstanding,
+        }
+
+    @app.post("/v1/{path:path}")
+    async def proxy(path: str, request: Request):
+        router = app.state.router
+        raw = await request.body()
+        try:
+            body = await request.json()
+        except Exception:
+            raise HTTPException(status_code=400, detail="The request body is not JSON")
+        if not isinstance(body, dict):
+            raise HTTPException(status_code=400, detail="The request body is not a JSON object")
+
+        key = request.headers.get(SESSION_KEY_HEADER) or get_routing_key(body, ROUTER_PREFIX_CHARS)
+        try:
+            url = router.pick(body.get("model", ""), key)
+        except LookupError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+        router.acquire(url)
+        upstream_request = app.state.client.build_request(
+            "POST", f"{url}/v1/{path}", content=raw,
+            headers={"content-type": "application/json",
+                     **({"authorization": request.headers["authorization"]}
+                        if "authorization" in request.headers else {})})
+        try:
+            upstream = await app.state.client.send(upstream_request, stream=True)
+        except httpx.ConnectError as e:
+            router.release(url)
+            router.eject(url)
+            logger.error(f"Replica {url} is unreachable: {str(e)}")
+            raise HTTPException(status_code=502, detail=f"Replica {url} is unreachable")
+        except Exception:
+            router.release(url)
+            raise
+
+        if not body.get("stream"):
+            try:
+                content = await upstream.aread()
+            finally:
+                await upstream.aclose()
+                router.release(url)
+            return Response(content=content, status_code=upstream.status_code,
+                            media_type=upstream.headers.get("content-type"))
+
+        released = False
+
+        async def close():
+            nonlocal released
+            if not released:
+                released = True
+                await upstream.aclose()
+                router.release(url)
+
+        async def stream():
+            try:
+                async for chunk in upstream.aiter_bytes():
+                    yield chunk
+            finally:
+                await close()
+
+        # The generator's finally does not run if the client disconnects
+        # before the body is iterated, the background task always does.
+        return StreamingResponse(stream(), status_code=upstream.status_code,
+                                 media_type=upstream.headers.get("content-type"),
+                                 background=BackgroundTask(close))
+
+    return app
+
+
+app = create_app()
+
+if __name__ == "__main__":
+    import uvicorn
+    logger.info("Starting the vLLM router on port 7600")
+    uvicorn.run(app, host="0.0.0.0", port=7600)
@@ -0,0 +1,270 @@
+import docker
+import pytest
+
+from model_pool import POOL_LABEL, SERVING, STANDBY, STARTING, ModelPoolManager
+
+DOCKER_CONFIG = {
+    "image_name": "vllm/vllm-openai:latest",
+    "app_network": "app_network",
+    "platform_network": "platform_network",
+    "gpu_runtime": "nvidia"
+}
+
+
+class FakeContainer:
+
+    def __init__(self, client, name, host_port, labels):
+        self.client = client
+        self.id = f"id-{name}"
+        self.name = name
+        self.labels = labels
+        self.status = "running"
+        self.attrs = {
+            "NetworkSettings": {
+                "Ports": {
+                    "8000/tcp": [{
+                        "HostIp": "0.0.0.0",
+                        "HostPort": str(host_port)
+                    }]
+                }
+            }
+        }
+
+    def reload(self):
+        pass
+
+    def remove(self, force=False):
+        self.client.containers.removed.append(self.name)
+        del self.client.containers.by_id[self.id]
+
+
+class FakeContainers:
+
+    def __init__(self, client):
+        self.client = client
+        self.by_id = {}
+        self.run_kwargs = []
+        self.removed = []
+
+    def run(self, **kwargs):
+        self.run_kwargs.append(kwargs)
+        container = FakeContainer(self.client, kwargs["name"],
+                                  32768 + len(self.run_kwargs),
+                                  kwargs.get("labels", {}))
+        self.by_id[container.id] = container
+        return container
+
+    def get(self, container_id):
+        if container_id not in self.by_id:
+            raise docker.errors.NotFound(container_id)
+        return self.by_id[container_id]
+
+    def list(self, all=False, filters=None):
+        label = (filters or {}).get("label")
+        return [
+            c for c in self.by_id.values() if label is None or label in c.labels
+        ]
+
+
+class FakeNetwork:
+
+    def __init__(self):
+        self.containers = []
+
+    def connect(self, container):
+        self.containers.append(container.name)
+
+
+class FakeNetworks:
+
+    def __init__(self):
+        self.by_name = {}
+
+    def get(self, name):
+        return self.by_name.setdefault(name, FakeNetwork())
+
+
+class FakeDockerClient:
+
+    def __init__(self):
+        self.containers = FakeContainers(self)
+        self.networks = FakeNetworks()
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def client():
+    return FakeDockerClient()
+
+
+@pytest.fixture
+def healthy():
+    # Internal URLs whose health check passes.
+    return set()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def manager(client, healthy, clock):
+    return ModelPoolManager(client,
+                            DOCKER_CONFIG, {
+                                "health_timeout_s": 60,
+                                "max_health_failures": 2
+                            },
+                            probe=lambda url, model: url in healthy,
+                            clock=clock)
+
+
+def urls(manager, model_name):
+    return [r["internal_url"] for r in manager.status(model_name)["members"]]
+
+
+def test_replicas_get_their_own_ports(manager, client):
+    manager.start_pool("org/model", "token", ["--dtype", "half"], replicas=2)
+
+    assert len(client.containers.run_kwargs) == 2
+    for kwargs in client.containers.run_kwargs:
+        assert kwargs["ports"] == {"8000/tcp": None}
+        assert kwargs["labels"][POOL_LABEL] == "true"
+        assert kwargs["command"] == [
+            "--model", "org/model", "--dtype", "half"
+        ]
+    assert len(set(urls(manager, "org/model"))) == 2
+    assert len({r["url"] for r in manager.status("org/model")["members"]}) == 2
+
+
+def test_replicas_are_probed_on_the_platform_network(client, clock):
+    probed = []
+    manager = ModelPoolManager(client,
+                               DOCKER_CONFIG,
+                               probe=lambda url, model: probed.append(url),
+                               clock=clock)
+    manager.start_pool("org/model", "token", [])
+    (replica, ) = manager.status("org/model")["members"]
+    manager.reconcile()
+
+    platform_network = client.networks.get(DOCKER_CONFIG["platform_network"])
+    assert platform_network.containers == [replica["container_name"]]
+    assert probed == [f"http://{replica['container_name']}:8000"]
+
+
+def test_replicas_are_routed_only_once_healthy(manager, healthy):
+    manager.start_pool("org/model", "token", [], replicas=2)
+    first, second = urls(manager, "org/model")
+
+    with pytest.raises(LookupError, match="No ready replica"):
+        manager.route("org/model")
+    assert manager.registry() == {"org/model": []}
+
+    healthy.add(first)
+    manager.reconcile()
+    registry = manager.registry()["org/model"]
+    assert [r["internal_url"] for r in registry] == [first]
+
+    healthy.add(second)
+    manager.reconcile()
+    routed = [manager.route("org/model")["internal_url"] for _ in range(4)]
+    assert routed == [first, second, first, second]
+
+
+def test_standby_takes_over_failed_replica(manager, client, healthy):
+    manager.start_pool("org/model", "token", [], replicas=1, warm_standby=1)
+    first, second = urls(manager, "org/model")
+    healthy.update([first, second])
+    manager.reconcile()
+    roles = {
+        r["internal_url"]: r["role"]
+        for r in manager.status("org/model")["members"]
+    }
+    assert roles == {first: SERVING, second: STANDBY}
+
+    # The serving replica fails its health checks and is replaced.
+    healthy.remove(first)
+    manager.reconcile()
+    assert manager.route("org/model")["internal_url"] == first
+    manager.reconcile()
+
+    members = manager.status("org/model")["members"]
+    assert [(r["internal_url"], r["role"]) for r in members] == [
+        (second, SERVING), (members[1]["internal_url"], STARTING)
+    ]
+    assert manager.route("org/model")["internal_url"] == second
+    assert len(client.containers.removed) == 1
+
+
+def test_replica_not_ready_in_time_is_replaced(manager, client, clock):
+    manager.start_pool("org/model", "token", [])
+    (first, ) = urls(manager, "org/model")
+
+    clock.now = 30
+    manager.reconcile()
+    assert urls(manager, "org/model") == [first]
+
+    clock.now = 61
+    manager.reconcile()
+    (replacement, ) = urls(manager, "org/model")
+    assert replacement != first
+    assert len(client.containers.run_kwargs) == 2
+
+
+def test_exited_container_is_replaced(manager, client, healthy):
+    manager.start_pool("org/model", "token", [])
+    (first, ) = urls(manager, "org/model")
+    healthy.add(first)
+    manager.reconcile()
+
+    next(iter(client.containers.by_id.values())).status = "exited"
+    manager.reconcile()
+    assert urls(manager, "org/model") != [first]
+
+
+def test_devices_are_reused_by_replacements(manager, client, healthy):
+    manager.start_pool("org/model",
+                       "token", [],
+                       replicas=1,
+                       warm_standby=1,
+                       devices=["0", "1"])
+    devices = [
+        kwargs["environment"]["NVIDIA_VISIBLE_DEVICES"]
+        for kwargs in client.containers.run_kwargs
+    ]
+    assert devices == ["0", "1"]
+
+    client.containers.get(
+        manager.pools["org/model"].members[0].container_id).status = "dead"
+    manager.reconcile()
+    assert client.containers.run_kwargs[-1]["environment"][
+        "NVIDIA_VISIBLE_DEVICES"] == "0"
+
+    with pytest.raises(ValueError, match="devices"):
+        manager.start_pool("org/other", "token", [], devices=["0", "1"])
+
+
+def test_stop_pool_and_orphans(manager, client):
+    manager.start_pool("org/model", "token", [], replicas=2)
+    with pytest.raises(ValueError, match="already running"):
+        manager.start_pool("org/model", "token", [])
+
+    assert len(manager.stop_pool("org/model")) == 2
+    assert client.containers.by_id == {}
+    with pytest.raises(KeyError):
+        manager.stop_pool("org/model")
+
+    # Only the containers started by a pool are removed on startup.
+    client.containers.run(name="vllm-gateway")
+    client.containers.run(name="left-over", labels={POOL_LABEL: "true"})
+    manager.remove_orphans()
+    assert [c.name for c in client.containers.by_id.values()
+            ] == ["vllm-gateway"]
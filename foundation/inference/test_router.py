@@ -0,0 +1,163 @@
+import os
+from urllib.parse import urlparse
+
+import httpx
+import yaml
+from fastapi.testclient import TestClient
+
+from model_pool import ModelPoolManager
+from router import ANY_MODEL, PrefixAffinityRouter, create_app, get_routing_key
+from test_model_pool import DOCKER_CONFIG, FakeDockerClient
+
+REPLICAS = [f"http://vllm-{i}:8000" for i in range(4)]
+
+
+def create_router(load_factor=1.25):
+    router = PrefixAffinityRouter(load_factor=load_factor, virtual_nodes=50)
+    router.set_replicas({ANY_MODEL: REPLICAS})
+    return router
+
+
+def chat(system, user, model="model"):
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+    }
+
+
+def test_routing_key_uses_prompt_prefix():
+    thesis = "Thesis text. " * 500
+    first = get_routing_key(chat("Grade criterion.", thesis + "Criterion 1"), 1024)
+    second = get_routing_key(chat("Grade criterion.", thesis + "Criterion 2"), 1024)
+    other = get_routing_key(chat("Grade criterion.", "Another thesis. " * 500), 1024)
+
+    assert first == second
+    assert first != other
+    assert get_routing_key({"model": "m", "prompt": ["abc"]}, 2) == "m\nab"
+
+
+def test_same_prefix_goes_to_same_replica():
+    router = create_router()
+    picks = {router.pick("model", f"thesis-{i}") for i in range(200)}
+    assert picks == set(REPLICAS)
+
+    for i in range(20):
+        assert router.pick("model", f"thesis-{i}") == router.pick("model", f"thesis-{i}")
+
+
+def test_removing_a_replica_only_moves_its_keys():
+    router = create_router()
+    before = {i: router.pick("model", f"thesis-{i}") for i in range(200)}
+    router.set_replicas({ANY_MODEL: REPLICAS[:3]})
+    after = {i: router.pick("model", f"thesis-{i}") for i in range(200)}
+
+    moved = [i for i in before if before[i] != after[i]]
+    assert all(before[i] == REPLICAS[3] for i in moved)
+
+
+def test_overloaded_replica_falls_back_to_least_outstanding():
+    router = create_router(load_factor=1.0)
+    home = router.pick("model", "thesis")
+    for _ in range(3):
+        router.acquire(home)
+
+    picked = router.pick("model", "thesis")
+    assert picked != home
+    assert router.outstanding[picked] == 0
+    assert router.fallbacks_total == 1
+
+    for _ in range(3):
+        router.release(home)
+    assert router.pick("model", "thesis") == home
+
+
+def test_ejected_replica_is_skipped():
+    router = create_router()
+    home = router.pick("model", "thesis")
+    router.eject(home)
+    assert router.pick("model", "thesis") != home
+
+
+def test_proxy_routes_and_exports_queue_depth():
+    seen = []
+
+    def handler(request: httpx.Request):
+        seen.append(str(request.url))
+        return httpx.Response(200, json={"choices": []})
+
+    router = create_router()
+    app = create_app(router, transport=httpx.MockTransport(handler))
+    with TestClient(app) as client:
+        for criterion in range(3):
+            response = client.post(
+                "/v1/chat/completions",
+                json=chat("Grade criterion.", "Thesis text. " * 500 + f"Criterion {criterion}"))
+            assert response.status_code == 200
+
+        response = client.post("/v1/chat/completions",
+                               json=chat("a", "b"),
+                               headers={"X-Session-Key": "thesis-42"})
+        assert response.status_code == 200
+        metrics = client.get("/metrics").text
+
+    assert len(set(seen[:3])) == 1
+    assert seen[0].endswith("/v1/chat/completions")
+    assert seen[3].startswith(router.pick("model", "thesis-42"))
+    assert 'router_replica_outstanding_requests{replica="http://vllm-0:8000"} 0' in metrics
+    assert sum(router.requests_total.values()) == 4
+
+
+def test_proxy_rejects_bodies_that_are_not_objects():
+    def handler(request: httpx.Request):
+        return httpx.Response(200, json={"choices": []})
+
+    router = create_router()
+    app = create_app(router, transport=httpx.MockTransport(handler))
+    with TestClient(app) as client:
+        responses = [client.post("/v1/chat/completions", json=body) for body in ([], "x", 1, None)]
+        responses.append(client.post("/v1/chat/completions", content=b"{"))
+
+    assert [response.status_code for response in responses] == [400] * 5
+    assert sum(router.requests_total.values()) == 0
+
+
+def test_streamed_request_releases_its_replica():
+    def handler(request: httpx.Request):
+        return httpx.Response(200, content=b"data: [DONE]\n\n",
+                              headers={"content-type": "text/event-stream"})
+
+    router = create_router()
+    app = create_app(router, transport=httpx.MockTransport(handler))
+    with TestClient(app) as client:
+        response = client.post("/v1/chat/completions", json={**chat("a", "b"), "stream": True})
+
+    assert response.text == "data: [DONE]\n\n"
+    assert sum(router.requests_total.values()) == 1
+    assert set(router.outstanding.values()) == {0}
+
+
+def test_registry_replicas_are_on_the_router_network():
+    compose_path = os.path.join(os.path.dirname(__file__), "docker-compose-vllm-gateway.yml")
+    with open(compose_path) as f:
+        compose = yaml.safe_load(f)
+    network_names = {key: spec.get("name", key) for key, spec in compose["networks"].items()}
+    router_service = compose["services"]["vllm-router"]
+    router_networks = {network_names[key] for key in router_service["networks"]}
+    gateway_networks = {network_names[key] for key in compose["services"]["vllm-gateway"]["networks"]
+                        if key in network_names}
+
+    client = FakeDockerClient()
+    manager = ModelPoolManager(client, DOCKER_CONFIG, probe=lambda url, model: True)
+    manager.start_pool("org/model", "token", [])
+    manager.reconcile()
+    (replica, ) = manager.registry()["org/model"]
+
+    # The router reaches the gateway and the replicas on the platform network,
+    # where the replicas resolve by container name.
+    platform_network = DOCKER_CONFIG["platform_network"]
+    assert platform_network in router_networks & gateway_networks
+    assert client.networks.get(platform_network).containers == [replica["container_name"]]
+    assert urlparse(replica["internal_url"]).hostname == replica["container_name"]
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate filter for fine-tuning datasets, using MinHash signatures and LSH banding.
+
+Rows whose text has an estimated Jaccard similarity of at least --threshold
+to another row (the same paper across years, reworded variants) are grouped
+into clusters, and only the first row of each cluster is kept.
+Usage:
+    python minhash_dedup.py --dataset ../question_paper_processor/final_stack/fine_tuning_dataset.csv \
+        --text_fields question --threshold 0.8
+Writes the kept rows next to the dataset ({name}.dedup.{ext}) and a manifest
+({name}.dedup.manifest.json) with the kept row indices and the clusters,
+which SFT_train.py, ORPO_train.py, CPT_train.py and pack_dataset.py accept as
+--dedup_manifest. They import select_deduplicated_rows from here to apply it.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+MAX_HASH = np.uint64((1 << 32) - 1)
+# Odd 64-bit multiplier used to combine the token hashes of a shingle.
+SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def read_rows(path: str) -> Tuple[List[dict], List[str]]:
+    """Reads a .csv, .json (list of objects) or .jsonl dataset, returning its rows and column names."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+            return rows, list(reader.fieldnames or [])
+    if extension == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    elif extension == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        if not isinstance(rows, list):
+            raise ValueError(f"Expected a list of rows in {path}")
+    else:
+        raise ValueError(f"Unsupported dataset format: {path}")
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    return rows, fieldnames
+
+
+def write_rows(rows: List[dict], fieldnames: List[str], path: str):
+    """Writes rows in the format given by the extension of `path`."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+    elif extension == ".jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def tokenize(texts: List[str], vocabulary: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the 32-bit hashes of the lowercased word tokens of all texts,
+    concatenated, and the number of tokens of each text.
+    """
+    hashes = []
+    lengths = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        for token in tokens:
+            token_hash = vocabulary.get(token)
+            if token_hash is None:
+                token_hash = vocabulary[token] = zlib.crc32(token.encode("utf-8"))
+            hashes.append(token_hash)
+        lengths[i] = len(tokens)
+    return np.array(hashes, dtype=np.uint64), lengths
+
+
+def shingle_hashes(token_hashes: np.ndarray, lengths: np.ndarray, ngram: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashes the word n-grams of each text, texts shorter than `ngram` giving one
+    shingle of all their tokens. Returns the 32-bit shingle hashes, ordered by
+    text, and the number of shingles of each text.
+    """
+    counts = np.where(lengths > 0, np.maximum(lengths - ngram + 1, 1), 0)
+    token_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    token_ends = np.repeat(token_starts + lengths, counts)
+    shingle_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = np.repeat(token_starts, counts) + np.arange(counts.sum()) - np.repeat(shingle_starts, counts)
+
+    shingles = np.zeros(len(positions), dtype=np.uint64)
+    last_token = max(len(token_hashes) - 1, 0)
+    for offset in range(ngram):
+        index = positions + offset
+        token = np.where(index < token_ends, token_hashes[np.minimum(index, last_token)], 0)
+        shingles = shingles * SHINGLE_MULTIPLIER + token + np.uint64(1)
+    return (shingles ^ (shingles >> np.uint64(32))) & MAX_HASH, counts
+
+
+def minhash_signatures(shingles: np.ndarray, counts: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    MinHash signature of each text, with one multiply-shift hash (a * x + b) >> 32
+    per permutation. Texts without shingles get a signature of MAX_HASH.
+    """
+    signatures = np.full((len(counts), len(a)), MAX_HASH, dtype=np.uint32)
+    has_shingles = counts > 0
+    if not has_shingles.any():
+        return signatures
+    # One row per permutation, so that the shingles of a text are contiguous for reduceat
+    hashed = a[:, None] * shingles[None, :] + b[:, None]
+    hashed >>= np.uint64(32)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[has_shingles]
+    signatures[has_shingles] = np.minimum.reduceat(hashed.astype(np.uint32), starts, axis=1).T
+    return signatures
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Number of bands and rows per band minimizing the sum of the false positive
+    and false negative probabilities of LSH around `threshold`.
+    """
+    similarities = np.linspace(0, 1, 1001)
+    below, above = similarities <= threshold, similarities >= threshold
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            candidate = 1 - (1 - similarities ** rows) ** bands
+            error = np.trapezoid(candidate[below], similarities[below]) + np.trapezoid(1 - candidate[above], similarities[above])
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+def find_roots(parent: np.ndarray) -> np.ndarray:
+    """Follows the parents of every row to its root, compressing the paths."""
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            return parent
+        parent = grandparent
+
+
+def union(parent: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Merges the sets of each pair, the root of a set always being its lowest row."""
+    while len(left):
+        parent = find_roots(parent)
+        root_left, root_right = parent[left], parent[right]
+        apart = root_left != root_right
+        if not apart.any():
+            break
+        lower = np.minimum(root_left[apart], root_right[apart])
+        higher = np.maximum(root_left[apart], root_right[apart])
+        np.minimum.at(parent, higher, lower)
+        left, right = left[apart], right[apart]
+    return find_roots(parent)
+
+
+def cluster_rows(signatures: np.ndarray, empty: np.ndarray, bands: int, rows: int, threshold: float) -> np.ndarray:
+    """
+    Groups rows whose signatures share a band and agree on at least `threshold`
+    of their permutations. Returns the cluster of each row, as its lowest row.
+    """
+    parent = np.arange(len(signatures))
+    for band in range(bands):
+        columns = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = np.zeros(len(signatures), dtype=np.uint64)
+        for column in columns.T:
+            keys = keys * SHINGLE_MULTIPLIER + column
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        # Each row of a bucket is compared with the first, lowest, row of the bucket
+        first = order[np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))]
+        candidates = ~starts & ~empty[order] & ~empty[first]
+        left, right = first[candidates], order[candidates]
+        similar = (signatures[left] == signatures[right]).mean(axis=1) >= threshold
+        parent = union(parent, left[similar], right[similar])
+    return parent
+
+
+def deduplicate(texts: List[str], threshold: float = 0.8, num_perm: int = 128, ngram: int = 3,
+                bands: int = None, rows: int = None, seed: int = 42, batch_size: int = 2000) -> dict:
+    """
+    Finds the near-duplicate clusters of `texts`.
+
+    Returns the kept row indices, the clusters with more than one row and the
+    LSH parameters used.
+    """
+    if bands is None or rows is None:
+        bands, rows = optimal_bands(threshold, num_perm)
+    if bands * rows > num_perm:
+        raise ValueError(f"{bands} bands of {rows} rows need at least {bands * rows} permutations")
+
+    generator = np.random.default_rng(seed)
+    a = generator.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = generator.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+
+    start = time.perf_counter()
+    vocabulary = {}
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    empty = np.zeros(len(texts), dtype=bool)
+    for batch_start in range(0, len(texts), batch_size):
+        batch = texts[batch_start:batch_start + batch_size]
+        token_hashes, lengths = tokenize(batch, vocabulary)
+        shingles, counts = shingle_hashes(token_hashes, lengths, ngram)
+        signatures[batch_start:batch_start + len(batch)] = minhash_signatures(shingles, counts, a, b)
+        empty[batch_start:batch_start + len(batch)] = counts == 0
+    signature_seconds = time.perf_counter() - start
+    logging.info(f"Signatures of {len(texts)} rows in {signature_seconds:.1f}s "
+                 f"({len(texts) / max(signature_seconds, 1e-9):.0f} rows/s)")
+
+    start = time.perf_counter()
+    roots = cluster_rows(signatures, empty, bands, rows, threshold)
+    logging.info(f"LSH with {bands} bands of {rows} rows in {time.perf_counter() - start:.1f}s")
+
+    kept = np.flatnonzero(roots == np.arange(len(texts)))
+    duplicates = np.flatnonzero(roots != np.arange(len(texts)))
+    similarities = (signatures[duplicates] == signatures[roots[duplicates]]).mean(axis=1)
+    clusters = {}
+    for row, root, similarity in zip(duplicates.tolist(), roots[duplicates].tolist(), similarities.tolist()):
+        clusters.setdefault(root, []).append({"row": row, "similarity": round(similarity, 3)})
+    return {
+        "kept": kept.tolist(),
+        "clusters": [{"kept": root, "duplicates": members} for root, members in sorted(clusters.items())],
+        "bands": bands,
+        "rows_per_band": rows,
+    }
+
+
+def report_clusters(result: dict, texts: List[str], top: int):
+    """Logs the size distribution of the clusters and the largest ones."""
+    clusters = result["clusters"]
+    removed = sum(len(cluster["duplicates"]) for cluster in clusters)
+    logging.info(f"{len(texts)} rows, {len(result['kept'])} kept, {removed} removed in {len(clusters)} clusters")
+    if not clusters:
+        return
+    sizes = np.array([len(cluster["duplicates"]) + 1 for cluster in clusters])
+    for label, low, high in (("2", 2, 2), ("3-5", 3, 5), ("6-10", 6, 10), ("11+", 11, sizes.max())):
+        logging.info(f"  clusters of {label} rows: {int(((sizes >= low) & (sizes <= high)).sum())}")
+    for cluster in sorted(clusters, key=lambda c: len(c["duplicates"]), reverse=True)[:top]:
+        logging.info(f"  {len(cluster['duplicates']) + 1} rows like #{cluster['kept']}: {texts[cluster['kept']][:100]!r}")
+        for duplicate in cluster["duplicates"][:3]:
+            logging.info(f"    #{duplicate['row']} ({duplicate['similarity']:.2f}): {texts[duplicate['row']][:100]!r}")
+
+
+def select_deduplicated_rows(dataset, manifest_path: str, dataset_path: str):
+    """
+    Keeps the rows of `dataset`, loaded from `dataset_path`, listed as kept in
+    a manifest written by main(). Refuses a manifest written for another file.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not os.path.isfile(dataset_path):
+        raise ValueError(f"A dedup manifest needs the dataset file it was written for, not {dataset_path}")
+    if file_sha256(dataset_path) != manifest["dataset_sha256"]:
+        raise ValueError(f"The dedup manifest was written for {manifest['dataset']}, whose contents differ from {dataset_path}")
+    if manifest["total_rows"] != len(dataset):
+        raise ValueError(f"The dedup manifest is for a dataset of {manifest['total_rows']} rows, not {len(dataset)}")
+    print(f"Keeping {len(manifest['kept'])} of {len(dataset)} rows left by near-duplicate filtering")
+    return dataset.select(manifest["kept"])
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Remove near-duplicate rows from a fine-tuning dataset with MinHash-LSH.")
+    parser.add_argument('--dataset', type=str, required=True, help="Path to dataset file (.csv, .json, .jsonl)")
+    parser.add_argument('--text_fields', type=str, default="question", help="Comma-separated columns compared, default is 'question'.")
+    parser.add_argument('--output', type=str, default=None, help="Output dataset, default is {name}.dedup.{ext} next to the dataset.")
+    parser.add_argument('--threshold', type=float, default=0.8, help="Jaccard similarity from which rows are duplicates, default is 0.8.")
+    parser.add_argument('--num_perm', type=int, default=128, help="MinHash permutations, default is 128.")
+    parser.add_argument('--ngram', type=int, default=3, help="Words per shingle, default is 3.")
+    parser.add_argument('--bands', type=int, default=None, help="LSH bands, default is chosen from the threshold.")
+    parser.add_argument('--rows_per_band', type=int, default=None, help="Rows per LSH band, default is chosen from the threshold.")
+    parser.add_argument('--batch_size', type=int, default=2000, help="Rows hashed at a time, default is 2000.")
+    parser.add_argument('--seed', type=int, default=42, help="Seed of the hash permutations, default is 42.")
+    parser.add_argument('--report', type=int, default=10, help="Largest clusters to print, default is 10.")
+    args = parser.parse_args()
+
+    rows, fieldnames = read_rows(args.dataset)
+    text_fields = [field.strip() for field in args.text_fields.split(",") if field.strip()]
+    missing = [field for field in text_fields if field not in fieldnames]
+    if missing:
+        raise ValueError(f"Missing text fields {missing} in the dataset. Columns: {fieldnames}")
+    texts = [" ".join(str(row.get(field) or "") for field in text_fields) for row in rows]
+
+    result = deduplicate(texts, args.threshold, args.num_perm, args.ngram, args.bands, args.rows_per_band,
+                         args.seed, args.batch_size)
+    report_clusters(result, texts, args.report)
+
+    base, extension = os.path.splitext(args.dataset)
+    output = args.output or f"{base}.dedup{extension}"
+    write_rows([rows[i] for i in result["kept"]], fieldnames, output)
+    manifest_path = f"{os.path.splitext(output)[0]}.manifest.json"
+    manifest = {
+        "dataset": os.path.abspath(args.dataset),
+        "dataset_sha256": file_sha256(args.dataset),
+        "output": os.path.abspath(output),
+        "text_fields": text_fields,
+        "threshold": args.threshold,
+        "num_perm": args.num_perm,
+        "ngram": args.ngram,
+        "seed": args.seed,
+        "total_rows": len(rows),
+        **result,
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    logging.info(f"Wrote {len(result['kept'])} rows to {output} and the manifest to {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares inferring the topics of questions one at a time with batched
+inference, on a sample of the papers converted by qp_dataset.py:
+
+    python benchmark_topics.py --sample 10 --batch-size 20
+
+Reports the requests, tokens and wall time of each mode, and how often
+both modes give the same topic.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from qp_dataset import (
+    LLM_CONCURRENCY, TOPIC_BATCH_SIZE, StageStats, extract_course_info, extract_questions,
+    infer_question_topics, read_text_file
+)
+
+async def run_mode(papers: list, api_url: str, model_name: str, batch_size: int, concurrency: int) -> dict:
+    stats = StageStats()
+    llm_slots = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    topics = await asyncio.gather(*(
+        infer_question_topics(question_texts, course_title, api_url, model_name, llm_slots, stats, batch_size)
+        for course_title, question_texts in papers
+    ))
+    tokens = stats.tokens.get("topic", {})
+    return {
+        "requests": sum(stats.stages.get(stage, [0])[0] for stage in ("topic_batch", "topic")),
+        "prompt_tokens": tokens.get("prompt_tokens", 0),
+        "completion_tokens": tokens.get("completion_tokens", 0),
+        "seconds": time.perf_counter() - start,
+        "topics": [topic for paper_topics in topics for topic in paper_topics],
+    }
+
+async def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--text-dir", default=os.path.join(script_dir, "final_stack", "text_converted"))
+    parser.add_argument("--sample", type=int, default=10, help="Papers to run on")
+    parser.add_argument("--batch-size", type=int, default=max(TOPIC_BATCH_SIZE, 2))
+    parser.add_argument("--concurrency", type=int, default=LLM_CONCURRENCY)
+    parser.add_argument("--api-url", default="http://localhost:11434")
+    parser.add_argument("--model", default="llama3.2")
+    args = parser.parse_args()
+
+    papers = []
+    for file in sorted(os.listdir(args.text_dir))[:args.sample]:
+        text_content = read_text_file(os.path.join(args.text_dir, file))
+        questions = extract_questions(text_content)
+        if questions:
+            course_title = extract_course_info(text_content)["course_title"]
+            papers.append((course_title, [question["question_text"] for question in questions]))
+    print(f"{len(papers)} papers, {sum(len(questions) for _, questions in papers)} questions")
+
+    single = await run_mode(papers, args.api_url, args.model, 1, args.concurrency)
+    batched = await run_mode(papers, args.api_url, args.model, args.batch_size, args.concurrency)
+
+    print(f"{'mode':<16}{'requests':>10}{'prompt tok':>12}{'compl. tok':>12}{'seconds':>10}")
+    for name, result in (("one by one", single), (f"batches of {args.batch_size}", batched)):
+        print(f"{name:<16}{result['requests']:>10}{result['prompt_tokens']:>12}"
+              f"{result['completion_tokens']:>12}{result['seconds']:>10.1f}")
+    total_single = single["prompt_tokens"] + single["completion_tokens"]
+    total_batched = batched["prompt_tokens"] + batched["completion_tokens"]
+    if total_single and single["seconds"]:
+        print(f"Tokens: -{100 * (1 - total_batched / total_single):.0f}%, "
+              f"wall time: -{100 * (1 - batched['seconds'] / single['seconds']):.0f}%")
+    same = sum(a.lower() == b.lower() for a, b in zip(single["topics"], batched["topics"]))
+    print(f"Same topic in both modes: {same}/{len(single['topics'])}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
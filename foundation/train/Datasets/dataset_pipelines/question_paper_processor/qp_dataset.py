@@ -16,7 +16,10 @@ import markdown
 import tempfile
 import shutil
 import subprocess
-from typing import Optional
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # Set up logging
 logging.basicConfig(
@@ -28,6 +31,128 @@ logging.basicConfig(
     ]
 )
 
+# Documents processed at the same time, and LLM requests in flight across all of them.
+FILE_CONCURRENCY = int(os.getenv("QP_FILE_CONCURRENCY", "4"))
+LLM_CONCURRENCY = int(os.getenv("QP_LLM_CONCURRENCY", "8"))
+# Processes converting documents to PDF and text.
+CONVERSION_WORKERS = int(os.getenv("QP_CONVERSION_WORKERS", str(os.cpu_count() or 1)))
+# Questions whose topics are inferred in one request; 1 infers the topic of each question on its own.
+TOPIC_BATCH_SIZE = int(os.getenv("QP_TOPIC_BATCH_SIZE", "20"))
+
+class StageStats:
+    """Counts the items of each stage and the time spent on them, to report throughput."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.tokens: Dict[str, Dict[str, int]] = {}
+
+    def add_tokens(self, stage: str, usage: Dict[str, int]):
+        tokens = self.tokens.setdefault(stage, {"prompt_tokens": 0, "completion_tokens": 0})
+        for kind in tokens:
+            tokens[kind] += usage.get(kind, 0)
+
+    def add(self, stage: str, seconds: float, items: int = 1):
+        count_and_time = self.stages.setdefault(stage, [0, 0.0])
+        count_and_time[0] += items
+        count_and_time[1] += seconds
+
+    @contextmanager
+    def time(self, stage: str, items: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, items)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        logging.info(f"Throughput over {elapsed:.1f}s:")
+        for stage, (count, seconds) in self.stages.items():
+            logging.info(
+                f"  {stage}: {count:.0f} done, {count / elapsed:.2f}/s, "
+                f"{seconds / max(count, 1):.2f}s each"
+            )
+        for stage, tokens in self.tokens.items():
+            logging.info(
+                f"  {stage}: {tokens['prompt_tokens']} prompt tokens, "
+                f"{tokens['completion_tokens']} completion tokens"
+            )
+
+class DatasetCheckpoint:
+    """
+    Append-only JSONL dataset, with a manifest of the documents whose rows are all in it.
+
+    The rows of a document are written before its manifest entry, so after a
+    crash the rows of documents missing from the manifest are dropped and
+    those documents are processed again.
+    """
+    def __init__(self, dataset_path: str, manifest_path: str):
+        self.dataset_path = dataset_path
+        self.manifest_path = manifest_path
+        self.completed: Dict[str, dict] = {}
+        for entry in self._read_jsonl(manifest_path):
+            self.completed[entry["document_id"]] = entry
+        self._drop_incomplete_rows()
+
+    @staticmethod
+    def _read_jsonl(path: str) -> Iterator[dict]:
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash
+                    continue
+
+    @staticmethod
+    def _append(f, lines: List[str]):
+        f.write("".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _drop_incomplete_rows(self):
+        rows = list(self._read_jsonl(self.dataset_path))
+        kept = [row for row in rows if row.get("metadata_tag") in self.completed]
+        if len(kept) == len(rows) and os.path.exists(self.dataset_path):
+            return
+        temp_path = self.dataset_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            self._append(f, [json.dumps(row, ensure_ascii=False) + "\n" for row in kept])
+        os.replace(temp_path, self.dataset_path)
+        if len(kept) < len(rows):
+            logging.info(f"Dropped {len(rows) - len(kept)} rows of unfinished documents from {self.dataset_path}")
+
+    def is_completed(self, document_id: str) -> bool:
+        return document_id in self.completed
+
+    def add(self, document_id: str, rows: List[dict], **entry):
+        with open(self.dataset_path, "a", encoding="utf-8") as f:
+            self._append(f, [json.dumps(row, ensure_ascii=False) + "\n" for row in rows])
+        entry = {"document_id": document_id, "rows": len(rows), "completed_at": time.time(), **entry}
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            self._append(f, [json.dumps(entry, ensure_ascii=False) + "\n"])
+        self.completed[document_id] = entry
+
+    def rows(self) -> Iterator[dict]:
+        return self._read_jsonl(self.dataset_path)
+
+def add_usage(usage: Optional[Dict[str, int]], response_json: dict):
+    """Adds the token counts of an Ollama response to `usage`."""
+    if usage is not None:
+        usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + response_json.get("prompt_eval_count", 0)
+        usage["completion_tokens"] = usage.get("completion_tokens", 0) + response_json.get("eval_count", 0)
+
+def add_failure(failures: Optional[List[str]], message: str):
+    """Logs an LLM call that fell back to a default and records it in `failures`."""
+    logging.error(message)
+    if failures is not None:
+        failures.append(message)
+
+class IncompleteDocumentError(Exception):
+    """Some LLM calls of a document failed, so it is left for the next run."""
+
 def generate_document_id(file_path: str) -> str:
     """Generates a unique identifier for a document based on its file path."""
     return hashlib.sha256(file_path.encode()).hexdigest()[:8]
@@ -139,7 +264,9 @@ def extract_questions(text_content: str) -> list:
 
     return questions
 
-async def correct_spelling(text: str, api_url: str, model_name: str) -> str:
+async def correct_spelling(text: str, api_url: str, model_name: str,
+                           usage: Optional[Dict[str, int]] = None,
+                           failures: Optional[List[str]] = None) -> str:
     """
     Corrects spelling mistakes in the text using an LLM.
     """
@@ -165,28 +292,31 @@ async def correct_spelling(text: str, api_url: str, model_name: str) -> str:
 
             async with session.post(f"{api_url}/api/generate", json=data, headers=headers) as response:
                 if response.status != 200:
-                    logging.error(f"API Error: HTTP {response.status}")
+                    add_failure(failures, f"API Error: HTTP {response.status}")
                     return text
 
                 try:
                     response_json = await response.json()
+                    add_usage(usage, response_json)
                     corrected_text = response_json.get('response', '')
                     if corrected_text:
                         logging.info(f"Successfully corrected text. First 100 chars: {corrected_text[:100]}...")
                         return corrected_text.strip()
                     else:
-                        logging.warning("API returned empty response")
+                        add_failure(failures, "API returned empty response")
                         return text
 
                 except json.JSONDecodeError as e:
-                    logging.error(f"JSON Decode Error: {e}")
+                    add_failure(failures, f"JSON Decode Error: {e}")
                     return text
 
     except Exception as e:
-        logging.error(f"Unexpected error in correct_spelling: {str(e)}")
+        add_failure(failures, f"Unexpected error in correct_spelling: {str(e)}")
         return text
 
-async def infer_topic_name(question_text: str, course_title: str, api_url: str, model_name: str) -> str:
+async def infer_topic_name(question_text: str, course_title: str, api_url: str, model_name: str,
+                           usage: Optional[Dict[str, int]] = None,
+                           failures: Optional[List[str]] = None) -> str:
     """
     Infers the topic name for a question based on the course title and question text.
     """
@@ -203,7 +333,7 @@ async def infer_topic_name(question_text: str, course_title: str, api_url: str,
 
             async with session.post(f"{api_url}/api/generate", json=data, headers=headers) as response:
                 if response.status != 200:
-                    logging.error(f"Error inferring topic name: HTTP {response.status}, {await response.text()}")
+                    add_failure(failures, f"Error inferring topic name: HTTP {response.status}, {await response.text()}")
                     return "Unknown_Topic"
 
                 collected_text = ""
@@ -213,21 +343,188 @@ async def infer_topic_name(question_text: str, course_title: str, api_url: str,
                             obj = json.loads(line)
                             collected_text += obj.get("response", "")
                             if obj.get("done", False):
+                                add_usage(usage, obj)
                                 break
                         except json.JSONDecodeError as e:
                             logging.error(f"JSON Decode Error while inferring topic: {e}")
 
                 if collected_text.strip():
                     return collected_text.strip().capitalize()
+                add_failure(failures, "No topic name in the answer")
 
     except Exception as e:
         logging.error(f"Error inferring topic name: {str(e)}", exc_info=True)
+        if failures is not None:
+            failures.append(f"Error inferring topic name: {str(e)}")
 
     return "Unknown_Topic"
 
-async def process_text_files(input_dir: str, output_file: str, api_url: str, model_name: str):
+def parse_topic_names(answer: str, count: int) -> Dict[int, str]:
+    """
+    Reads the topics of questions 1..count from a JSON object like {"1": "Topic", ...}.
+    Questions with no topic in the answer are left out.
+    """
+    start, end = answer.find('{'), answer.rfind('}') + 1
+    if start < 0 or end <= start:
+        return {}
+    try:
+        topics = json.loads(answer[start:end])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(topics, dict):
+        return {}
+    # Some models wrap the object, e.g. {"topics": {...}}
+    if len(topics) == 1 and isinstance(next(iter(topics.values())), dict):
+        topics = next(iter(topics.values()))
+    parsed = {}
+    for number in range(1, count + 1):
+        topic = topics.get(str(number))
+        if isinstance(topic, str) and topic.strip():
+            parsed[number - 1] = topic.strip().capitalize()
+    return parsed
+
+async def infer_topic_names(question_texts: List[str], course_title: str, api_url: str, model_name: str,
+                            usage: Optional[Dict[str, int]] = None) -> Dict[int, str]:
+    """
+    Infers the topic names of several questions of a course in one request.
+
+    Returns the topics by question index; questions whose topic could not be
+    read from the answer are missing, for the caller to infer one by one.
+    """
+    numbered_questions = "\n\n".join(f"{i}. {text}" for i, text in enumerate(question_texts, 1))
+    prompt = (
+        f"Infer the topic name for each of the following questions from the course titled '{course_title}':\n\n"
+        f"{numbered_questions}\n\n"
+        f"Answer with a JSON object mapping each question number to its topic name, "
+        f"like {{\"1\": \"Topic\", \"2\": \"Topic\"}}. "
+        f"PLEASE OUTPUT ONLY THE JSON OBJECT AND NOTHING ELSE"
+    )
+    try:
+        timeout = aiohttp.ClientTimeout(total=300)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            data = {"model": model_name, "prompt": prompt, "format": "json", "stream": False}
+            async with session.post(f"{api_url}/api/generate", json=data) as response:
+                if response.status != 200:
+                    logging.error(f"Error inferring topic names: HTTP {response.status}, {await response.text()}")
+                    return {}
+                response_json = await response.json()
+                add_usage(usage, response_json)
+                return parse_topic_names(response_json.get("response", ""), len(question_texts))
+    except Exception as e:
+        logging.error(f"Error inferring topic names: {str(e)}", exc_info=True)
+        return {}
+
+def read_text_file(file_path: str) -> str:
+    """Reads a text file, falling back to latin-1 if it isn't UTF-8."""
+    try:
+        with open(file_path, "r", encoding="utf-8", errors='replace') as f:
+            return f.read()
+    except UnicodeError:
+        with open(file_path, "r", encoding="latin-1", errors='replace') as f:
+            return f.read()
+
+async def infer_question_topics(question_texts: List[str], course_title: str, api_url: str, model_name: str,
+                                llm_slots: asyncio.Semaphore, stats: StageStats,
+                                batch_size: int = TOPIC_BATCH_SIZE,
+                                failures: Optional[List[str]] = None) -> List[str]:
+    """
+    Infers the topics of questions in windows of `batch_size`, then one by one
+    for the questions the batched answers missed. Questions whose topic could
+    not be inferred at all are recorded in `failures`.
+    """
+    topics: Dict[int, str] = {}
+
+    async def infer_window(start: int):
+        window = question_texts[start:start + batch_size]
+        usage = {}
+        async with llm_slots:
+            with stats.time("topic_batch"):
+                window_topics = await infer_topic_names(window, course_title, api_url, model_name, usage)
+        stats.add_tokens("topic", usage)
+        topics.update({start + i: topic for i, topic in window_topics.items()})
+
+    async def infer_one(index: int):
+        usage = {}
+        async with llm_slots:
+            with stats.time("topic"):
+                topics[index] = await infer_topic_name(question_texts[index], course_title, api_url, model_name,
+                                                       usage, failures)
+        stats.add_tokens("topic", usage)
+
+    if batch_size > 1:
+        await asyncio.gather(*(infer_window(start) for start in range(0, len(question_texts), batch_size)))
+    missing = [index for index in range(len(question_texts)) if index not in topics]
+    if batch_size > 1 and missing:
+        logging.warning(f"No topic in the batched answer for {len(missing)} questions, inferring them one by one")
+    await asyncio.gather(*(infer_one(index) for index in missing))
+    return [topics[index] for index in range(len(question_texts))]
+
+async def process_document(file_path: str, api_url: str, model_name: str,
+                           llm_slots: asyncio.Semaphore, stats: StageStats) -> List[dict]:
+    """
+    Extracts the questions of a text file and returns its dataset rows.
+
+    Raises IncompleteDocumentError if an LLM call failed, rather than
+    returning rows made of the fallback values.
+    """
+    text_content = read_text_file(file_path)
+
+    usage = {}
+    failures = []
+    async with llm_slots:
+        with stats.time("spelling"):
+            corrected_text = await correct_spelling(text_content, api_url, model_name, usage, failures)
+    stats.add_tokens("spelling", usage)
+    course_info = extract_course_info(corrected_text)
+    questions = extract_questions(corrected_text)
+    document_id = generate_document_id(file_path)
+
+    topic_names = await infer_question_topics(
+        [question["question_text"] for question in questions], course_info["course_title"],
+        api_url, model_name, llm_slots, stats, failures=failures
+    )
+    if failures:
+        raise IncompleteDocumentError(f"{len(failures)} LLM calls failed, first: {failures[0]}")
+
+    rows = []
+    for question, topic_name in zip(questions, topic_names):
+        instruction = (
+            f"Act as an expert in question generation. "
+            f"When you find the course titled '{course_info['course_title']}' "
+            f"with course number '{course_info['course_no']}', "
+            f"generate a new question related to the topic '{topic_name}'. "
+            f"The new question should be similar in style and complexity to the following example, "
+            f"but it must not repeat the same question: "
+            f"'{question['question_text']}'. "
+            f"Ensure the generated question aligns with the course content and topic."
+        )
+
+        input_text = (
+            f"Generate a question for the course id '{course_info['course_no']}', "
+            f"course name '{course_info['course_title']}' under the topic '{topic_name}' "
+            f"appropriate for marks {question['marks']}"
+        )
+
+        rows.append({
+            "instruction": instruction,
+            "input": input_text,
+            "question": question["question_text"],
+            "course_no": course_info["course_no"],
+            "course_title": course_info["course_title"],
+            "marks": question["marks"],
+            "topic": topic_name,
+            "metadata_tag": document_id
+        })
+    return rows
+
+async def process_text_files(input_dir: str, output_file: str, api_url: str, model_name: str,
+                             file_concurrency: int = FILE_CONCURRENCY, llm_concurrency: int = LLM_CONCURRENCY):
     """
     Processes all text files in the input directory and saves the extracted data as a CSV file.
+
+    The rows of each document are appended to a JSONL file next to the CSV as
+    soon as the document is done, and documents done by an earlier run are
+    skipped, so an interrupted run picks up where it stopped.
     """
     supported_extensions = [".txt"]
     files = [
@@ -240,61 +537,36 @@ async def process_text_files(input_dir: str, output_file: str, api_url: str, mod
         logging.warning("No supported files found in the 'text_converted' directory.")
         return
 
-    csv_rows = []
-
-    logging.info(f"Processing {len(files)} files...")
-    for file_path in tqdm(files, desc="Processing Files", unit="file"):
-        try:
-            # Read file with error handling
-            try:
-                with open(file_path, "r", encoding="utf-8", errors='replace') as f:
-                    text_content = f.read()
-            except UnicodeError:
-                # Fallback to latin-1 if UTF-8 fails
-                with open(file_path, "r", encoding="latin-1", errors='replace') as f:
-                    text_content = f.read()
-
-            corrected_text = await correct_spelling(text_content, api_url, model_name)
-            course_info = extract_course_info(corrected_text)
-            questions = extract_questions(corrected_text)
-            document_id = generate_document_id(file_path)
-
-            for question in questions:
-                topic_name = await infer_topic_name(
-                    question["question_text"], course_info["course_title"], api_url, model_name
-                )
-
-                instruction = (
-                    f"Act as an expert in question generation. "
-                    f"When you find the course titled '{course_info['course_title']}' "
-                    f"with course number '{course_info['course_no']}', "
-                    f"generate a new question related to the topic '{topic_name}'. "
-                    f"The new question should be similar in style and complexity to the following example, "
-                    f"but it must not repeat the same question: "
-                    f"'{question['question_text']}'. "
-                    f"Ensure the generated question aligns with the course content and topic."
-                )
-
-                input_text = (
-                    f"Generate a question for the course id '{course_info['course_no']}', "
-                    f"course name '{course_info['course_title']}' under the topic '{topic_name}' "
-                    f"appropriate for marks {question['marks']}"
-                )
-
-                csv_rows.append({
-                    "instruction": instruction,
-                    "input": input_text,
-                    "question": question["question_text"],
-                    "course_no": course_info["course_no"],
-                    "course_title": course_info["course_title"],
-                    "marks": question["marks"],
-                    "topic": topic_name,
-                    "metadata_tag": document_id
-                })
+    output_base = os.path.splitext(output_file)[0]
+    checkpoint = DatasetCheckpoint(f"{output_base}.jsonl", f"{output_base}.manifest.jsonl")
+    pending = [f for f in files if not checkpoint.is_completed(generate_document_id(f))]
+    logging.info(f"Processing {len(pending)} files, {len(files) - len(pending)} already done...")
 
-        except Exception as e:
-            logging.error(f"Error processing {file_path}: {str(e)}", exc_info=True)
+    file_slots = asyncio.Semaphore(file_concurrency)
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    stats = StageStats()
+    progress = tqdm(total=len(pending), desc="Processing Files", unit="file")
 
+    async def process(file_path: str):
+        async with file_slots:
+            try:
+                with stats.time("document"):
+                    rows = await process_document(file_path, api_url, model_name, llm_slots, stats)
+                checkpoint.add(generate_document_id(file_path), rows, filename=os.path.basename(file_path))
+                stats.add("question", 0.0, len(rows))
+            except IncompleteDocumentError as e:
+                # Not checkpointed, so the next run processes it again.
+                logging.warning(f"Leaving {file_path} for the next run: {str(e)}")
+            except Exception as e:
+                logging.error(f"Error processing {file_path}: {str(e)}", exc_info=True)
+            finally:
+                progress.update(1)
+
+    await asyncio.gather(*(process(file_path) for file_path in pending))
+    progress.close()
+    stats.report()
+
+    csv_rows = list(checkpoint.rows())
     if csv_rows:
         fieldnames = ["instruction", "input", "question", "course_no", "course_title", "marks", "topic", "metadata_tag"]
         write_csv_safely(csv_rows, output_file, fieldnames)
@@ -318,8 +590,11 @@ class DocumentToPDFConverter:
             # Create temporary directory for conversion
             with tempfile.TemporaryDirectory() as temp_dir:
                 # Use LibreOffice to convert the document
+                # A profile per process, concurrent LibreOffice instances can't share one
+                profile_dir = os.path.join(tempfile.gettempdir(), f"qp_libreoffice_{os.getpid()}")
                 subprocess.run([
                     'libreoffice',
+                    f'-env:UserInstallation=file://{profile_dir}',
                     '--headless',
                     '--convert-to', 'pdf',
                     '--outdir', temp_dir,
@@ -392,53 +667,93 @@ class PDFToTextConverter:
         except Exception as e:
             raise Exception(f"Error converting PDF to text: {str(e)}")
 
-def process_directory(input_dir: str, output_dir: str):
-    """Process all documents by converting to PDF first, then to text"""
+_converters = None
+
+def _get_converters() -> Tuple["DocumentToPDFConverter", "PDFToTextConverter"]:
+    """Converters of the current worker process, created on first use."""
+    global _converters
+    if _converters is None:
+        _converters = (DocumentToPDFConverter(), PDFToTextConverter())
+    return _converters
+
+def convert_document(input_path: str, pdf_dir: str, text_dir: str) -> Tuple[str, str, Dict[str, float]]:
+    """
+    Converts a document to PDF, then to text. Runs in a worker process.
+
+    Returns the status of the conversion and the seconds spent per stage.
+    """
+    file = os.path.basename(input_path)
+    file_extension = Path(file).suffix.lower()
+    file_name = Path(file).stem
+    # Define output paths
+    pdf_path = os.path.join(pdf_dir, f"{file_name}.pdf")
+    text_path = os.path.join(text_dir, f"{file_name}.txt")
+    timings = {}
+
+    # Converted by an earlier run
+    if os.path.exists(text_path) and os.path.getmtime(text_path) >= os.path.getmtime(input_path):
+        return "skipped", f"Already converted: {file}", timings
+
+    pdf_converter, text_converter = _get_converters()
+    start = time.perf_counter()
+    # If file is already PDF, just copy it
+    if file_extension == '.pdf':
+        shutil.copy2(input_path, pdf_path)
+    # For HTML and Markdown, use specific converters
+    elif file_extension in ['.html', '.htm']:
+        if not pdf_converter.convert_html_to_pdf(input_path, pdf_path):
+            return "failed", f"Could not convert {file} to PDF", timings
+    elif file_extension == '.md':
+        if not pdf_converter.convert_markdown_to_pdf(input_path, pdf_path):
+            return "failed", f"Could not convert {file} to PDF", timings
+    # For other document types (DOCX, PPTX), use LibreOffice
+    elif file_extension in ['.docx', '.pptx']:
+        pdf_result = pdf_converter.convert_to_pdf_libreoffice(input_path, pdf_dir)
+        if not pdf_result:
+            return "failed", f"Could not convert {file} to PDF", timings
+    else:
+        return "unsupported", f"Unsupported file format: {file}", timings
+    timings["pdf_conversion"] = time.perf_counter() - start
+
+    # Convert PDF to text
+    start = time.perf_counter()
+    text_content = text_converter.convert_pdf_to_text(pdf_path)
+    # Save text content, through a temporary file so that a crash leaves no partial text
+    with open(text_path + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(text_content)
+    os.replace(text_path + ".tmp", text_path)
+    timings["text_extraction"] = time.perf_counter() - start
+    return "converted", f"✅ Processed: {file}", timings
+
+def process_directory(input_dir: str, output_dir: str, workers: int = CONVERSION_WORKERS):
+    """Process all documents by converting to PDF first, then to text, in `workers` processes"""
     # Create output directories
     pdf_dir = os.path.join(output_dir, "pdf_converted")
     text_dir = os.path.join(output_dir, "text_converted")
     os.makedirs(pdf_dir, exist_ok=True)
     os.makedirs(text_dir, exist_ok=True)
-    # Initialize converters
-    pdf_converter = DocumentToPDFConverter()
-    text_converter = PDFToTextConverter()
+    # Fail early if a converter is missing
+    DocumentToPDFConverter()
     # Process all files
     files = os.listdir(input_dir)
     print(f"Found {len(files)} files to process...")
-    for file in tqdm(files, desc="Converting Documents"):
-        input_path = os.path.join(input_dir, file)
-        file_extension = Path(file).suffix.lower()
-        file_name = Path(file).stem
-        # Define output paths
-        pdf_path = os.path.join(pdf_dir, f"{file_name}.pdf")
-        text_path = os.path.join(text_dir, f"{file_name}.txt")
-        try:
-            # If file is already PDF, just copy it
-            if file_extension == '.pdf':
-                shutil.copy2(input_path, pdf_path)
-            # For HTML and Markdown, use specific converters
-            elif file_extension in ['.html', '.htm']:
-                if not pdf_converter.convert_html_to_pdf(input_path, pdf_path):
-                    continue
-            elif file_extension == '.md':
-                if not pdf_converter.convert_markdown_to_pdf(input_path, pdf_path):
-                    continue
-            # For other document types (DOCX, PPTX), use LibreOffice
-            elif file_extension in ['.docx', '.pptx']:
-                pdf_result = pdf_converter.convert_to_pdf_libreoffice(input_path, pdf_dir)
-                if not pdf_result:
-                    continue
-            else:
-                print(f"Unsupported file format: {file}")
-                continue
-            # Convert PDF to text
-            text_content = text_converter.convert_pdf_to_text(pdf_path)
-            # Save text content
-            with open(text_path, 'w', encoding='utf-8') as f:
-                f.write(text_content)
-            print(f"✅ Processed: {file}")
-        except Exception as e:
-            print(f"Error processing {file}: {str(e)}")
+    stats = StageStats()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(convert_document, os.path.join(input_dir, file), pdf_dir, text_dir): file
+            for file in files
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Converting Documents"):
+            file = futures[future]
+            try:
+                status, message, timings = future.result()
+                for stage, seconds in timings.items():
+                    stats.add(stage, seconds)
+                stats.add(status, 0.0)
+                print(message)
+            except Exception as e:
+                print(f"Error processing {file}: {str(e)}")
+    stats.report()
 
 async def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
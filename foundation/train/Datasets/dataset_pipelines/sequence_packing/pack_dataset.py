@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Offline tokenization and sequence packing for SFT_train.py and CPT_train.py.
+
+The dataset is formatted with the prompt template of the training script,
+tokenized once on all CPUs, and its samples are bin-packed into rows of
+exactly --max_seq_length tokens. Position ids restart at 0 at every sample
+and the first token of each sample is not predicted from the one before.
+Only flash-attention uses those position ids to keep the samples of a row
+from attending to each other, so the training scripts refuse a packed
+dataset unless the model runs with flash_attention_2.
+Usage:
+    python pack_dataset.py --model_name "unsloth/llama-3.2-1b-Instruct" --dataset dataset.csv \
+        --data_format alpaca --max_seq_length 2048
+The packed dataset is saved as memory-mapped Arrow files in
+{cache_dir}/{name}-{data_format}-{key}, the key hashing the tokenizer, the
+template, the data and the sequence length, and is reused while they are
+unchanged. Pass that directory to the training script as --packed_dataset.
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# The dedup manifests are written and checked by minhash_dedup.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "near_duplicate_filter"))
+from minhash_dedup import file_sha256, select_deduplicated_rows  # noqa: E402
+
+# Bumped when the layout of the packed rows changes, so that old caches are not reused.
+PACKING_VERSION = 1
+REPORT_FILE = "packing_report.json"
+
+# Same prompt templates as SFT_train.py and CPT_train.py
+ALPACA_PROMPT = """Below is an instruction that describes a task, paired with an input that provides further context. Write a response that appropriately completes the request.
+    ### Instruction:
+    {}
+    ### Input:
+    {}
+    ### Response:
+    {}"""
+CUSTOM_PROMPT = "Q: {}\nA: {}"
+CPT_PROMPT = """Subject: {}\nTopic: {}\nText: {}"""
+TEMPLATES = {"alpaca": ALPACA_PROMPT, "custom": CUSTOM_PROMPT, "cpt": CPT_PROMPT}
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Hash of everything about the tokenizer that changes the token ids."""
+    if getattr(tokenizer, "is_fast", False):
+        vocabulary = tokenizer.backend_tokenizer.to_str()
+    else:
+        vocabulary = json.dumps(tokenizer.get_vocab(), sort_keys=True)
+    description = json.dumps({
+        "class": type(tokenizer).__name__,
+        "special_tokens": tokenizer.special_tokens_map,
+        "vocabulary": hashlib.sha256(vocabulary.encode("utf-8")).hexdigest(),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+
+def load_sft_dataset(dataset_path: str) -> "Dataset":
+    """Loads a dataset as SFT_train.py does, with instruction, input and output columns."""
+    from datasets import Dataset, load_dataset
+
+    if dataset_path.endswith(".txt"):
+        dataset = load_dataset("text", data_files=dataset_path, split="train")
+
+        def preprocess_txt(example):
+            parts = example["text"].split("\t")  # Assuming tab-separated values
+            return {
+                "instruction": parts[0],
+                "input": parts[1] if len(parts) > 1 else "",
+                "output": parts[2] if len(parts) > 2 else "",
+            }
+        return dataset.map(preprocess_txt)
+    if dataset_path.endswith(".json"):
+        dataset = load_dataset("json", data_files=dataset_path, split="train")
+    elif dataset_path.endswith(".csv"):
+        dataset = load_dataset("csv", data_files=dataset_path, split="train")
+    elif dataset_path.endswith(".xlsx"):
+        dataset = Dataset.from_pandas(pd.read_excel(dataset_path))
+    else:
+        raise ValueError(f"Unsupported dataset format: {dataset_path}")
+
+    def map_columns(example):
+        input_context = (
+            f"Generate a question for the course id {example['course_no']}, "
+            f"course name {example['course_title']} under the topic {example['topic']} "
+            f"appropriate for marks {example['marks']}"
+        )
+        return {
+            "instruction": example["instruction"],
+            "input": input_context,
+            "output": example["question"],
+        }
+    return dataset.map(map_columns)
+
+
+def load_cpt_dataset(dataset_path: str) -> "Dataset":
+    """Loads a dataset as CPT_train.py does, with Subject, Topic and Text columns."""
+    from datasets import Dataset
+
+    if dataset_path.endswith(".txt"):
+        with open(dataset_path, "r", encoding="utf-8") as f:
+            examples = [line.strip().split("\t") for line in f]
+        subjects, topics, texts = zip(*examples)
+        return Dataset.from_dict({"Subject": list(subjects), "Topic": list(topics), "Text": list(texts)})
+    if dataset_path.endswith(".json"):
+        with open(dataset_path, "r", encoding="utf-8") as f:
+            return Dataset.from_list(json.load(f))
+    if dataset_path.endswith(".csv"):
+        return Dataset.from_pandas(pd.read_csv(dataset_path))
+    raise ValueError(f"Unsupported dataset format: {dataset_path}")
+
+
+def format_texts(examples: dict, data_format: str, eos_token: str) -> list:
+    """Formats a batch of examples with the prompt template of `data_format`."""
+    template = TEMPLATES[data_format]
+    if data_format == "alpaca":
+        fields = zip(examples["instruction"], examples["input"], examples["output"])
+    elif data_format == "custom":
+        fields = zip(examples["question"], examples["answer"])
+    else:
+        fields = zip(examples["Subject"], examples["Topic"], examples["Text"])
+    return [template.format(*values) + eos_token for values in fields]
+
+
+def pack_lengths(lengths: np.ndarray, capacity: int):
+    """
+    Best-fit decreasing bin packing. Returns the row of each sample, its
+    offset in the row and the number of rows.
+    """
+    rows = np.empty(len(lengths), dtype=np.int64)
+    offsets = np.empty(len(lengths), dtype=np.int64)
+    # Free space of the open rows, sorted, with the row each belongs to
+    free, free_rows = [], []
+    used = []
+    for sample in np.argsort(-lengths, kind="stable"):
+        length = int(lengths[sample])
+        position = bisect.bisect_left(free, length)
+        if position < len(free):
+            row = free_rows.pop(position)
+            del free[position]
+        else:
+            row = len(used)
+            used.append(0)
+        rows[sample], offsets[sample] = row, used[row]
+        used[row] += length
+        if used[row] < capacity:
+            position = bisect.bisect_left(free, capacity - used[row])
+            free.insert(position, capacity - used[row])
+            free_rows.insert(position, row)
+    return rows, offsets, len(used)
+
+
+def pack_tokens(tokens: np.ndarray, lengths: np.ndarray, capacity: int, pad_token_id: int):
+    """
+    Lays out the samples, whose tokens are concatenated in `tokens`, in rows of
+    `capacity` tokens. Returns the input ids, the labels, with -100 on padding
+    and on the first token of each sample, and the position ids, restarting at
+    every sample and at the padding.
+    """
+    rows, offsets, row_count = pack_lengths(lengths, capacity)
+    destination_starts = rows * capacity + offsets
+    within_sample = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    destinations = np.repeat(destination_starts, lengths) + within_sample
+    input_ids = np.full(row_count * capacity, pad_token_id, dtype=np.int32)
+    input_ids[destinations] = tokens
+    labels = np.full(row_count * capacity, -100, dtype=np.int32)
+    labels[destinations] = tokens
+    labels[destination_starts] = -100
+    position_ids = np.zeros(row_count * capacity, dtype=np.int32)
+    position_ids[destinations] = within_sample
+
+    used = np.bincount(rows, weights=lengths, minlength=row_count).astype(np.int64)
+    columns = np.arange(capacity)[None, :]
+    position_ids = position_ids.reshape(row_count, capacity)
+    position_ids = np.where(columns >= used[:, None], columns - used[:, None], position_ids)
+    return input_ids.reshape(row_count, capacity), labels.reshape(row_count, capacity), position_ids.astype(np.int32)
+
+
+def padding_report(lengths: np.ndarray, row_count: int, capacity: int, batch_size: int) -> dict:
+    """Share of real tokens in the batches, unpacked and packed."""
+    tokens = int(lengths.sum())
+    longest_in_batch = sum(
+        int(lengths[i:i + batch_size].max()) * len(lengths[i:i + batch_size])
+        for i in range(0, len(lengths), batch_size)
+    )
+    return {
+        "samples": len(lengths),
+        "sequences": row_count,
+        "tokens": tokens,
+        "max_seq_length": capacity,
+        "samples_at_max_length": int((lengths >= capacity).sum()),
+        "efficiency_padded_to_max_length": tokens / (len(lengths) * capacity),
+        "efficiency_padded_to_longest_in_batch": tokens / longest_in_batch,
+        "efficiency_packed": tokens / (row_count * capacity),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokenize and pack a fine-tuning dataset once, for SFT_train.py and CPT_train.py.")
+    parser.add_argument('--model_name', type=str, default="unsloth/llama-3.2-1b-Instruct", help="Model whose tokenizer is used")
+    parser.add_argument('--dataset', type=str, required=True, help="Path to dataset file (.txt, .json, .csv, .xlsx)")
+    parser.add_argument('--data_format', type=str, default="alpaca", choices=["alpaca", "custom", "cpt"], help="Prompt template: SFT_train.py's 'alpaca' or 'custom', or CPT_train.py's 'cpt'")
+    parser.add_argument('--max_seq_length', type=int, default=2048, help="Tokens per packed sequence, default is 2048.")
+    parser.add_argument('--dedup_manifest', type=str, default=None, help="Manifest written by minhash_dedup.py; only its kept rows are packed.")
+    parser.add_argument('--num_proc', type=int, default=os.cpu_count(), help="Tokenizer processes, default is the CPU count.")
+    parser.add_argument('--batch_size', type=int, default=4, help="Per-device batch size, for the padding report. Default is 4.")
+    parser.add_argument('--cache_dir', type=str, default="packed_datasets", help="Directory of the packed datasets.")
+    parser.add_argument('--force', action='store_true', help="Pack again even if the cache is up to date.")
+    args = parser.parse_args()
+    # Only needed to tokenize, so that the packing functions can be imported without them
+    from datasets import Dataset
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name)
+    eos_token = tokenizer.eos_token or ""
+    pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+    key_source = {
+        "version": PACKING_VERSION,
+        "tokenizer": tokenizer_fingerprint(tokenizer),
+        "template": hashlib.sha256((TEMPLATES[args.data_format] + eos_token).encode("utf-8")).hexdigest(),
+        "dataset": file_sha256(args.dataset),
+        "dedup_manifest": file_sha256(args.dedup_manifest) if args.dedup_manifest else None,
+        "max_seq_length": args.max_seq_length,
+    }
+    key = hashlib.sha256(json.dumps(key_source, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(args.dataset))[0]
+    output_dir = os.path.join(args.cache_dir, f"{name}-{args.data_format}-{key}")
+    report_path = os.path.join(output_dir, REPORT_FILE)
+    if os.path.exists(report_path) and not args.force:
+        print(f"Packed dataset is up to date: {output_dir}")
+        return
+
+    start = time.perf_counter()
+    dataset = load_cpt_dataset(args.dataset) if args.data_format == "cpt" else load_sft_dataset(args.dataset)
+    if args.dedup_manifest:
+        dataset = select_deduplicated_rows(dataset, args.dedup_manifest, args.dataset)
+
+    def tokenize(examples):
+        texts = format_texts(examples, args.data_format, eos_token)
+        return tokenizer(texts, truncation=True, max_length=args.max_seq_length)
+
+    tokenized = dataset.map(
+        tokenize, batched=True, num_proc=max(1, min(args.num_proc, len(dataset))),
+        remove_columns=dataset.column_names, desc="Tokenizing",
+    )
+    tokenize_seconds = time.perf_counter() - start
+
+    column = tokenized.data.column("input_ids").combine_chunks()
+    offsets = column.offsets.to_numpy()
+    tokens = column.flatten().to_numpy()
+    lengths = np.diff(offsets)
+    input_ids, labels, position_ids = pack_tokens(tokens, lengths[lengths > 0], args.max_seq_length, pad_token_id)
+
+    packed = Dataset.from_dict({"input_ids": input_ids, "labels": labels, "position_ids": position_ids})
+    packed.save_to_disk(output_dir)
+    report = {
+        **padding_report(lengths[lengths > 0], len(input_ids), args.max_seq_length, args.batch_size),
+        "model_name": args.model_name,
+        "data_format": args.data_format,
+        "dataset": os.path.abspath(args.dataset),
+        "key": key_source,
+        "tokenize_seconds": round(tokenize_seconds, 1),
+        "total_seconds": round(time.perf_counter() - start, 1),
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Packed {report['samples']} samples into {report['sequences']} sequences of {args.max_seq_length} tokens in {output_dir}")
+    print(f"Real tokens per batch: {report['efficiency_padded_to_max_length']:.1%} padded to max length, "
+          f"{report['efficiency_padded_to_longest_in_batch']:.1%} padded to the longest sample of a batch of "
+          f"{args.batch_size}, {report['efficiency_packed']:.1%} packed")
+
+
+if __name__ == "__main__":
+    main()
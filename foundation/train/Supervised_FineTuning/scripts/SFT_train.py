@@ -9,17 +9,48 @@ To see a full list of configurable options, use:
 Happy fine-tuning!
 """
 import argparse
+import json
 import os
+import sys
 from transformers.utils import strtobool
 from trl import SFTTrainer
-from transformers import TrainingArguments
+from transformers import TrainingArguments, default_data_collator
 from unsloth import FastLanguageModel, is_bfloat16_supported
 from unsloth.chat_templates import get_chat_template  # Import get_chat_template for chat formatting
-from datasets import load_dataset  # Import load_dataset for CSV support
+from datasets import load_dataset, load_from_disk  # Import load_dataset for CSV support
 import logging
 import pandas as pd
 logging.getLogger('hf-to-gguf').setLevel(logging.WARNING)
 
+# The dedup manifests are written and checked by minhash_dedup.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Datasets", "dataset_pipelines", "near_duplicate_filter"))
+from minhash_dedup import select_deduplicated_rows  # noqa: E402
+
+
+def load_packed_dataset(path, model_name, max_seq_length):
+    """Loads a dataset tokenized and packed by pack_dataset.py, memory-mapped from its Arrow files."""
+    with open(os.path.join(path, "packing_report.json"), "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if report["max_seq_length"] > max_seq_length:
+        raise ValueError(f"The packed sequences have {report['max_seq_length']} tokens, more than --max_seq_length {max_seq_length}")
+    if report["model_name"] != model_name:
+        print(f"Warning: the packed dataset was tokenized for {report['model_name']}, not {model_name}")
+    print(f"Packed dataset: {report['samples']} samples in {report['sequences']} sequences of {report['max_seq_length']} tokens")
+    print(f"Real tokens per batch: {report['efficiency_padded_to_longest_in_batch']:.1%} unpacked, {report['efficiency_packed']:.1%} packed")
+    return load_from_disk(path)
+
+
+def check_packed_attention(model):
+    """
+    Packed rows hold several samples, kept apart only by flash-attention, which
+    starts a new sequence wherever the position ids restart at 0. With any other
+    attention implementation the samples of a row would attend to each other.
+    """
+    attention = getattr(model.config, "_attn_implementation", None)
+    if attention != "flash_attention_2":
+        raise ValueError(f"--packed_dataset needs flash_attention_2 to keep the packed samples apart, but the model uses {attention}. "
+                         "Install flash-attn, or train on --dataset without packing.")
+
 
 def run(args):
     import torch
@@ -34,6 +65,8 @@ def run(args):
         )
     except Exception as e:
         raise RuntimeError(f"Failed to load model: {str(e)}")
+    if args.packed_dataset:
+        check_packed_attention(model)
 
     # Configure PEFT model
     model = FastLanguageModel.get_peft_model(
@@ -102,65 +135,71 @@ def run(args):
         return {"text": texts}
 
     # Load dataset
-    if args.dataset.endswith(".txt"):
-        dataset = load_dataset("text", data_files=args.dataset, split="train")
-        # Preprocess TXT file to extract fields
-        def preprocess_txt(example):
-            parts = example["text"].split("\t")  # Assuming tab-separated values
-            return {
-                "instruction": parts[0],
-                "input": parts[1] if len(parts) > 1 else "",
-                "output": parts[2] if len(parts) > 2 else "",
-            }
-        dataset = dataset.map(preprocess_txt)
-    elif args.dataset.endswith(".json"):
-        dataset = load_dataset("json", data_files=args.dataset, split="train")
-    elif args.dataset.endswith(".csv"):
-        dataset = load_dataset("csv", data_files=args.dataset, split="train")
-    elif args.dataset.endswith(".xlsx"):
-        # Load Excel file using Pandas
-        df = pd.read_excel(args.dataset)
+    if args.packed_dataset:
+        dataset = load_packed_dataset(args.packed_dataset, args.model_name, args.max_seq_length)
+    else:
+        if args.dataset.endswith(".txt"):
+            dataset = load_dataset("text", data_files=args.dataset, split="train")
+            # Preprocess TXT file to extract fields
+            def preprocess_txt(example):
+                parts = example["text"].split("\t")  # Assuming tab-separated values
+                return {
+                    "instruction": parts[0],
+                    "input": parts[1] if len(parts) > 1 else "",
+                    "output": parts[2] if len(parts) > 2 else "",
+                }
+            dataset = dataset.map(preprocess_txt)
+        elif args.dataset.endswith(".json"):
+            dataset = load_dataset("json", data_files=args.dataset, split="train")
+        elif args.dataset.endswith(".csv"):
+            dataset = load_dataset("csv", data_files=args.dataset, split="train")
+        elif args.dataset.endswith(".xlsx"):
+            # Load Excel file using Pandas
+            df = pd.read_excel(args.dataset)
         
-        # Ensure the required columns are present
-        required_columns = ["instruction", "course_no", "course_title", "topic", "marks", "question"]
-        if not all(col in df.columns for col in required_columns):
-            raise ValueError(f"Missing required columns in the dataset. Expected: {required_columns}")
+            # Ensure the required columns are present
+            required_columns = ["instruction", "course_no", "course_title", "topic", "marks", "question"]
+            if not all(col in df.columns for col in required_columns):
+                raise ValueError(f"Missing required columns in the dataset. Expected: {required_columns}")
         
-        # Convert Pandas DataFrame to Hugging Face Dataset
-        dataset = load_dataset("pandas", pd_df=df, split="train")
-    else:
-        raise ValueError(f"Unsupported dataset format: {args.dataset}")
+            # Convert Pandas DataFrame to Hugging Face Dataset
+            dataset = load_dataset("pandas", pd_df=df, split="train")
+        else:
+            raise ValueError(f"Unsupported dataset format: {args.dataset}")
+
+        if args.dedup_manifest:
+            dataset = select_deduplicated_rows(dataset, args.dedup_manifest, args.dataset)
     
-    def map_columns(example):
-    # Map your dataset columns here
-        instruction = example["instruction"]
-        input_context = (
-            f"Generate a question for the course id {example['course_no']}, "
-            f"course name {example['course_title']} under the topic {example['topic']} "
-            f"appropriate for marks {example['marks']}"
-        )
-        output = example["question"]  # Use the 'question' field as the output
-        return {
-            "instruction": instruction,
-            "input": input_context,
-            "output": output,
-        }
+        def map_columns(example):
+        # Map your dataset columns here
+            instruction = example["instruction"]
+            input_context = (
+                f"Generate a question for the course id {example['course_no']}, "
+                f"course name {example['course_title']} under the topic {example['topic']} "
+                f"appropriate for marks {example['marks']}"
+            )
+            output = example["question"]  # Use the 'question' field as the output
+            return {
+                "instruction": instruction,
+                "input": input_context,
+                "output": output,
+            }
     
-    # Apply column mapping
-    dataset = dataset.map(map_columns)
+        # Apply column mapping
+        dataset = dataset.map(map_columns)
 
 
-    # Preprocess dataset based on data format
-    if args.data_format == "alpaca":
-        dataset = dataset.map(formatting_prompts_alpaca, batched=True)
-    elif args.data_format == "chatml":
-        dataset = dataset.map(formatting_prompts_chatml, batched=True)
-    elif args.data_format == "custom":
-        dataset = dataset.map(formatting_prompts_custom, batched=True)
-    else:
-        raise ValueError(f"Unsupported data format: {args.data_format}")
+        # Preprocess dataset based on data format
+        if args.data_format == "alpaca":
+            dataset = dataset.map(formatting_prompts_alpaca, batched=True)
+        elif args.data_format == "chatml":
+            dataset = dataset.map(formatting_prompts_chatml, batched=True)
+        elif args.data_format == "custom":
+            dataset = dataset.map(formatting_prompts_custom, batched=True)
+        else:
+            raise ValueError(f"Unsupported data format: {args.data_format}")
 
-    print("Data is formatted and ready!")
+        print("Data is formatted and ready!")
 
     # Configure training arguments
     training_args = TrainingArguments(
@@ -181,16 +220,21 @@ def run(args):
         report_to=args.report_to,
     )
 
+    if args.packed_dataset:
+        # Already tokenized and packed, the sequences are stacked into batches as they are
+        dataset_options = dict(data_collator=default_data_collator, dataset_kwargs={"skip_prepare_dataset": True})
+    else:
+        dataset_options = dict(dataset_text_field="text", dataset_num_proc=2)
+
     # Initialize trainer
     trainer = SFTTrainer(
         model=model,
         tokenizer=tokenizer,
         train_dataset=dataset,
-        dataset_text_field="text",
         max_seq_length=args.max_seq_length,
-        dataset_num_proc=2,
         packing=False,
         args=training_args,
+        **dataset_options,
     )
 
     # Train model
@@ -247,8 +291,10 @@ if __name__ == "__main__":
     
     # Dataset Options
     dataset_group = parser.add_argument_group("📋 Dataset Options")
-    dataset_group.add_argument('--dataset', type=str, required=True, help="Path to dataset file (.txt, .json, .csv)")
-    dataset_group.add_argument('--data_format', type=str,default= "alpaca", choices=["alpaca", "chatml", "custom"], required=True, help="Dataset format: 'alpaca', 'chatml', or 'custom'")
+    dataset_group.add_argument('--dataset', type=str, default=None, help="Path to dataset file (.txt, .json, .csv)")
+    dataset_group.add_argument('--data_format', type=str,default= "alpaca", choices=["alpaca", "chatml", "custom"], help="Dataset format: 'alpaca', 'chatml', or 'custom'")
+    dataset_group.add_argument('--dedup_manifest', type=str, default=None, help="Manifest written by minhash_dedup.py for the dataset; only its kept rows are trained on.")
+    dataset_group.add_argument('--packed_dataset', type=str, default=None, help="Directory written by pack_dataset.py; its tokenized, packed sequences are trained on instead of --dataset.")
     
     # LoRA Options
     lora_group = parser.add_argument_group("🧠 LoRA Options", "These options are used to configure the LoRA model.")
@@ -296,4 +342,6 @@ if __name__ == "__main__":
     
     # Parse arguments and run
     args = parser.parse_args()
+    if not args.dataset and not args.packed_dataset:
+        parser.error("--dataset or --packed_dataset is required")
     run(args)
\ No newline at end of file
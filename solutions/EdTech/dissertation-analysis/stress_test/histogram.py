@@ -0,0 +1,102 @@
+import math
+from typing import Dict, Iterable, Optional
+
+
+class LatencyHistogram:
+    """HDR-style histogram of latencies with a bounded relative error.
+
+    Values are recorded in microseconds into log-linear buckets: each power of
+    two is split into 2**sub_bucket_bits linear sub-buckets, so that every
+    value is kept with about 3 significant digits (0.1% error with the default
+    11 bits) whatever its magnitude, in a few KB of memory. Count, min, max and
+    mean are exact. Histograms of several runs or workers can be merged, and
+    serialize to a sparse dict for the JSON results.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 11):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    def _index(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self.sub_bucket_bits)
+        return (shift << self.sub_bucket_bits) | (value_us >> shift)
+
+    def _value(self, index: int) -> int:
+        """The highest value that falls into the bucket."""
+        shift = index >> self.sub_bucket_bits
+        sub_bucket = index & ((1 << self.sub_bucket_bits) - 1)
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value_s: float, count: int = 1):
+        value_us = max(0, int(round(value_s * 1e6)))
+        index = self._index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total_us += value_us * count
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms of different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        for value_us in (other.min_us, other.max_us):
+            if value_us is not None:
+                self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+                self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def percentile(self, percentile: float) -> float:
+        """The value in seconds below which `percentile`% of the values fall."""
+        if not self.count:
+            return 0.0
+        # The epsilon keeps 99.9% of 10000 at rank 9990 despite the float error.
+        rank = max(1, math.ceil(percentile / 100 * self.count - 1e-9))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # The bucket bound can overshoot the largest value recorded.
+                return min(self._value(index), self.max_us) / 1e6
+        return self.max_us / 1e6
+
+    @property
+    def mean(self) -> float:
+        return self.total_us / self.count / 1e6 if self.count else 0.0
+
+    def summary(self, percentiles: Iterable[float] = (50, 90, 99, 99.9)) -> dict:
+        result = {
+            "count": self.count,
+            "min": (self.min_us or 0) / 1e6,
+            "mean": round(self.mean, 6),
+            "max": (self.max_us or 0) / 1e6,
+        }
+        for percentile in percentiles:
+            result[f"p{percentile:g}"] = self.percentile(percentile)
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "counts": {str(index): count for index, count in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(data["sub_bucket_bits"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total_us = data["total_us"]
+        histogram.min_us = data["min_us"]
+        histogram.max_us = data["max_us"]
+        return histogram
@@ -0,0 +1,444 @@
+"""
+Open-loop load generator for the dissertation analysis pipeline.
+
+Sessions arrive on a Poisson, constant-rate or recorded schedule, whether or
+not the earlier ones have finished, like real users do. Each session runs the
+steps of a scenario file (extract -> pre_analyze -> analyze), and latencies
+are measured from the time the session was due to start, so that a slow
+server can't hide its queueing delay by slowing the load generator down.
+
+    python loadgen.py run scenarios/dissertation_e2e.yaml --output results.json
+    python loadgen.py compare baseline.json results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import runpy
+import sys
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from histogram import LatencyHistogram
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+STEP_TYPES = ("extract", "pre_analyze", "analyze")
+DEFAULT_PATHS = {
+    "extract": "/api/extract_text_from_file_and_analyze_images",
+    "pre_analyze": "/api/pre_analyze",
+    "analyze": "/api/ws/document_analysis",
+}
+
+
+class StepError(Exception):
+    pass
+
+
+def load_value(spec: Any, base_dir: str) -> Any:
+    """Resolve an input of the scenario file.
+
+    "file.py:name" is a variable of a Python file, "file.json" or "file.yaml"
+    the content of the file, and anything else is taken literally.
+    """
+    if not isinstance(spec, str):
+        return spec
+    path, _, name = spec.partition(":")
+    if path.endswith(".py") and name:
+        return runpy.run_path(os.path.join(base_dir, path))[name]
+    if spec.endswith(".json"):
+        with open(os.path.join(base_dir, spec), "r") as f:
+            return json.load(f)
+    if spec.endswith((".yaml", ".yml")):
+        import yaml
+        with open(os.path.join(base_dir, spec), "r") as f:
+            return yaml.safe_load(f)
+    return spec
+
+
+def load_scenario(path: str) -> dict:
+    """Read a scenario file and load its inputs, so that no file is read while measuring."""
+    with open(path, "r") as f:
+        if path.endswith(".json"):
+            scenario = json.load(f)
+        else:
+            import yaml
+            scenario = yaml.safe_load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+
+    steps = []
+    for step in scenario.get("steps", []):
+        step = dict(step)
+        if step.get("type") not in STEP_TYPES:
+            raise ValueError(f"Unknown step type {step.get('type')!r}, expected one of {STEP_TYPES}")
+        step.setdefault("path", DEFAULT_PATHS[step["type"]])
+        if "file" in step:
+            with open(os.path.join(base_dir, step["file"]), "rb") as f:
+                step["content"] = f.read()
+            step["filename"] = os.path.basename(step["file"])
+        for key in ("document", "pre_analysis", "rubric"):
+            if key in step:
+                step[key] = load_value(step[key], base_dir)
+        steps.append(step)
+    if not steps:
+        raise ValueError("The scenario has no steps")
+    scenario["steps"] = steps
+
+    arrival = scenario.setdefault("arrival", {})
+    if arrival.get("process") == "trace":
+        arrival["trace"] = os.path.join(base_dir, arrival["trace"])
+    return scenario
+
+
+def arrival_times(arrival: dict, rng: random.Random) -> List[float]:
+    """Offsets in seconds from the start of the run at which the sessions start."""
+    process = arrival.get("process", "poisson")
+    if process == "trace":
+        # One arrival per line, as seconds since the start of the trace (the
+        # first column of a CSV). `speedup` replays the trace faster.
+        with open(arrival["trace"], "r") as f:
+            offsets = sorted(float(line.split(",")[0]) for line in f
+                             if line.strip() and not line.startswith("#"))
+        speedup = arrival.get("speedup", 1.0)
+        times = [(offset - offsets[0]) / speedup for offset in offsets] if offsets else []
+    elif process in ("poisson", "constant"):
+        rate = arrival["rate"]
+        duration = arrival["duration_s"]
+        if process == "constant":
+            times = [i / rate for i in range(int(math.ceil(duration * rate)))]
+        else:
+            times = []
+            t = rng.expovariate(rate)
+            while t < duration:
+                times.append(t)
+                t += rng.expovariate(rate)
+    else:
+        raise ValueError(f"Unknown arrival process {process!r}")
+    if "max_sessions" in arrival:
+        times = times[:arrival["max_sessions"]]
+    return times
+
+
+class SessionRecorder:
+    """Samples of one session, kept apart until we know whether it met the SLOs."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def record(self, metric: str, value: float):
+        self.samples[metric].append(value)
+
+
+async def run_extract(transport, base_url: str, step: dict, state: dict,
+                      recorder: SessionRecorder, clock: Callable[[], float]):
+    start = clock()
+    response = await transport.post_file(base_url + step["path"], "file",
+                                         step["filename"], step["content"])
+    recorder.record("extract.latency", clock() - start)
+    state["document"] = response.get("text_and_image_analysis", "")
+
+
+async def run_pre_analyze(transport, base_url: str, step: dict, state: dict,
+                          recorder: SessionRecorder, clock: Callable[[], float]):
+    document = step.get("document", state.get("document"))
+    if document is None:
+        raise StepError("pre_analyze needs a document, or an extract step before it")
+    start = clock()
+    response = await transport.post_json(base_url + step["path"], {"document": document})
+    recorder.record("pre_analyze.latency", clock() - start)
+    state["pre_analysis"] = response
+
+
+async def run_analyze(transport, base_url: str, step: dict, state: dict,
+                      recorder: SessionRecorder, clock: Callable[[], float]):
+    pre_analysis = step.get("pre_analysis", state.get("pre_analysis"))
+    if pre_analysis is None:
+        raise StepError("analyze needs pre_analysis, or a pre_analyze step before it")
+    payload = {"pre_analysis": pre_analysis, "rubric": step["rubric"],
+               "feedback": step.get("feedback")}
+    url = base_url.replace("http", "ws", 1) + step["path"]
+
+    start = clock()
+    # criterion -> [criterion_start time, last analysis_chunk time]
+    criteria: Dict[str, List[Optional[float]]] = {}
+    first_message = True
+    messages = transport.websocket(url, payload)
+    try:
+        async for message in messages:
+            now = clock()
+            if first_message:
+                recorder.record("analyze.first_message", now - start)
+                first_message = False
+            kind = message.get("type")
+            data = message.get("data") or {}
+            criterion = data.get("criterion")
+            if kind == "criterion_start":
+                criteria[criterion] = [now, None]
+            elif kind == "analysis_chunk" and criterion in criteria:
+                criterion_start, last_chunk = criteria[criterion]
+                if last_chunk is None:
+                    recorder.record("analyze.criterion_ttft", now - criterion_start)
+                else:
+                    recorder.record("analyze.chunk_interval", now - last_chunk)
+                criteria[criterion][1] = now
+            elif kind == "criterion_complete" and criterion in criteria:
+                criterion_start, last_chunk = criteria.pop(criterion)
+                recorder.record("analyze.criterion_latency", now - criterion_start)
+                if last_chunk is not None:
+                    # Time spent scoring the analysis after its last chunk.
+                    recorder.record("analyze.criterion_scoring", now - last_chunk)
+            elif kind == "complete":
+                recorder.record("analyze.latency", now - start)
+                state["analysis"] = data
+                return
+            elif kind == "error":
+                raise StepError(f"Server error: {data.get('message', data)}")
+    finally:
+        await messages.aclose()
+    raise StepError("WebSocket closed before the analysis completed")
+
+
+STEP_RUNNERS = {
+    "extract": run_extract,
+    "pre_analyze": run_pre_analyze,
+    "analyze": run_analyze,
+}
+
+
+class AiohttpTransport:
+    """HTTP and WebSocket calls to the services, through one aiohttp session."""
+
+    def __init__(self, timeout_s: float = 900):
+        self.timeout_s = timeout_s
+        self.session = None
+
+    async def __aenter__(self):
+        import aiohttp
+        self.aiohttp = aiohttp
+        # No connection limit, the load generator decides the concurrency.
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+            connector=aiohttp.TCPConnector(limit=0),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def _json(self, response) -> dict:
+        if response.status != 200:
+            text = await response.text()
+            raise StepError(f"HTTP {response.status}: {text[:200]}")
+        return await response.json()
+
+    async def post_json(self, url: str, payload: dict) -> dict:
+        async with self.session.post(url, json=payload) as response:
+            return await self._json(response)
+
+    async def post_file(self, url: str, field: str, filename: str, content: bytes) -> dict:
+        form = self.aiohttp.FormData()
+        form.add_field(field, content, filename=filename)
+        async with self.session.post(url, data=form) as response:
+            return await self._json(response)
+
+    async def websocket(self, url: str, payload: dict) -> AsyncIterator[dict]:
+        async with self.session.ws_connect(url, max_msg_size=0) as ws:
+            await ws.send_json(payload)
+            async for message in ws:
+                if message.type == self.aiohttp.WSMsgType.TEXT:
+                    yield json.loads(message.data)
+                elif message.type == self.aiohttp.WSMsgType.ERROR:
+                    raise StepError(f"WebSocket error: {ws.exception()}")
+
+
+def meets_slo(recorder: SessionRecorder, slo: Dict[str, float]) -> bool:
+    """Whether every sample of the session is within the SLO of its metric."""
+    return all(value <= threshold
+               for metric, threshold in slo.items()
+               for value in recorder.samples.get(metric, []))
+
+
+async def run_scenario(scenario: dict, transport, base_url: str,
+                       clock: Callable[[], float] = time.perf_counter) -> dict:
+    """Run the sessions of the scenario open-loop and return the results."""
+    arrival = scenario["arrival"]
+    rng = random.Random(scenario.get("seed", 0))
+    times = arrival_times(arrival, rng)
+    warmup_s = scenario.get("warmup_s", 0)
+    max_in_flight = scenario.get("max_in_flight", 1000)
+    slo = scenario.get("slo", {})
+
+    histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+    errors: Dict[str, int] = defaultdict(int)
+    counts = defaultdict(int)
+    in_flight = 0
+
+    async def session(scheduled: float):
+        nonlocal in_flight
+        recorder = SessionRecorder()
+        state: Dict[str, Any] = {}
+        error = None
+        try:
+            for step in scenario["steps"]:
+                await STEP_RUNNERS[step["type"]](transport, base_url, step, state, recorder, clock)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            in_flight -= 1
+        # Measured from the arrival time, not from when we got around to it.
+        recorder.record("session.latency", clock() - start - scheduled)
+
+        if scheduled < warmup_s:
+            return
+        for metric, values in recorder.samples.items():
+            for value in values:
+                histograms[metric].record(value)
+        if error:
+            counts["failed"] += 1
+            errors[error[:200]] += 1
+            logger.debug(f"Session at {scheduled:.2f}s failed: {error}")
+        else:
+            counts["completed"] += 1
+            if meets_slo(recorder, slo):
+                counts["good"] += 1
+
+    logger.info(f"Running scenario {scenario['name']}: {len(times)} sessions "
+                f"over {times[-1] if times else 0:.1f}s against {base_url}")
+    tasks = []
+    start = clock()
+    for scheduled in times:
+        delay = scheduled - (clock() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lag = clock() - start - scheduled
+        if scheduled >= warmup_s:
+            counts["scheduled"] += 1
+            histograms["loadgen.dispatch_lag"].record(max(0.0, lag))
+        if in_flight >= max_in_flight:
+            # Open loop: a session that can't start now is lost, not delayed.
+            if scheduled >= warmup_s:
+                counts["dropped"] += 1
+            continue
+        in_flight += 1
+        tasks.append(asyncio.create_task(session(scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = clock() - start
+
+    measured_s = max(1e-9, elapsed - warmup_s)
+    return {
+        "scenario": scenario["name"],
+        "target": base_url,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "arrival": {k: v for k, v in arrival.items() if k != "trace"},
+        "warmup_s": warmup_s,
+        "duration_s": round(elapsed, 3),
+        "slo": slo,
+        "sessions": {key: counts[key] for key in ("scheduled", "completed", "failed", "dropped", "good")},
+        "throughput_rps": counts["completed"] / measured_s,
+        "goodput_rps": counts["good"] / measured_s,
+        "slo_attainment": counts["good"] / counts["scheduled"] if counts["scheduled"] else 0.0,
+        "metrics": {metric: {**histogram.summary(), "histogram": histogram.to_dict()}
+                    for metric, histogram in sorted(histograms.items())},
+        "errors": dict(errors),
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1,
+                    stats=("p50", "p99")) -> List[dict]:
+    """Changes of the latencies and goodput between two results.
+
+    A latency growing, or the goodput shrinking, by more than `threshold`
+    (relative) is flagged as a regression.
+    """
+    rows = []
+    for metric in sorted(set(baseline["metrics"]) & set(current["metrics"])):
+        for stat in stats:
+            before = baseline["metrics"][metric][stat]
+            after = current["metrics"][metric][stat]
+            change = (after - before) / before if before else 0.0
+            rows.append({"metric": metric, "stat": stat, "baseline": before,
+                         "current": after, "change": change,
+                         "regression": change > threshold})
+    for key in ("goodput_rps", "slo_attainment"):
+        before, after = baseline[key], current[key]
+        change = (after - before) / before if before else 0.0
+        rows.append({"metric": key, "stat": "value", "baseline": before, "current": after,
+                     "change": change, "regression": change < -threshold})
+    return rows
+
+
+def print_results(results: dict):
+    sessions = results["sessions"]
+    logger.info(f"Sessions: {sessions['scheduled']} scheduled, {sessions['completed']} completed, "
+                f"{sessions['failed']} failed, {sessions['dropped']} dropped")
+    logger.info(f"Throughput: {results['throughput_rps']:.3f} sessions/s, "
+                f"goodput: {results['goodput_rps']:.3f} sessions/s, "
+                f"SLO attainment: {results['slo_attainment']:.1%}")
+    for metric, summary in results["metrics"].items():
+        logger.info(f"{metric:<28} n={summary['count']:<6} p50={summary['p50']:.3f}s "
+                    f"p90={summary['p90']:.3f}s p99={summary['p99']:.3f}s max={summary['max']:.3f}s")
+    for error, count in results["errors"].items():
+        logger.info(f"{count} x {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop benchmark of the dissertation analysis pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run a scenario")
+    run_parser.add_argument("scenario", help="Scenario file (YAML or JSON)")
+    run_parser.add_argument("--target", default=os.getenv("LOADGEN_TARGET"),
+                            help="Base URL of the services, overrides the scenario's target")
+    run_parser.add_argument("--rate", type=float, help="Overrides the arrival rate (sessions/s)")
+    run_parser.add_argument("--duration", type=float, help="Overrides the duration (s)")
+    run_parser.add_argument("--output", help="Write the results to this JSON file")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Relative change flagged as a regression")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        with open(args.current, "r") as f:
+            current = json.load(f)
+        rows = compare_results(baseline, current, args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            logger.info(f"{row['metric']:<28} {row['stat']:<6} {row['baseline']:>10.3f} -> "
+                        f"{row['current']:>10.3f} ({row['change']:+.1%}) {flag}")
+        sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+    scenario = load_scenario(args.scenario)
+    if args.rate is not None:
+        scenario["arrival"]["rate"] = args.rate
+    if args.duration is not None:
+        scenario["arrival"]["duration_s"] = args.duration
+    base_url = (args.target or scenario.get("target", "http://localhost")).rstrip("/")
+
+    async def run():
+        async with AiohttpTransport(scenario.get("timeout_s", 900)) as transport:
+            return await run_scenario(scenario, transport, base_url)
+
+    results = asyncio.run(run())
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import random
+
+import pytest
+
+from histogram import LatencyHistogram
+from loadgen import arrival_times, compare_results, load_scenario, run_scenario
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakeTransport:
+    """Answers like the services, with a delay before each WebSocket message."""
+
+    def __init__(self, delay_s: float = 0.001, fail_analyze: bool = False):
+        self.delay_s = delay_s
+        self.fail_analyze = fail_analyze
+        self.calls = []
+
+    async def post_file(self, url, field, filename, content):
+        self.calls.append(("extract", url))
+        await asyncio.sleep(self.delay_s)
+        return {"text_and_image_analysis": f"text of {filename}"}
+
+    async def post_json(self, url, payload):
+        self.calls.append(("pre_analyze", payload["document"]))
+        await asyncio.sleep(self.delay_s)
+        return {"degree": "M.Tech", "name": "A", "topic": "B", "pre_analyzed_summary": "C"}
+
+    async def websocket(self, url, payload):
+        self.calls.append(("analyze", url))
+        for criterion in payload["rubric"]:
+            yield {"type": "criterion_start", "data": {"criterion": criterion}}
+            for chunk in ("a", "b", "c"):
+                await asyncio.sleep(self.delay_s)
+                yield {"type": "analysis_chunk", "data": {"criterion": criterion, "chunk": chunk}}
+            if self.fail_analyze:
+                yield {"type": "error", "data": {"message": "LLM unavailable"}}
+            yield {"type": "criterion_complete", "data": {"criterion": criterion, "score": 3}}
+        yield {"type": "complete", "data": {"total_score": 3}}
+
+
+def scenario(**kwargs) -> dict:
+    return {
+        "name": "test",
+        "arrival": {"process": "constant", "rate": 100, "duration_s": 0.1},
+        "steps": [
+            {"type": "extract", "path": "/extract", "filename": "a.pdf", "content": b""},
+            {"type": "pre_analyze", "path": "/pre_analyze"},
+            {"type": "analyze", "path": "/ws", "rubric": {"Clarity": {}, "Depth": {}}},
+        ],
+        **kwargs,
+    }
+
+
+def test_histogram_precision_and_merge():
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(0, 1) for _ in range(10000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    for percentile in (50, 90, 99, 99.9):
+        exact = values[int(len(values) * percentile / 100) - 1]
+        assert histogram.percentile(percentile) == pytest.approx(exact, rel=2e-3)
+    assert histogram.percentile(100) == pytest.approx(values[-1], abs=1e-6)
+
+    copy = LatencyHistogram.from_dict(histogram.to_dict())
+    copy.merge(histogram)
+    assert copy.count == 2 * histogram.count
+    assert copy.percentile(50) == histogram.percentile(50)
+
+
+def test_arrival_times(tmp_path):
+    poisson = arrival_times({"rate": 10, "duration_s": 100}, random.Random(0))
+    assert 900 < len(poisson) < 1100
+    assert poisson == sorted(poisson) and poisson[-1] < 100
+
+    constant = arrival_times({"process": "constant", "rate": 2, "duration_s": 2}, random.Random(0))
+    assert constant == [0.0, 0.5, 1.0, 1.5]
+
+    trace = tmp_path / "arrivals.txt"
+    trace.write_text("# offsets\n10\n12,extra\n11\n")
+    times = arrival_times({"process": "trace", "trace": str(trace), "speedup": 2}, random.Random(0))
+    assert times == [0.0, 0.5, 1.0]
+
+
+def test_example_scenarios_load():
+    e2e = load_scenario(os.path.join(HERE, "scenarios", "dissertation_e2e.yaml"))
+    assert [step["type"] for step in e2e["steps"]] == ["extract", "pre_analyze", "analyze"]
+    assert e2e["steps"][0]["content"].startswith(b"%PDF")
+    assert "Authenticity" in e2e["steps"][2]["rubric"]
+
+    analyze_only = load_scenario(os.path.join(HERE, "scenarios", "analyze_only.yaml"))
+    assert "pre_analyzed_summary" in analyze_only["steps"][0]["pre_analysis"]
+
+
+def test_run_scenario_end_to_end():
+    transport = FakeTransport()
+    results = asyncio.run(run_scenario(scenario(slo={"analyze.criterion_ttft": 10}),
+                                       transport, "http://test"))
+
+    assert results["sessions"]["scheduled"] == 10
+    assert results["sessions"]["completed"] == 10
+    assert results["sessions"]["good"] == 10
+    assert results["slo_attainment"] == 1.0
+    # The pre-analysis gets the extracted text, the analysis a WebSocket URL.
+    assert ("pre_analyze", "text of a.pdf") in transport.calls
+    assert ("analyze", "ws://test/ws") in transport.calls
+
+    metrics = results["metrics"]
+    assert metrics["analyze.criterion_ttft"]["count"] == 20
+    assert metrics["analyze.chunk_interval"]["count"] == 40
+    assert metrics["analyze.criterion_latency"]["count"] == 20
+    for metric in ("extract.latency", "pre_analyze.latency", "analyze.latency", "session.latency"):
+        assert metrics[metric]["count"] == 10
+
+
+def test_slo_and_failures():
+    results = asyncio.run(run_scenario(scenario(slo={"analyze.criterion_ttft": 0}),
+                                       FakeTransport(), "http://test"))
+    assert results["sessions"]["completed"] == 10
+    assert results["sessions"]["good"] == 0
+    assert results["goodput_rps"] == 0
+
+    results = asyncio.run(run_scenario(scenario(), FakeTransport(fail_analyze=True), "http://test"))
+    assert results["sessions"]["failed"] == 10
+    assert results["errors"] == {"StepError: Server error: LLM unavailable": 10}
+
+
+def test_open_loop_drops_and_warmup():
+    results = asyncio.run(run_scenario(scenario(max_in_flight=1),
+                                       FakeTransport(delay_s=0.05), "http://test"))
+    # The first session is still running when the others arrive.
+    assert results["sessions"]["completed"] == 1
+    assert results["sessions"]["dropped"] == 9
+
+    results = asyncio.run(run_scenario(scenario(warmup_s=0.05), FakeTransport(), "http://test"))
+    assert results["sessions"]["scheduled"] == 5
+
+
+def test_compare_results():
+    results = asyncio.run(run_scenario(scenario(), FakeTransport(), "http://test"))
+    assert not any(row["regression"] for row in compare_results(results, results))
+
+    slower = {**results, "goodput_rps": results["goodput_rps"] / 2,
+              "metrics": {metric: {**summary, "p99": summary["p99"] * 2}
+                          for metric, summary in results["metrics"].items()}}
+    regressions = {row["metric"] for row in compare_results(results, slower) if row["regression"]}
+    assert "analyze.latency" in regressions
+    assert "goodput_rps" in regressions